@@ -0,0 +1 @@
+"""Engine performance benchmarks (not shipped; run from memento-workflow/)."""
@@ -0,0 +1,242 @@
+"""Engine benchmark suite with JSON baselines and regression gating.
+
+Runs the scenarios in ``benchmarks.scenarios`` headlessly through
+``WorkflowRunner``, with no MCP, relay or network. Each scenario times one
+op: a whole workflow run, or a single engine hot path.
+
+Every scenario reports throughput, p50/p99 latency and peak RSS. Some also
+report extra, ungated numbers such as on-disk size (``state_kb``).
+
+Each scenario runs in a forked child process, so peak RSS is measured per
+scenario rather than as a process-wide high-water mark.
+
+Usage (from memento-workflow/):
+    python -m benchmarks.engine_bench                         # run, print table
+    python -m benchmarks.engine_bench --save baseline.json    # record baseline
+    python -m benchmarks.engine_bench --baseline baseline.json --threshold 0.25
+    python -m benchmarks.engine_bench --only long_loop --scale small
+
+Exit code is 1 when any metric regresses beyond the threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from benchmarks.scenarios import EXTRA, SCALES, SCENARIOS  # noqa: E402
+
+BASELINE_VERSION = 1
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_RSS_THRESHOLD = 0.25
+
+# Metric name -> direction. "higher" means a drop is a regression.
+_GATED_METRICS = {
+    "ops_per_sec": "higher",
+    "p50_ms": "lower",
+    "p99_ms": "lower",
+}
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def _peak_rss_kb() -> int:
+    # Linux reports ru_maxrss in KiB (macOS would report bytes).
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def summarize(latencies: list[float], size: int, rss_start_kb: int) -> dict[str, Any]:
+    """Reduce per-op latencies (seconds) to the recorded metrics."""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    peak = _peak_rss_kb()
+    return {
+        "size": size,
+        "iterations": len(ordered),
+        "ops_per_sec": round(len(ordered) / total, 3) if total > 0 else 0.0,
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 4),
+        "p99_ms": round(_percentile(ordered, 99) * 1000, 4),
+        "peak_rss_kb": peak,
+        "rss_growth_kb": max(0, peak - rss_start_kb),
+    }
+
+
+def run_scenario(name: str, scale: str = "full", warmup: int = 1) -> dict[str, Any]:
+    """Run one scenario in the current process and return its metrics."""
+    size, iterations = SCALES[scale][name]
+    EXTRA.clear()
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as tmp:
+        rss_start = _peak_rss_kb()
+        op = SCENARIOS[name](size, Path(tmp))
+        for _ in range(warmup):
+            op()
+        latencies: list[float] = []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            op()
+            latencies.append(time.perf_counter() - t0)
+        return {**summarize(latencies, size, rss_start), **EXTRA}
+
+
+def _run_isolated(name: str, scale: str) -> dict[str, Any]:
+    """Run a scenario in a forked child so peak RSS is per scenario."""
+    try:
+        mp = multiprocessing.get_context("fork")
+    except ValueError:
+        return run_scenario(name, scale)
+    with mp.Pool(1) as pool:
+        return pool.apply(run_scenario, (name, scale))
+
+
+def run_suite(
+    names: list[str] | None = None,
+    scale: str = "full",
+    *,
+    isolate: bool = True,
+) -> dict[str, Any]:
+    """Run the selected scenarios and return a baseline-shaped document."""
+    results: dict[str, Any] = {}
+    for name in names or list(SCENARIOS):
+        results[name] = _run_isolated(name, scale) if isolate else run_scenario(name, scale)
+    return {
+        "version": BASELINE_VERSION,
+        "scale": scale,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Regression gating
+# ---------------------------------------------------------------------------
+
+
+def compare(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    *,
+    threshold: float = DEFAULT_THRESHOLD,
+    rss_threshold: float = DEFAULT_RSS_THRESHOLD,
+) -> list[str]:
+    """Return human-readable regressions of ``current`` against ``baseline``.
+
+    A timing metric regresses when it is worse than the baseline by more than
+    ``threshold`` (fraction, 0.25 = 25%). Peak RSS uses ``rss_threshold``.
+    Scenarios missing from either side, or recorded at another size, are
+    skipped.
+    """
+    regressions: list[str] = []
+    base_results = baseline.get("results", {})
+    for name, cur in current.get("results", {}).items():
+        base = base_results.get(name)
+        if not base or base.get("size") != cur.get("size"):
+            continue
+        for metric, direction in _GATED_METRICS.items():
+            old, new = base.get(metric), cur.get(metric)
+            if not old or new is None:
+                continue
+            change = (old - new) / old if direction == "higher" else (new - old) / old
+            if change > threshold:
+                regressions.append(
+                    f"{name}.{metric}: {old} -> {new} ({change:+.0%} worse, limit {threshold:.0%})"
+                )
+        old_rss, new_rss = base.get("peak_rss_kb"), cur.get("peak_rss_kb")
+        if old_rss and new_rss is not None:
+            change = (new_rss - old_rss) / old_rss
+            if change > rss_threshold:
+                regressions.append(
+                    f"{name}.peak_rss_kb: {old_rss} -> {new_rss} "
+                    f"({change:+.0%} worse, limit {rss_threshold:.0%})"
+                )
+    return regressions
+
+
+def format_table(doc: dict[str, Any]) -> str:
+    rows = [f"{'scenario':<26}{'size':>7}{'ops/s':>12}{'p50 ms':>11}{'p99 ms':>11}{'rss KiB':>11}{'state KiB':>11}"]
+    for name, r in doc["results"].items():
+        rows.append(
+            f"{name:<26}{r['size']:>7}{r['ops_per_sec']:>12.2f}"
+            f"{r['p50_ms']:>11.3f}{r['p99_ms']:>11.3f}{r['peak_rss_kb']:>11}"
+            f"{r.get('state_kb', '-'):>11}"
+        )
+    return "\n".join(rows)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Run workflow engine benchmarks and gate on regressions",
+    )
+    parser.add_argument(
+        "--scale", choices=sorted(SCALES), default="full",
+        help="Workload size (small for smoke runs)",
+    )
+    parser.add_argument(
+        "--only", action="append", choices=sorted(SCENARIOS), default=None,
+        help="Run only this scenario (repeatable)",
+    )
+    parser.add_argument("--save", type=Path, default=None, help="Write results as a baseline JSON file")
+    parser.add_argument("--baseline", type=Path, default=None, help="Compare against this baseline JSON file")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="Allowed timing regression as a fraction (default 0.25)",
+    )
+    parser.add_argument(
+        "--rss-threshold", type=float, default=DEFAULT_RSS_THRESHOLD,
+        help="Allowed peak RSS regression as a fraction (default 0.25)",
+    )
+    parser.add_argument(
+        "--no-isolate", action="store_true",
+        help="Run scenarios in-process (peak RSS becomes cumulative)",
+    )
+    args = parser.parse_args(argv)
+
+    doc = run_suite(args.only, args.scale, isolate=not args.no_isolate)
+    print(format_table(doc))
+
+    if args.save:
+        args.save.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+        print(f"\nBaseline written to {args.save}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("version") != BASELINE_VERSION:
+            print(f"\nBaseline version mismatch ({baseline.get('version')}), not comparing")
+            return 2
+        regressions = compare(
+            doc, baseline, threshold=args.threshold, rss_threshold=args.rss_threshold,
+        )
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions beyond threshold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Benchmark scenarios for ``benchmarks.engine_bench``.
+
+A scenario is a setup function ``(size, tmp) -> op``. The setup builds a
+workflow or fixture once; the returned ``op`` is what the driver times.
+
+Scenarios are grouped by theme: ``engine`` (hot paths and replay),
+``lanes`` (parallel submits and dispatch order) and ``storage`` (on-disk
+state). Each module has its own ``SCENARIOS`` table; add a new scenario
+there and give it a size in ``SCALES`` below.
+
+A scenario can report extra, ungated metrics for its last op by setting
+keys in ``EXTRA``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+
+from . import engine, lanes, storage
+from .common import EXTRA
+
+__all__ = ["EXTRA", "SCALES", "SCENARIOS"]
+
+SCENARIOS: dict[str, Callable[[int, Path], Callable[[], None]]] = {
+    **engine.SCENARIOS,
+    **lanes.SCENARIOS,
+    **storage.SCENARIOS,
+}
+
+# Per-scale knobs: (size, iterations). "small" is for smoke tests / CI,
+# "full" is the default for recorded baselines.
+SCALES: dict[str, dict[str, tuple[int, int]]] = {
+    "small": {
+        "deep_nesting": (8, 3),
+        "wide_fanout": (16, 3),
+        "parallel_spawn": (16, 5),
+        "long_loop": (20, 3),
+        "large_structured_output": (4, 3),
+        "huge_variables": (4, 3),
+        "substitute": (8, 50),
+        "get_var": (8, 200),
+        "checkpoint_save": (20, 10),
+        "discover_workflows": (5, 3),
+        "trace_replay": (20, 3),
+        "lane_submit_single": (16, 3),
+        "lane_submit_batch": (16, 3),
+        "skewed_fanout": (8, 1),
+        "skewed_fanout_lpt": (8, 1),
+        "blob_fanout": (8, 2),
+        "blob_fanout_inline": (8, 2),
+        "dedupe_fanout": (8, 2),
+        "dedupe_fanout_off": (8, 2),
+        "artifact_logs": (4, 2),
+        "artifact_logs_raw": (4, 2),
+        "artifact_loose": (50, 2),
+        "artifact_pack": (50, 2),
+    },
+    "full": {
+        "deep_nesting": (60, 20),
+        "wide_fanout": (200, 10),
+        "parallel_spawn": (500, 20),
+        "long_loop": (1000, 10),
+        "large_structured_output": (40, 10),
+        "huge_variables": (40, 10),
+        "substitute": (64, 5000),
+        "get_var": (32, 20000),
+        "checkpoint_save": (1000, 100),
+        "discover_workflows": (100, 20),
+        "trace_replay": (200, 10),
+        "lane_submit_single": (50, 20),
+        "lane_submit_batch": (50, 20),
+        "skewed_fanout": (32, 3),
+        "skewed_fanout_lpt": (32, 3),
+        "blob_fanout": (64, 5),
+        "blob_fanout_inline": (64, 5),
+        "dedupe_fanout": (64, 5),
+        "dedupe_fanout_off": (64, 5),
+        "artifact_logs": (40, 5),
+        "artifact_logs_raw": (40, 5),
+        "artifact_loose": (2000, 5),
+        "artifact_pack": (2000, 5),
+    },
+}
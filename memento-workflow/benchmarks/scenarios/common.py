@@ -0,0 +1,74 @@
+"""Headless driver shared by the benchmark scenarios.
+
+``drive`` answers prompts and walks parallel lanes in process, without MCP
+or a relay, until the run reaches a terminal action.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from scripts.engine.protocol import ActionBase, AskUserAction, ParallelAction, PromptAction
+from scripts.engine.types import WorkflowDef
+from scripts.engine.workflow_runner import WorkflowRunner
+
+_TERMINAL_ACTIONS = frozenset({"completed", "error", "halted", "cancelled", "deadline_exceeded"})
+
+# Extra, ungated metrics a scenario reports for its last op (e.g. state_kb)
+EXTRA: dict[str, Any] = {}
+
+
+def _default_respond(action: ActionBase) -> dict[str, Any]:
+    return {"output": "ok"}
+
+
+def drive(
+    runner: WorkflowRunner,
+    action: ActionBase,
+    respond: Callable[[ActionBase], dict[str, Any]] = _default_respond,
+) -> ActionBase:
+    """Answer prompts and drive parallel lanes until a terminal action."""
+    while action.action not in _TERMINAL_ACTIONS:
+        if isinstance(action, (PromptAction, AskUserAction)):
+            action = runner.submit(action.run_id, action.exec_key, **respond(action))
+        elif isinstance(action, ParallelAction):
+            for lane in action.lanes:
+                lane_action = drive(runner, runner.next(lane.child_run_id), respond)
+                if lane_action.action != "completed":
+                    return lane_action
+            action = runner.submit(action.run_id, action.exec_key, output="lanes done")
+        else:
+            raise RuntimeError(f"benchmark driver cannot handle action {action.action!r}")
+    return action
+
+
+def run_workflow(
+    wf: WorkflowDef,
+    cwd: Path,
+    *,
+    variables: dict[str, Any] | None = None,
+    checkpoint: bool = False,
+    respond: Callable[[ActionBase], dict[str, Any]] = _default_respond,
+) -> None:
+    runner = WorkflowRunner(
+        wf, variables=variables, cwd=str(cwd),
+        registry={wf.name: wf}, checkpoint=checkpoint,
+    )
+    final = drive(runner, runner.start(), respond)
+    if final.action != "completed":
+        raise RuntimeError(f"{wf.name}: run ended with {final.action}: {final}")
+
+
+def dir_kb(path: Path) -> int:
+    """Size of a directory tree, hardlinked files counted once."""
+    seen: set[int] = set()
+    total = 0
+    for p in path.rglob("*"):
+        if p.is_file():
+            st = p.stat()
+            if st.st_ino not in seen:
+                seen.add(st.st_ino)
+                total += st.st_size
+    return total // 1024
@@ -0,0 +1,301 @@
+"""Engine hot paths: block traversal, substitution, checkpoints, replay.
+
+Micro-benchmarks for ``advance()``, ``apply_submit()``, ``substitute()``,
+``get_var()``, ``checkpoint_save()``, ``_handle_parallel()`` and
+``discover_workflows()``, plus a recorded session replayed without shells
+or a relay.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from scripts.engine import recording
+from scripts.engine.core import Frame, RunState
+from scripts.engine.protocol import ActionBase
+from scripts.engine.replay import load_trace, replay_trace
+from scripts.engine.types import (
+    GroupBlock,
+    LLMStep,
+    LoopBlock,
+    ParallelEachBlock,
+    ShellStep,
+    StepResult,
+    WorkflowContext,
+    WorkflowDef,
+)
+from scripts.engine.workflow_runner import WorkflowRunner
+from scripts.infra.checkpoint import checkpoint_save
+from scripts.infra.loader import discover_workflows
+from scripts.utils import record_leaf_result, substitute
+
+from .common import EXTRA, run_workflow
+
+
+def _setup_deep_nesting(size: int, tmp: Path) -> Callable[[], None]:
+    """GroupBlocks nested ``size`` deep, one prompt per level."""
+    inner: list[Any] = [LLMStep(name="leaf", prompt_text="leaf {{variables.n}}")]
+    for depth in range(size):
+        inner = [
+            GroupBlock(
+                name=f"g{depth}",
+                blocks=[LLMStep(name=f"s{depth}", prompt_text="depth {{variables.n}}"), *inner],
+            )
+        ]
+    wf = WorkflowDef(name="deep-nesting", description="bench", blocks=inner)
+    return lambda: run_workflow(wf, tmp, variables={"n": 1})
+
+
+def _setup_wide_fanout(size: int, tmp: Path) -> Callable[[], None]:
+    """ParallelEachBlock over ``size`` items, every lane answered via next/submit."""
+    wf = WorkflowDef(
+        name="wide-fanout",
+        description="bench",
+        blocks=[
+            ParallelEachBlock(
+                name="fan",
+                parallel_for="variables.items",
+                template=[LLMStep(name="review", prompt_text="Review {{variables.item}}")],
+            )
+        ],
+    )
+    items = [f"file{i}.py" for i in range(size)]
+    return lambda: run_workflow(wf, tmp, variables={"items": items})
+
+
+def _setup_parallel_spawn(size: int, tmp: Path) -> Callable[[], None]:
+    """``_handle_parallel`` lane creation only: start() up to the parallel action."""
+    wf = WorkflowDef(
+        name="parallel-spawn",
+        description="bench",
+        blocks=[
+            ParallelEachBlock(
+                name="fan",
+                parallel_for="variables.items",
+                template=[LLMStep(name="review", prompt_text="Review {{variables.item}}")],
+            )
+        ],
+    )
+    variables = {"items": [{"path": f"f{i}.py", "size": i} for i in range(size)]}
+
+    def op() -> None:
+        runner = WorkflowRunner(
+            wf, variables=variables, cwd=str(tmp),
+            registry={wf.name: wf}, checkpoint=False,
+        )
+        action = runner.start()
+        if action.action != "parallel":
+            raise RuntimeError(f"expected parallel action, got {action.action}")
+
+    return op
+
+
+def _setup_long_loop(size: int, tmp: Path) -> Callable[[], None]:
+    """LoopBlock over ``size`` items with one prompt per iteration."""
+    wf = WorkflowDef(
+        name="long-loop",
+        description="bench",
+        blocks=[
+            LoopBlock(
+                name="each",
+                loop_over="variables.items",
+                loop_var="item",
+                blocks=[LLMStep(name="step", prompt_text="Handle {{variables.item}}")],
+            )
+        ],
+    )
+    items = list(range(size))
+    return lambda: run_workflow(wf, tmp, variables={"items": items})
+
+
+def _big_payload(records: int) -> dict[str, Any]:
+    return {
+        "findings": [
+            {"id": i, "file": f"src/mod{i}.py", "line": i * 7, "message": "x" * 80}
+            for i in range(records)
+        ]
+    }
+
+
+def _setup_large_structured_output(size: int, tmp: Path) -> Callable[[], None]:
+    """``size`` prompts answered with ~100 KB structured outputs, checkpointed."""
+    wf = WorkflowDef(
+        name="large-structured-output",
+        description="bench",
+        blocks=[LLMStep(name=f"s{i}", prompt_text="Analyze") for i in range(size)],
+    )
+    payload = _big_payload(1000)
+
+    def respond(action: ActionBase) -> dict[str, Any]:
+        return {"output": "done", "structured_output": payload}
+
+    return lambda: run_workflow(wf, tmp, checkpoint=True, respond=respond)
+
+
+def _setup_huge_variables(size: int, tmp: Path) -> Callable[[], None]:
+    """Multi-megabyte variables substituted into ``size`` checkpointed prompts."""
+    wf = WorkflowDef(
+        name="huge-variables",
+        description="bench",
+        blocks=[
+            LLMStep(
+                name=f"s{i}",
+                prompt_text="Context: {{variables.blob}}\nKey: {{variables.index.k500.value}}",
+            )
+            for i in range(size)
+        ],
+    )
+    variables = {
+        "blob": "lorem ipsum " * 100_000,
+        "index": {f"k{i}": {"value": i, "tags": ["a", "b"]} for i in range(10_000)},
+    }
+    return lambda: run_workflow(wf, tmp, variables=variables, checkpoint=True)
+
+
+def _setup_substitute(size: int, tmp: Path) -> Callable[[], None]:
+    """One ``substitute()`` call on a template with ``size`` placeholders."""
+    ctx = WorkflowContext(
+        variables={f"v{i}": {"name": f"value-{i}"} for i in range(size)},
+        cwd=str(tmp),
+    )
+    template = " ".join(
+        f"text {i} {{{{variables.v{i}.name}}}}" for i in range(size)
+    )
+    def op() -> None:
+        substitute(template, ctx)
+
+    return op
+
+
+def _setup_get_var(size: int, tmp: Path) -> Callable[[], None]:
+    """``get_var()`` on a ``size``-deep dotpath through results and variables."""
+    nested: dict[str, Any] = {"leaf": 1}
+    for depth in range(size):
+        nested = {f"d{depth}": nested}
+    ctx = WorkflowContext(variables={"tree": nested}, cwd=str(tmp))
+    path = "variables.tree." + ".".join(f"d{d}" for d in reversed(range(size))) + ".leaf"
+    return lambda: ctx.get_var(path)
+
+
+def _setup_checkpoint_save(size: int, tmp: Path) -> Callable[[], None]:
+    """``checkpoint_save()`` of a run holding ``size`` recorded results."""
+    wf = WorkflowDef(name="checkpoint", description="bench")
+    ctx = WorkflowContext(variables={"items": list(range(size))}, cwd=str(tmp))
+    for i in range(size):
+        record_leaf_result(
+            ctx,
+            f"step{i}",
+            StepResult(
+                name=f"step{i}",
+                exec_key=f"step{i}",
+                output="o" * 200,
+                structured_output={"i": i, "tags": ["x", "y"]},
+            ),
+        )
+    state = RunState(
+        run_id="bench",
+        ctx=ctx,
+        stack=[Frame(block=wf)],
+        registry={wf.name: wf},
+        checkpoint_dir=tmp / ".workflow-state" / "bench",
+    )
+
+    def op() -> None:
+        if not checkpoint_save(state):
+            raise RuntimeError("checkpoint_save failed")
+
+    return op
+
+
+def _setup_discover_workflows(size: int, tmp: Path) -> Callable[[], None]:
+    """``discover_workflows()`` over ``size`` YAML workflow packages."""
+    root = tmp / "workflows"
+    for i in range(size):
+        wf_dir = root / f"group{i % 10}" / f"wf{i}"
+        wf_dir.mkdir(parents=True)
+        (wf_dir / "workflow.yaml").write_text(
+            f"name: wf{i}\n"
+            "description: bench\n"
+            "blocks:\n"
+            "  - shell: detect\n"
+            "    command: \"echo {{variables.x}}\"\n"
+            "  - loop: each\n"
+            "    over: variables.items\n"
+            "    as: item\n"
+            "    blocks:\n"
+            "      - llm: review\n"
+            "        prompt_text: \"Review {{variables.item}}\"\n",
+            encoding="utf-8",
+        )
+
+    def op() -> None:
+        if len(discover_workflows(root)) != size:
+            raise RuntimeError("discover_workflows missed workflows")
+
+    return op
+
+
+def _setup_trace_replay(size: int, tmp: Path) -> Callable[[], None]:
+    """Replay a recorded session: ``size`` loop iterations of a shell and a
+    prompt, then a ``size // 4``-lane fan-out, checkpointed.
+
+    Engine-only: shells get their recorded results and prompts their
+    recorded answers (``calls`` / ``shells`` per op).
+    """
+    wf = WorkflowDef(
+        name="trace-replay",
+        description="bench",
+        blocks=[
+            LoopBlock(
+                name="each",
+                loop_over="variables.items",
+                loop_var="item",
+                blocks=[
+                    ShellStep(name="build", command="echo build {{variables.item}}"),
+                    LLMStep(name="check", prompt_text="Check {{variables.item}}"),
+                ],
+            ),
+            ParallelEachBlock(
+                name="fan",
+                parallel_for="variables.lanes",
+                template=[LLMStep(name="review", prompt_text="Review {{variables.item}}")],
+            ),
+        ],
+    )
+    trace = tmp / "trace.jsonl"
+    recording.start_recording(trace)
+    try:
+        run_workflow(
+            wf, tmp / "recorded", checkpoint=True,
+            variables={"items": list(range(size)), "lanes": list(range(max(1, size // 4)))},
+        )
+    finally:
+        recording.stop_recording()
+    events = load_trace(trace)
+    counter = iter(range(1_000_000))
+
+    def op() -> None:
+        report = replay_trace(events, {wf.name: wf}, tmp / f"replay{next(counter)}")
+        if report["divergences"]:
+            raise RuntimeError(f"replay diverged: {report['divergences'][:3]}")
+        EXTRA["calls"] = report["calls"]
+        EXTRA["shells"] = report["shells"]
+
+    return op
+
+
+SCENARIOS: dict[str, Callable[[int, Path], Callable[[], None]]] = {
+    "deep_nesting": _setup_deep_nesting,
+    "wide_fanout": _setup_wide_fanout,
+    "parallel_spawn": _setup_parallel_spawn,
+    "long_loop": _setup_long_loop,
+    "large_structured_output": _setup_large_structured_output,
+    "huge_variables": _setup_huge_variables,
+    "substitute": _setup_substitute,
+    "get_var": _setup_get_var,
+    "checkpoint_save": _setup_checkpoint_save,
+    "discover_workflows": _setup_discover_workflows,
+    "trace_replay": _setup_trace_replay,
+}
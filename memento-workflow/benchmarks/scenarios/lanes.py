@@ -0,0 +1,177 @@
+"""Parallel lanes: per-lane against batched submits, dispatch order.
+
+``lane_submit_single`` answers every lane with its own ``submit()`` and
+``lane_submit_batch`` answers them all with one ``submit_many()``.
+``skewed_fanout`` runs shell lanes in item order and ``skewed_fanout_lpt``
+runs them longest-first.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Literal
+
+from scripts.engine.protocol import ParallelAction, PromptAction, action_to_dict
+from scripts.engine.types import LLMStep, ParallelEachBlock, ShellStep, WorkflowDef
+from scripts.engine.workflow_runner import WorkflowRunner
+from scripts.infra.scheduler import SCHEDULER
+
+from .common import run_workflow
+
+
+def _lane_fanout(
+    size: int, tmp: Path,
+) -> Callable[[], tuple[WorkflowRunner, ParallelAction, list[PromptAction]]]:
+    """Start a checkpointed run up to a ``size``-lane parallel action.
+
+    The returned ``begin()`` also fetches the first prompt of every lane.
+    """
+    wf = WorkflowDef(
+        name="lane-submit",
+        description="bench",
+        blocks=[
+            ParallelEachBlock(
+                name="fan",
+                parallel_for="variables.items",
+                template=[LLMStep(name="review", prompt_text="Review {{variables.item}}")],
+            )
+        ],
+    )
+    items = [f"file{i}.py" for i in range(size)]
+
+    def begin() -> tuple[WorkflowRunner, ParallelAction, list[PromptAction]]:
+        runner = WorkflowRunner(
+            wf, variables={"items": items}, cwd=str(tmp),
+            registry={wf.name: wf}, checkpoint=True,
+        )
+        action = runner.start()
+        if not isinstance(action, ParallelAction):
+            raise RuntimeError(f"expected parallel action, got {action.action}")
+        lanes: list[PromptAction] = []
+        for lane in action.lanes:
+            prompt = runner.next(lane.child_run_id)
+            if not isinstance(prompt, PromptAction):
+                raise RuntimeError(f"expected lane prompt, got {prompt.action}")
+            lanes.append(prompt)
+        return runner, action, lanes
+
+    return begin
+
+
+def _wire(params: dict[str, Any], result: Any) -> Any:
+    """Encode and decode one request/response pair as JSON.
+
+    This is the per-call transport cost a relay pays on every tool call,
+    and the part of the work that ``submit_many()`` pays once per batch
+    instead of once per lane.
+    """
+    json.loads(json.dumps(params))
+    return json.loads(json.dumps(result, default=str))
+
+
+def _setup_lane_submit_single(size: int, tmp: Path) -> Callable[[], None]:
+    """``size`` lanes answered with one ``submit()`` each, then the parent.
+
+    Every call pays the JSON transport cost of a relay tool call (see
+    ``_wire``). Includes the shared ``start()``; compare with ``lane_submit_batch``.
+    """
+    begin = _lane_fanout(size, tmp)
+
+    def op() -> None:
+        runner, action, lanes = begin()
+        params: dict[str, Any]
+        for lane in lanes:
+            params = {"run_id": lane.run_id, "exec_key": lane.exec_key, "output": "ok"}
+            _wire(params, action_to_dict(runner.submit(**params)))
+        params = {"run_id": action.run_id, "exec_key": action.exec_key, "output": "lanes done"}
+        final = _wire(params, action_to_dict(runner.submit(**params)))
+        if final["action"] != "completed":
+            raise RuntimeError(f"run ended with {final['action']}")
+
+    return op
+
+
+def _setup_lane_submit_batch(size: int, tmp: Path) -> Callable[[], None]:
+    """The same ``size`` lanes answered by one ``submit_many()`` call."""
+    begin = _lane_fanout(size, tmp)
+
+    def op() -> None:
+        runner, _, lanes = begin()
+        params = {"submissions": [
+            {"run_id": lane.run_id, "exec_key": lane.exec_key, "output": "ok"}
+            for lane in lanes
+        ]}
+        results, parents = runner.submit_many(params["submissions"])
+        reply = _wire(params, {
+            "results": [action_to_dict(a) for a in results],
+            "parents": [action_to_dict(a) for a in parents],
+        })
+        if [p["action"] for p in reply["parents"]] != ["completed"]:
+            raise RuntimeError(f"batch ended with {reply['parents']}")
+
+    return op
+
+
+# Skewed fan-out: every 4th item is slow, batches of _SKEW_LANES lanes
+_SKEW_LANES = 4
+_SKEW_SLOW, _SKEW_FAST = 0.2, 0.01
+
+
+def _skewed_fanout(
+    size: int, tmp: Path, order: Literal["items", "longest_first"],
+) -> Callable[[], None]:
+    """``size`` shell lanes (sleeps) where one item in four is 20x slower.
+
+    In item order every batch holds one slow item, so each batch waits for
+    it; longest-first puts the slow items in the first batches together.
+    Shell slots are raised to the batch size so the scheduler is not the
+    bound.
+    """
+    wf = WorkflowDef(
+        name=f"skewed-{order}",
+        description="bench",
+        blocks=[
+            ParallelEachBlock(
+                name="fan",
+                parallel_for="variables.items",
+                max_concurrency=_SKEW_LANES,
+                order=order,
+                cost="secs",
+                template=[ShellStep(name="work", command="sleep {{variables.item.secs}}")],
+            )
+        ],
+    )
+    items = [
+        {"file": f"f{i}.py", "secs": _SKEW_SLOW if i % _SKEW_LANES == 0 else _SKEW_FAST}
+        for i in range(size)
+    ]
+
+    def op() -> None:
+        slots = SCHEDULER.slots
+        SCHEDULER.set_slots(max(slots, _SKEW_LANES))
+        try:
+            run_workflow(wf, tmp, variables={"items": items})
+        finally:
+            SCHEDULER.set_slots(slots)
+
+    return op
+
+
+def _setup_skewed_fanout(size: int, tmp: Path) -> Callable[[], None]:
+    """Skewed shell fan-out dispatched in item order."""
+    return _skewed_fanout(size, tmp, "items")
+
+
+def _setup_skewed_fanout_lpt(size: int, tmp: Path) -> Callable[[], None]:
+    """The same fan-out with ``order="longest_first"``; compare with ``skewed_fanout``."""
+    return _skewed_fanout(size, tmp, "longest_first")
+
+
+SCENARIOS: dict[str, Callable[[int, Path], Callable[[], None]]] = {
+    "lane_submit_single": _setup_lane_submit_single,
+    "lane_submit_batch": _setup_lane_submit_batch,
+    "skewed_fanout": _setup_skewed_fanout,
+    "skewed_fanout_lpt": _setup_skewed_fanout_lpt,
+}
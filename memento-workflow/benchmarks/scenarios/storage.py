@@ -0,0 +1,239 @@
+"""On-disk state: blobs, the object store, artifact compression and packs.
+
+Each scenario has a twin with the feature turned off (``blob_fanout`` and
+``blob_fanout_inline``, and so on). Besides timings they report the size
+left on disk as ``state_kb``; the artifact pair reports ``write_ms``,
+``cleanup_ms`` and ``files`` instead.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from scripts.engine.types import LLMStep, LoopBlock, ParallelEachBlock, ShellStep, WorkflowDef
+from scripts.engine.workflow_runner import WorkflowRunner
+from scripts.infra import artifacts, blobs, objects
+from scripts.infra.cleanup import cleanup
+
+from .common import EXTRA, dir_kb, drive, run_workflow
+
+
+def _blob_fanout(size: int, tmp: Path, threshold: int | None) -> Callable[[], None]:
+    """``size`` checkpointed lanes whose parent holds a ~300 KiB file list.
+
+    With blobs each lane shares the list and its checkpoints hold a handle;
+    inline (``threshold=0``) every lane deep-copies it and writes it into
+    each of its checkpoints.
+    """
+    wf = WorkflowDef(
+        name="blob-fanout",
+        description="bench",
+        blocks=[
+            ParallelEachBlock(
+                name="fan",
+                parallel_for="variables.items",
+                template=[LLMStep(name="review", prompt_text="Review {{variables.item}}")],
+            )
+        ],
+    )
+    variables = {
+        "items": [f"file{i}.py" for i in range(size)],
+        "files": [{"path": f"src/pkg/module_{i}.py", "lines": i % 500} for i in range(8000)],
+    }
+
+    def op() -> None:
+        saved = blobs.BLOB_THRESHOLD
+        if threshold is not None:
+            blobs.BLOB_THRESHOLD = threshold
+        try:
+            runner = WorkflowRunner(
+                wf, variables=variables, cwd=str(tmp),
+                registry={wf.name: wf}, checkpoint=True,
+            )
+            final = drive(runner, runner.start())
+        finally:
+            blobs.BLOB_THRESHOLD = saved
+        if final.action != "completed":
+            raise RuntimeError(f"run ended with {final.action}")
+        if runner.root_state.checkpoint_dir:
+            EXTRA["state_kb"] = dir_kb(runner.root_state.checkpoint_dir)
+
+    return op
+
+
+def _setup_blob_fanout(size: int, tmp: Path) -> Callable[[], None]:
+    """Lane fan-out with large values stored once as blobs."""
+    return _blob_fanout(size, tmp, None)
+
+
+def _setup_blob_fanout_inline(size: int, tmp: Path) -> Callable[[], None]:
+    """The same fan-out with blobs disabled; compare with ``blob_fanout``."""
+    return _blob_fanout(size, tmp, 0)
+
+
+def _dedupe_fanout(size: int, tmp: Path, min_bytes: int | None) -> Callable[[], None]:
+    """Repeated ``size``-lane fan-outs with a ~40 KiB spec in every prompt.
+
+    Each lane externalizes the same spec to a context file and answers with
+    the same ~8 KiB review; every op is a new run in the same project.
+    ``state_kb`` is the whole ``.workflow-state`` after the last op.
+    """
+    wf = WorkflowDef(
+        name="dedupe-fanout",
+        description="bench",
+        blocks=[
+            ParallelEachBlock(
+                name="fan",
+                parallel_for="variables.items",
+                template=[LLMStep(
+                    name="review",
+                    prompt_text="Review {{variables.item}} against:\n{{variables.spec}}",
+                )],
+            )
+        ],
+    )
+    variables = {
+        "items": [f"file{i}.py" for i in range(size)],
+        "spec": "".join(f"- rule {i}: keep functions short and named\n" for i in range(1000)),
+    }
+    review = "LGTM, no findings.\n" * 400
+
+    def op() -> None:
+        saved = objects.DEDUPE_MIN_BYTES
+        if min_bytes is not None:
+            objects.DEDUPE_MIN_BYTES = min_bytes
+        try:
+            run_workflow(
+                wf, tmp, variables=variables, checkpoint=True,
+                respond=lambda action: {"output": review},
+            )
+        finally:
+            objects.DEDUPE_MIN_BYTES = saved
+        EXTRA["state_kb"] = dir_kb(tmp / ".workflow-state")
+
+    return op
+
+
+def _setup_dedupe_fanout(size: int, tmp: Path) -> Callable[[], None]:
+    """Repeated lane fan-outs sharing identical files through the object store."""
+    return _dedupe_fanout(size, tmp, None)
+
+
+def _setup_dedupe_fanout_off(size: int, tmp: Path) -> Callable[[], None]:
+    """The same runs with the object store disabled; compare with ``dedupe_fanout``."""
+    return _dedupe_fanout(size, tmp, 0)
+
+
+def _artifact_logs(size: int, tmp: Path, level: int | None) -> Callable[[], None]:
+    """``size`` shell steps each printing a ~300 KiB test-runner log.
+
+    Every op is a new checkpointed run; ``state_kb`` is the artifacts of
+    the last one (step outputs stay inline in state.json either way).
+    """
+    wf = WorkflowDef(
+        name="artifact-logs",
+        description="bench",
+        blocks=[
+            LoopBlock(
+                name="each",
+                loop_over="variables.items",
+                loop_var="item",
+                blocks=[ShellStep(
+                    name="test",
+                    command=(
+                        "seq 1 8000 | awk '{printf \"tests/test_mod{{variables.item}}.py"
+                        "::test_case_%d PASSED [%3d%%] in 0.%03ds\\n\", $1, $1 % 100, $1 % 997}'"
+                    ),
+                )],
+            )
+        ],
+    )
+    variables = {"items": list(range(size))}
+
+    def op() -> None:
+        saved = artifacts.COMPRESS_LEVEL
+        if level is not None:
+            artifacts.COMPRESS_LEVEL = level
+        try:
+            runner = WorkflowRunner(
+                wf, variables=variables, cwd=str(tmp),
+                registry={wf.name: wf}, checkpoint=True,
+            )
+            final = drive(runner, runner.start())
+        finally:
+            artifacts.COMPRESS_LEVEL = saved
+        if final.action != "completed":
+            raise RuntimeError(f"run ended with {final.action}")
+        if runner.root_state.artifacts_dir:
+            EXTRA["state_kb"] = dir_kb(runner.root_state.artifacts_dir)
+
+    return op
+
+
+def _setup_artifact_logs(size: int, tmp: Path) -> Callable[[], None]:
+    """Shell logs stored gzip-compressed at the default level."""
+    return _artifact_logs(size, tmp, None)
+
+
+def _setup_artifact_logs_raw(size: int, tmp: Path) -> Callable[[], None]:
+    """The same logs stored plain; compare with ``artifact_logs``."""
+    return _artifact_logs(size, tmp, 0)
+
+
+def _artifact_store(size: int, tmp: Path, pack: bool) -> Callable[[], None]:
+    """Write the artifacts of ``size`` shell steps into a new run, then clean up.
+
+    Each step writes command, output, error, result and resources; the
+    op times both phases, reported for the last op as ``write_ms`` and
+    ``cleanup_ms`` (``files`` is the artifact file count).
+    """
+    output = "".join(f"tests/test_mod.py::test_case_{i} PASSED\n" for i in range(40))
+    state_dir = tmp / ".workflow-state"
+    counter = iter(range(1_000_000))
+
+    def op() -> None:
+        run_dir = state_dir / f"run{next(counter):06d}"
+        run_dir.mkdir(parents=True)
+        (run_dir / "meta.json").write_text('{"status": "completed"}')
+        saved = artifacts.PACK_ARTIFACTS
+        artifacts.PACK_ARTIFACTS = pack
+        try:
+            t0 = time.perf_counter()
+            for i in range(size):
+                artifacts.write_shell_artifacts(
+                    run_dir / "artifacts", f"loop:each[i={i}]/test", "pytest -q",
+                    output, "1 warning", {"passed": 40}, {"cpu_user": 0.5},
+                )
+            t1 = time.perf_counter()
+        finally:
+            artifacts.PACK_ARTIFACTS = saved
+        EXTRA["files"] = sum(1 for p in run_dir.rglob("*") if p.is_file())
+        cleanup(str(tmp), remove_all=True)
+        EXTRA["write_ms"] = round((t1 - t0) * 1000, 2)
+        EXTRA["cleanup_ms"] = round((time.perf_counter() - t1) * 1000, 2)
+
+    return op
+
+
+def _setup_artifact_loose(size: int, tmp: Path) -> Callable[[], None]:
+    """Shell-step artifacts as loose files, one directory per step."""
+    return _artifact_store(size, tmp, False)
+
+
+def _setup_artifact_pack(size: int, tmp: Path) -> Callable[[], None]:
+    """The same artifacts appended to one pack; compare with ``artifact_loose``."""
+    return _artifact_store(size, tmp, True)
+
+
+SCENARIOS: dict[str, Callable[[int, Path], Callable[[], None]]] = {
+    "blob_fanout": _setup_blob_fanout,
+    "blob_fanout_inline": _setup_blob_fanout_inline,
+    "dedupe_fanout": _setup_dedupe_fanout,
+    "dedupe_fanout_off": _setup_dedupe_fanout_off,
+    "artifact_logs": _setup_artifact_logs,
+    "artifact_logs_raw": _setup_artifact_logs_raw,
+    "artifact_loose": _setup_artifact_loose,
+    "artifact_pack": _setup_artifact_pack,
+}
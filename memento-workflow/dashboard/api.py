@@ -137,6 +137,21 @@ async def handle_diff(request: Request) -> Response:
     return JSONResponse(result)
 
 
+# Written by the engine process (scripts/infra/metrics.py), served as-is.
+_METRICS_FILE = ".metrics.prom"
+_METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+async def handle_metrics(request: Request) -> Response:
+    """Prometheus text endpoint — the engine's latest metrics snapshot."""
+    path = _state_dir(request) / _METRICS_FILE
+    try:
+        body = await asyncio.to_thread(path.read_text, encoding="utf-8")
+    except OSError:
+        body = ""
+    return Response(body, headers={"Content-Type": _METRICS_CONTENT_TYPE})
+
+
 async def ws_endpoint(websocket: WebSocket) -> None:
     """WebSocket endpoint — pushes run list updates every 2 seconds."""
     await websocket.accept()
@@ -186,5 +201,6 @@ routes = [
     Route("/api/runs/{run_id}", handle_run_detail),
     Route("/api/runs/{run_id}/artifacts/{path:path}", handle_artifact),
     Route("/api/diff/{id1}/{id2}", handle_diff),
+    Route("/metrics", handle_metrics),
     WebSocketRoute("/api/ws", ws_endpoint),
 ]
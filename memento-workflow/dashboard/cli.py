@@ -76,6 +76,16 @@ def _fmt_time(iso: str) -> str:
     return dt.strftime("%Y-%m-%d %H:%M:%S")
 
 
+def _fmt_resources(r: dict) -> str:
+    """'user 1.20s · sys 0.30s · peak 512MB' from a resources dict."""
+    parts = [f"user {r.get('cpu_user', 0):.2f}s", f"sys {r.get('cpu_sys', 0):.2f}s"]
+    if r.get("max_rss_kb"):
+        parts.append(f"peak {r['max_rss_kb'] / 1024:.0f}MB")
+    if r.get("cpu_cores"):
+        parts.append(f"{r['cpu_cores']:.2f} cores")
+    return " · ".join(parts)
+
+
 def _exec_key_short(exec_key: str) -> str:
     """Short display name from exec_key, stripping type prefixes."""
     parts = exec_key.split("/")
@@ -136,6 +146,19 @@ def cmd_run(state_dir: Path, run_id: str) -> None:
     if meta.get("steps_by_type"):
         parts = [f"{k}: {v}" for k, v in meta["steps_by_type"].items()]
         print(f"Types:    {', '.join(parts)}")
+    run_timing = (meta.get("timing") or {}).get("run")
+    if run_timing:
+        parts = [f"{k}: {v:.3f}s" for k, v in run_timing.items() if v]
+        if parts:
+            print(f"Timing:   {', '.join(parts)}")
+    resources = meta.get("resources")
+    if resources:
+        print(f"CPU:      {_fmt_resources(resources)}")
+    parent_run = meta.get("parent_run")
+    if parent_run:
+        print(f"Fork of:  {parent_run.get('run_id')} at {parent_run.get('exec_key')}")
+    for fork in detail.get("forks", []):
+        print(f"Forked:   {fork['run_id']} at {fork['exec_key']} ({fork['status']})")
     print()
 
     steps = detail["steps"]
@@ -151,8 +174,10 @@ def cmd_run(state_dir: Path, run_id: str) -> None:
             stype = f"  [{s['step_type']}]" if s.get("step_type") else ""
             model = f"  ({s['model']})" if s.get("model") else ""
             files = f"  [{', '.join(s['artifact_files'])}]" if s.get("artifact_files") else ""
+            res = s.get("resources")
+            cpu = f"  cpu {res.get('cpu_user', 0) + res.get('cpu_sys', 0):.2f}s" if res else ""
             err = f"  ERR: {s['error']}" if s.get("error") else ""
-            print(f"  {indent}{status_char} {name}  ({dur}){cost}{stype}{model}{files}{err}")
+            print(f"  {indent}{status_char} {name}  ({dur}){cost}{cpu}{stype}{model}{files}{err}")
     else:
         print("No steps.")
 
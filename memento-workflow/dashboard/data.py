@@ -6,6 +6,7 @@ All reads, no writes. Safe for concurrent access.
 
 from __future__ import annotations
 
+import gzip
 import json
 import os
 import re
@@ -33,6 +34,82 @@ def _sanitize_rel_path(path: str) -> str:
     return "/".join(parts) or "unknown"
 
 
+# Large step logs/results are stored as <name>.gz; listed and read by <name>.
+# Runs may append them to artifacts/.pack (index: .pack.idx) instead.
+# Must stay in sync with scripts/infra/artifacts.py:read_artifact() and
+# scripts/infra/pack.py.
+_COMPRESSED_SUFFIX = ".gz"
+_PACK_FILE = ".pack"
+_PACK_INDEX = ".pack.idx"
+
+
+def _artifact_name(file_name: str) -> str:
+    return file_name.removesuffix(_COMPRESSED_SUFFIX)
+
+
+def _pack_index(artifacts_dir: Path) -> dict[str, tuple[int, int, bool]]:
+    """``{path: (offset, length, gz)}`` of a run's artifact pack (last entry wins)."""
+    index: dict[str, tuple[int, int, bool]] = {}
+    try:
+        text = (artifacts_dir / _PACK_INDEX).read_text(encoding="utf-8")
+    except OSError:
+        return index
+    for line in text.splitlines():
+        try:
+            e = json.loads(line)
+            index[e["path"]] = (int(e["offset"]), int(e["length"]), bool(e.get("gz")))
+        except (ValueError, KeyError, TypeError):
+            continue
+    return index
+
+
+def _read_packed(artifacts_dir: Path, rel: str) -> str | None:
+    loc = _pack_index(artifacts_dir).get(rel)
+    if loc is None:
+        return None
+    offset, length, gz = loc
+    with open(artifacts_dir / _PACK_FILE, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    return (gzip.decompress(data) if gz else data).decode("utf-8")
+
+
+def _read_artifact(path: Path) -> str | None:
+    """Read an artifact stored plain, compressed or packed; None if missing/unreadable."""
+    try:
+        if path.is_file():
+            if path.name.endswith(_COMPRESSED_SUFFIX):
+                return gzip.decompress(path.read_bytes()).decode("utf-8")
+            return path.read_text(encoding="utf-8")
+        packed = path.with_name(path.name + _COMPRESSED_SUFFIX)
+        if packed.is_file():
+            return gzip.decompress(packed.read_bytes()).decode("utf-8")
+        logical = path.with_name(_artifact_name(path.name))
+        for parent in logical.parents:
+            if (parent / _PACK_INDEX).is_file():
+                return _read_packed(parent, logical.relative_to(parent).as_posix())
+    except (OSError, EOFError, gzip.BadGzipFile, UnicodeDecodeError):
+        pass
+    return None
+
+
+def _step_artifact_files(
+    artifacts_dir: Path, step_rel: str, index: dict[str, tuple[int, int, bool]],
+) -> set[str]:
+    """Names of a step's artifacts, loose or packed."""
+    step_dir = artifacts_dir / step_rel
+    names = (
+        {_artifact_name(f.name) for f in step_dir.iterdir() if f.is_file()}
+        if step_dir.is_dir() else set()
+    )
+    prefix = f"{step_rel}/"
+    names.update(
+        p[len(prefix):] for p in index
+        if p.startswith(prefix) and "/" not in p[len(prefix):]
+    )
+    return names
+
+
 def _read_run_summary(entry: Path) -> dict[str, Any] | None:
     """Read run summary from meta.json, falling back to state.json for legacy runs."""
     meta: dict[str, Any] = {}
@@ -91,9 +168,12 @@ def _read_run_summary(entry: Path) -> dict[str, Any] | None:
         "cwd": meta.get("cwd", state.get("ctx", {}).get("cwd", "")),
         "parent_run_id": state.get("parent_run_id"),
         "child_run_ids": state.get("child_run_ids", []),
+        "parent_run": meta.get("parent_run"),
         "total_cost_usd": meta.get("total_cost_usd"),
         "total_duration": meta.get("total_duration"),
         "steps_by_type": meta.get("steps_by_type"),
+        "timing": meta.get("timing"),
+        "resources": meta.get("resources"),
     }
 
 
@@ -131,13 +211,59 @@ def list_runs(state_dir: Path) -> list[dict[str, Any]]:
     return runs
 
 
+def _list_forks(state_dir: Path, run_id: str) -> list[dict[str, Any]]:
+    """Runs forked from ``run_id``: ``[{run_id, exec_key, status, started_at}]``."""
+    forks: list[dict[str, Any]] = []
+    for meta_path in state_dir.glob("*/meta.json"):
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            continue
+        parent = meta.get("parent_run")
+        if isinstance(parent, dict) and parent.get("run_id") == run_id:
+            forks.append({
+                "run_id": meta.get("run_id", meta_path.parent.name),
+                "exec_key": parent.get("exec_key", ""),
+                "status": meta.get("status", "unknown"),
+                "started_at": meta.get("started_at", ""),
+            })
+    forks.sort(key=lambda f: f["started_at"])
+    return forks
+
+
+def _add_packed(
+    nodes: list[dict[str, Any]], path: str, length: int, gz: bool,
+) -> None:
+    """Insert a packed artifact into an artifact tree (loose files win)."""
+    parts = path.split("/")
+    rel = ""
+    for depth, part in enumerate(parts):
+        rel = f"{rel}/{part}" if rel else part
+        node = next((n for n in nodes if n["name"] == part), None)
+        if depth == len(parts) - 1:
+            if node is None:
+                leaf = {"name": part, "path": rel, "type": "file", "size": length, "packed": True}
+                if gz:
+                    leaf["compressed"] = True
+                nodes.append(leaf)
+            return
+        if node is None:
+            node = {"name": part, "path": rel, "type": "directory", "children": []}
+            nodes.append(node)
+        elif node["type"] != "directory":
+            return
+        nodes = node["children"]
+
+
 def _build_artifact_tree(base: Path, rel: str = "") -> list[dict[str, Any]]:
-    """Recursively build artifact tree from a directory."""
+    """Recursively build artifact tree from a directory (and its pack)."""
     nodes: list[dict[str, Any]] = []
     if not base.is_dir():
         return nodes
 
     for entry in sorted(base.iterdir()):
+        if not rel and entry.name in (_PACK_FILE, _PACK_INDEX):
+            continue
         entry_rel = f"{rel}/{entry.name}" if rel else entry.name
         if entry.is_dir():
             children = _build_artifact_tree(entry, entry_rel)
@@ -148,16 +274,33 @@ def _build_artifact_tree(base: Path, rel: str = "") -> list[dict[str, Any]]:
                 "children": children,
             })
         else:
-            nodes.append({
-                "name": entry.name,
-                "path": entry_rel,
+            name = _artifact_name(entry.name)
+            node = {
+                "name": name,
+                "path": f"{rel}/{name}" if rel else name,
                 "type": "file",
                 "size": entry.stat().st_size,
-            })
-
+            }
+            if name != entry.name:
+                node["compressed"] = True
+            nodes.append(node)
+
+    if not rel:
+        index = _pack_index(base)
+        for path, (_, length, gz) in index.items():
+            _add_packed(nodes, path, length, gz)
+        if index:
+            _sort_tree(nodes)
     return nodes
 
 
+def _sort_tree(nodes: list[dict[str, Any]]) -> None:
+    nodes.sort(key=lambda n: n["name"])
+    for n in nodes:
+        if n["type"] == "directory":
+            _sort_tree(n["children"])
+
+
 def _find_run_dir(state_dir: Path, run_id: str) -> Path | None:
     """Locate a run directory — top-level, composite ID, or nested under a parent's children/."""
     # Composite ID: "aaa>bbb>ccc" → state_dir/aaa/children/bbb/children/ccc
@@ -227,16 +370,14 @@ def get_run_detail(state_dir: Path, run_id: str) -> dict[str, Any] | None:
                             pass
 
             artifacts_dir = run_dir / "artifacts"
+            pack_index = _pack_index(artifacts_dir)
             for exec_key, result in results_scoped.items():
                 if exec_key in parent_keys:
                     continue
                 # List artifact files for this step
-                art_path = artifacts_dir / _exec_key_to_artifact_path(exec_key)
-                artifact_files: list[str] = []
-                if art_path.is_dir():
-                    artifact_files = sorted(
-                        f.name for f in art_path.iterdir() if f.is_file()
-                    )
+                artifact_files = sorted(_step_artifact_files(
+                    artifacts_dir, _exec_key_to_artifact_path(exec_key), pack_index,
+                ))
                 steps.append({
                     "exec_key": exec_key,
                     "results_key": result.get("results_key", ""),
@@ -249,6 +390,10 @@ def get_run_detail(state_dir: Path, run_id: str) -> dict[str, Any] | None:
                     "step_type": result.get("step_type", ""),
                     "model": result.get("model"),
                     "started_at": result.get("started_at", ""),
+                    "issued_at": result.get("issued_at", ""),
+                    "submitted_at": result.get("submitted_at", ""),
+                    "timing": result.get("timing"),
+                    "resources": result.get("resources"),
                     "order": result.get("order", 0),
                     "artifact_files": artifact_files,
                 })
@@ -265,6 +410,7 @@ def get_run_detail(state_dir: Path, run_id: str) -> dict[str, Any] | None:
         "meta": {**summary, "step_count": len(steps)},
         "steps": steps,
         "artifact_tree": artifact_tree,
+        "forks": _list_forks(state_dir, summary["run_id"]),
     }
 
 
@@ -277,12 +423,7 @@ def get_artifact_content(state_dir: Path, run_id: str, path: str) -> str | None:
     file_path = (run_dir / "artifacts" / path).resolve()
     if not file_path.is_relative_to(artifacts_base):
         return None
-    if not file_path.is_file():
-        return None
-    try:
-        return file_path.read_text(encoding="utf-8")
-    except (OSError, UnicodeDecodeError):
-        return None
+    return _read_artifact(file_path)
 
 
 def diff_runs(
@@ -344,23 +485,27 @@ def _diff_step_artifacts(
     """Diff artifact files between two steps."""
     if not run_dir1 or not run_dir2:
         return []
-    path1 = run_dir1 / "artifacts" / _exec_key_to_artifact_path(exec_key1)
-    path2 = run_dir2 / "artifacts" / _exec_key_to_artifact_path(exec_key2)
+    rel1 = _exec_key_to_artifact_path(exec_key1)
+    rel2 = _exec_key_to_artifact_path(exec_key2)
+    path1 = run_dir1 / "artifacts" / rel1
+    path2 = run_dir2 / "artifacts" / rel2
 
     results: list[dict[str, str]] = []
 
-    files1 = {f.name for f in path1.iterdir()} if path1.is_dir() else set()
-    files2 = {f.name for f in path2.iterdir()} if path2.is_dir() else set()
+    files1 = _step_artifact_files(
+        run_dir1 / "artifacts", rel1, _pack_index(run_dir1 / "artifacts"),
+    )
+    files2 = _step_artifact_files(
+        run_dir2 / "artifacts", rel2, _pack_index(run_dir2 / "artifacts"),
+    )
 
     for fname in sorted(files1 | files2):
-        f1 = path1 / fname if fname in files1 else None
-        f2 = path2 / fname if fname in files2 else None
-
-        try:
-            content1 = f1.read_text(encoding="utf-8").splitlines(keepends=True) if f1 else []
-            content2 = f2.read_text(encoding="utf-8").splitlines(keepends=True) if f2 else []
-        except (OSError, UnicodeDecodeError):
+        text1 = _read_artifact(path1 / fname) if fname in files1 else ""
+        text2 = _read_artifact(path2 / fname) if fname in files2 else ""
+        if text1 is None or text2 is None:
             continue
+        content1 = text1.splitlines(keepends=True)
+        content2 = text2.splitlines(keepends=True)
 
         if content1 == content2:
             continue
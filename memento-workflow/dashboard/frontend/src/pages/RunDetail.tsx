@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react'
 import { useParams, Link } from 'react-router-dom'
-import type { RunDetail as RunDetailType, StepInfo } from '../types'
+import type { RunDetail as RunDetailType, Resources, StepInfo, Timing } from '../types'
 import { fetchRunDetail, fetchArtifact } from '../api'
 import StatusBadge from '../components/StatusBadge'
 import Timeline from '../components/Timeline'
@@ -20,6 +20,40 @@ function formatDuration(start: string, end: string | null): string {
   return `${Math.floor(sec / 3600)}h ${Math.floor((sec % 3600) / 60)}m`
 }
 
+const TIMING_LABELS: Array<[keyof Timing, string]> = [
+  ['engine_cpu', 'engine'],
+  ['shell', 'shell'],
+  ['sandbox', 'sandbox'],
+  ['relay_wait', 'relay'],
+  ['backoff', 'backoff'],
+  ['queue', 'queue'],
+]
+
+function formatSeconds(s: number): string {
+  if (s < 1) return `${Math.round(s * 1000)}ms`
+  if (s < 60) return `${s.toFixed(1)}s`
+  return `${Math.floor(s / 60)}m ${Math.round(s % 60)}s`
+}
+
+/** "engine 12ms · shell 1.2s · relay 40s" — zero components omitted */
+function formatTiming(t: Timing | null | undefined): string {
+  if (!t) return ''
+  return TIMING_LABELS
+    .filter(([key]) => (t[key] ?? 0) > 0)
+    .map(([key, label]) => `${label} ${formatSeconds(t[key] ?? 0)}`)
+    .join(' · ')
+}
+
+/** "cpu 1.2s · peak 512MB · io 40/3" — empty when nothing was recorded */
+function formatResources(r: Resources | null | undefined): string {
+  if (!r) return ''
+  const parts = [`cpu ${formatSeconds((r.cpu_user ?? 0) + (r.cpu_sys ?? 0))}`]
+  if (r.max_rss_kb) parts.push(`peak ${Math.round(r.max_rss_kb / 1024)}MB`)
+  if (r.io_read || r.io_write) parts.push(`io ${r.io_read ?? 0}/${r.io_write ?? 0}`)
+  if (r.cpu_cores) parts.push(`${r.cpu_cores.toFixed(2)} cores`)
+  return parts.join(' · ')
+}
+
 export default function RunDetail() {
   const { id } = useParams<{ id: string }>()
   const [detail, setDetail] = useState<RunDetailType | null>(null)
@@ -98,6 +132,32 @@ export default function RunDetail() {
           <span style={{ color: 'var(--text-muted)', fontSize: 11 }}>
             {steps.length} steps
           </span>
+          {meta.timing && formatTiming(meta.timing.run) && (
+            <span style={{ color: 'var(--text-muted)', fontSize: 11 }} title="time split: engine CPU, shell exec, sandbox setup, relay wait">
+              {formatTiming(meta.timing.run)}
+            </span>
+          )}
+          {formatResources(meta.resources) && (
+            <span style={{ color: 'var(--text-muted)', fontSize: 11 }} title="shell rusage: CPU time, peak RSS, block reads/writes, average cores busy">
+              {formatResources(meta.resources)}
+            </span>
+          )}
+          {meta.parent_run && (
+            <span style={{ color: 'var(--text-muted)', fontSize: 11 }} title="forked from this run's checkpoint">
+              fork of <Link to={`/runs/${meta.parent_run.run_id}`}>{meta.parent_run.run_id}</Link> at {meta.parent_run.exec_key}
+            </span>
+          )}
+          {detail.forks && detail.forks.length > 0 && (
+            <span style={{ color: 'var(--text-muted)', fontSize: 11 }} title="runs forked from this one">
+              forks:{' '}
+              {detail.forks.map((f, i) => (
+                <span key={f.run_id}>
+                  {i > 0 && ', '}
+                  <Link to={`/runs/${f.run_id}`}>{f.run_id}</Link> at {f.exec_key}
+                </span>
+              ))}
+            </span>
+          )}
         </span>
       </div>
 
@@ -119,6 +179,16 @@ export default function RunDetail() {
               <div className="viewer-toolbar">
                 <span style={{ color: 'var(--text-muted)' }}>step:</span>
                 <span className="viewer-path">{activeStep.name}</span>
+                {formatTiming(activeStep.timing) && (
+                  <span style={{ color: 'var(--text-muted)', fontSize: 11 }}>
+                    {formatTiming(activeStep.timing)}
+                  </span>
+                )}
+                {formatResources(activeStep.resources) && (
+                  <span style={{ color: 'var(--text-muted)', fontSize: 11 }}>
+                    {formatResources(activeStep.resources)}
+                  </span>
+                )}
                 {activeStep.artifact_files.length > 0 && (
                   <div className="artifact-file-tabs">
                     <button
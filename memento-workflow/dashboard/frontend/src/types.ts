@@ -1,3 +1,35 @@
+/** Seconds split by where they were spent (see compute_timing in utils.py) */
+export interface Timing {
+  engine_cpu?: number
+  shell?: number
+  sandbox?: number
+  relay_wait?: number
+  backoff?: number
+  queue?: number
+}
+
+/** Shell step rusage (see sum_resources in utils.py) */
+export interface Resources {
+  cpu_user?: number
+  cpu_sys?: number
+  max_rss_kb?: number
+  io_read?: number
+  io_write?: number
+  ctx_voluntary?: number
+  ctx_involuntary?: number
+  cpu_cores?: number
+}
+
+export interface RunTiming {
+  run: Timing
+  blocks: Record<string, Timing & { count: number }>
+}
+
+export interface ForkPoint {
+  run_id: string
+  exec_key: string
+}
+
 export interface RunListItem {
   run_id: string
   workflow: string
@@ -8,7 +40,11 @@ export interface RunListItem {
   cwd: string
   parent_run_id: string | null
   child_run_ids: string[]
+  // Set on a run forked from another run's checkpoint
+  parent_run?: ForkPoint | null
   children: RunListItem[]
+  timing?: RunTiming | null
+  resources?: Resources | null
 }
 
 export interface StepInfo {
@@ -22,6 +58,10 @@ export interface StepInfo {
   cost_usd: number | null
   order: number
   artifact_files: string[]
+  issued_at?: string
+  submitted_at?: string
+  timing?: Timing | null
+  resources?: Resources | null
 }
 
 export interface ArtifactNode {
@@ -29,13 +69,23 @@ export interface ArtifactNode {
   path: string
   type: 'file' | 'directory'
   size?: number
+  // Stored gzip-compressed (size is on disk); read by its plain name
+  compressed?: boolean
+  // Stored in the run's artifact pack rather than as a file
+  packed?: boolean
   children?: ArtifactNode[]
 }
 
+export interface RunFork extends ForkPoint {
+  status: string
+  started_at: string
+}
+
 export interface RunDetail {
   meta: RunListItem
   steps: StepInfo[]
   artifact_tree: ArtifactNode[]
+  forks?: RunFork[]
 }
 
 export interface DiffEntry {
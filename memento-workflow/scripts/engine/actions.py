@@ -9,6 +9,7 @@ from __future__ import annotations
 import hashlib
 import json
 from pathlib import Path
+from typing import Any
 
 from ..infra.artifacts import exec_key_to_artifact_path, write_llm_prompt_artifact
 from .core import RunState
@@ -16,14 +17,23 @@ from .protocol import (
     ActionBase,
     AskUserAction,
     CompletedAction,
+    DeadlineExceededAction,
     ErrorAction,
     HaltedAction,
     PromptAction,
     ShellAction,
     SubagentAction,
 )
+from .tracing import trace_span
 from .types import Block, LLMStep, PromptStep, ShellStep
-from ..utils import compute_totals, schema_dict, substitute, substitute_with_files
+from ..utils import (
+    compile_template,
+    compute_totals,
+    load_prompt_template,
+    schema_dict,
+    substitute,
+    substitute_with_files,
+)
 
 
 def _resolve_stdin(raw: str) -> str | None:
@@ -40,20 +50,21 @@ def _resolve_stdin(raw: str) -> str | None:
 
 def _build_shell_action(state: RunState, step: ShellStep, exec_key: str) -> ShellAction:
     """Build a shell action."""
-    command = substitute(step.command, state.ctx) if step.command else ""
     script_path: str | None = None
     args: str | None = None
     env: dict[str, str] | None = None
 
-    if step.env:
-        env = {k: substitute(v, state.ctx) for k, v in step.env.items()}
-    if step.script:
-        workflow_dir = state.ctx.variables.get("workflow_dir", "")
-        if workflow_dir:
-            script_path = str(Path(workflow_dir) / step.script)
-        else:
-            script_path = step.script
-        args = substitute(step.args, state.ctx) if step.args else ""
+    with trace_span(state, f"substitute {exec_key}", "substitute"):
+        command = substitute(step.command, state.ctx) if step.command else ""
+        if step.env:
+            env = {k: substitute(v, state.ctx) for k, v in step.env.items()}
+        if step.script:
+            workflow_dir = state.ctx.variables.get("workflow_dir", "")
+            if workflow_dir:
+                script_path = str(Path(workflow_dir) / step.script)
+            else:
+                script_path = step.script
+            args = substitute(step.args, state.ctx) if step.args else ""
 
     display_cmd = command or step.script
     cmd_short = display_cmd[:80] + ("..." if len(display_cmd) > 80 else "")
@@ -76,12 +87,13 @@ def _build_prompt_action(state: RunState, step: LLMStep, exec_key: str) -> Promp
     """Build a prompt action (inline LLM)."""
     context_files: list[str] = []
 
-    # Read raw template
+    # Compiled template: file reads and placeholder scans are cached and
+    # shared across parallel lanes / loop iterations using the same prompt.
     if step.prompt_text:
-        raw = step.prompt_text
+        tpl = compile_template(step.prompt_text)
     else:
-        full = Path(state.ctx.prompt_dir) / step.prompt
-        raw = full.read_text(encoding="utf-8")
+        tpl = load_prompt_template(Path(state.ctx.prompt_dir) / step.prompt)
+    raw = tpl.raw
 
     # Substitute: externalize large values to files when artifacts are available
     step_dir = (
@@ -89,17 +101,18 @@ def _build_prompt_action(state: RunState, step: LLMStep, exec_key: str) -> Promp
         if state.artifacts_dir
         else None
     )
-    if step_dir:
-        prompt_text, context_files = substitute_with_files(raw, state.ctx, step_dir)
-    else:
-        prompt_text = substitute(raw, state.ctx)
+    with trace_span(state, f"substitute {exec_key}", "substitute"):
+        if step_dir:
+            prompt_text, context_files = substitute_with_files(tpl, state.ctx, step_dir)
+        else:
+            prompt_text = substitute(tpl, state.ctx)
 
     prompt_file: str | None = None
     prompt_hash: str | None = None
 
     if step.cache_prompt and state.artifacts_dir:
         # Template-level caching: hash raw template, cache in _prompts/
-        raw_hash = hashlib.sha256(raw.encode()).hexdigest()[:12]
+        raw_hash = tpl.digest
         cache_dir = state.checkpoint_dir.parent / "_prompts"
         cached = cache_dir / f"{raw_hash}.md"
         if not cached.exists():
@@ -109,7 +122,7 @@ def _build_prompt_action(state: RunState, step: LLMStep, exec_key: str) -> Promp
         # template + context_files is always a complete set.
         if step_dir:
             _, context_files = substitute_with_files(
-                raw, state.ctx, step_dir, extern_threshold=0
+                tpl, state.ctx, step_dir, extern_threshold=0
             )
         prompt_file = str(cached)
         prompt_hash = raw_hash
@@ -231,8 +244,8 @@ def _build_subagent_action(
 _COMPACT_THRESHOLD = 30
 
 
-def _build_completed_action(state: RunState) -> CompletedAction:
-    """Build a completed action."""
+def _results_summary(state: RunState) -> tuple[dict[str, object], dict[str, Any], bool]:
+    """Per-step summary, totals and whether the summary was compacted."""
     has_artifacts = state.artifacts_dir is not None
     compact = len(state.ctx.results) > _COMPACT_THRESHOLD
 
@@ -257,8 +270,12 @@ def _build_completed_action(state: RunState) -> CompletedAction:
             if isinstance(v, dict) and v.get("status") != "success"
         }
 
-    totals = compute_totals(state.ctx.results_scoped)
+    return summary, compute_totals(state.ctx.results_scoped, state.ctx.retired), compact
+
 
+def _build_completed_action(state: RunState) -> CompletedAction:
+    """Build a completed action."""
+    summary, totals, compact = _results_summary(state)
     return CompletedAction(
         run_id=state.run_id,
         summary=summary,
@@ -278,6 +295,21 @@ def _build_halted_action(state: RunState, reason: str, halted_at: str) -> Halted
     )
 
 
+def _build_deadline_action(state: RunState, deadline_at: str) -> DeadlineExceededAction:
+    """Build a deadline_exceeded action — a time budget ran out (partial results)."""
+    summary, totals, compact = _results_summary(state)
+    where = "run" if deadline_at == "run" else f"[{deadline_at}]"
+    return DeadlineExceededAction(
+        run_id=state.run_id,
+        deadline_at=deadline_at,
+        summary=summary,
+        totals=totals,
+        compact=True if compact else None,
+        display=f"Workflow stopped: time budget of {where} exhausted "
+        f"({totals.get('step_count', 0)} steps done)",
+    )
+
+
 def _build_error_action(
     state: RunState,
     message: str,
@@ -13,8 +13,10 @@ import logging
 from pathlib import Path
 from typing import Any
 
+from ..infra.blobs import shared_values
 from ..infra.checkpoint import checkpoint_dir_from_run_id
 from .core import Frame, RunState
+from .tracing import inherit_tracer
 from .types import (
     Block,
     GroupBlock,
@@ -69,11 +71,13 @@ def _create_child_run(
 
     child_run_id should be composite: "parent_id>child_segment".
     """
+    from .state import _block_deadline, effective_deadline
+
     # Deep copy context for isolation
     child_ctx = WorkflowContext(
         results=dict(state.ctx.results),
         results_scoped=dict(state.ctx.results_scoped),
-        variables=copy.deepcopy(state.ctx.variables),
+        variables=copy.deepcopy(state.ctx.variables, shared_values(state.ctx.variables)),
         cwd=state.ctx.cwd,
         dry_run=state.ctx.dry_run,
         prompt_dir=state.ctx.prompt_dir,
@@ -115,7 +119,7 @@ def _create_child_run(
             )
         ]
     elif isinstance(block, GroupBlock):
-        child_stack = [Frame(block=block)]
+        child_stack = [Frame(block=block, deadline=_block_deadline(block))]
     elif isinstance(block, LoopBlock):
         items = child_ctx.get_var(block.loop_over)
         if isinstance(items, list) and items:
@@ -129,6 +133,7 @@ def _create_child_run(
                     scope_label=scope,
                     loop_items=items,
                     loop_index=0,
+                    deadline=_block_deadline(block),
                 )
             ]
         else:
@@ -141,6 +146,7 @@ def _create_child_run(
         if state.checkpoint_dir
         else None
     )
+    deadline = effective_deadline(state)
     child_state = RunState(
         run_id=child_run_id,
         ctx=child_ctx,
@@ -150,7 +156,11 @@ def _create_child_run(
         wf_hash=state.wf_hash,
         checkpoint_dir=child_checkpoint_dir,
         workflow_name=state.workflow_name,
+        deadline=deadline[0] if deadline else None,
+        deadline_source=deadline[1] if deadline else "",
     )
+    child_state._blob_refs = dict(state._blob_refs)
+    inherit_tracer(state, child_state)
     return child_state
 
 
@@ -160,5 +170,7 @@ def _collect_subworkflow_results_from_child(state: RunState, child: RunState) ->
         state.ctx.results_scoped,
         state.ctx.results,
         child.ctx.results_scoped,
+        state.ctx.retired,
+        child.ctx.retired,
     )
     state.ctx._order_seq = max(state.ctx._order_seq, child.ctx._order_seq)
@@ -0,0 +1,107 @@
+"""Adaptive lane concurrency for ParallelEachBlock (concurrency="adaptive").
+
+An adaptive block runs its items in batches like a fixed ``max_concurrency``
+block (see parallel._handle_parallel_batched), but the batch size is decided
+anew after every batch by an AIMD controller:
+
+- additive increase: a healthy batch raises the limit by one lane;
+- multiplicative decrease: any congestion signal halves it.
+
+The limit starts at ``min_concurrency`` and stays within
+[min_concurrency, max_concurrency] (max defaults to the CPU count).
+
+Congestion signals, read when a batch completes:
+
+- failure rate of the batch's lanes above ``FAILURE_RATE``;
+- 1-minute load average per CPU above ``LOAD_PER_CPU``;
+- available memory below ``MIN_MEM_AVAILABLE`` of total (Linux only);
+- mean lane latency above ``LATENCY_FACTOR`` × the lowest mean seen so far
+  for the block (lanes slowing down as concurrency grows = contention).
+
+Each decision is returned as an event dict; the runner appends it to the
+run's ``events.jsonl`` so the controller's behaviour can be reviewed.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, NamedTuple
+
+FAILURE_RATE = 0.25
+LOAD_PER_CPU = 1.0
+MIN_MEM_AVAILABLE = 0.1
+LATENCY_FACTOR = 2.0
+
+
+class BatchSignals(NamedTuple):
+    """What the controller observed for one completed batch."""
+
+    lanes: int
+    failed: int
+    latency: float  # mean lane duration, seconds
+    load: float | None  # 1-minute load average per CPU
+    mem_available: float | None  # MemAvailable / MemTotal
+
+
+def system_load() -> float | None:
+    """1-minute load average per CPU, or None where unsupported."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+def memory_available() -> float | None:
+    """Fraction of memory available (Linux /proc/meminfo), else None."""
+    fields: dict[str, int] = {}
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("MemTotal", "MemAvailable"):
+                    fields[key] = int(rest.split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    if not fields.get("MemTotal") or "MemAvailable" not in fields:
+        return None
+    return fields["MemAvailable"] / fields["MemTotal"]
+
+
+def concurrency_bounds(block: Any) -> tuple[int, int]:
+    """(min, max) lanes per batch for an adaptive block."""
+    lo = max(1, block.min_concurrency)
+    hi = block.max_concurrency or os.cpu_count() or lo
+    return lo, max(lo, hi)
+
+
+def aimd_step(
+    limit: int,
+    lo: int,
+    hi: int,
+    signals: BatchSignals,
+    baseline: float | None,
+) -> tuple[int, str, list[str]]:
+    """Next batch size from the last batch's signals.
+
+    ``baseline`` is the lowest mean lane latency observed so far for the
+    block (None before the first batch).  Returns (limit, decision,
+    reasons) where decision is "increase", "decrease" or "hold".
+    """
+    reasons: list[str] = []
+    if signals.lanes and signals.failed / signals.lanes > FAILURE_RATE:
+        reasons.append(f"failure rate {signals.failed}/{signals.lanes}")
+    if signals.load is not None and signals.load > LOAD_PER_CPU:
+        reasons.append(f"load {signals.load:.2f}/cpu")
+    if signals.mem_available is not None and signals.mem_available < MIN_MEM_AVAILABLE:
+        reasons.append(f"memory available {signals.mem_available:.0%}")
+    if baseline and signals.latency > LATENCY_FACTOR * baseline:
+        reasons.append(f"latency {signals.latency / baseline:.1f}x baseline")
+    if reasons:
+        new = max(lo, limit // 2)
+    else:
+        new = min(hi, limit + 1)
+    if new > limit:
+        return new, "increase", reasons
+    if new < limit:
+        return new, "decrease", reasons
+    return new, "hold", reasons
@@ -28,6 +28,9 @@ class Frame:
         "chosen_blocks",
         "saved_vars",
         "saved_prompt_dir",
+        "not_before",
+        "attempt_deadline",
+        "deadline",
     )
 
     def __init__(
@@ -42,6 +45,9 @@ class Frame:
         chosen_blocks: list[Block] | None = None,
         saved_vars: dict[str, Any] | None = None,
         saved_prompt_dir: str | None = None,
+        not_before: float = 0.0,
+        attempt_deadline: float | None = None,
+        deadline: float | None = None,
     ):
         self.block = block
         self.block_index = block_index
@@ -53,6 +59,13 @@ class Frame:
         self.chosen_blocks = chosen_blocks
         self.saved_vars = saved_vars
         self.saved_prompt_dir = saved_prompt_dir
+        # Retry frames (runtime only, monotonic clock): backoff before the
+        # attempt's next shell step, and the attempt_timeout deadline.
+        self.not_before = not_before
+        self.attempt_deadline = attempt_deadline
+        # Wall-clock (time.time()) end of the block's budget; runtime only,
+        # so a resumed run restarts its block budgets
+        self.deadline = deadline
 
 
 class RunState:
@@ -75,12 +88,19 @@ class RunState:
         started_at: str = "",
         parallel_block_name: str = "",
         lane_index: int = -1,
+        on_failure: str = "",
         spawn_exec_key: str = "",
         subagent_block_name: str = "",
         subagent_exec_key: str = "",
         relay_parent_exec_key: str = "",
         relay_block_kind: str = "",
         relay_block_name: str = "",
+        timing: dict[str, float] | None = None,
+        priority: str = "interactive",
+        llm_limits: dict[str, int] | None = None,
+        deadline: float | None = None,
+        deadline_source: str = "",
+        parent_run: dict[str, str] | None = None,
     ):
         self.run_id = run_id
         self.ctx = ctx
@@ -97,12 +117,29 @@ class RunState:
         self.started_at = started_at or datetime.now(timezone.utc).isoformat()
         self.parallel_block_name = parallel_block_name
         self.lane_index = lane_index
+        # Parallel lane failure policy copied from the block ("cancel" = fail fast)
+        self.on_failure = on_failure
         self.spawn_exec_key = spawn_exec_key
         self.subagent_block_name = subagent_block_name
         self.subagent_exec_key = subagent_exec_key
         self.relay_parent_exec_key = relay_parent_exec_key
         self.relay_block_kind = relay_block_kind
         self.relay_block_name = relay_block_name
+        # Run-level time accounting (engine_cpu; step components live on StepResult)
+        self.timing: dict[str, float] = dict(timing) if timing else {}
+        # Shell scheduler priority class of a root run; child runs and lanes
+        # use their root's (see WorkflowRunner._shell_priority)
+        self.priority = priority
+        # Per-run LLM lane limits of a root run (see infra/rate_limit.py)
+        self.llm_limits = llm_limits
+        # Wall-clock (time.time()) end of the run's time budget.  Child runs
+        # and lanes inherit the tightest deadline of their spawn point, and
+        # deadline_source names the block it came from ("" = the run's own).
+        self.deadline = deadline
+        self.deadline_source = deadline_source
+        # Lineage of a forked root run: {"run_id", "exec_key"} of the run and
+        # step it was forked from (unrelated to parent_run_id of child runs)
+        self.parent_run = parent_run
         self.is_resumed: bool = False
         self._ephemeral_keys: set[str] = set()
         self._last_action: ActionBase | None = None
@@ -120,6 +157,28 @@ class RunState:
             ""  # child run_id being proxied transparently
         )
         self._advance_hook: Any = None  # AdvanceHook set during dry-run
+        self._tracer: Any = None  # Tracer shared by the run tree when tracing
+        # threading.Event shared by fail-fast lanes (on_failure="cancel")
+        self._lane_cancel: Any = None
+        # exec_key -> (monotonic, ISO timestamp) when the action was handed out
+        self._issued: dict[str, tuple[float, str]] = {}
+        # (exec_key, model) of the LLM rate-limit permit held for the pending prompt
+        self._llm_permit: tuple[str, str] | None = None
+        # Why the pending prompt is held by the rate limiter ("" = not held)
+        self._llm_held: str = ""
+        # Size of the last checkpoint write (RunCache memory estimate)
+        self._checkpoint_bytes: int = 0
+        self._spilled: bool = False  # results/variables dropped, see checkpoint_spill()
+        # exec_key -> (order, blob handle or literal wrapper, None when stored
+        # as is) of structured outputs already checked against the blob threshold
+        self._blob_refs: dict[str, tuple[int, Any]] = {}
+        # Batch loop variable -> AIMD controller of an adaptive parallel block
+        # ({"exec_key", "sizes", "limit", "baseline"}, see _adaptive_chunks);
+        # checkpointed so a resumed run rebuilds the same batches
+        self._adaptive_batches: dict[str, dict[str, Any]] = {}
+        # Batch loop variable -> {"exec_key", "order"}: item permutation of a
+        # batched longest_first block, checkpointed for the same reason
+        self._ranked_batches: dict[str, dict[str, Any]] = {}
 
     @property
     def parent_run_id(self) -> str | None:
@@ -1,7 +1,8 @@
 """Parallel block handling for the workflow engine.
 
 Manages ParallelEachBlock execution: child run creation, lane setup,
-batched execution with max_concurrency, and dry-run recording.
+batched execution with max_concurrency (fixed or adaptive batch sizes),
+and dry-run recording.
 """
 
 from __future__ import annotations
@@ -9,6 +10,7 @@ from __future__ import annotations
 import copy
 import logging
 import uuid
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
@@ -25,10 +27,16 @@ from .core import AdvanceResult, Frame, RunState
 from .protocol import ParallelAction, ParallelLane
 from ..utils import (
     dry_run_structured_output,
+    make_reducer,
     record_leaf_result,
 )
+from ..infra.blobs import shared_values
 from ..infra.checkpoint import checkpoint_dir_from_run_id
+from ..infra.lane_history import item_key, load_lane_costs
+from .actions import _build_error_action
+from .concurrency import BatchSignals, aimd_step, concurrency_bounds
 from .child_runs import set_relay_child_metadata
+from .tracing import inherit_tracer
 
 logger = logging.getLogger("workflow-engine")
 
@@ -39,7 +47,7 @@ def _handle_parallel(
     base: str,
 ) -> AdvanceResult:
     """Handle ParallelEachBlock: create child runs for each lane."""
-    from .state import _make_exec_key, advance
+    from .state import _block_deadline, _make_exec_key, advance, effective_deadline
 
     items = state.ctx.get_var(block.parallel_for)
     if not isinstance(items, list) or not items:
@@ -49,9 +57,28 @@ def _handle_parallel(
 
     exec_key = _make_exec_key(state, base)
 
-    # Batch if max_concurrency limits the number of concurrent lanes
-    if block.max_concurrency and len(items) > block.max_concurrency:
-        return _handle_parallel_batched(state, block, base, items)
+    # Reject a bad reduce spec before any lane runs
+    if block.reduce is not None:
+        try:
+            make_reducer(block.reduce)
+        except ValueError as exc:
+            return _build_error_action(state, str(exc), exec_key=exec_key), []
+
+    # Longest-first: rank items by expected cost.  Batches of an outer block
+    # arrive already ranked.
+    order: list[int] | None = None
+    if block.order == "longest_first" and _batch_chunk_var(block) is None:
+        order = _dispatch_order(state, block, items)
+
+    # Batch if max_concurrency limits the number of concurrent lanes, or if
+    # an adaptive block has more items than its starting batch size.  The
+    # inner per-batch blocks never re-batch.
+    if _batch_chunk_var(block) is None:
+        if block.concurrency == "adaptive":
+            if len(items) > concurrency_bounds(block)[0]:
+                return _handle_parallel_batched(state, block, base, items, order)
+        elif block.max_concurrency and len(items) > block.max_concurrency:
+            return _handle_parallel_batched(state, block, base, items, order)
 
     # Resume: reuse children loaded from checkpoint
     if exec_key in state._resume_children:
@@ -79,11 +106,20 @@ def _handle_parallel(
         state._last_action = action
         return action, []  # children already in _runs
 
-    # Parent run: create child runs for parallel lanes
+    # Parent run: create child runs for parallel lanes.  Lanes inherit the
+    # tightest of the enclosing deadlines and the block's own budget.
+    deadline = effective_deadline(state)
+    own = _block_deadline(block)
+    if own is not None and (deadline is None or own < deadline[0]):
+        deadline = (own, block.name)
     child_states: list[RunState] = []
     lanes: list[ParallelLane] = []
+    # Values above the blob threshold are shared by the lanes, not copied
+    shared = shared_values(state.ctx.variables)
+    # Lanes of a ranked batch keep their item's index in the whole block
+    indexes = _ranked_batch_indexes(state, block, len(items)) or range(len(items))
 
-    for i, item in enumerate(items):
+    for i, item in zip(indexes, items):
         child_segment = uuid.uuid4().hex[:12]
         child_run_id = f"{state.run_id}>{child_segment}"
         lane_scope = f"par:{base}[i={i}]"
@@ -91,7 +127,7 @@ def _handle_parallel(
         child_ctx = WorkflowContext(
             results=dict(state.ctx.results),
             results_scoped=dict(state.ctx.results_scoped),
-            variables=copy.deepcopy(state.ctx.variables),
+            variables=copy.deepcopy(state.ctx.variables, dict(shared)),
             cwd=state.ctx.cwd,
             dry_run=state.ctx.dry_run,
             prompt_dir=state.ctx.prompt_dir,
@@ -126,8 +162,13 @@ def _handle_parallel(
             workflow_name=state.workflow_name,
             parallel_block_name=block.name,
             lane_index=i,
+            on_failure=block.on_failure,
+            deadline=deadline[0] if deadline else None,
+            deadline_source=deadline[1] if deadline else "",
         )
+        child_state._blob_refs = dict(state._blob_refs)
         set_relay_child_metadata(child_state, block, exec_key)
+        inherit_tracer(state, child_state)
         child_states.append(child_state)
 
         lane_exec_key = f"{exec_key}[i={i}]"
@@ -141,6 +182,12 @@ def _handle_parallel(
         )
         state.child_run_ids.append(child_run_id)
 
+    # Lanes keep their item index (results and outputs stay in item order);
+    # only the order in which they are dispatched changes
+    if order is not None:
+        child_states = [child_states[i] for i in order]
+        lanes = [lanes[i] for i in order]
+
     action = ParallelAction(
         run_id=state.run_id,
         exec_key=exec_key,
@@ -159,32 +206,74 @@ def _handle_parallel_batched(
     block: ParallelEachBlock,
     base: str,
     items: list[Any],
+    order: list[int] | None = None,
 ) -> AdvanceResult:
     """Handle ParallelEachBlock with max_concurrency by chunking into batches.
 
     Creates a synthetic LoopBlock over chunks of items, where each chunk
     is a ParallelEachBlock with at most max_concurrency lanes. The loop
     executes batches sequentially; lanes within each batch run in parallel.
-    """
-    from .state import advance
 
-    assert block.max_concurrency is not None
-    chunk_size = block.max_concurrency
-    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+    With concurrency="adaptive" the batches are sized by adapt_batches()
+    as earlier batches complete; see _adaptive_chunks.  With a dispatch
+    ``order`` (longest_first) the items are batched in that order, so the
+    most expensive items share the first batches; their lanes keep the
+    items' indexes and their outputs the items' order.
+    """
+    from .state import _block_deadline, _make_exec_key, advance
 
     # Variable names for the synthetic loop (sanitized to avoid dot-path issues)
     safe = base.replace("-", "_").replace(".", "_")
     chunks_var = f"_par_{safe}_chunks"
     chunk_var = f"_par_{safe}_chunk"
+    failed_var = f"{chunk_var}_failed"
+
+    if order is not None:
+        # Lane history changes as batches finish; a resumed run must rebuild
+        # the batches it already recorded, so the first ranking is kept.
+        exec_key = _make_exec_key(state, base)
+        saved = state._ranked_batches.get(chunk_var)
+        if (
+            saved is not None
+            and saved["exec_key"] == exec_key
+            and len(saved["order"]) == len(items)
+        ):
+            ranked: list[int] = saved["order"]
+        else:
+            ranked = order
+            state._ranked_batches[chunk_var] = {"exec_key": exec_key, "order": ranked}
+        items = [items[i] for i in ranked]
+
+    if block.concurrency == "adaptive":
+        chunks = _adaptive_chunks(state, block, base, items, chunk_var)
+    else:
+        assert block.max_concurrency is not None
+        chunks = _chunk(items, block.max_concurrency)
+    chunk_size = len(chunks[0])
     state.ctx.variables[chunks_var] = chunks
 
-    # Inner parallel block (no max_concurrency — each chunk is within limits)
+    # Inner parallel block (no max_concurrency — each chunk is within limits).
+    # With on_failure="cancel", apply_submit sets failed_var when a batch
+    # fails and the remaining batches are skipped by this condition.
+    # A reduce carries its accumulator across batches in result_var (see
+    # reduce_seed), so the last batch's output is the reduction of all lanes.
     inner_parallel = ParallelEachBlock(
         name=block.name,
         parallel_for=f"variables.{chunk_var}",
         item_var=block.item_var,
         template=block.template,
         model=block.model,
+        concurrency=block.concurrency,
+        min_concurrency=block.min_concurrency,
+        max_concurrency=block.max_concurrency,
+        order=block.order,
+        cost=block.cost,
+        on_failure=block.on_failure,
+        condition=(lambda ctx: not ctx.variables.get(failed_var))
+        if block.on_failure == "cancel"
+        else None,
+        reduce=block.reduce,
+        result_var=block.result_var or (f"{chunk_var}_reduced" if block.reduce else ""),
     )
 
     # Wrap in a loop over chunks
@@ -205,6 +294,7 @@ def _handle_parallel_batched(
             scope_label=scope,
             loop_items=chunks,
             loop_index=0,
+            deadline=_block_deadline(block),
         )
     )
     logger.debug(
@@ -216,6 +306,215 @@ def _handle_parallel_batched(
     return advance(state)
 
 
+def _item_cost(item: Any, cost: Any) -> float | None:
+    """Expected cost of one item from a dotpath into it or a callable."""
+    if callable(cost):
+        try:
+            value = cost(item)
+        except Exception:
+            logger.warning("cost function failed for item %r", item, exc_info=True)
+            return None
+    else:
+        value = item
+        for part in cost.split("."):
+            value = value.get(part) if isinstance(value, dict) else getattr(value, part, None)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _dispatch_order(state: RunState, block: ParallelEachBlock, items: list[Any]) -> list[int]:
+    """Item indexes, highest expected cost first (stable for ties).
+
+    Costs come from ``block.cost`` or, without it, from the items' lane
+    durations in earlier checkpointed runs.  Items with no known cost are ranked at the
+    mean of the known ones; with none known the item order is kept.
+    """
+    if block.cost is not None:
+        costs = [_item_cost(item, block.cost) for item in items]
+    else:
+        history = (
+            load_lane_costs(state.ctx.cwd, state.workflow_name, block.name)
+            if state.checkpoint_dir
+            else {}
+        )
+        costs = [history.get(item_key(item)) for item in items]
+    known = [c for c in costs if c is not None]
+    if not known:
+        return list(range(len(items)))
+    mean = sum(known) / len(known)
+    ranked = [mean if c is None else c for c in costs]
+    return sorted(range(len(items)), key=lambda i: -ranked[i])
+
+
+def _chunk(items: list[Any], size: int) -> list[list[Any]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _batch_chunk_var(block: ParallelEachBlock) -> str | None:
+    """Loop variable of the synthetic batch loop, if block is one of its batches."""
+    prefix = "variables._par_"
+    if not block.parallel_for.startswith(prefix):
+        return None
+    return block.parallel_for[len("variables."):]
+
+
+def _ranked_batch(state: RunState, block: ParallelEachBlock) -> dict[str, Any] | None:
+    """Saved ranking of a longest_first block, if block is one of its batches."""
+    chunk_var = _batch_chunk_var(block)
+    if chunk_var is None or block.order != "longest_first":
+        return None
+    return state._ranked_batches.get(chunk_var)
+
+
+def _ranked_batch_indexes(
+    state: RunState, block: ParallelEachBlock, count: int,
+) -> list[int] | None:
+    """Item indexes (in the ``for`` list) of the current ranked batch's items."""
+    saved = _ranked_batch(state, block)
+    chunk_var = _batch_chunk_var(block)
+    chunks = state.ctx.variables.get(f"{chunk_var}s")
+    if saved is None or not isinstance(chunks, list):
+        return None
+    batch = state.ctx.variables.get(f"{chunk_var}_index", 0)
+    start = sum(len(chunk) for chunk in chunks[:batch])
+    return saved["order"][start : start + count]
+
+
+def ranked_lanes_so_far(state: RunState, block: ParallelEachBlock) -> set[int] | None:
+    """Item indexes of the lanes of a ranked block's batches up to the current one.
+
+    Ranked (longest_first) batches run in cost order, so a batch's output,
+    and its reduce, is rebuilt from the lanes of every batch so far (see
+    WorkflowRunner._collect_parallel_results) to keep the ``for`` order.
+    None if block is not one of a ranked block's batches.
+    """
+    saved = _ranked_batch(state, block)
+    chunk_var = _batch_chunk_var(block)
+    chunks = state.ctx.variables.get(f"{chunk_var}s")
+    if saved is None or not isinstance(chunks, list):
+        return None
+    batch = state.ctx.variables.get(f"{chunk_var}_index", 0)
+    end = sum(len(chunk) for chunk in chunks[: batch + 1])
+    return set(saved["order"][:end])
+
+
+def _adaptive_chunks(
+    state: RunState,
+    block: ParallelEachBlock,
+    base: str,
+    items: list[Any],
+    chunk_var: str,
+) -> list[list[Any]]:
+    """Batches for an adaptive block: sizes already decided, then the rest.
+
+    The controller state is kept in ``state._adaptive_batches[chunk_var]``
+    and checkpointed, so a resumed run rebuilds the same batches (and
+    replays their recorded results).  It is tagged with the block's exec_key; entering the block
+    anew (e.g. in the next iteration of an outer loop) starts over at
+    min_concurrency.
+    """
+    from .state import _make_exec_key
+
+    exec_key = _make_exec_key(state, base)
+    ctl = state._adaptive_batches.get(chunk_var)
+    if not isinstance(ctl, dict) or ctl.get("exec_key") != exec_key:
+        ctl = {
+            "exec_key": exec_key,
+            "sizes": [],
+            "limit": concurrency_bounds(block)[0],
+            "baseline": None,
+        }
+        state._adaptive_batches[chunk_var] = ctl
+    chunks: list[list[Any]] = []
+    pos = 0
+    for size in ctl["sizes"]:
+        chunks.append(items[pos : pos + size])
+        pos += size
+    return chunks + _chunk(items[pos:], ctl["limit"])
+
+
+def adapt_batches(state: RunState, signals: BatchSignals) -> dict[str, Any] | None:
+    """Resize the remaining batches of an adaptive block after one completes.
+
+    Called with the signals of the batch whose lanes just finished, before
+    its results are applied.  Returns the controller decision as an event
+    dict, or None if the pending block is not an adaptive batch or nothing
+    is left to resize.
+    """
+    block = pending_parallel_block(state)
+    chunk_var = _batch_chunk_var(block) if block is not None else None
+    if block is None or chunk_var is None or block.concurrency != "adaptive":
+        return None
+    ctl = state._adaptive_batches.get(chunk_var)
+    frame = state.stack[-1]
+    if not isinstance(ctl, dict) or frame.loop_items is None:
+        return None
+    done = frame.loop_index + 1
+    remaining = [item for chunk in frame.loop_items[done:] for item in chunk]
+    if not remaining:
+        return None
+
+    lo, hi = concurrency_bounds(block)
+    before = ctl["limit"]
+    limit, decision, reasons = aimd_step(before, lo, hi, signals, ctl["baseline"])
+    if signals.latency > 0:
+        ctl["baseline"] = min(ctl["baseline"] or signals.latency, signals.latency)
+    ctl["sizes"] = [len(chunk) for chunk in frame.loop_items[:done]]
+    ctl["limit"] = limit
+    # The loop frame reads the same list on re-entry (state._pop_frame);
+    # the loop's list variable is <chunk_var>s (see _handle_parallel_batched)
+    frame.loop_items[done:] = _chunk(remaining, limit)
+    state.ctx.variables[f"{chunk_var}s"] = frame.loop_items
+
+    logger.info(
+        "adaptive concurrency %s: batch %d, %d -> %d lanes (%s%s)",
+        ctl["exec_key"], frame.loop_index, before, limit, decision,
+        f": {', '.join(reasons)}" if reasons else "",
+    )
+    return {
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "event": "concurrency",
+        "block": ctl["exec_key"],
+        "batch": frame.loop_index,
+        "limit_before": before,
+        "limit": limit,
+        "decision": decision,
+        "reasons": reasons,
+        "signals": {
+            k: round(v, 4) if isinstance(v, float) else v
+            for k, v in signals._asdict().items()
+        },
+    }
+
+
+def pending_parallel_block(state: RunState) -> ParallelEachBlock | None:
+    """The ParallelEachBlock whose lanes the run is waiting on, if any."""
+    from .state import _get_frame_children
+
+    if not state.stack:
+        return None
+    frame = state.stack[-1]
+    children = _get_frame_children(frame, state)
+    if not children or frame.block_index >= len(children):
+        return None
+    block = children[frame.block_index]
+    return block if isinstance(block, ParallelEachBlock) else None
+
+
+def reduce_seed(state: RunState, block: ParallelEachBlock) -> Any:
+    """Initial accumulator for a reduce: the previous batch's value, else None.
+
+    Ranked batches reduce every lane so far (ranked_lanes_so_far) from None.
+    """
+    chunk_var = _batch_chunk_var(block)
+    if chunk_var is None or _ranked_batch(state, block) is not None:
+        return None
+    if not state.ctx.variables.get(f"{chunk_var}_index", 0):
+        return None
+    return state.ctx.variables.get(block.result_var)
+
+
 def _auto_record_dry_run(
     state: RunState, block: Block, base: str, exec_key: str
 ) -> None:
@@ -116,6 +116,15 @@ class ParallelAction(ActionBase):
     model: str | None = None
 
 
+class PendingAction(ActionBase):
+    """A lane's prompt held back by the LLM rate limiter; retry later."""
+
+    action: Literal["pending"] = "pending"
+    exec_key: str = ""
+    retry_after: float = 0.0
+    reason: str = ""
+
+
 class CompletedAction(ActionBase):
     action: Literal["completed"] = "completed"
     summary: dict[str, Any] = Field(default_factory=dict)
@@ -141,6 +150,16 @@ class CancelledAction(ActionBase):
     action: Literal["cancelled"] = "cancelled"
 
 
+class DeadlineExceededAction(ActionBase):
+    """Run stopped because a time budget ran out; carries the partial results."""
+
+    action: Literal["deadline_exceeded"] = "deadline_exceeded"
+    deadline_at: str = ""  # "run", or the block (chain) whose budget ran out
+    summary: dict[str, Any] = Field(default_factory=dict)
+    totals: dict[str, Any] = Field(default_factory=dict)
+    compact: bool | None = None
+
+
 # ---------------------------------------------------------------------------
 # Dry-run models
 # ---------------------------------------------------------------------------
@@ -168,6 +187,10 @@ class DryRunNode(BaseModel):
     name: str
     detail: str = ""
     children: list[DryRunNode] = Field(default_factory=list)
+    # Symbolic dry-run only: times the children run (loop items, lanes,
+    # retry attempts) and the block's condition as text.
+    multiplicity: int | None = None
+    condition: str | None = None
 
 
 class DryRunSummary(BaseModel):
@@ -175,6 +198,11 @@ class DryRunSummary(BaseModel):
 
     step_count: int = 0
     steps_by_type: dict[str, int] = Field(default_factory=dict)
+    # Symbolic dry-run only: counts above are upper bounds weighted by
+    # multiplicity; unresolved lists loops/fan-outs whose items are unknown.
+    symbolic: bool | None = None
+    prompt_tokens: int | None = None
+    unresolved: list[str] | None = None
 
 
 class DryRunCompleteAction(ActionBase):
@@ -226,10 +254,12 @@ PromptAction.model_rebuild()
 SubagentAction.model_rebuild()
 ParallelLane.model_rebuild()
 ParallelAction.model_rebuild()
+PendingAction.model_rebuild()
 CompletedAction.model_rebuild()
 ErrorAction.model_rebuild()
 HaltedAction.model_rebuild()
 CancelledAction.model_rebuild()
+DeadlineExceededAction.model_rebuild()
 DryRunNode.model_rebuild()
 DryRunSummary.model_rebuild()
 DryRunCompleteAction.model_rebuild()
@@ -0,0 +1,179 @@
+"""Session recorder: engine calls and shell results in one JSONL trace file.
+
+With ``MEMENTO_RECORD=<path>`` (or ``start_recording(path)``) every public
+WorkflowRunner call (start, resume, submit, submit_many, next, wait,
+cancel) is appended to the trace with its arguments and the actions it
+returned, together with each new run's construction arguments and the
+result of every shell step.  ``replay.py`` drives a fresh runner from the
+trace without the relay or any shell, and reports divergences.
+
+One JSON object per line; ``event`` says which::
+
+    {"event": "header", "version": 1, "protocol_version": 1, "created_at": "..."}
+    {"event": "run", "run_id", "workflow", "wf_hash", "variables", "checkpoint",
+     "priority", "llm_limits", "budget"}
+    {"event": "call", "method": "submit", "args": {...}, "result": {...}, "seconds": 0.002}
+    {"event": "shell", "run_id": "<root run_id>", "exec_key", "output", "status",
+     "structured", "error", "duration", "timing", "resources"}
+
+A call is written when it returns, after the shells it ran.  Shell events
+are keyed by root run_id and exec_key, which is unique within a run tree
+(lane and subworkflow steps are scoped), so replay does not depend on the
+random run_ids of child runs.  Nested calls (``submit_many`` submitting
+each entry) are recorded once, as the outer call.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, TypeVar
+
+from .core import PROTOCOL_VERSION
+from .protocol import ActionBase, action_to_dict
+
+logger = logging.getLogger("workflow-engine")
+
+TRACE_VERSION = 1
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+class Recorder:
+    """Appends trace events to one file; safe to share between threads."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._header = False
+
+    def write(self, event: dict[str, Any]) -> None:
+        line = json.dumps(event, default=str)
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    if not self._header:
+                        f.write(json.dumps({
+                            "event": "header",
+                            "version": TRACE_VERSION,
+                            "protocol_version": PROTOCOL_VERSION,
+                            "created_at": datetime.now(timezone.utc).isoformat(),
+                        }) + "\n")
+                        self._header = True
+                    f.write(line + "\n")
+            except OSError as e:
+                logger.warning("trace write failed %s: %s", self.path, e)
+
+    def run(self, run_id: str, workflow: str, wf_hash: str, **kwargs: Any) -> None:
+        """A new root run and the arguments it was created with."""
+        self.write({
+            "event": "run", "run_id": run_id, "workflow": workflow,
+            "wf_hash": wf_hash, **kwargs,
+        })
+
+    def shell(
+        self,
+        run_id: str,
+        exec_key: str,
+        result: tuple[str, str, Any, str | None],
+        duration: float,
+        timing: dict[str, float],
+        resources: dict[str, float],
+    ) -> None:
+        """One executed shell step of the run tree rooted at ``run_id``."""
+        output, status, structured, error = result
+        self.write({
+            "event": "shell", "run_id": run_id.split(">", 1)[0], "exec_key": exec_key,
+            "output": output, "status": status, "structured": structured,
+            "error": error, "duration": duration, "timing": timing,
+            "resources": resources,
+        })
+
+
+_recorder: Recorder | None = (
+    Recorder(Path(os.environ["MEMENTO_RECORD"])) if os.environ.get("MEMENTO_RECORD") else None
+)
+# Per thread: depth of recorded calls in progress, and replay suspension
+_recording_local = threading.local()
+
+
+def start_recording(path: str | Path) -> Recorder:
+    """Record every later engine call in this process to ``path``."""
+    global _recorder
+    _recorder = Recorder(Path(path))
+    return _recorder
+
+
+def stop_recording() -> None:
+    global _recorder
+    _recorder = None
+
+
+def active_recorder() -> Recorder | None:
+    """The process recorder, unless recording is suspended in this thread."""
+    if getattr(_recording_local, "suspended", False):
+        return None
+    return _recorder
+
+
+@contextlib.contextmanager
+def recording_suspended() -> Iterator[None]:
+    """Don't record calls made by this thread (used while replaying)."""
+    previous = getattr(_recording_local, "suspended", False)
+    _recording_local.suspended = True
+    try:
+        yield
+    finally:
+        _recording_local.suspended = previous
+
+
+def to_wire(value: Any) -> Any:
+    """A call result as plain JSON data (actions via action_to_dict, no shell log)."""
+    if isinstance(value, ActionBase):
+        return action_to_dict(value, include_shell_log=False)
+    if isinstance(value, (list, tuple)):
+        return [to_wire(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_wire(v) for k, v in value.items()}
+    return value
+
+
+def records_call(method: _F) -> _F:
+    """Record a public WorkflowRunner method's arguments and result."""
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        recorder = active_recorder()
+        depth = getattr(_recording_local, "depth", 0)
+        if recorder is None or depth:
+            return method(self, *args, **kwargs)
+        _recording_local.depth = depth + 1
+        t0 = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            _recording_local.depth = depth
+        seconds = time.perf_counter() - t0
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        call_args = {k: v for k, v in bound.arguments.items() if k != "self"}
+        if self._root is not None and not call_args.get("run_id"):
+            call_args["run_id"] = self._root.run_id
+        recorder.write({
+            "event": "call", "method": method.__name__, "args": call_args,
+            "result": to_wire(result), "seconds": round(seconds, 6),
+        })
+        return result
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,322 @@
+"""Replay a recorded engine session (recording.py) without the relay or shells.
+
+Each ``run`` event recreates its runner (same workflow, variables and
+root run_id) in a scratch directory; each ``call`` is made again with the
+recorded arguments, and shell steps get their recorded results instead of
+running.  The actions returned are compared with the recorded ones: an
+``action`` or ``exec_key`` that differs anywhere in the result (lanes,
+``submit_many`` lists) is a divergence, as is a shell step with no
+recorded result.  Child run_ids are random, so recorded ones are mapped
+to the replayed ones as they appear in results.  ``wait`` is replayed with
+a zero timeout: the recorded call already returned what it waited for.
+
+Runs started before recording (resumed or forked from a checkpoint) have
+no ``run`` event; calls on them are reported as divergences.
+
+With ``--repeat``/``--concurrency`` the replayer is a load generator for
+engine-only profiling: many copies of the session, each in its own
+scratch directory, with call latency percentiles.
+
+Usage:
+    python -m scripts.engine.replay TRACE [--workflow-dir DIR ...] [--cwd DIR]
+                                          [--repeat N] [--concurrency N] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from .core import RunState
+from .recording import recording_suspended, to_wire
+from .types import WorkflowDef
+from .workflow_runner import WorkflowRunner
+from ..infra.loader import discover_workflows
+from ..infra.shell_exec import ShellResult
+from ..utils import workflow_hash
+
+ENGINE_ROOT = Path(__file__).resolve().parents[2]
+
+# Compared wherever they appear in a call result
+_COMPARED_FIELDS = ("action", "exec_key")
+
+
+def load_trace(path: str | Path) -> list[dict[str, Any]]:
+    """Events of a trace file, without headers (a torn last line is skipped)."""
+    events: list[dict[str, Any]] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(event, dict) and event.get("event") != "header":
+                events.append(event)
+    return events
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class _Replay:
+    """One replay of a trace into its own run store and directory."""
+
+    def __init__(self, events: list[dict[str, Any]], registry: dict[str, WorkflowDef], cwd: Path):
+        self.events = events
+        self.registry = registry
+        self.cwd = cwd
+        self.store: dict[str, RunState] = {}
+        self.runners: dict[str, WorkflowRunner] = {}
+        self.ids: dict[str, str] = {}  # recorded child run_id -> replayed
+        self.divergences: list[dict[str, Any]] = []
+        self.latencies: list[float] = []
+        self.calls = 0
+        self.shells_played = 0
+        self._shells: dict[tuple[str, str], deque[dict[str, Any]]] = {}
+        self._lock = threading.Lock()  # lanes play shells from worker threads
+        for event in events:
+            if event.get("event") == "shell":
+                key = (event["run_id"], event["exec_key"])
+                self._shells.setdefault(key, deque()).append(event)
+
+    def _diverge(self, index: int, method: str, path: str, recorded: Any, replayed: Any) -> None:
+        with self._lock:
+            self.divergences.append({
+                "index": index, "method": method, "path": path,
+                "recorded": recorded, "replayed": replayed,
+            })
+
+    def play_shell(
+        self, state: RunState, action: Any,
+    ) -> tuple[ShellResult, dict[str, float], dict[str, float]]:
+        """Recorded result of a shell step (the ``_shell_player`` hook)."""
+        root = state.run_id.split(">", 1)[0]
+        with self._lock:
+            queue = self._shells.get((root, action.exec_key))
+            event = queue.popleft() if queue else None
+            if event is not None:
+                self.shells_played += 1
+        if event is None:
+            self._diverge(-1, "shell", action.exec_key, "recorded result", None)
+            return ShellResult("", "failure", None, "replay: no recorded shell result"), {}, {}
+        return (
+            ShellResult(event["output"], event["status"], event.get("structured"), event.get("error")),
+            dict(event.get("timing") or {}),
+            dict(event.get("resources") or {}),
+        )
+
+    def run(self) -> None:
+        for index, event in enumerate(self.events):
+            kind = event.get("event")
+            if kind == "run":
+                self._create(index, event)
+            elif kind == "call":
+                self._call(index, event)
+
+    def _create(self, index: int, event: dict[str, Any]) -> None:
+        wf = self.registry.get(event["workflow"])
+        if wf is None:
+            self._diverge(index, "run", "workflow", event["workflow"], None)
+            return
+        if workflow_hash(wf) != event.get("wf_hash"):
+            self._diverge(index, "run", "wf_hash", event.get("wf_hash"), workflow_hash(wf))
+        runner = WorkflowRunner(
+            wf,
+            variables=event.get("variables"),
+            cwd=str(self.cwd),
+            registry=self.registry,
+            checkpoint=event.get("checkpoint", True),
+            run_id=event["run_id"],
+            run_store=self.store,
+            trace=False,
+            priority=event.get("priority", "interactive"),
+            llm_limits=event.get("llm_limits"),
+            budget=event.get("budget"),
+        )
+        runner._shell_player = self.play_shell
+        self.runners[event["run_id"]] = runner
+
+    def _translate(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {
+                k: self.ids.get(v, v) if k.endswith("run_id") and isinstance(v, str)
+                else self._translate(v)
+                for k, v in value.items()
+            }
+        if isinstance(value, list):
+            return [self._translate(v) for v in value]
+        return value
+
+    def _runner(self, method: str, run_id: str) -> WorkflowRunner | None:
+        if method == "start":
+            return self.runners.get(run_id)
+        if method in ("resume", "cancel"):
+            state = self.store.get(run_id)
+            if state is None:
+                return None
+            runner = WorkflowRunner.from_state(state, self.registry, run_store=self.store)
+        else:
+            runner = WorkflowRunner.from_run_store(self.store, self.registry)
+        runner._shell_player = self.play_shell
+        return runner
+
+    def _call(self, index: int, event: dict[str, Any]) -> None:
+        method = event["method"]
+        args = self._translate(dict(event.get("args") or {}))
+        run_id = args.get("run_id", "")
+        runner = self._runner(method, run_id)
+        if runner is None or (run_id and run_id.split(">", 1)[0] not in self.store):
+            self._diverge(index, method, "run_id", run_id, "run not started in this trace")
+            return
+        fn = getattr(runner, method)
+        params = inspect.signature(fn).parameters
+        kwargs = {k: v for k, v in args.items() if k in params}
+        if method == "wait":
+            kwargs["timeout"] = 0.0
+        t0 = time.perf_counter()
+        result = fn(**kwargs)
+        self.latencies.append(time.perf_counter() - t0)
+        self.calls += 1
+        self._compare(index, method, "result", event.get("result"), to_wire(result))
+
+    def _compare(self, index: int, method: str, path: str, recorded: Any, replayed: Any) -> None:
+        if isinstance(recorded, dict) and isinstance(replayed, dict):
+            for field in _COMPARED_FIELDS:
+                if field in recorded and recorded[field] != replayed.get(field):
+                    self._diverge(index, method, f"{path}.{field}", recorded[field], replayed.get(field))
+            for key, value in recorded.items():
+                if key.endswith("run_id") and isinstance(value, str):
+                    if isinstance(replayed.get(key), str):
+                        self.ids.setdefault(value, replayed[key])
+                elif isinstance(value, (dict, list)) and key in replayed:
+                    self._compare(index, method, f"{path}.{key}", value, replayed[key])
+        elif isinstance(recorded, list) and isinstance(replayed, list):
+            if len(recorded) != len(replayed):
+                self._diverge(index, method, f"{path}.length", len(recorded), len(replayed))
+            for i, (a, b) in enumerate(zip(recorded, replayed)):
+                self._compare(index, method, f"{path}[{i}]", a, b)
+
+    def report(self, seconds: float) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "shells": self.shells_played,
+            "divergences": self.divergences,
+            "seconds": round(seconds, 6),
+            "engine_seconds": round(sum(self.latencies), 6),
+            "p50_ms": round(_percentile(self.latencies, 50) * 1000, 3),
+            "p99_ms": round(_percentile(self.latencies, 99) * 1000, 3),
+            "latencies": self.latencies,
+        }
+
+
+def replay_trace(
+    events: list[dict[str, Any]],
+    registry: dict[str, WorkflowDef],
+    cwd: str | Path,
+) -> dict[str, Any]:
+    """Replay ``events`` (see load_trace) with runs under ``cwd``; returns a report.
+
+    ``{"calls", "shells", "divergences": [{"index", "method", "path",
+    "recorded", "replayed"}], "seconds", "engine_seconds", "p50_ms",
+    "p99_ms", "latencies"}`` — ``index`` is the event's position (-1 for
+    a shell step with no recorded result), ``latencies`` the seconds each
+    call took.
+    """
+    replay = _Replay(events, registry, Path(cwd).resolve())
+    t0 = time.perf_counter()
+    with recording_suspended():
+        replay.run()
+    return replay.report(time.perf_counter() - t0)
+
+
+def load_test(
+    events: list[dict[str, Any]],
+    registry: dict[str, WorkflowDef],
+    *,
+    repeat: int = 1,
+    concurrency: int = 1,
+) -> dict[str, Any]:
+    """Replay ``events`` ``repeat`` times on ``concurrency`` threads.
+
+    Each copy gets its own scratch directory.  Returns totals and call
+    latency percentiles over every copy.
+    """
+    def one(_: int) -> dict[str, Any]:
+        with tempfile.TemporaryDirectory(prefix="memento-replay-") as tmp:
+            return replay_trace(events, registry, tmp)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        reports = list(pool.map(one, range(repeat)))
+    seconds = time.perf_counter() - t0
+    latencies = [s for r in reports for s in r["latencies"]]
+    calls = sum(r["calls"] for r in reports)
+    return {
+        "replays": repeat,
+        "concurrency": concurrency,
+        "calls": calls,
+        "shells": sum(r["shells"] for r in reports),
+        "divergences": sum(len(r["divergences"]) for r in reports),
+        "seconds": round(seconds, 6),
+        "calls_per_sec": round(calls / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded engine session")
+    parser.add_argument("trace", type=Path, help="Trace file written with MEMENTO_RECORD")
+    parser.add_argument(
+        "--workflow-dir", action="append", default=[], type=Path,
+        help="Extra directory to discover workflows in (repeatable)",
+    )
+    parser.add_argument(
+        "--cwd", type=Path, default=Path("."),
+        help="Project whose .workflows/ to discover (runs are replayed elsewhere)",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the session N times")
+    parser.add_argument("--concurrency", type=int, default=1, help="Replays running at once")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    search = [ENGINE_ROOT / "skills", args.cwd.resolve() / ".workflows", *args.workflow_dir]
+    registry = discover_workflows(*(p for p in search if p.is_dir()))
+    events = load_trace(args.trace)
+
+    if args.repeat > 1 or args.concurrency > 1:
+        report = load_test(events, registry, repeat=args.repeat, concurrency=args.concurrency)
+        diverged = report["divergences"]
+    else:
+        with tempfile.TemporaryDirectory(prefix="memento-replay-") as tmp:
+            report = replay_trace(events, registry, tmp)
+        report.pop("latencies")
+        diverged = len(report["divergences"])
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print(
+            f"{report['calls']} calls, {report['shells']} shells in {report['seconds']:.3f}s "
+            f"(p50 {report['p50_ms']}ms, p99 {report['p99_ms']}ms), {diverged} divergences"
+        )
+        for d in report["divergences"][:20] if isinstance(report["divergences"], list) else []:
+            print(f"  #{d['index']} {d['method']} {d['path']}: {d['recorded']!r} -> {d['replayed']!r}")
+    sys.exit(1 if diverged else 0)
+
+
+if __name__ == "__main__":
+    main()
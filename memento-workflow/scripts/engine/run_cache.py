@@ -0,0 +1,315 @@
+"""Memory-bounded LRU run store with spill-to-checkpoint.
+
+``RunCache`` is a drop-in ``MutableMapping[str, RunState]`` for the MCP
+server's shared run store.  Resident runs are kept in LRU order and bounded
+by count and by estimated bytes (the size of each run's last checkpoint
+write).  When a bound is exceeded, the least recently used run is:
+
+- dropped together with its subtree, if it is a terminal root run whose
+  whole subtree is terminal (same rule as the old ``_evict_terminal_runs``);
+- otherwise spilled: checkpointed, and its results/variables released
+  (``checkpoint_spill``).  The RunState object stays in the store, so the
+  next ``get`` rehydrates it in place — callers never see the difference.
+
+Runs without a checkpoint directory cannot be spilled and stay resident.
+
+Eviction pops from the LRU head, so it is O(1) amortized.  Runs touched
+inside an active ``session()`` (one runner call) are pinned and never
+spilled under the caller's feet, and a tree with any pinned run is not
+dropped.  Victims are chosen under the lock but checkpointed after it is
+released; a run being spilled waits in ``_spilling`` and lookups of it
+block until the write is done.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator, MutableMapping
+from typing import Any
+
+from .core import RunState
+from ..infra.checkpoint import checkpoint_rehydrate, checkpoint_spill
+from ..infra.metrics import (
+    RUN_CACHE_REHYDRATIONS,
+    RUN_CACHE_SPILLS,
+    RUNS_EVICTED,
+)
+from ..infra.rate_limit import LLM_LIMITER
+
+logger = logging.getLogger("workflow-engine")
+
+TERMINAL_RUN_STATUSES = frozenset({"completed", "error", "halted", "cancelled", "deadline_exceeded"})
+
+DEFAULT_MAX_RUNS = int(os.environ.get("MEMENTO_RUN_CACHE_MAX_RUNS", "100"))
+DEFAULT_MAX_BYTES = int(os.environ.get("MEMENTO_RUN_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+_MISSING = object()
+
+
+class RunCache(MutableMapping[str, RunState]):
+    """LRU run store bounded by resident count and estimated bytes."""
+
+    def __init__(
+        self,
+        max_runs: int = DEFAULT_MAX_RUNS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.max_runs = max_runs
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._spill_done = threading.Condition(self._lock)
+        self._resident: OrderedDict[str, RunState] = OrderedDict()
+        self._spilling: dict[str, RunState] = {}
+        self._spilled: dict[str, RunState] = {}
+        self._sizes: dict[str, int] = {}
+        self._bytes = 0
+        self._pins: dict[str, int] = {}
+        self._local = threading.local()
+        self.spills = 0
+        self.rehydrations = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------------
+    # Mapping protocol
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, run_id: str) -> RunState:
+        with self._lock:
+            self._wait_spill(run_id)
+            state = self._resident.get(run_id)
+            if state is not None:
+                self._resident.move_to_end(run_id)
+            else:
+                state = self._spilled.get(run_id)
+                if state is None:
+                    raise KeyError(run_id)
+                if not checkpoint_rehydrate(state):
+                    # Checkpoint gone — the run can no longer be served.
+                    del self._spilled[run_id]
+                    raise KeyError(run_id)
+                del self._spilled[run_id]
+                self._resident[run_id] = state
+                self.rehydrations += 1
+                RUN_CACHE_REHYDRATIONS.inc()
+            self._pin(run_id)
+            self._resize(run_id, state)
+            victims = self._enforce()
+        self._spill(victims)
+        return state
+
+    def __setitem__(self, run_id: str, state: RunState) -> None:
+        with self._lock:
+            self._wait_spill(run_id)
+            self._spilled.pop(run_id, None)
+            self._resident[run_id] = state
+            self._resident.move_to_end(run_id)
+            self._pin(run_id)
+            self._resize(run_id, state)
+            victims = self._enforce()
+        self._spill(victims)
+
+    def __delitem__(self, run_id: str) -> None:
+        with self._lock:
+            if run_id in self._resident:
+                del self._resident[run_id]
+                self._bytes -= self._sizes.pop(run_id, 0)
+            elif run_id in self._spilled:
+                del self._spilled[run_id]
+            elif run_id in self._spilling:
+                # _spill() finds it gone and discards the result
+                del self._spilling[run_id]
+            else:
+                raise KeyError(run_id)
+        # A run tree that leaves the store can no longer submit its prompts
+        LLM_LIMITER.release_run(run_id)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter([*self._resident, *self._spilling, *self._spilled])
+
+    def __len__(self) -> int:
+        return len(self._resident) + len(self._spilling) + len(self._spilled)
+
+    def __contains__(self, run_id: object) -> bool:
+        return (
+            run_id in self._resident or run_id in self._spilling
+            or run_id in self._spilled
+        )
+
+    def pop(self, run_id: str, default: Any = _MISSING) -> Any:
+        """Remove without rehydrating a spilled run."""
+        with self._lock:
+            state = self.peek(run_id)
+            if state is None:
+                if default is _MISSING:
+                    raise KeyError(run_id)
+                return default
+            del self[run_id]
+            return state
+
+    def clear(self) -> None:
+        with self._lock:
+            self._resident.clear()
+            self._spilling.clear()
+            self._spilled.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def peek(self, run_id: str) -> RunState | None:
+        """Return a run without touching LRU order or rehydrating it."""
+        with self._lock:
+            return (
+                self._resident.get(run_id) or self._spilling.get(run_id)
+                or self._spilled.get(run_id)
+            )
+
+    # ------------------------------------------------------------------
+    # Pinning — runs used by an in-flight runner call are never spilled
+    # ------------------------------------------------------------------
+
+    @contextlib.contextmanager
+    def session(self) -> Iterator[None]:
+        """Pin every run touched by this thread until the outermost exit."""
+        pinned: set[str] | None = getattr(self._local, "pinned", None)
+        if pinned is not None:
+            yield
+            return
+        self._local.pinned = pinned = set()
+        try:
+            yield
+        finally:
+            self._local.pinned = None
+            with self._lock:
+                for run_id in pinned:
+                    n = self._pins.get(run_id, 0) - 1
+                    if n > 0:
+                        self._pins[run_id] = n
+                    else:
+                        self._pins.pop(run_id, None)
+                victims = self._enforce()
+            self._spill(victims)
+
+    def _pin(self, run_id: str) -> None:
+        pinned = getattr(self._local, "pinned", None)
+        if pinned is not None and run_id not in pinned:
+            pinned.add(run_id)
+            self._pins[run_id] = self._pins.get(run_id, 0) + 1
+
+    # ------------------------------------------------------------------
+    # Bounds
+    # ------------------------------------------------------------------
+
+    def _resize(self, run_id: str, state: RunState) -> None:
+        size = state._checkpoint_bytes
+        self._bytes += size - self._sizes.get(run_id, 0)
+        self._sizes[run_id] = size
+
+    def _over(self) -> bool:
+        return len(self._resident) > self.max_runs or self._bytes > self.max_bytes
+
+    def _enforce(self) -> list[tuple[str, RunState]]:
+        """Drop or pick LRU runs to spill until within bounds (or nothing is evictable).
+
+        Runs to spill move to ``_spilling`` and are returned; the caller
+        passes them to ``_spill()`` once it has released the lock.
+        """
+        victims: list[tuple[str, RunState]] = []
+        skipped = 0
+        while self._over() and skipped < len(self._resident):
+            run_id, state = next(iter(self._resident.items()))
+            if run_id in self._pins:
+                self._resident.move_to_end(run_id)
+                skipped += 1
+                continue
+            is_root = state.parent_run_id is None or state.parent_run_id not in self
+            if is_root and self._droppable(run_id):
+                self._drop_tree(run_id)
+                continue
+            if state.checkpoint_dir is None:
+                self._resident.move_to_end(run_id)
+                skipped += 1
+                continue
+            del self._resident[run_id]
+            self._bytes -= self._sizes.pop(run_id, 0)
+            self._spilling[run_id] = state
+            victims.append((run_id, state))
+        return victims
+
+    def _spill(self, victims: list[tuple[str, RunState]]) -> None:
+        """Checkpoint runs picked by ``_enforce()``; call without the lock held."""
+        for run_id, state in victims:
+            spilled = checkpoint_spill(state)
+            with self._lock:
+                if self._spilling.get(run_id) is state:
+                    del self._spilling[run_id]
+                    if spilled:
+                        self._spilled[run_id] = state
+                        self.spills += 1
+                        RUN_CACHE_SPILLS.inc()
+                    else:
+                        # Write failed: back to resident, at the LRU tail
+                        self._resident[run_id] = state
+                        self._resize(run_id, state)
+                self._spill_done.notify_all()
+
+    def _wait_spill(self, run_id: str) -> None:
+        while run_id in self._spilling:
+            self._spill_done.wait()
+
+    def _droppable(self, run_id: str) -> bool:
+        """True if the run and its whole subtree are terminal and unpinned."""
+        state = self.peek(run_id)
+        if state is None or state.status not in TERMINAL_RUN_STATUSES:
+            return False
+        if run_id in self._pins:
+            return False
+        return all(self._droppable(cid) for cid in state.child_run_ids)
+
+    def _drop_tree(self, run_id: str) -> int:
+        state = self.peek(run_id)
+        if state is None:
+            return 0
+        dropped = 1
+        for cid in state.child_run_ids:
+            dropped += self._drop_tree(cid)
+        del self[run_id]
+        self.evictions += 1
+        RUNS_EVICTED.inc()
+        return dropped
+
+    def drop_terminal_trees(self) -> int:
+        """Drop every unreferenced root whose whole subtree is terminal and unpinned.
+
+        Full scan — the LRU path handles this incrementally; kept for
+        explicit cleanup.  Returns the number of runs removed.
+        """
+        with self._lock:
+            referenced: set[str] = set()
+            for state in [
+                *self._resident.values(), *self._spilling.values(), *self._spilled.values(),
+            ]:
+                referenced.update(state.child_run_ids)
+            roots = [
+                rid for rid in list(self)
+                if rid not in referenced and self._droppable(rid)
+            ]
+            return sum(self._drop_tree(rid) for rid in roots)
+
+    def stats(self) -> dict[str, Any]:
+        """Occupancy snapshot for status/metrics."""
+        with self._lock:
+            return {
+                "resident": len(self._resident),
+                "spilled": len(self._spilled) + len(self._spilling),
+                "bytes": self._bytes,
+                "max_runs": self.max_runs,
+                "max_bytes": self.max_bytes,
+                "pinned": len(self._pins),
+                "spills": self.spills,
+                "rehydrations": self.rehydrations,
+                "evictions": self.evictions,
+            }
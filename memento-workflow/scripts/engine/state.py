@@ -18,6 +18,8 @@ from __future__ import annotations
 
 import json
 import logging
+import random
+import time
 
 from .types import (
     Block,
@@ -50,10 +52,13 @@ from .protocol import (
 
 from ..utils import (
     evaluate_condition,
+    merge_tallies,
     record_leaf_result,
     substitute,
+    tally_results,
     validate_structured_output,
 )
+from ..infra.artifacts import write_retired_results
 
 from .subworkflow import (
     _handle_subagent_block,
@@ -67,6 +72,7 @@ from .parallel import (
 from .actions import (
     _build_ask_user_action,
     _build_completed_action,
+    _build_deadline_action,
     _build_dry_run_action,
     _build_error_action,
     _build_halted_action,
@@ -78,6 +84,8 @@ from .actions import (
 
 __all__ = [
     "halt_workflow",
+    "exceed_deadline",
+    "effective_deadline",
     "advance",
     "apply_submit",
     "pending_action",
@@ -176,6 +184,12 @@ def advance(state: RunState) -> AdvanceResult:
                 frame.block_index += 1
                 continue
 
+        # Time budget: no new work once the run's or a block's budget ran out
+        if not state.ctx.dry_run:
+            expired = _expired_budget(state)
+            if expired is not None:
+                return exceed_deadline(state, expired)
+
         # Hook: notify block entry (dry-run tree builder, tracing, etc.)
         if state._advance_hook:
             state._advance_hook.on_block_enter(
@@ -250,7 +264,9 @@ def advance(state: RunState) -> AdvanceResult:
                 state.warnings.append(
                     f"Downgraded isolation='subagent' to inline for '{block.name}' (inside child run)"
                 )
-            state.stack.append(Frame(block=block, scope_label=""))
+            state.stack.append(
+                Frame(block=block, scope_label="", deadline=_block_deadline(block))
+            )
             continue
 
         if isinstance(block, LoopBlock):
@@ -259,19 +275,25 @@ def advance(state: RunState) -> AdvanceResult:
                 # Not a list — skip
                 frame.block_index += 1
                 continue
-            if not items:
+            # Resume: iterations dropped by a retain policy are not replayed
+            start = 0
+            if not state.ctx.dry_run:
+                retired = state.ctx.retired.get(state.ctx.scoped_exec_key(f"loop:{base}"))
+                start = retired["iterations"] if retired else 0
+            if start >= len(items):
                 frame.block_index += 1
                 continue
-            scope = f"loop:{base}[i=0]"
+            scope = f"loop:{base}[i={start}]"
             state.ctx.push_scope(scope)
-            state.ctx.variables[block.loop_var] = items[0]
-            state.ctx.variables[f"{block.loop_var}_index"] = 0
+            state.ctx.variables[block.loop_var] = items[start]
+            state.ctx.variables[f"{block.loop_var}_index"] = start
             state.stack.append(
                 Frame(
                     block=block,
                     scope_label=scope,
                     loop_items=items,
-                    loop_index=0,
+                    loop_index=start,
+                    deadline=_block_deadline(block),
                 )
             )
             continue
@@ -279,13 +301,7 @@ def advance(state: RunState) -> AdvanceResult:
         if isinstance(block, RetryBlock):
             scope = f"retry:{base}[attempt=0]"
             state.ctx.push_scope(scope)
-            state.stack.append(
-                Frame(
-                    block=block,
-                    scope_label=scope,
-                    retry_attempt=0,
-                )
-            )
+            state.stack.append(_retry_frame(block, scope, 0, _block_deadline(block)))
             continue
 
         if isinstance(block, ConditionalBlock):
@@ -363,6 +379,36 @@ def _resolve_conditional(
     return None, None
 
 
+def retry_delay(block: RetryBlock, attempt: int) -> float:
+    """Backoff (seconds) before ``attempt`` of a RetryBlock (0 for the first)."""
+    if attempt < 1 or block.backoff <= 0:
+        return 0.0
+    delay = min(block.backoff * block.backoff_factor ** (attempt - 1), block.max_backoff)
+    if block.jitter > 0:
+        delay *= 1.0 - min(block.jitter, 1.0) * random.random()
+    return delay
+
+
+def _retry_frame(
+    block: RetryBlock, scope: str, attempt: int, deadline: float | None = None,
+) -> Frame:
+    not_before = 0.0
+    delay = retry_delay(block, attempt)
+    if delay:
+        not_before = time.monotonic() + delay
+    attempt_deadline = None
+    if block.attempt_timeout:
+        attempt_deadline = (not_before or time.monotonic()) + block.attempt_timeout
+    return Frame(
+        block=block,
+        scope_label=scope,
+        retry_attempt=attempt,
+        not_before=not_before,
+        attempt_deadline=attempt_deadline,
+        deadline=deadline,
+    )
+
+
 def _pop_frame(state: RunState) -> ActionBase | None:
     """Pop the top frame, handle loop/retry re-entry.
 
@@ -378,9 +424,11 @@ def _pop_frame(state: RunState) -> ActionBase | None:
 
     if isinstance(block, LoopBlock) and frame.loop_items is not None:
         next_idx = frame.loop_index + 1
+        base = substitute(_base_name(block), state.ctx)
+        if not state.ctx.dry_run:
+            _retire_iterations(state, block, base, next_idx)
         if next_idx < len(frame.loop_items):
             # Re-enter loop with next item
-            base = substitute(_base_name(block), state.ctx)
             scope = f"loop:{base}[i={next_idx}]"
             state.ctx.push_scope(scope)
             state.ctx.variables[block.loop_var] = frame.loop_items[next_idx]
@@ -391,6 +439,7 @@ def _pop_frame(state: RunState) -> ActionBase | None:
                     scope_label=scope,
                     loop_items=frame.loop_items,
                     loop_index=next_idx,
+                    deadline=frame.deadline,
                 )
             )
             return None
@@ -412,13 +461,7 @@ def _pop_frame(state: RunState) -> ActionBase | None:
                 base = substitute(_base_name(block), state.ctx)
                 scope = f"retry:{base}[attempt={next_attempt}]"
                 state.ctx.push_scope(scope)
-                state.stack.append(
-                    Frame(
-                        block=block,
-                        scope_label=scope,
-                        retry_attempt=next_attempt,
-                    )
-                )
+                state.stack.append(_retry_frame(block, scope, next_attempt, frame.deadline))
                 return None
             # Exhausted — check halt_on_exhaustion
             if block.halt_on_exhaustion:
@@ -473,6 +516,99 @@ def _replay_skip(state: RunState, block: Block, exec_key: str) -> None:
                 state.ctx.variables[block.result_var] = json.loads(recorded.output)
             except (json.JSONDecodeError, ValueError):
                 state.ctx.variables[block.result_var] = recorded.output
+    if (
+        isinstance(block, ParallelEachBlock)
+        and block.result_var
+        and recorded.structured_output is not None
+    ):
+        state.ctx.variables[block.result_var] = recorded.structured_output
+
+
+# ---------------------------------------------------------------------------
+# Loop retention
+# ---------------------------------------------------------------------------
+
+
+def _retain_window(block: LoopBlock) -> int | None:
+    """Finished iterations a loop keeps results for (None: all of them)."""
+    if block.retain == "aggregate":
+        return 0
+    if block.retain.startswith("last:"):
+        try:
+            return max(int(block.retain.removeprefix("last:")), 0)
+        except ValueError:
+            pass
+    return None
+
+
+def _iteration_of(key: str, prefix: str) -> int | None:
+    """Iteration index of a key under ``{loop_key}[i=``, else None."""
+    if not key.startswith(prefix):
+        return None
+    end = key.find("]", len(prefix))
+    try:
+        return int(key[len(prefix):end])
+    except ValueError:
+        return None
+
+
+def _keep_latest(latest: dict[str, dict], dump: dict) -> None:
+    current = latest.get(dump["results_key"])
+    if current is None or current.get("order", 0) <= dump.get("order", 0):
+        latest[dump["results_key"]] = dump
+
+
+def _retire_iterations(state: RunState, block: LoopBlock, base: str, done: int) -> None:
+    """Drop the results of finished iterations outside the loop's retain window.
+
+    Called as iteration ``done - 1`` finishes (the scope is the loop's
+    parent's).  Dropped results are written to ``retired.json`` in each
+    iteration's artifact directory and folded into
+    ``ctx.retired[loop_key]``, whose ``iterations`` count lets a resumed
+    run start after them.  ``ctx.results`` keeps pointing at the last result
+    of each step, and ``latest`` keeps a copy of those for resume.
+    """
+    keep = _retain_window(block)
+    if keep is None:
+        return
+    ctx = state.ctx
+    loop_key = ctx.scoped_exec_key(f"loop:{base}")
+    upto = done - keep
+    record = ctx.retired.get(loop_key)
+    if upto <= (record["iterations"] if record else 0):
+        return
+    record = ctx.retired.setdefault(loop_key, {"iterations": 0, "latest": {}})
+    prefix = f"{loop_key}[i="
+
+    dropped: dict[int, list] = {}
+    for key, r in ctx.results_scoped.items():
+        i = _iteration_of(key, prefix)
+        if i is not None and i < upto:
+            dropped.setdefault(i, []).append(r)
+    # Nested loops' records fold into this loop's
+    for key in [k for k in ctx.retired if k != loop_key]:
+        i = _iteration_of(key, prefix)
+        if i is not None and i < upto:
+            nested = ctx.retired.pop(key)
+            merge_tallies(record, nested)
+            for dump in nested.get("latest", {}).values():
+                _keep_latest(record["latest"], dump)
+
+    for i, results in sorted(dropped.items()):
+        dumps = [r.model_dump() for r in results]
+        if state.artifacts_dir:
+            write_retired_results(state.artifacts_dir, f"{prefix}{i}]", dumps)
+        tally_results(results, record)
+        for r, dump in zip(results, dumps):
+            del ctx.results_scoped[r.exec_key]
+            state._ephemeral_keys.discard(r.exec_key)
+            if r.results_key and ctx.results.get(r.results_key) is r:
+                _keep_latest(record["latest"], dump)
+    record["iterations"] = upto
+    logger.debug(
+        "retire: loop=%s iterations<%d dropped=%d",
+        loop_key, upto, sum(len(v) for v in dropped.values()),
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -489,6 +625,49 @@ def halt_workflow(state: RunState, reason: str, halted_at: str) -> AdvanceResult
     return action, []
 
 
+# ---------------------------------------------------------------------------
+# Time budgets
+# ---------------------------------------------------------------------------
+
+
+def _block_deadline(block: Block) -> float | None:
+    """Wall-clock deadline of a block's ``budget`` counted from now."""
+    budget = getattr(block, "budget", None)
+    return time.time() + budget if budget else None
+
+
+def effective_deadline(state: RunState) -> tuple[float, str] | None:
+    """Tightest deadline over the run and its open blocks, with its source.
+
+    The source is ``"run"`` or the name of the block whose budget it is.
+    """
+    best: tuple[float, str] | None = None
+    if state.deadline is not None:
+        best = (state.deadline, state.deadline_source or "run")
+    for frame in state.stack:
+        if frame.deadline is not None and (best is None or frame.deadline < best[0]):
+            best = (frame.deadline, frame.block.name)
+    return best
+
+
+def _expired_budget(state: RunState) -> str | None:
+    deadline = effective_deadline(state)
+    if deadline is not None and time.time() >= deadline[0]:
+        return deadline[1]
+    return None
+
+
+def exceed_deadline(state: RunState, deadline_at: str) -> AdvanceResult:
+    """End the run because a time budget ran out, keeping its results so far."""
+    logger.info("run %s: time budget of %s exhausted", state.run_id, deadline_at)
+    action = _build_deadline_action(state, deadline_at)
+    state.status = "deadline_exceeded"
+    state.pending_exec_key = None
+    state.stack.clear()
+    state._last_action = action
+    return action, []
+
+
 # ---------------------------------------------------------------------------
 # apply_submit() — process a submit and return next action
 # ---------------------------------------------------------------------------
@@ -583,6 +762,13 @@ def _apply_result_var(
                 state.ctx.variables[block.result_var] = json.loads(output)
             except (json.JSONDecodeError, ValueError):
                 state.ctx.variables[block.result_var] = output
+    elif (
+        isinstance(block, ParallelEachBlock)
+        and block.result_var
+        and structured_output is not None
+    ):
+        # Merged (or reduced) lane outputs, kept even when a lane failed
+        state.ctx.variables[block.result_var] = structured_output
 
 
 def apply_submit(  # noqa: C901
@@ -597,11 +783,19 @@ def apply_submit(  # noqa: C901
     model: str | None = None,
     halt_reason: str | None = None,
     halt_origin: str | None = None,
+    timing: dict[str, float] | None = None,
+    issued_at: str = "",
+    resources: dict[str, float] | None = None,
+    deadline_origin: str | None = None,
 ) -> AdvanceResult:
     """Apply a submit to the run state and return the next action.
 
     If halt_reason is set, the workflow is halted (used for child halt propagation).
     halt_origin provides the halted_at chain from the child.
+    If deadline_origin is set (a child run ran out of time budget), the result
+    is recorded and the run ends as deadline_exceeded too.
+    timing / issued_at carry the runner's time accounting into the StepResult,
+    resources a shell step's rusage.
     Returns (action_dict, new_child_states).
     """
     logger.debug(
@@ -632,6 +826,9 @@ def apply_submit(  # noqa: C901
     if state.status == "error":
         return _build_error_action(state, "Workflow in error state"), []
 
+    if state.status == "deadline_exceeded":
+        return _build_error_action(state, "Workflow ran out of time budget"), []
+
     # Halt propagation: child halt routed through apply_submit boundary
     if halt_reason is not None:
         halted_at = f"{exec_key}\u2190{halt_origin}" if halt_origin else exec_key
@@ -699,6 +896,11 @@ def apply_submit(  # noqa: C901
 
         completed_at = datetime.now(timezone.utc)
         started_at = (completed_at - timedelta(seconds=duration)).isoformat()
+    submitted_at = ""
+    if issued_at:
+        from datetime import datetime, timezone
+
+        submitted_at = datetime.now(timezone.utc).isoformat()
 
     # Record the result
     result = StepResult(
@@ -713,12 +915,28 @@ def apply_submit(  # noqa: C901
         step_type=step_type,
         model=effective_model,
         started_at=started_at,
+        issued_at=issued_at,
+        submitted_at=submitted_at,
+        timing=timing,
+        resources=resources or None,
     )
     record_leaf_result(state.ctx, base or exec_key, result)
 
     # Store result_var into context variables
     _apply_result_var(state, block, output, structured_output, status)
 
+    # Fail-fast batched parallel: mark the synthetic batch loop as failed so
+    # the remaining batches are skipped (see _handle_parallel_batched)
+    if (
+        isinstance(block, ParallelEachBlock)
+        and block.on_failure == "cancel"
+        and status == "failure"
+        and frame
+        and isinstance(frame.block, LoopBlock)
+        and frame.block.loop_var.startswith("_par_")
+    ):
+        state.ctx.variables[f"{frame.block.loop_var}_failed"] = True
+
     # Advance past current block
     if frame:
         frame.block_index += 1
@@ -731,6 +949,13 @@ def apply_submit(  # noqa: C901
         reason = substitute(block.halt, state.ctx)
         return halt_workflow(state, reason, exec_key)
 
+    if deadline_origin is not None:
+        return exceed_deadline(state, f"{exec_key}\u2190{deadline_origin}")
+    # The budget ran out while this step ran (a shell step was cut short)
+    expired = None if state.ctx.dry_run else _expired_budget(state)
+    if expired is not None:
+        return exceed_deadline(state, expired)
+
     # Get next action
     result = advance(state)
     # Cache the post-submit action for this exec_key (true idempotency)
@@ -744,6 +969,8 @@ def pending_action(state: RunState) -> ActionBase:
         return state._last_action
     if state.status == "completed":
         return _build_completed_action(state)
+    if state.status == "cancelled":
+        return CancelledAction(run_id=state.run_id, display="Run cancelled")
     if state.pending_exec_key is None:
         return _build_error_action(state, "No pending action")
     return _build_error_action(
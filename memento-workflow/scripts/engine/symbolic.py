@@ -0,0 +1,233 @@
+"""Symbolic dry-run: preview a workflow from its definition, without advance().
+
+The regular dry-run (``DryRunTreeHook``) drives the state machine and
+expands loops and parallel lanes item by item, so its cost and tree size
+grow with the data.  The symbolic walk visits each block of the
+definition once:
+
+- a LoopBlock, ParallelEachBlock or RetryBlock is one node whose
+  ``multiplicity`` is its item count (or ``max_attempts``), with its body
+  below it once, exec_keys scoped ``[i=*]`` / ``[attempt=*]``;
+- conditions (``condition``, branch conditions, ``until``) are summarized
+  as text, not evaluated;
+- the summary counts steps weighted by the enclosing multiplicities and
+  estimates prompt tokens from each LLM prompt rendered once, with the
+  first item bound.
+
+Counts are upper bounds: every condition is assumed true, a conditional
+contributes its largest branch and a retry all of its attempts.  A loop
+or fan-out whose list can't be resolved from the variables (e.g. the
+output of an earlier step) counts once and is listed in
+``summary.unresolved``.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable
+
+from .child_runs import _resolve_inject_value
+from .hooks import _block_node_type
+from .protocol import DryRunNode, DryRunSummary
+from .types import (
+    Block,
+    ConditionalBlock,
+    GroupBlock,
+    LLMStep,
+    LoopBlock,
+    ParallelEachBlock,
+    PromptStep,
+    RetryBlock,
+    ShellStep,
+    SubWorkflow,
+    WorkflowContext,
+    WorkflowDef,
+)
+from ..infra.rate_limit import estimate_tokens
+from ..utils import compile_template, load_prompt_template, substitute
+
+
+def describe_condition(cond: Callable[[WorkflowContext], bool] | None) -> str | None:
+    """Text for a condition callable: its YAML expression, function name, or ``(python)``."""
+    if cond is None:
+        return None
+    expression = getattr(cond, "expression", None)
+    if expression:
+        return expression
+    name = getattr(cond, "__name__", "")
+    return f"{name}()" if name and name != "<lambda>" else "(python)"
+
+
+def _items_count(ctx: WorkflowContext, dotpath: str) -> tuple[int | None, Any]:
+    """``(len, first item)`` of a list variable, or ``(None, None)`` if unresolved."""
+    items = ctx.get_var(dotpath)
+    if not isinstance(items, list):
+        return None, None
+    return len(items), items[0] if items else None
+
+
+def _bind(ctx: WorkflowContext, **variables: Any) -> WorkflowContext:
+    """A context with extra variables (shallow: values are shared, not copied)."""
+    return ctx.model_copy(update={"variables": {**ctx.variables, **variables}})
+
+
+class _SymbolicWalk:
+    def __init__(self, registry: dict[str, WorkflowDef]):
+        self.registry = registry
+        self.steps: dict[str, int] = {}
+        self.prompt_tokens = 0
+        self.unresolved: list[str] = []
+        self._workflows: list[str] = []  # subworkflow chain, guards recursion
+
+    def _count(self, node_type: str, times: int) -> None:
+        self.steps[node_type] = self.steps.get(node_type, 0) + times
+
+    def walk(
+        self, blocks: list[Block], ctx: WorkflowContext, scope: str, times: int,
+    ) -> list[DryRunNode]:
+        return [self.block(b, ctx, scope, times) for b in blocks]
+
+    def block(self, block: Block, ctx: WorkflowContext, scope: str, times: int) -> DryRunNode:
+        base = block.key or block.name
+        exec_key = f"{scope}/{base}" if scope else base
+        node = DryRunNode(
+            exec_key=exec_key,
+            type=_block_node_type(block.type),
+            name=block.name,
+            condition=describe_condition(block.condition),
+        )
+
+        if isinstance(block, ShellStep):
+            if block.script:
+                wd = ctx.variables.get("workflow_dir", "")
+                node.detail = f"{wd}/{block.script}" if wd else block.script
+            else:
+                node.detail = substitute(block.command, ctx)
+            self._count("shell", times)
+        elif isinstance(block, LLMStep):
+            node.detail = block.prompt or "(inline)"
+            self._count("llm", times)
+            self.prompt_tokens += self._prompt_tokens(block, ctx) * times
+        elif isinstance(block, PromptStep):
+            node.detail = substitute(block.message, ctx)
+            self._count("prompt", times)
+        elif isinstance(block, GroupBlock):
+            node.children = self.walk(block.blocks, ctx, scope, times)
+        elif isinstance(block, LoopBlock):
+            n, first = _items_count(ctx, block.loop_over)
+            node.detail = f"over {block.loop_over}"
+            node.multiplicity = self._multiplicity(n, exec_key)
+            inner = _bind(ctx, **{block.loop_var: first, f"{block.loop_var}_index": 0})
+            node.children = self.walk(
+                block.blocks, inner, self._scope(scope, f"loop:{base}[i=*]"),
+                times * node.multiplicity,
+            )
+        elif isinstance(block, ParallelEachBlock):
+            n, first = _items_count(ctx, block.parallel_for)
+            node.detail = f"over {block.parallel_for}"
+            node.multiplicity = self._multiplicity(n, exec_key)
+            inner = _bind(ctx, **{block.item_var: first, f"{block.item_var}_index": 0})
+            node.children = self.walk(
+                block.template, inner, self._scope(scope, f"par:{base}[i=*]"),
+                times * node.multiplicity,
+            )
+        elif isinstance(block, RetryBlock):
+            node.detail = f"until {describe_condition(block.until)}"
+            node.multiplicity = block.max_attempts
+            node.children = self.walk(
+                block.blocks, ctx, self._scope(scope, f"retry:{base}[attempt=*]"),
+                times * block.max_attempts,
+            )
+        elif isinstance(block, ConditionalBlock):
+            node.children = self._branches(block, ctx, scope, times)
+        elif isinstance(block, SubWorkflow):
+            node.detail = block.workflow
+            node.children = self._subworkflow(block, ctx, self._scope(scope, f"sub:{base}"), times)
+        return node
+
+    @staticmethod
+    def _scope(scope: str, part: str) -> str:
+        return f"{scope}/{part}" if scope else part
+
+    def _multiplicity(self, n: int | None, exec_key: str) -> int:
+        if n is None:
+            self.unresolved.append(exec_key)
+            return 1
+        return n
+
+    def _prompt_tokens(self, block: LLMStep, ctx: WorkflowContext) -> int:
+        try:
+            tpl = (
+                compile_template(block.prompt_text) if block.prompt_text
+                else load_prompt_template(Path(ctx.prompt_dir) / block.prompt)
+            )
+        except OSError:
+            return 0
+        return estimate_tokens(len(substitute(tpl, ctx)))
+
+    def _branches(
+        self, block: ConditionalBlock, ctx: WorkflowContext, scope: str, times: int,
+    ) -> list[DryRunNode]:
+        """One group node per branch; only the largest branch is counted."""
+        arms = [
+            (f"branch {i}", describe_condition(b.condition), b.blocks)
+            for i, b in enumerate(block.branches)
+        ]
+        exec_key = self._scope(scope, block.key or block.name)
+        if block.default:
+            arms.append(("default", None, block.default))
+        outer_steps, outer_tokens = self.steps, self.prompt_tokens
+        merged: dict[str, int] = {}
+        max_tokens = 0
+        nodes = []
+        for name, condition, blocks in arms:
+            self.steps, self.prompt_tokens = {}, 0
+            nodes.append(DryRunNode(
+                exec_key=exec_key,
+                type="group", name=name, condition=condition,
+                children=self.walk(blocks, ctx, scope, times),
+            ))
+            for node_type, count in self.steps.items():
+                merged[node_type] = max(merged.get(node_type, 0), count)
+            max_tokens = max(max_tokens, self.prompt_tokens)
+        self.steps, self.prompt_tokens = outer_steps, outer_tokens + max_tokens
+        for node_type, count in merged.items():
+            self._count(node_type, count)
+        return nodes
+
+    def _subworkflow(
+        self, block: SubWorkflow, ctx: WorkflowContext, scope: str, times: int,
+    ) -> list[DryRunNode]:
+        wf = self.registry.get(block.workflow)
+        if wf is None or block.workflow in self._workflows:
+            return []
+        inner = ctx.model_copy(update={
+            "variables": dict(ctx.variables),
+            "prompt_dir": wf.prompt_dir or ctx.prompt_dir,
+        })
+        for var_name, value in block.inject.items():
+            inner.variables[var_name] = _resolve_inject_value(inner, value)
+        self._workflows.append(block.workflow)
+        try:
+            return self.walk(wf.blocks, inner, scope, times)
+        finally:
+            self._workflows.pop()
+
+
+def symbolic_dry_run(
+    wf: WorkflowDef,
+    ctx: WorkflowContext,
+    registry: dict[str, WorkflowDef],
+) -> tuple[list[DryRunNode], DryRunSummary]:
+    """Tree and summary of ``wf`` with ``ctx``'s variables, in time linear in its size."""
+    walk = _SymbolicWalk(registry)
+    walk._workflows.append(wf.name)
+    tree = walk.walk(wf.blocks, ctx, "", 1)
+    summary = DryRunSummary(
+        step_count=sum(walk.steps.values()),
+        steps_by_type=walk.steps,
+        symbolic=True,
+        prompt_tokens=walk.prompt_tokens,
+        unresolved=walk.unresolved,
+    )
+    return tree, summary
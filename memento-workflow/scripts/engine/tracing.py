@@ -0,0 +1,239 @@
+"""Opt-in step tracer with Chrome trace-event / Perfetto export.
+
+A single ``Tracer`` is shared by a run tree (root + subworkflow children +
+parallel lanes).  It is an ``AdvanceHook``, so block entry/exit spans come
+from the state machine; the runner, checkpoint writer and action builders
+add shell, checkpoint, substitution and relay-wait spans via ``trace_span()``
+and ``Tracer.wait_begin()/wait_end()``.
+
+Every run_id gets its own track (tid), so parallel lanes render side by
+side.  The root run writes ``trace.json`` next to ``meta.json`` when it
+reaches a terminal state; the file loads directly in https://ui.perfetto.dev
+or chrome://tracing.
+
+Tracing is off unless ``MEMENTO_TRACE=1`` or ``WorkflowRunner(trace=True)``.
+When off, every call site costs a single attribute check.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from .hooks import AdvanceHook
+from .types import Block, ConditionalBlock, GroupBlock, LoopBlock, RetryBlock
+
+TRACE_FILE = "trace.json"
+
+# Containers that push a frame and are closed by on_block_exit()
+_FRAME_BLOCKS = (GroupBlock, LoopBlock, RetryBlock, ConditionalBlock)
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Tracer(AdvanceHook):
+    """Collects trace events for one run tree.
+
+    Thread-safe: parallel lanes are advanced from a thread pool.
+    Timestamps are microseconds since the tracer was created.
+    """
+
+    def __init__(self, workflow_name: str = "") -> None:
+        self.workflow_name = workflow_name
+        self._t0 = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._events: list[dict[str, Any]] = []
+        self._tids: dict[str, int] = {}
+        # run_id -> open leaf-like span (name, cat, ts, args)
+        self._open_leaf: dict[str, tuple[str, str, int, dict[str, Any]]] = {}
+        # run_id -> stack of open container spans (id(block), name, cat, ts)
+        self._frames: dict[str, list[tuple[int, str, str, int]]] = {}
+        # (run_id, exec_key) -> ts when the action was handed to the relay
+        self._waits: dict[tuple[str, str], int] = {}
+
+    # ------------------------------------------------------------------
+    # Primitives
+    # ------------------------------------------------------------------
+
+    def now(self) -> int:
+        return (time.perf_counter_ns() - self._t0) // 1000
+
+    def track(self, state: Any) -> int:
+        """Return the tid for a run, registering a named track on first use."""
+        run_id = state.run_id
+        tid = self._tids.get(run_id)
+        if tid is not None:
+            return tid
+        with self._lock:
+            tid = self._tids.get(run_id)
+            if tid is not None:
+                return tid
+            tid = len(self._tids) + 1
+            self._tids[run_id] = tid
+            self._events.append({
+                "name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                "args": {"name": _track_label(state)},
+            })
+            self._events.append({
+                "name": "thread_sort_index", "ph": "M", "pid": 1, "tid": tid,
+                "args": {"sort_index": tid},
+            })
+        return tid
+
+    def _track_id(self, run_id: str) -> int:
+        return self._tids.get(run_id, 1)
+
+    def complete(
+        self,
+        run_id: str,
+        name: str,
+        cat: str,
+        ts: int,
+        end: int | None = None,
+        args: dict[str, Any] | None = None,
+    ) -> None:
+        """Record a complete ("X") event on the run's track."""
+        end = self.now() if end is None else end
+        event: dict[str, Any] = {
+            "name": name, "cat": cat, "ph": "X",
+            "ts": ts, "dur": max(0, end - ts),
+            "pid": 1, "tid": self._track_id(run_id),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append(event)
+
+    @contextlib.contextmanager
+    def span(
+        self, state: Any, name: str, cat: str, args: dict[str, Any] | None = None,
+    ) -> Iterator[None]:
+        self.track(state)
+        ts = self.now()
+        try:
+            yield
+        finally:
+            self.complete(state.run_id, name, cat, ts, args=args)
+
+    # ------------------------------------------------------------------
+    # Relay wait — action handed out → submit received
+    # ------------------------------------------------------------------
+
+    def wait_begin(self, state: Any, exec_key: str) -> None:
+        self.track(state)
+        self._waits.setdefault((state.run_id, exec_key), self.now())
+
+    def wait_end(self, run_id: str, exec_key: str) -> None:
+        ts = self._waits.pop((run_id, exec_key), None)
+        if ts is not None:
+            self.complete(run_id, f"relay-wait {exec_key}", "relay", ts)
+
+    # ------------------------------------------------------------------
+    # AdvanceHook — block spans
+    # ------------------------------------------------------------------
+
+    def on_block_enter(self, state: Any, block: Block, exec_key: str) -> None:
+        self.track(state)
+        self._close_leaf(state.run_id)
+        ts = self.now()
+        pushes_frame = isinstance(block, _FRAME_BLOCKS) and not (
+            block.isolation == "subagent" and state.parent_run_id is None
+        )
+        if pushes_frame:
+            self._frames.setdefault(state.run_id, []).append(
+                (id(block), exec_key, block.type, ts)
+            )
+        else:
+            self._open_leaf[state.run_id] = (
+                exec_key, block.type, ts, {"name": block.name},
+            )
+
+    def on_block_exit(self, state: Any, block: Block) -> None:
+        self._close_leaf(state.run_id)
+        stack = self._frames.get(state.run_id)
+        if not stack or not any(entry[0] == id(block) for entry in stack):
+            # Frames not entered via advance() (workflow root, lane group)
+            return
+        # Entries above the match are containers that never pushed a frame
+        # (empty loop, unmatched conditional) — drop them.
+        while stack:
+            block_id, name, cat, ts = stack.pop()
+            if block_id == id(block):
+                self.complete(state.run_id, name, cat, ts)
+                break
+
+    def _close_leaf(self, run_id: str) -> None:
+        leaf = self._open_leaf.pop(run_id, None)
+        if leaf is not None:
+            name, cat, ts, args = leaf
+            self.complete(run_id, name, cat, ts, args=args)
+
+    def close_run(self, run_id: str) -> None:
+        """Close every open span of a run (called when it turns terminal)."""
+        self._close_leaf(run_id)
+        for _block_id, name, cat, ts in reversed(self._frames.pop(run_id, [])):
+            self.complete(run_id, name, cat, ts)
+        for key in [k for k in list(self._waits) if k[0] == run_id]:
+            self.wait_end(*key)
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            events = list(self._events)
+        events.insert(0, {
+            "name": "process_name", "ph": "M", "pid": 1, "tid": 0,
+            "args": {"name": self.workflow_name or "workflow"},
+        })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path: Path) -> bool:
+        """Close all open spans and write the trace atomically. Never raises."""
+        for run_id in list(self._open_leaf) + list(self._frames):
+            self.close_run(run_id)
+        tmp = path.with_suffix(".json.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(self.to_dict()), encoding="utf-8")
+            os.replace(str(tmp), str(path))
+            return True
+        except OSError:
+            return False
+
+
+def _track_label(state: Any) -> str:
+    if state.parallel_block_name and state.lane_index >= 0:
+        return f"{state.parallel_block_name}[{state.lane_index}]"
+    if state.parent_run_id is None:
+        return f"{state.workflow_name or 'workflow'} (root)"
+    label = state.relay_block_name or state.subagent_block_name or state.workflow_name
+    return f"{label} ({state.run_id.rsplit('>', 1)[-1]})"
+
+
+def attach_tracer(state: Any, tracer: Tracer) -> None:
+    """Enable tracing on a run. Does not replace an existing advance hook."""
+    state._tracer = tracer
+    if state._advance_hook is None:
+        state._advance_hook = tracer
+
+
+def inherit_tracer(parent: Any, child: Any) -> None:
+    """Share the parent's tracer with a newly created child run."""
+    if parent._tracer is not None:
+        attach_tracer(child, parent._tracer)
+
+
+def trace_span(state: Any, name: str, cat: str, **args: Any) -> Any:
+    """Context manager timing a span on the run's track; no-op when untraced."""
+    tracer = state._tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(state, name, cat, args or None)
@@ -31,6 +31,14 @@ class StepResult(BaseModel):
     step_type: str = ""  # "llm_step" | "shell" | "prompt"
     model: str | None = None
     started_at: str = ""
+    # Relay accounting: when the action was handed out / its result accepted,
+    # and seconds split by engine_cpu | shell | sandbox | relay_wait | backoff | queue.
+    issued_at: str = ""
+    submitted_at: str = ""
+    timing: dict[str, float] | None = None
+    # Shell steps: child rusage (cpu_user/cpu_sys seconds, max_rss_kb, io_read/
+    # io_write blocks, ctx_voluntary/ctx_involuntary switches).
+    resources: dict[str, float] | None = None
 
 
 # ---------------------------------------------------------------------------
@@ -48,6 +56,10 @@ class WorkflowContext(BaseModel):
     # Canonical storage: every executed leaf step by deterministic scoped exec_key.
     results_scoped: dict[str, StepResult] = Field(default_factory=dict)
     variables: dict[str, Any] = Field(default_factory=dict)
+    # Loop iterations dropped by a LoopBlock.retain policy, by loop exec_key:
+    # counters of their results (see utils.tally_results), "iterations" (how
+    # many, from the first) and "latest" (their last result per results_key).
+    retired: dict[str, dict[str, Any]] = Field(default_factory=dict)
     cwd: str = "."
     dry_run: bool = False
     prompt_dir: str = ""
@@ -201,6 +213,11 @@ class LoopBlock(BlockBase):
     loop_over: str  # dotpath into ctx resolving to a list
     loop_var: str
     blocks: list["Block"] = []
+    budget: float | None = None  # wall-clock seconds for all iterations
+    # Results kept per finished iteration: "all", "last:N" (the N most recent
+    # iterations) or "aggregate" (none).  Older iterations are folded into
+    # WorkflowContext.retired and their results written to artifacts.
+    retain: str = "all"
 
 
 class RetryBlock(BlockBase):
@@ -216,6 +233,26 @@ class RetryBlock(BlockBase):
     # halt the entire workflow.  The string is the halt reason.
     halt_on_exhaustion: str = ""
 
+    # Delay before attempt n (n >= 1): backoff * backoff_factor**(n-1), capped
+    # at max_backoff, then scaled down at random by up to `jitter` (0..1).
+    # The engine waits before the next shell step it runs; relay steps
+    # (LLM, prompts) are not delayed.
+    backoff: float = 0.0
+    backoff_factor: float = 2.0
+    max_backoff: float = 60.0
+    jitter: float = 0.0
+
+    # Wall-clock budget per attempt (seconds), enforced on shell steps.
+    attempt_timeout: float | None = None
+    # Wall-clock budget for all attempts (seconds); see GroupBlock.budget.
+    budget: float | None = None
+
+    # Hedging for a body that is one idempotent ShellStep: when an attempt is
+    # still running after this many seconds (or "p<NN>": that percentile of
+    # the step's earlier successful durations in this run), start a second
+    # copy, keep whichever finishes first and kill the other.
+    hedge_after: float | str | None = None
+
 
 class SubWorkflow(BlockBase):
     """Invoke another workflow by name with injected variables."""
@@ -280,6 +317,10 @@ class GroupBlock(BlockBase):
 
     blocks: list["Block"] = []
     model: str | None = None
+    # Wall-clock budget (seconds) from block entry.  When it runs out the
+    # engine issues no new steps, iterations or lanes (running shell commands
+    # are cut short) and the run ends as "deadline_exceeded".
+    budget: float | None = None
 
 
 class ParallelEachBlock(BlockBase):
@@ -291,7 +332,30 @@ class ParallelEachBlock(BlockBase):
     template: list["Block"] = []
     item_var: str = "item"
     max_concurrency: int | None = None
+    # "fixed": batches of max_concurrency lanes.  "adaptive": batch size starts
+    # at min_concurrency and is tuned between batches by an AIMD controller
+    # (engine/concurrency.py), capped at max_concurrency (default: CPU count).
+    concurrency: Literal["fixed", "adaptive"] = "fixed"
+    min_concurrency: int = 1
+    # Lane dispatch order.  "longest_first" starts the lanes with the highest
+    # expected cost first (LPT), so a slow item does not start last and
+    # stretch the block.  Expected cost is ``cost`` (a dotpath into the item,
+    # or a callable item -> number), else the item's lane duration in earlier
+    # runs (infra/lane_history.py).
+    order: Literal["items", "longest_first"] = "items"
+    cost: str | Callable[[Any], float] | None = None
     model: str | None = None
+    # "continue": every lane runs to the end.  "cancel": the first failing
+    # lane cancels its siblings (running shell commands are killed, pending
+    # relay lanes are marked cancelled) and the block records failure with
+    # whatever results the lanes produced.
+    on_failure: Literal["continue", "cancel"] = "continue"
+    # Fold the lanes' outputs into one value instead of keeping the flat list:
+    # "concat", "merge", "count", "top_k:<k>[:<field>]" or a callable
+    # (acc, value) -> acc starting from None (see utils.make_reducer).
+    reduce: str | Callable[[Any, Any], Any] | None = None
+    result_var: str = ""  # if set, store the block's output → ctx.variables[result_var]
+    budget: float | None = None  # wall-clock seconds for all lanes (and batches)
 
 
 # Union of all block types (discriminated by `type`)
@@ -6,7 +6,7 @@ MCP runner.py becomes a thin JSON-serialization wrapper over this class.
 Usage (relay style — typed, no JSON):
     runner = WorkflowRunner(wf, variables={...}, cwd=".", registry=registry)
     action = runner.start()
-    while action.action not in ("completed", "error", "halted"):
+    while action.action not in ("completed", "error", "halted", "deadline_exceeded"):
         result = execute(action)  # external: relay, agent SDK, etc.
         action = runner.submit(action.run_id, action.exec_key, output=result)
 
@@ -17,16 +17,21 @@ Usage (library style — executor-driven):
 
 from __future__ import annotations
 
+import contextlib
+import functools
 import json
 import logging
 import os
+import re
 import shutil
+import threading
 import time
 import uuid
+from collections.abc import Callable, Iterator, MutableMapping
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 
 from .core import Frame, RunState
 from .hooks import DryRunTreeHook
@@ -34,18 +39,33 @@ from .protocol import (
     ActionBase,
     CancelledAction,
     CompletedAction,
+    DeadlineExceededAction,
     DryRunCompleteAction,
     DryRunNode,
     DryRunSummary,
     ErrorAction,
     HaltedAction,
     ParallelAction,
+    PendingAction,
+    PromptAction,
     SubagentAction,
 )
-from .state import advance, apply_submit, pending_action
-from .types import StructuredOutput, WorkflowContext, WorkflowDef
+from .concurrency import BatchSignals, memory_available, system_load
+from .parallel import (
+    adapt_batches,
+    pending_parallel_block,
+    ranked_lanes_so_far,
+    reduce_seed,
+)
+from .recording import active_recorder, records_call
+from .state import advance, apply_submit, effective_deadline, exceed_deadline, pending_action
+from .symbolic import symbolic_dry_run
+from .tracing import TRACE_FILE, Tracer, attach_tracer, inherit_tracer, trace_span
+from .types import RetryBlock, ShellStep, StructuredOutput, WorkflowContext, WorkflowDef
 from ..infra.artifacts import (
+    append_event,
     exec_key_to_artifact_path,
+    read_artifact,
     write_llm_output_artifact,
     write_meta,
     write_shell_artifacts,
@@ -55,19 +75,103 @@ from ..infra.checkpoint import (
     checkpoint_load_children,
     checkpoint_save,
 )
-from ..infra.shell_exec import _execute_shell
-from ..utils import compute_totals, merge_child_results, workflow_hash
+from ..infra.lane_history import item_key, record_lane_durations
+from ..infra.metrics import (
+    LANES_QUEUED,
+    LLM_LANE_HOLDS,
+    PARALLEL_FINALIZE_SECONDS,
+    PARALLEL_LANES,
+    RELAY_WAIT_SECONDS,
+)
+from ..infra.pack import forget_pack
+from ..infra.rate_limit import LLM_LIMITER, estimate_tokens, validate_limits
+from ..infra.scheduler import PRIORITIES, SCHEDULER
+from ..infra.shell_exec import CANCELLED_ERROR, ShellResult, _execute_hedged, _execute_shell
+from ..utils import (
+    compute_timing,
+    compute_totals,
+    merge_child_results,
+    reduce_values,
+    sum_resources,
+    workflow_hash,
+)
 
 logger = logging.getLogger("workflow-engine")
 
 # Terminal statuses — runs in these states are finished.
-_TERMINAL_RUN_STATUSES = frozenset({"completed", "error", "halted", "cancelled"})
-_TERMINAL_ACTION_TYPES = frozenset({"completed", "error", "halted"})
+_TERMINAL_RUN_STATUSES = frozenset({"completed", "error", "halted", "cancelled", "deadline_exceeded"})
+_TERMINAL_ACTION_TYPES = frozenset({"completed", "error", "halted", "deadline_exceeded"})
 
 # Parallel auto-advance: execute shell-only lanes inline, skip relay.
 _PARALLEL_AUTO_ADVANCE = os.environ.get("MEMENTO_PARALLEL_AUTO_ADVANCE", "on") != "off"
 _PARALLEL_MAX_WORKERS = 16
 
+# Step tracing: write trace.json (Chrome trace-event format) next to meta.json.
+_TRACE_ENABLED = os.environ.get("MEMENTO_TRACE", "") == "1"
+
+# hedge_after="p<NN>": percentile of the step's earlier durations; hedging
+# waits until the run has this many samples.
+_PERCENTILE_RE = re.compile(r"p(\d+(?:\.\d+)?)")
+_HEDGE_MIN_SAMPLES = 5
+
+# Actions handed to the relay — the interval until submit is a relay wait.
+_RELAY_ACTION_TYPES = frozenset({"prompt", "ask_user", "subagent", "parallel"})
+
+# Keyword arguments accepted per submit_many() entry (mirrors submit()).
+_SUBMIT_FIELDS = frozenset({
+    "run_id", "exec_key", "output", "structured_output", "status",
+    "error", "duration", "cost_usd", "model",
+})
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def _pins_runs(method: _F) -> _F:
+    """Run a public method inside a run-store session (see RunCache)."""
+
+    @functools.wraps(method)
+    def wrapper(self: WorkflowRunner, *args: Any, **kwargs: Any) -> Any:
+        with self._session():
+            return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+# Notified after every state-changing call; WorkflowRunner.wait() sleeps on it.
+# _runs_version counts the notifications, so wait() can check readiness
+# without holding the condition and still not miss a wake-up.
+_RUNS_CHANGED = threading.Condition()
+_runs_version = 0
+
+
+def _notifies_waiters(method: _F) -> _F:
+    """Wake wait() callers after a method that may change run state."""
+
+    @functools.wraps(method)
+    def wrapper(self: WorkflowRunner, *args: Any, **kwargs: Any) -> Any:
+        global _runs_version
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            with _RUNS_CHANGED:
+                _runs_version += 1
+                _RUNS_CHANGED.notify_all()
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _own_outputs(state: RunState, child: RunState) -> list[Any]:
+    """A lane's step outputs, without the results it inherited from state."""
+    values: list[Any] = []
+    for key, r in child.ctx.results_scoped.items():
+        if key in state.ctx.results_scoped:
+            continue  # inherited from parent
+        if r.structured_output is not None:
+            values.append(r.structured_output)
+        elif r.output:
+            values.append(r.output)
+    return values
+
 
 class WorkflowRunner:
     """Manages a workflow run tree (parent + child states).
@@ -90,11 +194,28 @@ class WorkflowRunner:
         registry: dict[str, WorkflowDef],
         checkpoint: bool = True,
         run_id: str = "",
-        run_store: dict[str, RunState] | None = None,
+        run_store: MutableMapping[str, RunState] | None = None,
+        trace: bool | None = None,
+        priority: str = "interactive",
+        llm_limits: dict[str, int] | None = None,
+        budget: float | None = None,
     ):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}: expected one of {PRIORITIES}")
+        if llm_limits is not None:
+            llm_limits = validate_limits(llm_limits) or None
+        if budget is not None and budget <= 0:
+            raise ValueError(f"budget must be positive seconds, got {budget!r}")
         variables = dict(variables or {})
         cwd_path = Path(cwd).resolve()
         run_id = run_id or uuid.uuid4().hex[:12]
+        recorder = active_recorder()
+        if recorder is not None:
+            recorder.run(
+                run_id, wf.name, workflow_hash(wf), variables=dict(variables),
+                checkpoint=checkpoint, priority=priority, llm_limits=llm_limits,
+                budget=budget,
+            )
 
         variables["run_id"] = run_id
         variables.setdefault(
@@ -121,11 +242,16 @@ class WorkflowRunner:
             wf_hash=workflow_hash(wf),
             checkpoint_dir=chk_dir,
             workflow_name=wf.name,
+            priority=priority,
+            llm_limits=llm_limits,
+            deadline=time.time() + budget if budget else None,
         )
+        if _TRACE_ENABLED if trace is None else trace:
+            attach_tracer(self._root, Tracer(wf.name))
         self._registry = registry
         self._workflow_name = wf.name
-        # run_store: shared dict in MCP mode, fresh dict in library mode
-        self._runs: dict[str, RunState] = run_store if run_store is not None else {}
+        # run_store: shared RunCache in MCP mode, fresh dict in library mode
+        self._runs: MutableMapping[str, RunState] = run_store if run_store is not None else {}
         self._runs[run_id] = self._root
 
     @classmethod
@@ -133,10 +259,12 @@ class WorkflowRunner:
         cls,
         state: RunState,
         registry: dict[str, WorkflowDef],
-        run_store: dict[str, RunState] | None = None,
+        run_store: MutableMapping[str, RunState] | None = None,
     ) -> WorkflowRunner:
         """Create a runner from an existing RunState (checkpoint resume)."""
         runner = object.__new__(cls)
+        if _TRACE_ENABLED and state._tracer is None and state.parent_run_id is None:
+            attach_tracer(state, Tracer(state.workflow_name))
         runner._root = state
         runner._registry = registry
         runner._workflow_name = state.workflow_name
@@ -147,7 +275,7 @@ class WorkflowRunner:
     @classmethod
     def from_run_store(
         cls,
-        run_store: dict[str, RunState],
+        run_store: MutableMapping[str, RunState],
         registry: dict[str, WorkflowDef] | None = None,
     ) -> WorkflowRunner:
         """Create an ephemeral runner over a shared run store (MCP compat).
@@ -187,12 +315,46 @@ class WorkflowRunner:
     def _get_run(self, run_id: str) -> RunState | None:
         return self._runs.get(run_id)
 
+    # Set by submit_many(): run_id → state awaiting one end-of-batch flush.
+    _deferred: dict[str, RunState] | None = None
+
+    # Set by the replayer (replay.py): serves recorded shell results instead
+    # of running commands — ``player(state, action) -> (result, timing, resources)``.
+    _shell_player: Callable[[RunState, Any], tuple[ShellResult, dict[str, float], dict[str, float]]] | None = None
+
+    def _checkpoint(self, state: RunState) -> bool:
+        """Save a checkpoint, or defer it to the end of a submit_many batch."""
+        if self._deferred is not None:
+            self._deferred[state.run_id] = state
+            return True
+        return checkpoint_save(state)
+
+    @contextlib.contextmanager
+    def _session(self) -> Iterator[None]:
+        """Pin runs touched by this call so a bounded store can't spill them.
+
+        Plain dict stores (library mode) have no session and are unaffected.
+        """
+        session = getattr(self._runs, "session", None)
+        if session is None:
+            yield
+            return
+        with session():
+            if self._root is not None:
+                # Pins the root and rehydrates it in place if it was spilled
+                self._get_run(self._root.run_id)
+            yield
+
     # ------------------------------------------------------------------
     # Public API — relay style
     # ------------------------------------------------------------------
 
+    @records_call
+    @_notifies_waiters
+    @_pins_runs
     def start(self) -> ActionBase:
         """Advance to first action. Auto-advances through shell steps."""
+        cpu0 = time.thread_time()
         state = self._root
 
         if state.checkpoint_dir:
@@ -203,24 +365,30 @@ class WorkflowRunner:
                 state.ctx.cwd,
                 "running",
                 state.started_at,
+                parent_run=state.parent_run,
             )
 
         action, children = advance(state)
         action, children = self._auto_advance(state, action, children)
+        self._add_engine_cpu(state, cpu0)
 
         if state.checkpoint_dir:
-            if not checkpoint_save(state) and action.action not in ("error", "completed"):
+            if not self._checkpoint(state) and action.action not in ("error", "completed"):
                 action.warnings.append("checkpoint write failed")
 
         self._write_terminal_meta(state, action)
         return self._finalize_action(action, children)
 
+    @records_call
+    @_notifies_waiters
+    @_pins_runs
     def resume(self) -> ActionBase:
         """Resume from checkpoint, re-advancing children and parent.
 
         Assumes self._root was loaded via checkpoint_load (e.g. from_state).
         Loads and re-advances child checkpoints, then advances the parent.
         """
+        cpu0 = time.thread_time()
         state = self._root
         state.is_resumed = True
 
@@ -230,6 +398,7 @@ class WorkflowRunner:
             for block_children in loaded_children.values():
                 for child in block_children:
                     child.is_resumed = True
+                    inherit_tracer(state, child)
                     # Skip terminal children — their results are already merged
                     if child.status not in ("completed", "cancelled"):
                         child_action, grandchildren = advance(child)
@@ -239,7 +408,7 @@ class WorkflowRunner:
                         for gc in grandchildren:
                             self._store_run(gc)
                     self._store_run(child)
-                    checkpoint_save(child)
+                    self._checkpoint(child)
 
         self._store_run(state)
         action, children = advance(state)
@@ -252,10 +421,11 @@ class WorkflowRunner:
                 target = child_state
 
         action, children = self._auto_advance(target, action, children)
-        checkpoint_save(target)
+        self._add_engine_cpu(target, cpu0)
+        self._checkpoint(target)
 
         if target != state:
-            checkpoint_save(state)
+            self._checkpoint(state)
             # Check cascade: child completed → merge into parent
             if action.action == "completed" and target.parent_run_id:
                 parent = self._get_run(target.parent_run_id)
@@ -267,6 +437,9 @@ class WorkflowRunner:
         action.resumed = True
         return self._finalize_action(action, children)
 
+    @records_call
+    @_notifies_waiters
+    @_pins_runs
     def submit(
         self,
         run_id: str,
@@ -280,6 +453,7 @@ class WorkflowRunner:
         model: str | None = None,
     ) -> ActionBase:
         """Submit result for an exec_key, return next action. Idempotent."""
+        cpu0 = time.thread_time()
         logger.info(
             "submit(run_id=%s, exec_key=%s, status=%s)",
             run_id, exec_key, status,
@@ -287,6 +461,14 @@ class WorkflowRunner:
         state = self._get_run(run_id)
         if state is None:
             return ErrorAction(run_id=run_id, message=f"Unknown run_id: {run_id}")
+        if state.status == "cancelled" and state.parent_run_id:
+            # Lane cancelled by a failing sibling: nothing left to accept
+            self._release_llm_permit(state)
+            return pending_action(state)
+        if state._tracer is not None:
+            state._tracer.wait_end(run_id, exec_key)
+        if state._llm_permit is not None and state._llm_permit[0] == exec_key:
+            self._release_llm_permit(state)
 
         # Transparent SubWorkflow: route to active inline child
         routed = self._route_to_inline_child(
@@ -296,6 +478,21 @@ class WorkflowRunner:
         if routed is not None:
             return routed
 
+        # Fail-fast fan-out: lanes were cancelled, so the block failed
+        if exec_key == state.pending_exec_key:
+            cancelled = self._cancelled_lanes(state)
+            if cancelled:
+                status = "failure"
+                error = error or f"{cancelled} parallel lane(s) cancelled after a lane failed"
+
+        # A child run ran out of time budget: record the partial result, then stop
+        deadline_origin = None
+        if exec_key == state.pending_exec_key:
+            deadline_origin = self._check_child_deadline(state)
+            if deadline_origin is not None:
+                status = "failure"
+                error = error or f"time budget of {deadline_origin} exhausted"
+
         # Child-run verification (only for matching exec_key)
         if exec_key == state.pending_exec_key:
             verification_error = self._verify_child_runs(state, status)
@@ -317,7 +514,7 @@ class WorkflowRunner:
                     halt_reason=child_reason, halt_origin=child_halted_at,
                 )
                 self._write_terminal_meta(state, action)
-                checkpoint_save(state)
+                self._checkpoint(state)
                 return action
 
         # Capture action type before apply_submit overwrites _last_action
@@ -325,9 +522,12 @@ class WorkflowRunner:
 
         # Auto-merge parallel lane results
         if prev_action_type == "parallel" and exec_key == state.pending_exec_key:
-            merged = self._collect_parallel_results(state)
-            if merged:
+            merged, reduce_error = self._collect_parallel_results(state)
+            self._observe_lanes(state)
+            if merged is not None:
                 structured_output = merged
+            if reduce_error:
+                status, error = "failure", reduce_error
 
         # Auto-merge SubWorkflow child results (subagent path)
         if (
@@ -347,15 +547,28 @@ class WorkflowRunner:
             and state.artifacts_dir
             and prev_action_type in ("prompt", "subagent")
         ):
-            result_file = (
+            text = read_artifact(
                 state.artifacts_dir / exec_key_to_artifact_path(exec_key) / "result.json"
             )
-            if result_file.is_file():
+            if text is not None:
                 try:
-                    structured_output = json.loads(result_file.read_text(encoding="utf-8"))
-                except (json.JSONDecodeError, OSError):
+                    structured_output = json.loads(text)
+                except json.JSONDecodeError:
                     pass
 
+        # Relay wait: action handed out → this submit
+        timing: dict[str, float] = {}
+        issued_at = ""
+        issued = state._issued.pop(exec_key, None) if exec_key == state.pending_exec_key else None
+        if issued is not None:
+            wait = time.monotonic() - issued[0]
+            timing["relay_wait"] = round(wait, 6)
+            issued_at = issued[1]
+            RELAY_WAIT_SECONDS.observe(wait, prev_action_type or "unknown")
+
+        lane_cancel = self._lane_cancel_event(state)
+        in_retry = any(isinstance(f.block, RetryBlock) for f in state.stack)
+
         try:
             action, children = apply_submit(
                 state,
@@ -367,6 +580,9 @@ class WorkflowRunner:
                 duration=duration,
                 cost_usd=cost_usd,
                 model=model,
+                timing=timing,
+                issued_at=issued_at,
+                deadline_origin=deadline_origin,
             )
         except Exception:
             logger.exception(
@@ -392,58 +608,306 @@ class WorkflowRunner:
         # Handle halt
         if isinstance(action, HaltedAction):
             self._write_terminal_meta(state, action)
-            checkpoint_save(state)
+            self._checkpoint(state)
             return action
 
+        if lane_cancel is not None and status != "success" and not in_retry:
+            lane_cancel.set()
+
         try:
-            action, children = self._auto_advance(state, action, children)
+            action, children = self._auto_advance(state, action, children, lane_cancel)
         except Exception:
             logger.exception("submit: auto_advance failed for run_id=%s", run_id)
             raise
 
+        # Only lanes get a cancel event, and every lane has a parent
+        if lane_cancel is not None and state.parent_run_id is not None:
+            if action.action in _TERMINAL_ACTION_TYPES and self._lane_failed(
+                self._get_run(state.parent_run_id) or state, state, action,
+            ):
+                lane_cancel.set()
+            if lane_cancel.is_set():
+                if action.action not in _TERMINAL_ACTION_TYPES:
+                    action = self._cancel_lane(state)
+                self._cancel_sibling_lanes(state)
+                if action.action == "cancelled":
+                    return action
+
         # Inline SubWorkflow child completed → cascade to parent
         if (
             action.action == "completed"
             and state._inline_parent_exec_key
             and state.parent_run_id
         ):
-            checkpoint_save(state)
+            self._checkpoint(state)
             parent_action, parent_children = self._cascade_to_parent(
                 state, state._inline_parent_exec_key,
             )
             return self._finalize_action(parent_action, parent_children)
 
-        if not checkpoint_save(state) and action.action not in ("error", "completed"):
+        self._add_engine_cpu(state, cpu0, exec_key)
+        if not self._checkpoint(state) and action.action not in ("error", "completed"):
             action.warnings.append("checkpoint write failed")
 
         self._write_terminal_meta(state, action)
         return self._finalize_action(action, children)
 
+    @records_call
+    @_notifies_waiters
+    @_pins_runs
+    def submit_many(
+        self,
+        submissions: list[dict[str, Any]],
+        *,
+        advance_parents: bool = True,
+    ) -> tuple[list[ActionBase], list[ActionBase]]:
+        """Apply a batch of submits in order; one checkpoint flush per run.
+
+        Each entry takes ``submit()``'s keyword arguments (``run_id`` and
+        ``exec_key`` required).  Returns ``(results, parents)``: the next
+        action per submission, and — when ``advance_parents`` is set — the
+        next action of each parallel parent whose lanes all became terminal
+        in this batch (auto-submitted once, as the relay would).
+        """
+        results: list[ActionBase] = []
+        submitted: set[tuple[str, str]] = set()
+        touched: list[str] = []
+        self._deferred = deferred = {}
+        try:
+            for sub in submissions:
+                unknown = set(sub) - _SUBMIT_FIELDS
+                run_id, exec_key = sub.get("run_id", ""), sub.get("exec_key", "")
+                if unknown or not run_id or not exec_key:
+                    problem = (
+                        f"unknown fields: {', '.join(sorted(unknown))}" if unknown
+                        else "run_id and exec_key are required"
+                    )
+                    results.append(ErrorAction(
+                        run_id=run_id, message=f"Invalid submission: {problem}",
+                    ))
+                    continue
+                results.append(self.submit(**sub))
+                submitted.add((run_id, exec_key))
+                if run_id not in touched:
+                    touched.append(run_id)
+
+            parents: list[ActionBase] = []
+            if advance_parents:
+                for parent in self._parents_ready(touched, submitted):
+                    if parent.pending_exec_key is None:
+                        parents.append(ErrorAction(
+                            run_id=parent.run_id,
+                            message=f"No pending action for run_id: {parent.run_id}",
+                        ))
+                        continue
+                    parents.append(self.submit(
+                        parent.run_id,
+                        parent.pending_exec_key,
+                        output="parallel-batch-completed",
+                        status=self._lanes_status(parent),
+                    ))
+        finally:
+            self._deferred = None
+            failed = {
+                run_id for run_id, state in deferred.items()
+                if not checkpoint_save(state)
+            }
+        for action in [*results, *parents]:
+            if action.run_id in failed and action.action not in ("error", "completed"):
+                action.warnings.append("checkpoint write failed")
+        return results, parents
+
+    def _parents_ready(
+        self,
+        run_ids: list[str],
+        submitted: set[tuple[str, str]],
+    ) -> list[RunState]:
+        """Parallel parents of ``run_ids`` whose lanes are all terminal."""
+        ready: list[RunState] = []
+        for run_id in run_ids:
+            lane = self._get_run(run_id)
+            if lane is None or lane.parent_run_id is None:
+                continue
+            parent = self._get_run(lane.parent_run_id)
+            if (
+                parent is None
+                or parent.status in _TERMINAL_RUN_STATUSES
+                or any(p is parent for p in ready)
+                or not isinstance(parent._last_action, ParallelAction)
+                or (parent.run_id, parent.pending_exec_key) in submitted
+            ):
+                continue
+            lanes = [self._get_run(ln.child_run_id) for ln in parent._last_action.lanes]
+            if all(c is not None and c.status in _TERMINAL_RUN_STATUSES for c in lanes):
+                ready.append(parent)
+        return ready
+
+    def _lanes_status(self, parent: RunState) -> str:
+        """Relay-equivalent submit status for a parent whose lanes finished."""
+        last = parent._last_action
+        assert isinstance(last, ParallelAction)
+        for ln in last.lanes:
+            child = self._get_run(ln.child_run_id)
+            if child is None or child.status not in ("completed", "halted"):
+                return "failure"
+        return "success"
+
+    @records_call
+    @_pins_runs
     def next(self, run_id: str = "") -> ActionBase:
-        """Re-fetch pending action without mutation (recovery)."""
+        """Re-fetch the pending action (recovery).
+
+        Never advances the run, but a lane prompt held by the LLM rate
+        limiter takes its permit here once one is free (see _gate_llm_lane).
+        """
+        return self._pending_action(run_id or self._root.run_id)
+
+    @records_call
+    def wait(
+        self,
+        run_id: str = "",
+        *,
+        until: str = "all",
+        exec_key: str = "",
+        timeout: float = 30.0,
+    ) -> ActionBase:
+        """Block until a run or its children move on, then return the action.
+
+        - ``exec_key`` set: until the run's pending exec_key differs from it
+          (or the run is terminal); returns the run's pending action.
+        - ``until="all"``: until every child of the pending parallel/subagent
+          action is terminal; returns the run's pending action (submit it next).
+        - ``until="any"``: until any child changes state (new pending action
+          or terminal); returns that child's pending action.
+
+        Woken by start/submit/cancel on any runner sharing this process —
+        no polling.  On timeout, returns the run's pending action with a
+        ``"wait timed out"`` warning.
+        """
         run_id = run_id or self._root.run_id
+        if until not in ("all", "any"):
+            return ErrorAction(
+                run_id=run_id, message=f"wait: until must be 'all' or 'any', got {until!r}",
+            )
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._session():
+            snapshot = self._child_snapshot(run_id)
+        while True:
+            # Read the version first: a change after it wakes the wait below
+            with _RUNS_CHANGED:
+                seen = _runs_version
+            with self._session():
+                state = self._get_run(run_id)
+                if state is None:
+                    return ErrorAction(run_id=run_id, message=f"Unknown run_id: {run_id}")
+                ready = self._wait_ready(state, until, exec_key, snapshot)
+                remaining = deadline - time.monotonic()
+                if isinstance(ready, PendingAction) and ready.run_id == run_id:
+                    # Held by the LLM rate limiter: wait for a permit
+                    if remaining <= 0:
+                        return ready
+                    remaining = min(remaining, max(ready.retry_after, 0.05))
+                elif ready is not None:
+                    return ready
+                elif remaining <= 0:
+                    action = self._pending_action(run_id)
+                    action.warnings.append(f"wait timed out after {timeout:g}s")
+                    return action
+            with _RUNS_CHANGED:
+                if _runs_version == seen:
+                    _RUNS_CHANGED.wait(remaining)
+
+    def _wait_children(self, state: RunState) -> list[str]:
+        """Child run_ids the run is currently waiting on."""
+        last = state._last_action
+        if isinstance(last, ParallelAction):
+            return [lane.child_run_id for lane in last.lanes]
+        if isinstance(last, SubagentAction) and last.relay and last.child_run_id:
+            return [last.child_run_id]
+        return []
+
+    def _child_snapshot(self, run_id: str) -> dict[str, tuple[str, str | None]]:
+        state = self._get_run(run_id)
+        if state is None:
+            return {}
+        snapshot: dict[str, tuple[str, str | None]] = {}
+        for cid in self._wait_children(state):
+            child = self._get_run(cid)
+            if child is not None:
+                snapshot[cid] = (child.status, child.pending_exec_key)
+        return snapshot
+
+    def _wait_ready(
+        self,
+        state: RunState,
+        until: str,
+        exec_key: str,
+        snapshot: dict[str, tuple[str, str | None]],
+    ) -> ActionBase | None:
+        """The action to return if the wait condition holds, else None."""
+        if state.status in _TERMINAL_RUN_STATUSES:
+            return self._pending_action(state.run_id)
+        if exec_key:
+            if state.pending_exec_key != exec_key:
+                return self._pending_action(state.run_id)
+            return None
+        children = self._wait_children(state)
+        if not children:
+            # Nothing to wait on (parent already moved past its fan-out)
+            return self._pending_action(state.run_id)
+        if until == "all":
+            for cid in children:
+                child = self._get_run(cid)
+                if child is not None and child.status not in _TERMINAL_RUN_STATUSES:
+                    return None
+            return self._pending_action(state.run_id)
+        for cid in children:
+            child = self._get_run(cid)
+            if child is None:
+                continue
+            if snapshot.get(cid) != (child.status, child.pending_exec_key):
+                return self._pending_action(cid)
+        return None
+
+    def _pending_action(self, run_id: str) -> ActionBase:
         state = self._get_run(run_id)
         if state is None:
             return ErrorAction(run_id=run_id, message=f"Unknown run_id: {run_id}")
 
+        action = None
         # Transparent SubWorkflow: return child's action with parent run_id
         if state._active_inline_child_id:
             child = self._get_run(state._active_inline_child_id)
             if child and child.status not in _TERMINAL_RUN_STATUSES:
-                child_action = pending_action(child)
-                child_action.run_id = run_id
-                return child_action
-
-        return pending_action(state)
+                action = pending_action(child)
+                action.run_id = run_id
+        if action is None:
+            action = pending_action(state)
+
+        # A lane's prompt is handed out here after a fan-out or a hold
+        if isinstance(action, PromptAction):
+            held = bool(state._llm_held)
+            action = self._gate_llm_lane(action)
+            if held and isinstance(action, PromptAction):
+                self._mark_issued(action)
+        return action
 
+    @records_call
+    @_notifies_waiters
+    @_pins_runs
     def cancel(self) -> CancelledAction:
         """Cancel the run tree, clean up checkpoints."""
         self._root.status = "cancelled"
         self._cleanup_run(self._root)
         return CancelledAction(run_id=self._root.run_id)
 
-    def dry_run(self) -> DryRunCompleteAction:
-        """Run advance() to completion without side effects."""
+    def dry_run(self, symbolic: bool = False) -> DryRunCompleteAction:
+        """Run advance() to completion without side effects.
+
+        ``symbolic=True`` walks the definition instead (see symbolic.py):
+        loops and fan-outs become one node with a multiplicity, in time
+        proportional to the workflow rather than to its data.
+        """
         # Dry-run uses a temporary state — don't touch self._root
         wf = None
         for w in self._registry.values():
@@ -462,6 +926,9 @@ class WorkflowRunner:
             dry_run=True,
             prompt_dir=wf.prompt_dir,
         )
+        if symbolic:
+            tree, summary = symbolic_dry_run(wf, ctx, self._registry)
+            return DryRunCompleteAction(run_id=self._root.run_id, tree=tree, summary=summary)
         state = RunState(
             run_id=self._root.run_id,
             ctx=ctx,
@@ -472,6 +939,7 @@ class WorkflowRunner:
         )
         return self._collect_dry_run(state)
 
+    @_pins_runs
     def get_status(self) -> dict[str, Any]:
         """Return run status dict (for monitoring)."""
         state = self._root
@@ -485,17 +953,46 @@ class WorkflowRunner:
             "results_count": len(state.ctx.results_scoped),
             "stack_depth": len(state.stack),
             "warnings": state.warnings,
+            "timing": compute_timing(
+                state.ctx.results_scoped, state.timing, state.ctx.retired,
+            ),
+            "resources": sum_resources(state.ctx.results_scoped.values()),
+            "scheduler": SCHEDULER.stats(self._shell_tenant(state)),
+            "llm_limits": LLM_LIMITER.stats(self._shell_tenant(state)),
         }
+        if state.ctx.retired:
+            result["retired"] = {
+                key: {"iterations": r["iterations"], "step_count": r.get("step_count", 0)}
+                for key, r in state.ctx.retired.items()
+            }
+        deadline = effective_deadline(state)
+        if deadline is not None:
+            result["deadline"] = {
+                "at": datetime.fromtimestamp(deadline[0], timezone.utc).isoformat(),
+                "remaining": round(max(deadline[0] - time.time(), 0.0), 3),
+                "source": deadline[1],
+            }
         child_statuses = {}
+        held = 0
         for child_id in state.child_run_ids:
             child = self._get_run(child_id)
             if child:
                 child_statuses[child_id] = {
                     "status": child.status,
                     "pending_exec_key": child.pending_exec_key,
+                    "timing": compute_timing(
+                        child.ctx.results_scoped, child.timing, child.ctx.retired,
+                    )["run"],
                 }
+                if child._llm_held:
+                    child_statuses[child_id]["llm_held"] = child._llm_held
+                    held += 1
         if child_statuses:
             result["children"] = child_statuses
+        result["llm_limits"]["held_lanes"] = held
+        stats = getattr(self._runs, "stats", None)
+        if stats is not None:
+            result["run_cache"] = stats()
         return result
 
     # ------------------------------------------------------------------
@@ -507,16 +1004,50 @@ class WorkflowRunner:
         state: RunState,
         action: ActionBase,
         children: list[RunState],
+        cancel: threading.Event | None = None,
     ) -> tuple[ActionBase, list[RunState]]:
-        """Auto-advance through shell steps, executing via subprocess."""
+        """Auto-advance through shell steps, executing via subprocess.
+
+        ``cancel`` is the fail-fast event of a parallel lane: a failed step
+        outside a retry sets it, and once set the loop stops (killing a
+        running command) and leaves the ShellAction for the caller to cancel.
+
+        Inside a RetryBlock, the attempt's backoff is slept before the step,
+        its attempt_timeout caps the command timeout, and hedge_after may
+        race a second copy of the command (see _execute_hedged).
+        """
         from .protocol import ShellAction
 
         shell_log: list[dict[str, Any]] = []
         all_children = list(children)
 
         while isinstance(action, ShellAction):
+            if cancel is not None and cancel.is_set():
+                break
             ek = action.exec_key
             logger.debug("auto-advance shell: exec_key=%s", ek)
+
+            retry = self._retry_frame(state)
+            backoff = 0.0
+            if retry is not None and retry.not_before:
+                backoff = max(0.0, retry.not_before - time.monotonic())
+                deadline = effective_deadline(state)
+                if deadline is not None:
+                    backoff = min(backoff, max(deadline[0] - time.time(), 0.0))
+                retry.not_before = 0.0
+                if backoff and self._shell_player is None:
+                    logger.debug("retry backoff %.3fs before %s", backoff, ek)
+                    if cancel is None:
+                        time.sleep(backoff)
+                    elif cancel.wait(backoff):
+                        break
+            timeout: float = action.timeout
+            if retry is not None and retry.attempt_deadline is not None:
+                timeout = min(timeout, max(retry.attempt_deadline - time.monotonic(), 0.01))
+            deadline = effective_deadline(state)
+            if deadline is not None:
+                timeout = min(timeout, max(deadline[0] - time.time(), 0.01))
+            hedge_after = self._hedge_after(state, retry)
             t0 = time.monotonic()
 
             # Resolve stdin from dotpath
@@ -529,22 +1060,47 @@ class WorkflowRunner:
                         else str(resolved)
                     )
 
-            output, sh_status, structured, sh_error = _execute_shell(
-                action.command,
-                state.ctx.cwd,
-                env=action.env,
-                script_path=action.script_path,
-                args=action.args or "",
-                stdin_data=stdin_data,
-                timeout=action.timeout,
+            issued_at = datetime.now(timezone.utc).isoformat()
+            run_shell = functools.partial(
+                self._run_shell, state.ctx.cwd, action, stdin_data, timeout,
+                self._shell_tenant(state), self._shell_priority(state),
             )
+            with trace_span(state, f"shell {ek}", "shell"):
+                if self._shell_player is not None:
+                    shell_result, sh_timing, sh_resources = self._shell_player(state, action)
+                elif hedge_after is None:
+                    shell_result, sh_timing, sh_resources = run_shell(cancel)
+                else:
+                    # The hedge copy skips the scheduler: the first copy holds
+                    # a slot (likely stalled) and there is at most one hedge
+                    hedge = functools.partial(
+                        self._run_shell, state.ctx.cwd, action, stdin_data, timeout,
+                        None, "interactive",
+                    )
+                    (shell_result, sh_timing, sh_resources), hedge_won = _execute_hedged(
+                        run_shell, hedge_after, cancel, hedge,
+                        failed=lambda attempt: attempt[0].status != "success",
+                    )
+                    sh_timing["hedged"] = 1.0
+                    if hedge_won:
+                        sh_timing["hedge_won"] = 1.0
+            output, sh_status, structured, sh_error = shell_result
+            if sh_error == CANCELLED_ERROR:
+                break
+            if backoff:
+                sh_timing["backoff"] = round(backoff, 6)
             sh_duration = round(time.monotonic() - t0, 3)
+            recorder = active_recorder() if self._shell_player is None else None
+            if recorder is not None:
+                recorder.shell(
+                    state.run_id, ek, shell_result, sh_duration, sh_timing, sh_resources,
+                )
 
             artifact_ref: str | None = None
             if state.artifacts_dir:
                 artifact_ref = write_shell_artifacts(
                     state.artifacts_dir, ek, action.command,
-                    output or "", sh_error, structured,
+                    output or "", sh_error, structured, sh_resources,
                 )
 
             if artifact_ref is not None:
@@ -559,6 +1115,7 @@ class WorkflowRunner:
                     "duration": sh_duration,
                 })
 
+            in_retry = any(isinstance(f.block, RetryBlock) for f in state.stack)
             try:
                 action, new_children = apply_submit(
                     state,
@@ -568,18 +1125,108 @@ class WorkflowRunner:
                     status=sh_status,
                     error=sh_error,
                     duration=sh_duration,
+                    timing=sh_timing,
+                    issued_at=issued_at,
+                    resources=sh_resources,
                 )
             except Exception:
                 logger.exception("apply_submit failed for exec_key=%s", ek)
                 raise
             all_children.extend(new_children)
-            checkpoint_save(state)
+            self._checkpoint(state)
+            if cancel is not None and sh_status == "failure" and not in_retry:
+                cancel.set()
 
         if shell_log:
             action.shell_log = shell_log
 
         return action, all_children
 
+    @staticmethod
+    def _run_shell(
+        cwd: str,
+        action: Any,
+        stdin_data: str | None,
+        timeout: float,
+        tenant: str | None,
+        priority: str,
+        cancel: threading.Event | None,
+    ) -> tuple[ShellResult, dict[str, float], dict[str, float]]:
+        """Execute a ShellAction's command; returns (result, timing, resources).
+
+        The command first waits for a SCHEDULER slot of ``tenant`` (recorded
+        as ``timing["queue"]``; no tenant = unscheduled); a cancel while
+        queued returns CANCELLED_ERROR.
+        """
+        timing: dict[str, float] = {}
+        resources: dict[str, float] = {}
+        if tenant is not None:
+            waited = SCHEDULER.acquire(tenant, priority, cancel)
+            if waited is None:
+                return ShellResult("", "failure", None, CANCELLED_ERROR), timing, resources
+            timing["queue"] = round(waited, 6)
+        try:
+            result = _execute_shell(
+                action.command,
+                cwd,
+                env=action.env,
+                script_path=action.script_path,
+                args=action.args or "",
+                stdin_data=stdin_data,
+                timeout=timeout,
+                timing=timing,
+                cancel=cancel,
+                resources=resources,
+            )
+        finally:
+            if tenant is not None:
+                SCHEDULER.release(tenant)
+        return result, timing, resources
+
+    @staticmethod
+    def _shell_tenant(state: RunState) -> str:
+        """Fair-share unit of the shell scheduler: the run tree's root run_id."""
+        return state.run_id.split(">", 1)[0]
+
+    def _shell_priority(self, state: RunState) -> str:
+        """Priority class of the run tree, as set on its root run."""
+        root = self._get_run(self._shell_tenant(state))
+        return root.priority if root is not None else "interactive"
+
+    @staticmethod
+    def _retry_frame(state: RunState) -> Frame | None:
+        """Innermost RetryBlock frame on the run's stack."""
+        for frame in reversed(state.stack):
+            if isinstance(frame.block, RetryBlock):
+                return frame
+        return None
+
+    @staticmethod
+    def _hedge_after(state: RunState, retry: Frame | None) -> float | None:
+        """Hedge delay (seconds) for the retry frame's shell body, if any."""
+        if retry is None:
+            return None
+        block = retry.block
+        assert isinstance(block, RetryBlock)
+        spec = block.hedge_after
+        if spec is None or len(block.blocks) != 1 or not isinstance(block.blocks[0], ShellStep):
+            return None
+        if not isinstance(spec, str):
+            return float(spec)
+        match = _PERCENTILE_RE.fullmatch(spec)
+        if match is None:
+            logger.warning("retry '%s': bad hedge_after %r, not hedging", block.name, spec)
+            return None
+        step_name = block.blocks[0].name
+        samples = sorted(
+            r.duration for r in state.ctx.results_scoped.values()
+            if r.name == step_name and r.status == "success" and r.duration > 0
+        )
+        if len(samples) < _HEDGE_MIN_SAMPLES:
+            return None
+        rank = int(len(samples) * float(match.group(1)) / 100)
+        return samples[min(rank, len(samples) - 1)]
+
     # ------------------------------------------------------------------
     # Child run management
     # ------------------------------------------------------------------
@@ -634,26 +1281,125 @@ class WorkflowRunner:
 
         return None
 
-    def _collect_parallel_results(self, state: RunState) -> list[Any] | None:
-        """Collect structured_output from parallel lane children."""
+    def _collect_parallel_results(self, state: RunState) -> tuple[Any, str | None]:
+        """Collect structured_output from parallel lane children.
+
+        Without a ``reduce`` on the block this is the flat list of lane
+        outputs (None if empty); with one, the outputs are folded lane by
+        lane in item order and only the reduced value is returned.
+        Returns (value, error) — error is set when the reducer raised.
+        """
         last = state._last_action
         if not isinstance(last, ParallelAction):
-            return None
+            return None, None
 
-        results: list[Any] = []
+        block = pending_parallel_block(state)
+        ranked = ranked_lanes_so_far(state, block) if block is not None else None
+        if block is not None and ranked is not None:
+            lanes = self._ranked_lane_outputs(state, block.name, ranked)
+        else:
+            lanes = self._lane_outputs(state, last)
+        values = (value for index in sorted(lanes) for value in lanes[index])
+        if block is not None and block.reduce is not None:
+            try:
+                return reduce_values(values, block.reduce, reduce_seed(state, block)), None
+            except Exception as exc:
+                logger.warning("reduce failed for %s: %s", block.name, exc)
+                return None, f"reduce failed: {type(exc).__name__}: {exc}"
+        results = list(values)
+        return (results if results else None), None
+
+    def _lane_outputs(self, state: RunState, last: ParallelAction) -> dict[int, list[Any]]:
+        """Each lane's own step outputs, by lane (item) index.
+
+        Lanes may be listed in dispatch order (``order="longest_first"``);
+        callers sort by index so outputs always follow the items' order.
+        """
+        outputs: dict[int, list[Any]] = {}
         for lane in last.lanes:
             child = self._get_run(lane.child_run_id)
             if child is None:
                 continue
-            for key, r in child.ctx.results_scoped.items():
-                if key in state.ctx.results_scoped:
-                    continue  # inherited from parent
-                if r.structured_output is not None:
-                    results.append(r.structured_output)
-                elif r.output:
-                    results.append(r.output)
+            outputs.setdefault(child.lane_index, []).extend(_own_outputs(state, child))
+        return outputs
+
+    def _ranked_lane_outputs(
+        self, state: RunState, block_name: str, indexes: set[int],
+    ) -> dict[int, list[Any]]:
+        """Own step outputs of the block's latest lanes for the given item indexes.
+
+        Walks the child runs newest first, so a lane of an earlier entry
+        of the block (e.g. an outer loop iteration) is shadowed by the
+        current entry's lane for the same item.
+        """
+        outputs: dict[int, list[Any]] = {}
+        for child_id in reversed(state.child_run_ids):
+            if len(outputs) == len(indexes):
+                break
+            child = self._get_run(child_id)
+            if (
+                child is None
+                or child.parallel_block_name != block_name
+                or child.lane_index not in indexes
+                or child.lane_index in outputs
+            ):
+                continue
+            outputs[child.lane_index] = _own_outputs(state, child)
+        return outputs
 
-        return results if results else None
+    def _observe_lanes(self, state: RunState) -> None:
+        """Feed a finished fan-out (or batch) to lane ordering and adaptive concurrency.
+
+        A lane's duration is the sum of its own step durations; it counts as
+        failed if it errored, was cancelled or recorded a failed step.
+        Longest-first blocks without a ``cost`` record the durations in the
+        lane history; adaptive blocks pass them to their controller, whose
+        decision is appended to events.jsonl.
+        """
+        last = state._last_action
+        if not isinstance(last, ParallelAction):
+            return
+        block = pending_parallel_block(state)
+        if block is None:
+            return
+        record_history = (
+            block.order == "longest_first" and block.cost is None and state.checkpoint_dir
+        )
+        if not record_history and block.concurrency != "adaptive":
+            return
+        durations: dict[str, float] = {}
+        latencies: list[float] = []
+        failed = 0
+        for lane in last.lanes:
+            child = self._get_run(lane.child_run_id)
+            if child is None:
+                continue
+            seconds = sum(
+                r.duration for key, r in child.ctx.results_scoped.items()
+                if key not in state.ctx.results_scoped
+            )
+            latencies.append(seconds)
+            durations[item_key(child.ctx.variables.get(block.item_var))] = seconds
+            action = child._last_action
+            if child.status == "cancelled" or (
+                action is not None and self._lane_failed(state, child, action)
+            ):
+                failed += 1
+
+        if record_history:
+            record_lane_durations(state.ctx.cwd, state.workflow_name, block.name, durations)
+        if block.concurrency != "adaptive":
+            return
+        signals = BatchSignals(
+            lanes=len(latencies),
+            failed=failed,
+            latency=sum(latencies) / len(latencies) if latencies else 0.0,
+            load=system_load(),
+            mem_available=memory_available(),
+        )
+        event = adapt_batches(state, signals)
+        if event is not None and state.checkpoint_dir:
+            append_event(state.checkpoint_dir, event)
 
     def _check_child_halt(self, state: RunState) -> tuple[str, str] | None:
         """Check if any child run halted. Returns (reason, halted_at) or None."""
@@ -676,6 +1422,14 @@ class WorkflowRunner:
 
         return None
 
+    def _check_child_deadline(self, state: RunState) -> str | None:
+        """deadline_at of a child run that ran out of time budget, if any."""
+        for cid in self._wait_children(state):
+            child = self._get_run(cid)
+            if child is not None and isinstance(child._last_action, DeadlineExceededAction):
+                return child._last_action.deadline_at
+        return None
+
     def _collect_subworkflow_results(self, state: RunState, child_run_id: str) -> None:
         """Merge child results into parent state."""
         child = self._get_run(child_run_id)
@@ -685,6 +1439,8 @@ class WorkflowRunner:
             state.ctx.results_scoped,
             state.ctx.results,
             child.ctx.results_scoped,
+            state.ctx.retired,
+            child.ctx.retired,
         )
         state.ctx._order_seq = max(state.ctx._order_seq, child.ctx._order_seq)
 
@@ -724,16 +1480,26 @@ class WorkflowRunner:
             cost_usd=cost_usd,
             model=model,
         )
+        if isinstance(result, DeadlineExceededAction) and result.run_id == child.run_id:
+            # Shared budget ran out inside the SubWorkflow: the parent stops too
+            self._collect_subworkflow_results(state, child.run_id)
+            state._active_inline_child_id = ""
+            action, _ = exceed_deadline(
+                state, f"{state.pending_exec_key}\u2190{result.deadline_at}",
+            )
+            self._write_terminal_meta(state, action)
+            self._checkpoint(state)
+            return action
         if result.run_id == child.run_id:
             # Child still active — rewrite run_id to parent
             result.run_id = run_id
             state._active_inline_child_id = child.run_id
-            checkpoint_save(state)
+            self._checkpoint(state)
             return result
         # Child completed and cascaded
         if state._active_inline_child_id == child.run_id:
             state._active_inline_child_id = ""
-        checkpoint_save(state)
+        self._checkpoint(state)
         return result
 
     def _cascade_to_parent(
@@ -760,7 +1526,7 @@ class WorkflowRunner:
             parent, parent_exec_key, output="child-completed", status="success",
         )
         action, children = self._auto_advance(parent, action, children)
-        checkpoint_save(parent)
+        self._checkpoint(parent)
 
         # Nested cascade: parent itself is an inline child that just completed
         if (
@@ -782,21 +1548,149 @@ class WorkflowRunner:
         children: list[RunState] | None = None,
     ) -> ActionBase:
         """Store & advance children, handle parallel fast path / inline cascade."""
+        if children and isinstance(action, ParallelAction):
+            # Fresh fan-out: fail-fast lanes share a new cancel event
+            parent = self._get_run(action.run_id)
+            if parent is not None:
+                parent._lane_cancel = threading.Event()
         if children and isinstance(action, ParallelAction) and _PARALLEL_AUTO_ADVANCE:
-            return self._finalize_parallel(action, children)
-        if children:
-            return self._finalize_sequential(action, children)
+            action = self._finalize_parallel(action, children)
+        elif children:
+            action = self._finalize_sequential(action, children)
+        action = self._gate_llm_lane(action)
+        self._mark_issued(action)
         return action
 
+    def _gate_llm_lane(self, action: ActionBase) -> ActionBase:
+        """Hold a parallel lane's prompt until the LLM rate limiter has room.
+
+        Returns the prompt once a permit is granted (kept until the submit),
+        else a ``pending`` action; ``next``/``wait`` on the lane retry.
+        """
+        if not isinstance(action, PromptAction):
+            return action
+        state = self._get_run(action.run_id)
+        if state is None or not state.parallel_block_name:
+            return action
+        model = action.model or "default"
+        if state._llm_permit == (action.exec_key, model):
+            return action
+        self._release_llm_permit(state)
+        chars = len(action.prompt)
+        if action.prompt_file:
+            try:
+                chars = os.path.getsize(action.prompt_file)
+            except OSError:
+                pass
+        root = self._get_run(self._shell_tenant(state))
+        wait, reason = LLM_LIMITER.try_acquire(
+            self._shell_tenant(state), model, estimate_tokens(chars),
+            root.llm_limits if root is not None else None,
+            owner=state.run_id,
+        )
+        if not wait:
+            state._llm_permit = (action.exec_key, model)
+            state._llm_held = ""
+            return action
+        if not state._llm_held:
+            LLM_LANE_HOLDS.inc(1, model)
+            # Relay wait starts when the prompt is actually handed out
+            state._issued.pop(action.exec_key, None)
+        state._llm_held = reason
+        return PendingAction(
+            run_id=action.run_id,
+            exec_key=action.exec_key,
+            retry_after=round(wait, 3),
+            reason=reason,
+            display=f"Lane {state.lane_index} of '{state.parallel_block_name}' "
+            f"waiting for LLM capacity ({reason})",
+        )
+
+    @staticmethod
+    def _release_llm_permit(state: RunState) -> None:
+        if state._llm_permit is not None:
+            LLM_LIMITER.release(
+                WorkflowRunner._shell_tenant(state), state._llm_permit[1], owner=state.run_id,
+            )
+            state._llm_permit = None
+        state._llm_held = ""
+
+    @staticmethod
+    def _release_llm_permits(state: RunState) -> None:
+        """Return a finished or removed run's permits (a root's: its whole tree's)."""
+        if state.parent_run_id is None:
+            LLM_LIMITER.release_run(state.run_id)
+            state._llm_permit = None
+            state._llm_held = ""
+        else:
+            WorkflowRunner._release_llm_permit(state)
+
+    def _mark_issued(self, action: ActionBase) -> None:
+        """Timestamp an action (and its lanes' first actions) handed to the relay.
+
+        The interval until the matching submit is the step's relay wait.
+        """
+        if action.action not in _RELAY_ACTION_TYPES:
+            return
+        state = self._get_run(action.run_id)
+        exec_key = getattr(action, "exec_key", "")
+        # Proxied inline SubWorkflow action: the pending step lives on the child
+        while state is not None and state.pending_exec_key != exec_key and state._active_inline_child_id:
+            state = self._get_run(state._active_inline_child_id)
+        if state is None:
+            return
+        pending = [(state, exec_key)]
+        if isinstance(action, ParallelAction):
+            for lane in action.lanes:
+                child = self._get_run(lane.child_run_id)
+                if child is not None and child.pending_exec_key:
+                    pending.append((child, child.pending_exec_key))
+        now = (time.monotonic(), datetime.now(timezone.utc).isoformat())
+        for target, key in pending:
+            target._issued.setdefault(key, now)
+            if target._tracer is not None:
+                target._tracer.wait_begin(target, key)
+
     def _finalize_parallel(
         self,
         action: ParallelAction,
         children: list[RunState],
     ) -> ActionBase:
         """Advance parallel children in threads, attempt fast path."""
+        parent = self._get_run(action.run_id)
+        cancel: threading.Event | None = None
+        if parent is not None and children[0].on_failure == "cancel":
+            cancel = parent._lane_cancel
+
+        def _dequeue_and_advance(
+            child: RunState,
+        ) -> tuple[RunState, ActionBase, list[RunState]]:
+            LANES_QUEUED.dec()
+            child_result = self._advance_single_child(child, cancel)
+            if (
+                cancel is not None
+                and parent is not None
+                and child_result[1].action in _TERMINAL_ACTION_TYPES
+                and self._lane_failed(parent, child_result[0], child_result[1])
+            ):
+                cancel.set()
+            return child_result
+
+        t0 = time.perf_counter()
         n_workers = min(len(children), _PARALLEL_MAX_WORKERS)
+        PARALLEL_LANES.inc(len(children))
+        LANES_QUEUED.inc(len(children))
         with ThreadPoolExecutor(max_workers=n_workers) as pool:
-            results = list(pool.map(self._advance_single_child, children))
+            results = list(pool.map(_dequeue_and_advance, children))
+        PARALLEL_FINALIZE_SECONDS.observe(time.perf_counter() - t0)
+
+        # Fail-fast: a lane failed, so cancel every lane still in flight
+        if cancel is not None and cancel.is_set():
+            results = [
+                (child, ca, gcs) if ca.action in _TERMINAL_ACTION_TYPES
+                else (child, self._cancel_lane(child), [])
+                for child, ca, gcs in results
+            ]
 
         # Store all runs
         for child, _ca, grandchildren in results:
@@ -830,14 +1724,16 @@ class WorkflowRunner:
                     "running",
                     child.started_at,
                 )
+            cpu0 = time.thread_time()
             child_action, grandchildren = advance(child)
             child_action, grandchildren = self._auto_advance(
                 child, child_action, grandchildren,
             )
+            self._add_engine_cpu(child, cpu0)
             for gc in grandchildren:
                 self._store_run(gc)
             self._store_run(child)
-            checkpoint_save(child)
+            self._checkpoint(child)
 
             # Inline SubWorkflow child
             if child._inline_parent_exec_key:
@@ -869,7 +1765,7 @@ class WorkflowRunner:
             parent = self._get_run(parent_rid)
             if parent:
                 parent._active_inline_child_id = child.run_id
-                checkpoint_save(parent)
+                self._checkpoint(parent)
             child_action.run_id = parent_rid
         if prior_logs:
             child_action.shell_log = prior_logs
@@ -882,8 +1778,10 @@ class WorkflowRunner:
     def _advance_single_child(
         self,
         child: RunState,
+        cancel: threading.Event | None = None,
     ) -> tuple[RunState, ActionBase, list[RunState]]:
         """Advance child to first action (thread-safe: only modifies child)."""
+        cpu0 = time.thread_time()
         try:
             if child.checkpoint_dir:
                 block_label = child.parallel_block_name
@@ -899,15 +1797,16 @@ class WorkflowRunner:
                 )
             child_action, grandchildren = advance(child)
             child_action, grandchildren = self._auto_advance(
-                child, child_action, grandchildren,
+                child, child_action, grandchildren, cancel,
             )
-            checkpoint_save(child)
+            self._add_engine_cpu(child, cpu0)
+            self._checkpoint(child)
             return child, child_action, grandchildren
         except Exception as exc:
             logger.exception("_advance_single_child failed: %s", child.run_id)
             child.status = "error"
             try:
-                checkpoint_save(child)
+                self._checkpoint(child)
             except Exception:
                 pass
             return (
@@ -925,16 +1824,20 @@ class WorkflowRunner:
         results: list[tuple[RunState, ActionBase, list[RunState]]],
     ) -> ActionBase | None:
         """Auto-submit parent when all parallel lanes are terminal."""
-        if not all(ca.action in _TERMINAL_ACTION_TYPES for _, ca, _ in results):
+        if not all(
+            ca.action in _TERMINAL_ACTION_TYPES or ca.action == "cancelled"
+            for _, ca, _ in results
+        ):
             return None
 
         parent = self._get_run(action.run_id)
         if parent is None:
             return None
 
-        # Write terminal meta for each child
+        # Write terminal meta for each child (cancelled lanes already have it)
         for child, child_action, _ in results:
-            self._write_terminal_meta(child, child_action)
+            if child_action.action != "cancelled":
+                self._write_terminal_meta(child, child_action)
 
         # Halt propagation
         child_halt = self._check_child_halt(parent)
@@ -946,21 +1849,33 @@ class WorkflowRunner:
                 halt_reason=reason, halt_origin=halted_at,
             )
             self._write_terminal_meta(parent, parent_action)
-            checkpoint_save(parent)
+            self._checkpoint(parent)
             all_logs = self._merge_shell_logs(action, results)
             if all_logs:
                 parent_action.shell_log = all_logs
             return parent_action
 
         # Derive status, apply submit, auto-advance
-        merged = self._collect_parallel_results(parent)
+        merged, reduce_error = self._collect_parallel_results(parent)
+        self._observe_lanes(parent)
         parent_status = self._derive_parallel_status(parent, results)
+        cancelled = sum(1 for _, ca, _ in results if ca.action == "cancelled")
+        error = reduce_error
+        if cancelled:
+            error = f"{cancelled} parallel lane(s) cancelled after a lane failed"
+        deadline_origin = self._check_child_deadline(parent)
+        if deadline_origin is not None:
+            error = f"time budget of {deadline_origin} exhausted"
+        if error:
+            parent_status = "failure"
 
         parent_action, parent_children = apply_submit(
             parent, action.exec_key,
             output="parallel-auto-completed",
             structured_output=merged,
             status=parent_status,
+            error=error,
+            deadline_origin=deadline_origin,
         )
         parent_action, parent_children = self._auto_advance(
             parent, parent_action, parent_children,
@@ -972,7 +1887,7 @@ class WorkflowRunner:
             parent_action.shell_log = all_logs + existing
 
         self._write_terminal_meta(parent, parent_action)
-        checkpoint_save(parent)
+        self._checkpoint(parent)
         return self._finalize_action(parent_action, parent_children)
 
     @staticmethod
@@ -981,15 +1896,76 @@ class WorkflowRunner:
         results: list[tuple[RunState, ActionBase, list[RunState]]],
     ) -> str:
         for child, child_action, _ in results:
-            if child_action.action == "error":
+            if child_action.action == "cancelled" or WorkflowRunner._lane_failed(
+                parent, child, child_action,
+            ):
                 return "failure"
-            for key, r in child.ctx.results_scoped.items():
-                if key in parent.ctx.results_scoped:
-                    continue
-                if r.status == "failure":
-                    return "failure"
         return "success"
 
+    @staticmethod
+    def _lane_failed(parent: RunState, child: RunState, child_action: ActionBase) -> bool:
+        """Whether a lane errored, ran out of time or recorded a failed step of its own."""
+        if child_action.action in ("error", "deadline_exceeded"):
+            return True
+        for key, r in child.ctx.results_scoped.items():
+            if key in parent.ctx.results_scoped:
+                continue  # inherited from parent
+            if r.status == "failure":
+                return True
+        return False
+
+    def _lane_cancel_event(self, state: RunState) -> threading.Event | None:
+        """The fail-fast event shared by a lane and its siblings, if any."""
+        if state.on_failure != "cancel" or not state.parent_run_id:
+            return None
+        parent = self._get_run(state.parent_run_id)
+        if parent is None:
+            return None
+        if parent._lane_cancel is None:
+            parent._lane_cancel = threading.Event()
+        return parent._lane_cancel
+
+    def _cancel_lane(self, lane: RunState) -> CancelledAction:
+        """Stop a parallel lane that a failing sibling cancelled."""
+        action = CancelledAction(
+            run_id=lane.run_id,
+            display=f"Lane {lane.lane_index} of '{lane.parallel_block_name}' cancelled: "
+            "a sibling lane failed",
+        )
+        lane.status = "cancelled"
+        self._release_llm_permit(lane)
+        lane.pending_exec_key = None
+        lane._last_action = action
+        lane._issued.clear()
+        self._checkpoint(lane)
+        self._write_terminal_meta(lane, action)
+        return action
+
+    def _cancel_sibling_lanes(self, lane: RunState) -> None:
+        """Cancel the lane's siblings that have not finished yet."""
+        parent = self._get_run(lane.parent_run_id or "")
+        if parent is None or not isinstance(parent._last_action, ParallelAction):
+            return
+        for ln in parent._last_action.lanes:
+            sibling = self._get_run(ln.child_run_id)
+            if (
+                sibling is not None
+                and sibling is not lane
+                and sibling.status not in _TERMINAL_RUN_STATUSES
+            ):
+                self._cancel_lane(sibling)
+
+    def _cancelled_lanes(self, state: RunState) -> int:
+        """Number of cancelled lanes behind a pending parallel action."""
+        last = state._last_action
+        if not isinstance(last, ParallelAction):
+            return 0
+        return sum(
+            1 for ln in last.lanes
+            if (child := self._get_run(ln.child_run_id)) is not None
+            and child.status == "cancelled"
+        )
+
     @staticmethod
     def _merge_shell_logs(
         action: ActionBase,
@@ -1000,20 +1976,53 @@ class WorkflowRunner:
             logs.extend(ca.shell_log or [])
         return logs
 
+    # ------------------------------------------------------------------
+    # Time accounting
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _add_engine_cpu(state: RunState, cpu0: float, exec_key: str = "") -> None:
+        """Charge thread CPU since cpu0 to the run (and to exec_key's step).
+
+        Thread CPU excludes time blocked on subprocesses and other threads,
+        so shell execution and parallel lanes are not double-counted.
+        """
+        cpu = time.thread_time() - cpu0
+        state.timing["engine_cpu"] = round(state.timing.get("engine_cpu", 0.0) + cpu, 6)
+        if exec_key:
+            rec = state.ctx.results_scoped.get(exec_key)
+            if rec is not None and rec.timing is not None and "engine_cpu" not in rec.timing:
+                rec.timing["engine_cpu"] = round(cpu, 6)
+
     # ------------------------------------------------------------------
     # Terminal meta & cleanup
     # ------------------------------------------------------------------
 
     @staticmethod
     def _write_terminal_meta(state: RunState, action: ActionBase) -> None:
-        """Write meta.json on completed/error/halted."""
-        if not isinstance(action, (CompletedAction, ErrorAction, HaltedAction)):
+        """Write meta.json (and trace.json when tracing) on a terminal action.
+
+        The run's LLM permits are returned first (see _release_llm_permits).
+        """
+        if not isinstance(
+            action,
+            (CompletedAction, ErrorAction, HaltedAction, CancelledAction, DeadlineExceededAction),
+        ):
             return
+        WorkflowRunner._release_llm_permits(state)
+        if state._tracer is not None:
+            state._tracer.close_run(state.run_id)
+            if state.parent_run_id is None and state.checkpoint_dir:
+                state._tracer.write(state.checkpoint_dir / TRACE_FILE)
         if not state.checkpoint_dir:
             return
 
         if isinstance(action, HaltedAction):
             terminal_status = "halted"
+        elif isinstance(action, DeadlineExceededAction):
+            terminal_status = "deadline_exceeded"
+        elif isinstance(action, CancelledAction):
+            terminal_status = "cancelled"
         elif isinstance(action, ErrorAction):
             terminal_status = "error"
         else:
@@ -1025,7 +2034,7 @@ class WorkflowRunner:
             if state.lane_index >= 0:
                 meta_workflow = f"{meta_workflow}[{state.lane_index}]"
 
-        totals = compute_totals(state.ctx.results_scoped)
+        totals = compute_totals(state.ctx.results_scoped, state.ctx.retired)
         write_meta(
             state.checkpoint_dir,
             state.run_id,
@@ -1037,15 +2046,26 @@ class WorkflowRunner:
             total_cost_usd=totals.get("cost_usd"),
             total_duration=totals["duration"],
             steps_by_type=totals.get("steps_by_type"),
+            timing=compute_timing(state.ctx.results_scoped, state.timing, state.ctx.retired),
+            resources=totals.get("resources"),
+            parent_run=state.parent_run,
         )
 
     def _cleanup_run(self, state: RunState) -> None:
         """Remove checkpoint files and in-memory state for a run and its children."""
+        self._release_llm_permits(state)
         if state.checkpoint_dir and state.checkpoint_dir.exists():
             shutil.rmtree(state.checkpoint_dir, ignore_errors=True)
+            forget_pack(state.checkpoint_dir / "artifacts")
         self._runs.pop(state.run_id, None)
+        if self._deferred is not None:
+            self._deferred.pop(state.run_id, None)
         for child_id in state.child_run_ids:
             child = self._runs.pop(child_id, None)
+            if child is not None:
+                self._release_llm_permits(child)
+            if self._deferred is not None:
+                self._deferred.pop(child_id, None)
             if child and child.checkpoint_dir and child.checkpoint_dir.exists():
                 shutil.rmtree(child.checkpoint_dir, ignore_errors=True)
 
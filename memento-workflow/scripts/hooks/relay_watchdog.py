@@ -18,7 +18,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 MAX_BLOCKS = 3
-TERMINAL_ACTIONS = frozenset({"completed", "halted", "error", "cancelled"})
+TERMINAL_ACTIONS = frozenset({"completed", "halted", "error", "cancelled", "deadline_exceeded"})
 WAITING_ACTIONS = frozenset({"parallel", "subagent"})
 
 
@@ -131,7 +131,11 @@ def handle_post_tool_use(data: dict) -> None:
                 "watchdog_blocks": 0,
             })
 
-    elif tool_name.endswith("__submit") or tool_name.endswith("__next"):
+    elif (
+        tool_name.endswith("__submit")
+        or tool_name.endswith("__next")
+        or tool_name.endswith("__wait")
+    ):
         if action in TERMINAL_ACTIONS:
             _delete_marker(path)
         elif action in WAITING_ACTIONS:
@@ -5,21 +5,53 @@ responses carry lightweight references instead of inline data.
 
 All write functions create directories, use atomic writes (.tmp + os.replace),
 and never raise — they log and swallow failures for graceful degradation.
+Large files are shared with identical ones across lanes and runs through the
+project's object store (objects.py).
+
+Step logs and results (command.txt, output.txt, error.txt, result.json,
+structured.json, retired.json) of at least ``COMPRESS_MIN_BYTES`` are stored
+gzip-compressed as ``<name>.gz``; ``read_artifact()`` reads either form.
+Files handed to the relay agent (prompt.md, context files) stay plain.
+``MEMENTO_ARTIFACT_COMPRESS_LEVEL`` sets the gzip level (default 6, ``0``
+disables).
+
+With ``MEMENTO_ARTIFACT_PACK=on`` the same files are appended to the run's
+pack file instead of written loose (pack.py); ``read_artifact()`` falls back
+to the pack.
 """
 
 from __future__ import annotations
 
+import gzip
 import json
 import logging
 import os
 import re
+import shutil
+from collections.abc import Iterable
 from pathlib import Path
 from typing import Any
 
 from ..engine.types import StructuredOutput
+from .objects import write_file
+from .pack import append_to_pack, find_pack, load_pack_index, read_packed
 
 logger = logging.getLogger("workflow-engine")
 
+COMPRESSED_SUFFIX = ".gz"
+COMPRESS_MIN_BYTES = 16 * 1024
+
+
+def _compress_level_from_env() -> int:
+    try:
+        return min(max(int(os.environ.get("MEMENTO_ARTIFACT_COMPRESS_LEVEL", "")), 0), 9)
+    except ValueError:
+        return 6
+
+
+COMPRESS_LEVEL = _compress_level_from_env()
+PACK_ARTIFACTS = os.environ.get("MEMENTO_ARTIFACT_PACK", "off").lower() in ("on", "1", "true")
+
 
 def exec_key_to_artifact_path(exec_key: str) -> str:
     """Map an exec_key to a relative artifact directory path.
@@ -71,20 +103,100 @@ def _ensure_step_dir(artifacts_dir: Path, exec_key: str) -> Path | None:
 
 def _atomic_write(path: Path, content: str) -> bool:
     """Write content atomically via tmp file + os.replace. Returns success."""
-    tmp = path.with_suffix(path.suffix + ".tmp")
     try:
-        tmp.write_text(content, encoding="utf-8")
-        os.replace(str(tmp), str(path))
+        write_file(path, content.encode("utf-8"))
         return True
     except OSError as e:
         logger.warning("artifact write failed %s: %s", path, e)
-        try:
-            tmp.unlink(missing_ok=True)
-        except OSError:
-            pass
         return False
 
 
+def _encode(content: str) -> tuple[bytes, bool]:
+    """Stored bytes of a step log/result and whether they are gzip-compressed."""
+    data = content.encode("utf-8")
+    if COMPRESS_LEVEL and len(data) >= COMPRESS_MIN_BYTES:
+        # mtime=0 keeps identical content byte-identical for the object store
+        packed = gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+        if len(packed) < len(data):
+            return packed, True
+    return data, False
+
+
+def _write_log(step_dir: Path, name: str, content: str) -> bool:
+    """Write a step log/result, gzip-compressed as ``name.gz`` when large.
+
+    Removes the other form left by an earlier write of the same step.
+    """
+    path, stale = step_dir / name, step_dir / f"{name}{COMPRESSED_SUFFIX}"
+    data, gz = _encode(content)
+    if gz:
+        path, stale = stale, path
+    try:
+        write_file(path, data)
+    except OSError as e:
+        logger.warning("artifact write failed %s: %s", path, e)
+        return False
+    try:
+        stale.unlink(missing_ok=True)
+    except OSError:
+        pass
+    return True
+
+
+def _write_step_files(
+    artifacts_dir: Path, exec_key: str, files: dict[str, str],
+) -> str | None:
+    """Write a step's logs/results (name -> content) to the pack or loose.
+
+    Returns the artifact relative path on success, None on failure.
+    """
+    rel = exec_key_to_artifact_path(exec_key)
+    if PACK_ARTIFACTS:
+        entries = [(f"{rel}/{name}", *_encode(content)) for name, content in files.items()]
+        if not entries or append_to_pack(artifacts_dir, entries):
+            step_dir = artifacts_dir / rel
+            if step_dir.is_dir():  # loose copies from before packing was on
+                for name in files:
+                    (step_dir / name).unlink(missing_ok=True)
+                    (step_dir / f"{name}{COMPRESSED_SUFFIX}").unlink(missing_ok=True)
+            return rel
+    step_dir = _ensure_step_dir(artifacts_dir, exec_key)
+    if step_dir is None:
+        return None
+    ok = True
+    for name, content in files.items():
+        ok = _write_log(step_dir, name, content) and ok
+    return rel if ok else None
+
+
+def read_artifact(path: Path) -> str | None:
+    """Text of an artifact, stored plain, as ``<name>.gz`` or in the run's pack.
+
+    Returns None if it does not exist or cannot be read.
+    """
+    try:
+        if path.is_file():
+            if path.name.endswith(COMPRESSED_SUFFIX):
+                return gzip.decompress(path.read_bytes()).decode("utf-8")
+            return path.read_text(encoding="utf-8")
+        packed = path.with_name(path.name + COMPRESSED_SUFFIX)
+        if packed.is_file():
+            return gzip.decompress(packed.read_bytes()).decode("utf-8")
+        found = find_pack(path.with_name(artifact_name(path.name)))
+        entry = read_packed(*found) if found else None
+        if entry is not None:
+            data, gz = entry
+            return (gzip.decompress(data) if gz else data).decode("utf-8")
+    except (OSError, EOFError, gzip.BadGzipFile, UnicodeDecodeError) as e:
+        logger.warning("artifact read failed %s: %s", path, e)
+    return None
+
+
+def artifact_name(file_name: str) -> str:
+    """The name an artifact file is read by (``output.txt.gz`` → ``output.txt``)."""
+    return file_name.removesuffix(COMPRESSED_SUFFIX)
+
+
 def write_shell_artifacts(
     artifacts_dir: Path,
     exec_key: str,
@@ -92,30 +204,25 @@ def write_shell_artifacts(
     output: str,
     error: str | None,
     structured: dict[str, Any] | None,
+    resources: dict[str, float] | None = None,
 ) -> str | None:
-    """Write shell step artifacts (command.txt, output.txt, error.txt, result.json).
+    """Write shell step artifacts (command.txt, output.txt, error.txt, result.json,
+    resources.json).
 
     Returns the artifact relative path on success, None on failure.
     """
-    step_dir = _ensure_step_dir(artifacts_dir, exec_key)
-    if step_dir is None:
-        return None
-    rel = exec_key_to_artifact_path(exec_key)
-
-    ok = True
+    files: dict[str, str] = {}
     if command:
-        ok = _atomic_write(step_dir / "command.txt", command) and ok
+        files["command.txt"] = command
     if output:
-        ok = _atomic_write(step_dir / "output.txt", output) and ok
+        files["output.txt"] = output
     if error:
-        ok = _atomic_write(step_dir / "error.txt", error) and ok
+        files["error.txt"] = error
     if structured is not None:
-        ok = _atomic_write(
-            step_dir / "result.json",
-            json.dumps(structured, indent=2, default=str),
-        ) and ok
-
-    return rel if ok else None
+        files["result.json"] = json.dumps(structured, indent=2, default=str)
+    if resources:
+        files["resources.json"] = json.dumps(resources, indent=2)
+    return _write_step_files(artifacts_dir, exec_key, files)
 
 
 def write_llm_prompt_artifact(
@@ -147,21 +254,66 @@ def write_llm_output_artifact(
 
     Returns the artifact relative path on success, None on failure.
     """
-    step_dir = _ensure_step_dir(artifacts_dir, exec_key)
-    if step_dir is None:
-        return None
-
-    rel = exec_key_to_artifact_path(exec_key)
-    ok = True
+    files: dict[str, str] = {}
     if output:
-        ok = _atomic_write(step_dir / "output.txt", output) and ok
+        files["output.txt"] = output
     if structured is not None:
-        ok = _atomic_write(
-            step_dir / "structured.json",
-            json.dumps(structured, indent=2, default=str),
-        ) and ok
+        files["structured.json"] = json.dumps(structured, indent=2, default=str)
+    return _write_step_files(artifacts_dir, exec_key, files)
 
-    return rel if ok else None
+
+def write_retired_results(
+    artifacts_dir: Path,
+    iteration_key: str,
+    results: list[dict[str, Any]],
+) -> str | None:
+    """Write the results of a loop iteration dropped by a retain policy.
+
+    ``iteration_key`` is the iteration's scope (``loop:x[i=3]``); the
+    StepResult dumps go to ``retired.json`` in its artifact directory.
+    Returns the artifact relative path on success, None on failure.
+    """
+    return _write_step_files(
+        artifacts_dir, iteration_key, {"retired.json": json.dumps(results, default=str)},
+    )
+
+
+def link_step_artifacts(src_dir: Path, dst_dir: Path, exec_keys: Iterable[str]) -> int:
+    """Give another run the artifact files of ``exec_keys`` (used by fork).
+
+    Loose files are hardlinked (artifacts are only ever replaced, never
+    modified in place), falling back to a copy; packed ones are appended to
+    the destination's pack.  Returns the number of files linked.
+    """
+    packed: dict[str, list[str]] = {}
+    for path in load_pack_index(src_dir):
+        packed.setdefault(path.rpartition("/")[0], []).append(path)
+    linked = 0
+    for exec_key in exec_keys:
+        rel = exec_key_to_artifact_path(exec_key)
+        step_dir = src_dir / rel
+        if step_dir.is_dir():
+            for src in step_dir.iterdir():
+                if not src.is_file():
+                    continue
+                dst = dst_dir / rel / src.name
+                try:
+                    dst.parent.mkdir(parents=True, exist_ok=True)
+                    try:
+                        os.link(src, dst)
+                    except OSError:
+                        shutil.copyfile(src, dst)
+                    linked += 1
+                except OSError as e:
+                    logger.warning("artifact link failed %s: %s", dst, e)
+        entries = []
+        for path in packed.get(rel, ()):
+            found = read_packed(src_dir, path)
+            if found is not None:
+                entries.append((path, *found))
+        if entries and append_to_pack(dst_dir, entries):
+            linked += len(entries)
+    return linked
 
 
 def write_meta(
@@ -175,6 +327,9 @@ def write_meta(
     total_cost_usd: float | None = None,
     total_duration: float | None = None,
     steps_by_type: dict[str, int] | None = None,
+    timing: dict[str, Any] | None = None,
+    resources: dict[str, float] | None = None,
+    parent_run: dict[str, str] | None = None,
 ) -> bool:
     """Write or update meta.json in the run directory.
 
@@ -195,6 +350,12 @@ def write_meta(
         data["total_duration"] = total_duration
     if steps_by_type:
         data["steps_by_type"] = steps_by_type
+    if timing:
+        data["timing"] = timing
+    if resources:
+        data["resources"] = resources
+    if parent_run:
+        data["parent_run"] = parent_run
 
     try:
         run_dir.mkdir(parents=True, exist_ok=True)
@@ -206,3 +367,21 @@ def write_meta(
         run_dir / "meta.json",
         json.dumps(data, indent=2, default=str),
     )
+
+
+EVENTS_FILE = "events.jsonl"
+
+
+def append_event(run_dir: Path, event: dict[str, Any]) -> bool:
+    """Append one engine decision (e.g. a concurrency change) to events.jsonl.
+
+    Returns True on success; failures are logged, never raised.
+    """
+    try:
+        run_dir.mkdir(parents=True, exist_ok=True)
+        with open(run_dir / EVENTS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, default=str) + "\n")
+        return True
+    except OSError as e:
+        logger.warning("event write failed %s: %s", run_dir, e)
+        return False
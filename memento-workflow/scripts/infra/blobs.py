@@ -0,0 +1,174 @@
+"""Out-of-line storage for large variables and structured outputs.
+
+A checkpoint embeds ``ctx.variables`` and every result's
+``structured_output``, and each parallel lane's checkpoint repeats the
+parent's — so one large value (a file list, a diff, a generated document)
+was written once per lane on every save.  Values whose JSON is larger than
+``BLOB_THRESHOLD`` bytes are instead saved once, by content hash, under the
+root run's ``blobs/`` directory, and the checkpoint holds a handle::
+
+    {"$blob": "<sha256>", "bytes": 123456}
+
+Blob files go through the project's object store (objects.py), so runs
+holding the same large value share its bytes.
+
+A stored value that merely looks like a handle (or like the escape
+wrapper) is written as ``{"$blob-literal": value}`` instead, so loading
+never mistakes user data for a handle.
+
+Handles only exist on disk: loading a checkpoint materializes them, through
+a small process-wide cache of blob text so lanes of the same run skip the
+disk read; every load parses its own copy, so runs never share (and
+mutate) one cached object.  Lanes share values above the threshold with
+their parent in memory (``shared_values``), so such values are read-only
+by convention.
+
+``MEMENTO_BLOB_THRESHOLD`` overrides the threshold; ``0`` disables blobs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from .objects import write_file
+
+logger = logging.getLogger("workflow-engine")
+
+BLOB_DIR = "blobs"
+BLOB_KEY = "$blob"
+LITERAL_KEY = "$blob-literal"
+
+
+def _threshold_from_env() -> int:
+    try:
+        return max(int(os.environ.get("MEMENTO_BLOB_THRESHOLD", "")), 0)
+    except ValueError:
+        return 16 * 1024
+
+
+BLOB_THRESHOLD = _threshold_from_env()
+# Blob text kept for reuse, by total size
+_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def is_blob_handle(value: Any) -> bool:
+    return isinstance(value, dict) and len(value) == 2 and BLOB_KEY in value and "bytes" in value
+
+
+def _is_literal(value: Any) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and LITERAL_KEY in value
+
+
+class BlobStore:
+    """Content-addressed JSON values under ``<root>/<sha[:2]>/<sha>.json``."""
+
+    def __init__(self, root: Path, threshold: int | None = None) -> None:
+        self.root = root
+        self.threshold = BLOB_THRESHOLD if threshold is None else threshold
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def put_text(self, text: str) -> dict[str, Any] | None:
+        """Store serialized JSON; returns its handle, or None if the write failed."""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not path.is_file():
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                write_file(path, data)
+            except OSError as e:
+                logger.warning("blob write failed %s: %s", path, e)
+                return None
+        return {BLOB_KEY: digest, "bytes": len(data)}
+
+    def externalize(self, value: Any) -> Any:
+        """``value`` itself if small (or not JSON), else a handle to it.
+
+        Values shaped like a handle or a literal wrapper are wrapped in
+        ``{LITERAL_KEY: value}`` whatever their size.
+        """
+        if is_blob_handle(value) or _is_literal(value):
+            return {LITERAL_KEY: value}
+        if not self.threshold or value is None or isinstance(value, (bool, int, float)):
+            return value
+        try:
+            text = json.dumps(value, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return value
+        if len(text) <= self.threshold:
+            return value
+        return self.put_text(text) or value
+
+    def get(self, handle: dict[str, Any]) -> Any:
+        """Materialize a handle (a fresh copy); raises OSError/ValueError."""
+        digest = handle[BLOB_KEY]
+        with _cache_lock:
+            text = _cache.get(digest)
+            if text is not None:
+                _cache.move_to_end(digest)
+        if text is None:
+            text = self.path(digest).read_text(encoding="utf-8")
+            _remember(digest, text)
+        return json.loads(text)
+
+    def materialize(self, value: Any) -> Any:
+        """The value a checkpoint entry stands for (see externalize)."""
+        if is_blob_handle(value):
+            return self.get(value)
+        if _is_literal(value):
+            return value[LITERAL_KEY]
+        return value
+
+
+_cache: OrderedDict[str, str] = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_size = 0
+
+
+def _remember(digest: str, text: str) -> None:
+    global _cache_size
+    if len(text) > _CACHE_BYTES:
+        return
+    with _cache_lock:
+        if digest in _cache:
+            return
+        _cache[digest] = text
+        _cache_size += len(text)
+        while _cache_size > _CACHE_BYTES:
+            _, dropped = _cache.popitem(last=False)
+            _cache_size -= len(dropped)
+
+
+def shared_values(variables: dict[str, Any], threshold: int | None = None) -> dict[int, Any]:
+    """Deepcopy memo that makes child runs share the large top-level values.
+
+    Maps each value whose JSON is larger than the threshold to itself;
+    compute it once per fan-out and pass ``dict(memo)`` to each
+    ``copy.deepcopy(variables, ...)`` call.
+    """
+    limit = BLOB_THRESHOLD if threshold is None else threshold
+    memo: dict[int, Any] = {}
+    if not limit:
+        return memo
+    for value in variables.values():
+        if isinstance(value, str):
+            size = len(value)
+        elif isinstance(value, (dict, list)):
+            try:
+                size = len(json.dumps(value, separators=(",", ":")))
+            except (TypeError, ValueError):
+                continue
+        else:
+            continue
+        if size > limit:
+            memo[id(value)] = value
+    return memo
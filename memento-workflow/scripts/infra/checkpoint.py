@@ -10,9 +10,13 @@ import json
 import logging
 import os
 import re
+import time
+import uuid
 from pathlib import Path
+from typing import Any
 
 from ..engine.core import PROTOCOL_VERSION, Frame, RunState
+from ..engine.tracing import trace_span
 from ..engine.types import (
     Block,
     BlockBase,
@@ -26,6 +30,9 @@ from ..engine.types import (
     WorkflowDef,
 )
 from ..utils import workflow_hash
+from .artifacts import link_step_artifacts
+from .blobs import BLOB_DIR, BlobStore
+from .metrics import CHECKPOINT_FAILURES, CHECKPOINT_SECONDS, METRICS, state_dir_of
 
 logger = logging.getLogger("workflow-engine")
 
@@ -66,18 +73,66 @@ def checkpoint_save(state: RunState) -> bool:
     outputs of all completed steps).  checkpoint_load() creates a fresh stack from the
     workflow root; advance() fast-forwards through completed blocks by checking
     exec_key in results_scoped, re-applying result_var side effects via _replay_skip().
-    No block-path reconstruction is needed.
+    No block-path reconstruction is needed.  Loop iterations dropped by a retain
+    policy are only in ctx.retired; advance() resumes such a loop after them.
 
     Returns True on success, False on failure.
     """
     if state.checkpoint_dir is None:
         return False
-
-    state.checkpoint_dir.mkdir(parents=True, exist_ok=True)
-    checkpoint_file = state.checkpoint_dir / "state.json"
-
-    # Exclude ephemeral keys (resume_only + not resume_once) from checkpoint
-    ephemeral = state._ephemeral_keys
+    t0 = time.perf_counter()
+    with trace_span(state, "checkpoint_save", "checkpoint"):
+        ok = _write_checkpoint(state, state.checkpoint_dir)
+    CHECKPOINT_SECONDS.observe(time.perf_counter() - t0)
+    if not ok:
+        CHECKPOINT_FAILURES.inc()
+    state_dir = state_dir_of(state.checkpoint_dir)
+    if state_dir is not None:
+        METRICS.maybe_export(state_dir)
+    return ok
+
+
+def _blob_store(checkpoint_dir: Path, run_id: str) -> BlobStore:
+    """The blob store of a run tree, in its root run's directory."""
+    root = checkpoint_dir
+    for _ in range(run_id.count(">")):
+        root = root.parent.parent  # .../<parent>/children/<segment>
+    return BlobStore(root / BLOB_DIR)
+
+
+def _dump_results(state: RunState, store: BlobStore) -> dict[str, dict]:
+    """results_scoped for state.json, large structured outputs as blob handles."""
+    dumps: dict[str, dict] = {}
+    refs = state._blob_refs
+    for k, v in state.ctx.results_scoped.items():
+        if k in state._ephemeral_keys:
+            continue
+        dump = v.model_dump()
+        if v.structured_output is not None:
+            ref = refs.get(k)
+            if ref is None or ref[0] != v.order:
+                stored = store.externalize(v.structured_output)
+                ref = refs[k] = (v.order, None if stored is v.structured_output else stored)
+            if ref[1] is not None:
+                dump["structured_output"] = ref[1]
+        dumps[k] = dump
+    return dumps
+
+
+def _materialize_ctx(ctx_data: dict, store: BlobStore) -> None:
+    """Replace blob handles in checkpoint ctx data with their values (in place)."""
+    variables = ctx_data.get("variables", {})
+    for k, v in variables.items():
+        variables[k] = store.materialize(v)
+    for dump in ctx_data.get("results_scoped", {}).values():
+        if "structured_output" in dump:
+            dump["structured_output"] = store.materialize(dump["structured_output"])
+
+
+def _write_checkpoint(state: RunState, checkpoint_dir: Path) -> bool:
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint_file = checkpoint_dir / "state.json"
+    store = _blob_store(checkpoint_dir, state.run_id)
 
     data = {
         "run_id": state.run_id,
@@ -92,6 +147,7 @@ def checkpoint_save(state: RunState) -> bool:
         "started_at": state.started_at,
         "parallel_block_name": state.parallel_block_name,
         "lane_index": state.lane_index,
+        "on_failure": state.on_failure,
         "spawn_exec_key": state.spawn_exec_key,
         "subagent_block_name": state.subagent_block_name,
         "subagent_exec_key": state.subagent_exec_key,
@@ -99,13 +155,19 @@ def checkpoint_save(state: RunState) -> bool:
         "relay_block_kind": state.relay_block_kind,
         "relay_block_name": state.relay_block_name,
         "inline_parent_exec_key": state._inline_parent_exec_key,
+        "adaptive_batches": state._adaptive_batches,
+        "ranked_batches": state._ranked_batches,
+        "timing": state.timing,
+        "priority": state.priority,
+        "llm_limits": state.llm_limits,
+        "deadline": state.deadline,
+        "deadline_source": state.deadline_source,
+        "parent_run": state.parent_run,
         "ctx": {
-            "results_scoped": {
-                k: v.model_dump()
-                for k, v in state.ctx.results_scoped.items()
-                if k not in ephemeral
-            },
-            "variables": state.ctx.variables,
+            # Ephemeral keys (resume_only + not resume_once) are excluded
+            "results_scoped": _dump_results(state, store),
+            "variables": {k: store.externalize(v) for k, v in state.ctx.variables.items()},
+            "retired": state.ctx.retired,
             "cwd": state.ctx.cwd,
             "dry_run": state.ctx.dry_run,
             "prompt_dir": state.ctx.prompt_dir,
@@ -119,18 +181,87 @@ def checkpoint_save(state: RunState) -> bool:
 
     tmp_file = checkpoint_file.with_suffix(".json.tmp")
     try:
-        tmp_file.write_text(json.dumps(data, default=str), encoding="utf-8")
+        text = json.dumps(data, default=str)
+        tmp_file.write_text(text, encoding="utf-8")
         os.replace(str(tmp_file), str(checkpoint_file))
+        state._checkpoint_bytes = len(text)
         return True
     except OSError:
         return False
 
 
+def _rebuild_results_view(ctx: WorkflowContext) -> None:
+    # Results of retired loop iterations first: any kept result is newer
+    for record in ctx.retired.values():
+        for key, dump in record.get("latest", {}).items():
+            ctx.results[key] = StepResult(**dump)
+    for r in sorted(ctx.results_scoped.values(), key=lambda x: (x.order, x.exec_key)):
+        if r.results_key:
+            ctx.results[r.results_key] = r
+
+
+def checkpoint_spill(state: RunState) -> bool:
+    """Checkpoint the run, then drop its results and variables from memory.
+
+    The RunState object itself (stack, status, pending key, caches) stays
+    in place so existing references remain valid.  Ephemeral results are
+    never written to the checkpoint, so they are kept in memory.
+    checkpoint_rehydrate() restores the payload.
+
+    Returns False (and leaves the run untouched) if the checkpoint write fails.
+    """
+    if state._spilled:
+        return True
+    if not checkpoint_save(state):
+        return False
+    ctx = state.ctx
+    ctx.results_scoped = {
+        k: v for k, v in ctx.results_scoped.items() if k in state._ephemeral_keys
+    }
+    ctx.results = {}
+    ctx.variables = {}
+    state._spilled = True
+    return True
+
+
+def checkpoint_rehydrate(state: RunState) -> bool:
+    """Reload results and variables dropped by checkpoint_spill()."""
+    if not state._spilled:
+        return True
+    if state.checkpoint_dir is None:
+        return False
+    try:
+        data = json.loads(
+            (state.checkpoint_dir / "state.json").read_text(encoding="utf-8")
+        )
+        _materialize_ctx(
+            data.get("ctx", {}), _blob_store(state.checkpoint_dir, state.run_id),
+        )
+    except (json.JSONDecodeError, OSError):
+        logger.exception("rehydrate: cannot read checkpoint for run_id=%s", state.run_id)
+        return False
+
+    ctx_data = data.get("ctx", {})
+    ctx = state.ctx
+    ephemeral = ctx.results_scoped
+    ctx.results_scoped = {
+        k: StepResult(**v) for k, v in ctx_data.get("results_scoped", {}).items()
+    }
+    ctx.results_scoped.update(ephemeral)
+    ctx.results = {}
+    _rebuild_results_view(ctx)
+    ctx.variables = ctx_data.get("variables", {})
+    state._spilled = False
+    return True
+
+
 def checkpoint_load(
     run_id: str,
     cwd: Path,
     registry: dict[str, WorkflowDef],
     workflow: WorkflowDef,
+    *,
+    check_drift: bool = True,
 ) -> RunState | str:
     """Load a run state from checkpoint.
 
@@ -144,6 +275,7 @@ def checkpoint_load(
 
     try:
         data = json.loads(checkpoint_file.read_text(encoding="utf-8"))
+        _materialize_ctx(data.get("ctx", {}), _blob_store(checkpoint_dir, run_id))
     except (json.JSONDecodeError, OSError) as exc:
         return f"Failed to read checkpoint: {exc}"
 
@@ -158,7 +290,7 @@ def checkpoint_load(
     # Drift check
     saved_hash = data.get("wf_hash", "")
     current_hash = workflow_hash(workflow)
-    if saved_hash and current_hash and saved_hash != current_hash:
+    if check_drift and saved_hash and current_hash and saved_hash != current_hash:
         return (
             f"Workflow source changed since checkpoint. "
             f"checkpoint_hash={saved_hash}, current_hash={current_hash}"
@@ -168,6 +300,7 @@ def checkpoint_load(
     ctx_data = data.get("ctx", {})
     ctx = WorkflowContext(
         variables=ctx_data.get("variables", {}),
+        retired=ctx_data.get("retired", {}),
         cwd=ctx_data.get("cwd", str(cwd)),
         dry_run=ctx_data.get("dry_run", False),
         prompt_dir=ctx_data.get("prompt_dir", ""),
@@ -178,9 +311,7 @@ def checkpoint_load(
         ctx.results_scoped[k] = StepResult(**v)
 
     # Rebuild convenience results view
-    for r in sorted(ctx.results_scoped.values(), key=lambda x: (x.order, x.exec_key)):
-        if r.results_key:
-            ctx.results[r.results_key] = r
+    _rebuild_results_view(ctx)
 
     # Don't restore scope — advance() will rebuild it during replay
     # as it re-enters containers (loops, retries, subworkflows).
@@ -202,8 +333,15 @@ def checkpoint_load(
         warnings=data.get("warnings", []),
         workflow_name=data.get("workflow_name", ""),
         started_at=data.get("started_at", ""),
+        timing=data.get("timing"),
+        priority=data.get("priority", "interactive"),
+        llm_limits=data.get("llm_limits"),
+        deadline=data.get("deadline"),
+        deadline_source=data.get("deadline_source", ""),
+        parent_run=data.get("parent_run"),
         parallel_block_name=data.get("parallel_block_name", ""),
         lane_index=data.get("lane_index", -1),
+        on_failure=data.get("on_failure", ""),
         spawn_exec_key=data.get("spawn_exec_key", ""),
         subagent_block_name=data.get("subagent_block_name", ""),
         subagent_exec_key=data.get("subagent_exec_key", ""),
@@ -212,7 +350,79 @@ def checkpoint_load(
         relay_block_name=data.get("relay_block_name", ""),
     )
     state._inline_parent_exec_key = data.get("inline_parent_exec_key", "")
+    state._adaptive_batches = data.get("adaptive_batches", {})
+    state._ranked_batches = data.get("ranked_batches", {})
+
+    return state
+
+
+def checkpoint_fork(
+    run_id: str,
+    exec_key: str,
+    cwd: Path,
+    registry: dict[str, WorkflowDef],
+    workflow: WorkflowDef,
+    *,
+    variables: dict[str, Any] | None = None,
+    new_run_id: str = "",
+) -> RunState | str:
+    """Create a new run from a root run's checkpoint, truncated at ``exec_key``.
+
+    The fork keeps the results recorded before ``exec_key`` (by record
+    order) and links their artifacts from the source run, so advancing it
+    replays them and re-executes ``exec_key`` and everything after.
+    ``workflow`` may be a newer version of the run's workflow: the drift
+    check is skipped and the fork records the new hash.  ``variables``
+    override the checkpointed ones.  Like a resumed run, the fork runs
+    ``resume_only`` blocks.  Child runs are not copied; parallel blocks
+    and subagents recorded before ``exec_key`` are replayed from their
+    merged results.
+
+    Returns the new RunState (not yet saved), or an error string.
+    """
+    if ">" in run_id:
+        return f"Cannot fork child run {run_id}: fork its root run"
+    source = checkpoint_load(run_id, cwd, registry, workflow, check_drift=False)
+    if isinstance(source, str):
+        return source
+    cut = source.ctx.results_scoped.get(exec_key)
+    if cut is None:
+        return f"Step {exec_key!r} has no recorded result in run {run_id}"
+
+    ctx = source.ctx
+    ctx.results_scoped = {
+        k: r for k, r in ctx.results_scoped.items() if r.order < cut.order
+    }
+    # A loop whose dropped iterations reach past the cut starts over
+    ctx.retired = {
+        k: record for k, record in ctx.retired.items()
+        if all(d.get("order", 0) < cut.order for d in record.get("latest", {}).values())
+    }
+    ctx.results = {}
+    _rebuild_results_view(ctx)
+
+    new_run_id = new_run_id or uuid.uuid4().hex[:12]
+    checkpoint_dir = checkpoint_dir_from_run_id(cwd, new_run_id)
+    ctx.variables["run_id"] = new_run_id
+    if source.checkpoint_dir and ctx.variables.get("clean_dir") == str(source.checkpoint_dir / "clean"):
+        ctx.variables["clean_dir"] = str(checkpoint_dir / "clean")
+    ctx.variables.update(variables or {})
 
+    state = RunState(
+        run_id=new_run_id,
+        ctx=ctx,
+        stack=[Frame(block=workflow)],
+        registry=registry,
+        wf_hash=workflow_hash(workflow),
+        checkpoint_dir=checkpoint_dir,
+        workflow_name=workflow.name,
+        priority=source.priority,
+        llm_limits=source.llm_limits,
+        parent_run={"run_id": run_id, "exec_key": exec_key},
+    )
+    state.is_resumed = True
+    if source.artifacts_dir and state.artifacts_dir:
+        link_step_artifacts(source.artifacts_dir, state.artifacts_dir, ctx.results_scoped)
     return state
 
 
@@ -268,6 +478,7 @@ def _restore_child_context(
     ctx_data = data.get("ctx", {})
     child_ctx = WorkflowContext(
         variables=ctx_data.get("variables", {}),
+        retired=ctx_data.get("retired", {}),
         cwd=ctx_data.get("cwd", parent_state.ctx.cwd),
         dry_run=ctx_data.get("dry_run", False),
         prompt_dir=ctx_data.get("prompt_dir", ""),
@@ -276,12 +487,7 @@ def _restore_child_context(
     # Restore results
     for k, v in ctx_data.get("results_scoped", {}).items():
         child_ctx.results_scoped[k] = StepResult(**v)
-    for r in sorted(
-        child_ctx.results_scoped.values(),
-        key=lambda x: (x.order, x.exec_key),
-    ):
-        if r.results_key:
-            child_ctx.results[r.results_key] = r
+    _rebuild_results_view(child_ctx)
 
     # Restore scope — critical for children. Their scope was pushed before
     # stack creation, so advance() replay won't rebuild it.
@@ -353,6 +559,10 @@ def _load_subworkflow_child(
         warnings=data.get("warnings", []),
         workflow_name=child_wf_name,
         started_at=data.get("started_at", ""),
+        timing=data.get("timing"),
+        # Block budgets are runtime only; a resumed child gets the run's deadline
+        deadline=parent_state.deadline,
+        deadline_source=parent_state.deadline_source,
         spawn_exec_key=spawn_key,
         relay_parent_exec_key=data.get("relay_parent_exec_key", spawn_key),
         relay_block_kind=data.get("relay_block_kind", "subworkflow"),
@@ -360,6 +570,8 @@ def _load_subworkflow_child(
     )
     child_state.is_resumed = True
     child_state._inline_parent_exec_key = data.get("inline_parent_exec_key", "")
+    child_state._adaptive_batches = data.get("adaptive_batches", {})
+    child_state._ranked_batches = data.get("ranked_batches", {})
 
     return child_state
 
@@ -443,6 +655,10 @@ def _load_relay_container_child(
         warnings=data.get("warnings", []),
         workflow_name=child_wf_name,
         started_at=data.get("started_at", ""),
+        timing=data.get("timing"),
+        # Block budgets are runtime only; a resumed child gets the run's deadline
+        deadline=parent_state.deadline,
+        deadline_source=parent_state.deadline_source,
         subagent_block_name=block_name if block_kind == "group" else "",
         subagent_exec_key=parent_exec_key if block_kind == "group" else "",
         relay_parent_exec_key=data.get("relay_parent_exec_key", parent_exec_key),
@@ -451,6 +667,8 @@ def _load_relay_container_child(
     )
     child_state.is_resumed = True
     child_state._inline_parent_exec_key = data.get("inline_parent_exec_key", "")
+    child_state._adaptive_batches = data.get("adaptive_batches", {})
+    child_state._ranked_batches = data.get("ranked_batches", {})
 
     return child_state
 
@@ -496,14 +714,21 @@ def _load_parallel_lane_child(
         warnings=data.get("warnings", []),
         workflow_name=data.get("workflow_name", ""),
         started_at=data.get("started_at", ""),
+        timing=data.get("timing"),
+        # Block budgets are runtime only; a resumed child gets the run's deadline
+        deadline=parent_state.deadline,
+        deadline_source=parent_state.deadline_source,
         parallel_block_name=block_name,
         lane_index=lane_index,
+        on_failure=data.get("on_failure", parallel_block.on_failure),
         relay_parent_exec_key=data.get("relay_parent_exec_key", parent_exec_key),
         relay_block_kind=data.get("relay_block_kind", "parallel_each"),
         relay_block_name=data.get("relay_block_name", block_name),
     )
     child_state.is_resumed = True
     child_state._inline_parent_exec_key = data.get("inline_parent_exec_key", "")
+    child_state._adaptive_batches = data.get("adaptive_batches", {})
+    child_state._ranked_batches = data.get("ranked_batches", {})
     return child_state
 
 
@@ -560,6 +785,9 @@ def checkpoint_load_children(
 
         try:
             data = json.loads(checkpoint_file.read_text(encoding="utf-8"))
+            _materialize_ctx(
+                data.get("ctx", {}), _blob_store(child_dir, data.get("run_id", "")),
+            )
         except (json.JSONDecodeError, OSError) as exc:
             logger.warning(
                 "Failed to read child checkpoint %s: %s", checkpoint_file, exc
@@ -1,7 +1,7 @@
 """Clean up old workflow state directories.
 
 Usage:
-    python -m scripts.cleanup [OPTIONS] [CWD]
+    python -m scripts.infra.cleanup [OPTIONS] [CWD]
 
 Options:
     --before DATE    Remove runs started before this date (ISO 8601 or YYYY-MM-DD)
@@ -9,12 +9,17 @@ Options:
     --keep N         Keep the N most recent runs (default: 0 = don't keep)
     --dry-run        Show what would be deleted without deleting
     --all            Remove ALL runs (ignores --before/--status filters)
+    --usage          Only report disk usage (files shared through the object store
+                     counted once)
+
+Removing runs also removes the objects (objects.py) no remaining run links to.
 
 Examples:
-    python -m scripts.cleanup --before 2026-03-01
-    python -m scripts.cleanup --status completed --keep 5
-    python -m scripts.cleanup --all --dry-run
-    python -m scripts.cleanup --before 2026-03-10 --status completed /path/to/project
+    python -m scripts.infra.cleanup --before 2026-03-01
+    python -m scripts.infra.cleanup --status completed --keep 5
+    python -m scripts.infra.cleanup --all --dry-run
+    python -m scripts.infra.cleanup --before 2026-03-10 --status completed /path/to/project
+    python -m scripts.infra.cleanup --usage
 """
 
 from __future__ import annotations
@@ -25,6 +30,9 @@ import shutil
 from datetime import datetime, timezone
 from pathlib import Path
 
+from .objects import disk_usage, gc_objects
+from .pack import forget_pack
+
 
 def _parse_date(date_str: str) -> datetime:
     """Parse date string (ISO 8601 or YYYY-MM-DD) into timezone-aware datetime."""
@@ -111,6 +119,27 @@ def filter_runs(
     return candidates
 
 
+def _run_size(path: Path, linked: dict[tuple[int, int], list[int]]) -> int:
+    """Bytes only this run holds; tallies its hardlinked files into ``linked``.
+
+    ``linked`` maps inode -> [links seen, link count, size].
+    """
+    size = 0
+    for f in path.rglob("*"):
+        try:
+            if not f.is_file():
+                continue
+            st = f.stat()
+        except OSError:
+            continue
+        if st.st_nlink > 1:
+            entry = linked.setdefault((st.st_dev, st.st_ino), [0, st.st_nlink, st.st_size])
+            entry[0] += 1
+        else:
+            size += st.st_size
+    return size
+
+
 def cleanup(
     cwd: str = ".",
     *,
@@ -164,17 +193,15 @@ def cleanup(
     removed = []
     skipped = []
     total_freed = 0
+    usage_before = disk_usage(state_dir)
+    linked: dict[tuple[int, int], list[int]] = {}
 
     for r in runs:
         if r["run_id"] in remove_ids:
-            try:
-                size = sum(
-                    f.stat().st_size for f in r["path"].rglob("*") if f.is_file()
-                )
-            except OSError:
-                size = 0
+            size = _run_size(r["path"], linked)
             if not dry_run:
                 shutil.rmtree(r["path"], ignore_errors=True)
+                forget_pack(Path(r["path"]) / "artifacts")
             removed.append(
                 {
                     "run_id": r["run_id"],
@@ -195,15 +222,31 @@ def cleanup(
                 }
             )
 
-    return {
+    if dry_run:
+        # Objects whose every link (besides the store's own) is in a removed run
+        orphaned = [e for e in linked.values() if e[0] >= e[1] - 1]
+        gc = {
+            "objects_removed": len(orphaned),
+            "objects_freed_bytes": sum(e[2] for e in orphaned),
+        }
+    else:
+        gc = gc_objects(state_dir)
+    total_freed += gc["objects_freed_bytes"]
+
+    result = {
         "status": "success",
         "dry_run": dry_run,
         "removed": len(removed),
         "skipped": len(skipped),
         "freed_bytes": total_freed,
         "freed_mb": round(total_freed / 1_048_576, 2),
+        **gc,
+        "usage_before": usage_before,
         "details": removed,
     }
+    if not dry_run:
+        result["usage_after"] = disk_usage(state_dir)
+    return result
 
 
 def cleanup_stale_relay_markers(cwd: str, max_age_hours: int = 24) -> int:
@@ -267,8 +310,18 @@ def main():
         action="store_true",
         help="Remove ALL runs (ignores --before/--status)",
     )
+    parser.add_argument(
+        "--usage",
+        action="store_true",
+        help="Only report disk usage of .workflow-state/",
+    )
     args = parser.parse_args()
 
+    if args.usage:
+        usage = disk_usage(Path(args.cwd).resolve() / ".workflow-state")
+        print(json.dumps(usage, indent=2))
+        return
+
     if not args.before and not args.status and not args.remove_all:
         parser.error("Specify --before, --status, --all, or a combination")
 
@@ -312,7 +312,9 @@ def compile_expression(expr: str) -> Callable[[WorkflowContext], bool]:
     """
     tokens = _tokenize(expr)
     parser = _Parser(tokens, expr)
-    return parser.parse()
+    fn = parser.parse()
+    fn.expression = expr  # type: ignore[attr-defined]  # shown by the symbolic dry-run
+    return fn
 
 
 # ---------------------------------------------------------------------------
@@ -405,6 +407,26 @@ def _compile_blocks(
     return [compile_block(item, workflow_dir, modules) for item in items]
 
 
+def _budget(data: dict[str, Any], block_label: str) -> float | None:
+    """Validated ``budget`` (wall-clock seconds) of a container block."""
+    budget = data.get("budget")
+    if budget is None:
+        return None
+    if isinstance(budget, bool) or not isinstance(budget, (int, float)) or budget <= 0:
+        raise ValueError(f"{block_label}: budget must be a positive number of seconds")
+    return float(budget)
+
+
+def _retain(data: dict[str, Any], block_name: str) -> str:
+    """Validated ``retain`` policy of a loop: all, aggregate or last:N."""
+    retain = str(data.get("retain", "all"))
+    if retain not in ("all", "aggregate") and not re.fullmatch(r"last:[1-9]\d*", retain):
+        raise ValueError(
+            f"Loop block '{block_name}': retain must be 'all', 'aggregate' or 'last:N' (N >= 1)"
+        )
+    return retain
+
+
 def compile_block(
     data: dict[str, Any],
     workflow_dir: Path,
@@ -488,6 +510,7 @@ def compile_block(
             **common,
             blocks=_compile_blocks(data.get("blocks", []), workflow_dir, modules),
             model=data.get("model"),
+            budget=_budget(data, f"Group block '{block_name}'"),
         )
 
     if block_type == "loop":
@@ -496,18 +519,38 @@ def compile_block(
             loop_over=data["over"],
             loop_var=data["as"],
             blocks=_compile_blocks(data.get("blocks", []), workflow_dir, modules),
+            budget=_budget(data, f"Loop block '{block_name}'"),
+            retain=_retain(data, block_name),
         )
 
     if block_type == "retry":
         until = _compile_condition(data, modules, "until", "until_fn")
         if until is None:
             raise ValueError(f"Retry block '{block_name}': must specify 'until' or 'until_fn'")
+        blocks = _compile_blocks(data.get("blocks", []), workflow_dir, modules)
+        hedge_after = data.get("hedge_after")
+        if hedge_after is not None:
+            if len(blocks) != 1 or not isinstance(blocks[0], ShellStep):
+                raise ValueError(
+                    f"Retry block '{block_name}': hedge_after needs a single shell step body"
+                )
+            if isinstance(hedge_after, str) and not re.fullmatch(r"p\d+(\.\d+)?", hedge_after):
+                raise ValueError(
+                    f"Retry block '{block_name}': hedge_after must be seconds or 'p<NN>'"
+                )
         return RetryBlock(
             **common,
             until=until,
             max_attempts=data.get("max_attempts", 3),
             halt_on_exhaustion=data.get("halt_on_exhaustion", ""),
-            blocks=_compile_blocks(data.get("blocks", []), workflow_dir, modules),
+            backoff=data.get("backoff", 0.0),
+            backoff_factor=data.get("backoff_factor", 2.0),
+            max_backoff=data.get("max_backoff", 60.0),
+            jitter=data.get("jitter", 0.0),
+            attempt_timeout=data.get("attempt_timeout"),
+            budget=_budget(data, f"Retry block '{block_name}'"),
+            hedge_after=hedge_after,
+            blocks=blocks,
         )
 
     if block_type == "conditional":
@@ -535,12 +578,54 @@ def compile_block(
         )
 
     if block_type == "parallel":
+        reduce: Any = data.get("reduce")
+        reduce_fn = data.get("reduce_fn")
+        if reduce and reduce_fn:
+            raise ValueError(f"Cannot specify both 'reduce' and 'reduce_fn' on block '{data}'")
+        if reduce_fn:
+            reduce = _resolve_ref(reduce_fn, modules, "reduce_fn")
+            if not callable(reduce):
+                raise ValueError(f"reduce_fn reference '{reduce_fn}' is not callable")
+        cost: Any = data.get("cost")
+        cost_fn = data.get("cost_fn")
+        if cost and cost_fn:
+            raise ValueError(f"Cannot specify both 'cost' and 'cost_fn' on block '{data}'")
+        if cost_fn:
+            fn = _resolve_ref(cost_fn, modules, "cost_fn")
+            if not callable(fn):
+                raise ValueError(f"cost_fn reference '{cost_fn}' is not callable")
+            cost = cast(Callable[[Any], float], fn)
+        order = data.get("order", "items")
+        if order not in ("items", "longest_first"):
+            raise ValueError(
+                f"Parallel block '{block_name}': order must be 'items' or 'longest_first'"
+            )
+        concurrency = data.get("concurrency", "fixed")
+        if concurrency not in ("fixed", "adaptive"):
+            raise ValueError(
+                f"Parallel block '{block_name}': concurrency must be 'fixed' or 'adaptive'"
+            )
+        max_concurrency = data.get("max_concurrency")
+        min_concurrency = data.get("min_concurrency", 1)
+        if min_concurrency < 1 or (max_concurrency and min_concurrency > max_concurrency):
+            raise ValueError(
+                f"Parallel block '{block_name}': min_concurrency must be between 1 "
+                "and max_concurrency"
+            )
         return ParallelEachBlock(
             **common,
             parallel_for=data["for"],
             item_var=data.get("as", "item"),
-            max_concurrency=data.get("max_concurrency"),
+            max_concurrency=max_concurrency,
+            concurrency=concurrency,
+            min_concurrency=min_concurrency,
+            order=order,
+            cost=cost,
             model=data.get("model"),
+            on_failure=data.get("on_failure", "continue"),
+            reduce=reduce,
+            result_var=data.get("result_var", ""),
+            budget=_budget(data, f"Parallel block '{block_name}'"),
             template=_compile_blocks(data.get("template", []), workflow_dir, modules),
         )
 
@@ -0,0 +1,96 @@
+"""Per-item lane durations from earlier runs, for longest-first lane ordering.
+
+A ParallelEachBlock with ``order="longest_first"`` and no ``cost`` ranks its
+items by how long each item's lane took before.  When such a fan-out (or
+batch) finishes, the runner records every lane's duration (the sum of the
+lane's own StepResult durations) here; the next run of the same block reads
+them back.
+
+History lives in ``<cwd>/.workflow-state/.lane-history.json`` (dot-prefixed,
+so run cleanup and the dashboard skip it and it outlives the runs)::
+
+    {"<workflow>/<block>": {"<item key>": seconds, ...}, ...}
+
+Durations are smoothed (EWMA) and each block keeps its most recently seen
+``MAX_ITEMS_PER_BLOCK`` items.  Writes are atomic and serialized within the
+process; concurrent server processes may lose an update, which only makes
+the ordering hint slightly staler.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("workflow-engine")
+
+HISTORY_FILE = ".lane-history.json"
+MAX_ITEMS_PER_BLOCK = 2000
+# Weight of the newest observation in the smoothed duration
+SMOOTHING = 0.5
+
+_lock = threading.Lock()
+
+
+def history_path(cwd: str | Path) -> Path:
+    return Path(cwd) / ".workflow-state" / HISTORY_FILE
+
+
+def item_key(item: Any) -> str:
+    """Stable key for a parallel item (long keys are hashed)."""
+    key = json.dumps(item, sort_keys=True, default=str)
+    if len(key) > 128:
+        key = hashlib.sha256(key.encode()).hexdigest()[:32]
+    return key
+
+
+def _read(path: Path) -> dict[str, dict[str, float]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("lane history unreadable %s: %s", path, e)
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def load_lane_costs(cwd: str | Path, workflow: str, block: str) -> dict[str, float]:
+    """Item key -> smoothed lane seconds for one block ({} if none recorded)."""
+    return _read(history_path(cwd)).get(f"{workflow}/{block}", {})
+
+
+def record_lane_durations(
+    cwd: str | Path,
+    workflow: str,
+    block: str,
+    durations: dict[str, float],
+) -> bool:
+    """Fold one fan-out's lane durations into the history. Returns success."""
+    if not durations:
+        return True
+    path = history_path(cwd)
+    with _lock:
+        data = _read(path)
+        costs = data.setdefault(f"{workflow}/{block}", {})
+        for key, seconds in durations.items():
+            old = costs.pop(key, None)  # re-insert: most recent last
+            costs[key] = round(
+                seconds if old is None else SMOOTHING * seconds + (1 - SMOOTHING) * old, 6
+            )
+        for key in list(costs)[: max(0, len(costs) - MAX_ITEMS_PER_BLOCK)]:
+            del costs[key]
+        tmp = path.with_suffix(".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("lane history write failed %s: %s", path, e)
+            return False
+    return True
@@ -0,0 +1,379 @@
+"""In-process engine metrics with Prometheus text exposition.
+
+A small, dependency-free registry of counters, gauges and histograms.  The
+engine updates the module-level instruments below at its hot spots
+(checkpoint writes, shell execution, run eviction, parallel fan-out, relay
+waits); ``METRICS.render()`` produces the Prometheus text format served by
+the ``metrics`` MCP tool.
+
+The dashboard runs in a separate process, so the engine also exports a
+snapshot to ``.workflow-state/.metrics.prom`` (at most once per
+``EXPORT_INTERVAL`` seconds, textfile-collector style) which the dashboard's
+``/metrics`` endpoint serves as-is.
+
+Cardinality is bounded: every metric declares its label names up front, and
+after ``MAX_SERIES`` distinct label sets further values collapse into a
+single ``"other"`` series.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+MAX_SERIES = 32
+EXPORT_INTERVAL = 2.0
+METRICS_FILE = ".metrics.prom"
+OVERFLOW_LABEL = "other"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SHELL_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+WAIT_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Base: a named family of series keyed by label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._series: dict[tuple[str, ...], Any] = {}
+
+    def _key(self, values: tuple[Any, ...]) -> tuple[str, ...]:
+        if len(values) != len(self.label_names):
+            raise ValueError(
+                f"{self.name}: expected labels {self.label_names}, got {values!r}"
+            )
+        key = tuple(str(v) for v in values)
+        if key not in self._series and len(self._series) >= MAX_SERIES:
+            key = (OVERFLOW_LABEL,) * len(key)
+        return key
+
+    def _new_series(self) -> Any:
+        raise NotImplementedError
+
+    def _get(self, values: tuple[Any, ...]) -> Any:
+        with self._lock:
+            key = self._key(values)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = self._new_series()
+            return series
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        """Yield (suffix, label string, value) for every series."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def _new_series(self) -> list[float]:
+        return [0.0]
+
+    def inc(self, amount: float = 1.0, *labels: Any) -> None:
+        series = self._get(labels)
+        with self._lock:
+            series[0] += amount
+
+    def value(self, *labels: Any) -> float:
+        return self._get(labels)[0]
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        with self._lock:
+            items = [(k, v[0]) for k, v in self._series.items()]
+        for key, value in items:
+            yield "_total", _label_str(self.label_names, key), value
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is read from a callback at render time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self._fn: Callable[[], float] | None = None
+
+    def _new_series(self) -> list[float]:
+        return [0.0]
+
+    def set(self, value: float, *labels: Any) -> None:
+        series = self._get(labels)
+        with self._lock:
+            series[0] = value
+
+    def inc(self, amount: float = 1.0, *labels: Any) -> None:
+        series = self._get(labels)
+        with self._lock:
+            series[0] += amount
+
+    def dec(self, amount: float = 1.0, *labels: Any) -> None:
+        self.inc(-amount, *labels)
+
+    def set_function(self, fn: Callable[[], float] | None) -> None:
+        """Read the (unlabelled) value from fn at render time."""
+        self._fn = fn
+
+    def value(self, *labels: Any) -> float:
+        if self._fn is not None and not labels:
+            return float(self._fn())
+        return self._get(labels)[0]
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        if self._fn is not None:
+            yield "", "", float(self._fn())
+            return
+        with self._lock:
+            items = [(k, v[0]) for k, v in self._series.items()]
+        for key, value in items:
+            yield "", _label_str(self.label_names, key), value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def _new_series(self) -> list[Any]:
+        # [bucket counts..., sum, count]
+        return [0] * len(self.buckets) + [0.0, 0]
+
+    def observe(self, value: float, *labels: Any) -> None:
+        series = self._get(labels)
+        n = len(self.buckets)
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[n] += value
+            series[n + 1] += 1
+
+    def count(self, *labels: Any) -> int:
+        return self._get(labels)[len(self.buckets) + 1]
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        n = len(self.buckets)
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for key, series in items:
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += series[i]
+                yield "_bucket", _label_str(
+                    self.label_names, key, f'le="{_fmt(bound)}"'
+                ), cumulative
+            yield "_sum", _label_str(self.label_names, key), series[n]
+            yield "_count", _label_str(self.label_names, key), series[n + 1]
+
+
+class MetricsRegistry:
+    """Named collection of metrics; get-or-create by name."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+        self._last_export: dict[str, float] = {}
+
+    def _register(self, cls: type[_Metric], name: str, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"metric {name!r} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, help_text, labels, buckets)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: list[str] = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{labels} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-friendly dump: {name: {"type", "help", "samples": [...]}}."""
+        out: dict[str, Any] = {}
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            out[metric.name] = {
+                "type": metric.kind,
+                "help": metric.help,
+                "samples": [
+                    {"name": metric.name + suffix, "labels": labels, "value": value}
+                    for suffix, labels, value in metric.samples()
+                ],
+            }
+        return out
+
+    def reset(self) -> None:
+        """Zero every series (tests)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            self._last_export.clear()
+        for metric in metrics:
+            metric.reset()
+
+    def export(self, state_dir: Path) -> bool:
+        """Atomically write render() to state_dir/METRICS_FILE. Never raises."""
+        path = state_dir / METRICS_FILE
+        tmp = path.with_name(f"{METRICS_FILE}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(self.render(), encoding="utf-8")
+            os.replace(str(tmp), str(path))
+            return True
+        except OSError:
+            return False
+
+    def maybe_export(self, state_dir: Path, interval: float = EXPORT_INTERVAL) -> bool:
+        """export() unless this state_dir was exported less than interval ago."""
+        key = str(state_dir)
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_export.get(key)
+            if last is not None and now - last < interval:
+                return False
+            self._last_export[key] = now
+        return self.export(state_dir)
+
+
+def state_dir_of(checkpoint_dir: Path | None) -> Path | None:
+    """The enclosing .workflow-state/ of a (possibly nested) checkpoint dir."""
+    if checkpoint_dir is None:
+        return None
+    for parent in checkpoint_dir.parents:
+        if parent.name == ".workflow-state":
+            return parent
+    return None
+
+
+METRICS = MetricsRegistry()
+
+# Engine instruments.  Label values must come from small fixed sets.
+ACTIVE_RUNS = METRICS.gauge(
+    "memento_active_runs", "Runs held in the in-memory run store",
+)
+RUNS_EVICTED = METRICS.counter(
+    "memento_runs_evicted", "Terminal runs evicted from the in-memory run store",
+)
+RUN_CACHE_RESIDENT = METRICS.gauge(
+    "memento_run_cache_resident", "Runs held fully in memory (not spilled)",
+)
+RUN_CACHE_BYTES = METRICS.gauge(
+    "memento_run_cache_bytes", "Estimated bytes of resident runs (checkpoint size)",
+)
+RUN_CACHE_SPILLS = METRICS.counter(
+    "memento_run_cache_spills", "Idle runs spilled to their checkpoint",
+)
+RUN_CACHE_REHYDRATIONS = METRICS.counter(
+    "memento_run_cache_rehydrations", "Spilled runs reloaded from their checkpoint",
+)
+CHECKPOINT_SECONDS = METRICS.histogram(
+    "memento_checkpoint_write_seconds", "checkpoint_save() latency",
+)
+CHECKPOINT_FAILURES = METRICS.counter(
+    "memento_checkpoint_failures", "Checkpoint writes that failed",
+)
+SHELL_SECONDS = METRICS.histogram(
+    "memento_shell_exec_seconds", "Shell subprocess wall time by outcome",
+    labels=("outcome",), buckets=SHELL_BUCKETS,
+)
+SHELL_CPU_SECONDS = METRICS.counter(
+    "memento_shell_cpu_seconds", "CPU seconds used by shell commands, by mode",
+    labels=("mode",),
+)
+SHELL_QUEUED = METRICS.gauge(
+    "memento_shell_queued", "Shell commands waiting for a scheduler slot",
+)
+SHELL_QUEUE_WAIT_SECONDS = METRICS.histogram(
+    "memento_shell_queue_wait_seconds", "Time a shell command waited for a slot, by priority",
+    labels=("priority",), buckets=SHELL_BUCKETS,
+)
+SHELL_HEDGES = METRICS.counter(
+    "memento_shell_hedges", "Hedged retry attempts launched, by winner",
+    labels=("winner",),
+)
+PARALLEL_LANES = METRICS.counter(
+    "memento_parallel_lanes", "Parallel lanes advanced by the engine",
+)
+LANES_QUEUED = METRICS.gauge(
+    "memento_parallel_lanes_queued", "Parallel lanes waiting for a worker thread",
+)
+PARALLEL_FINALIZE_SECONDS = METRICS.histogram(
+    "memento_parallel_finalize_seconds", "Time to advance all lanes of a parallel block",
+    buckets=SHELL_BUCKETS,
+)
+LLM_LANE_HOLDS = METRICS.counter(
+    "memento_llm_lane_holds", "LLM lane prompts held back by the rate limiter, by model",
+    labels=("model",),
+)
+RELAY_WAIT_SECONDS = METRICS.histogram(
+    "memento_relay_wait_seconds", "Action issued → submit received, by action type",
+    labels=("action",), buckets=WAIT_BUCKETS,
+)
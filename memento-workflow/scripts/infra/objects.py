@@ -0,0 +1,185 @@
+"""Project-wide content-addressed store for run files.
+
+Artifacts, prompt context files and blobs are often byte-identical across
+lanes and runs: 100 lanes externalize the same large variable, a rerun
+writes the same outputs.  Files written through ``write_file()`` that are
+at least ``DEDUPE_MIN_BYTES`` long are stored once, by SHA-256, under
+``.workflow-state/.objects/<sha[:2]>/<sha>`` and hardlinked to their path
+in the run directory.
+
+The hardlink count is the reference count: an object with no links left
+besides its own entry is unreferenced, and ``gc_objects()`` (run by
+``cleanup``) removes it.  Objects are read-only; files are only ever
+replaced (``os.replace``), never modified in place, so a rewrite never
+leaks into other references.  When linking fails (another filesystem, link
+limit, object removed concurrently) the file is written as a plain copy.
+
+``MEMENTO_DEDUPE_MIN_BYTES`` overrides the size floor; ``0`` disables.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger("workflow-engine")
+
+STATE_DIR = ".workflow-state"
+OBJECTS_DIR = ".objects"
+# Leftover temp files older than this are swept by gc_objects()
+_STALE_TMP_SECS = 3600.0
+
+
+def _min_bytes_from_env() -> int:
+    try:
+        return max(int(os.environ.get("MEMENTO_DEDUPE_MIN_BYTES", "")), 0)
+    except ValueError:
+        return 4096
+
+
+DEDUPE_MIN_BYTES = _min_bytes_from_env()
+
+
+def objects_dir_for(path: Path) -> Path | None:
+    """The object store of the ``.workflow-state`` directory holding ``path``."""
+    for parent in path.parents:
+        if parent.name == STATE_DIR:
+            return parent / OBJECTS_DIR
+    return None
+
+
+def _tmp_name(path: Path) -> Path:
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _link_object(objects: Path, data: bytes, target: Path) -> bool:
+    """Hardlink ``target`` to the object holding ``data``, storing it if new."""
+    digest = hashlib.sha256(data).hexdigest()
+    obj = objects / digest[:2] / digest
+    try:
+        if not obj.is_file():
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            tmp = _tmp_name(obj)
+            try:
+                tmp.write_bytes(data)
+                os.chmod(tmp, 0o444)
+                # link, not replace: a concurrent writer of the same content
+                # must not swap the inode under targets already linked to it
+                try:
+                    os.link(tmp, obj)
+                except FileExistsError:
+                    pass
+            finally:
+                tmp.unlink(missing_ok=True)
+        os.link(obj, target)
+        return True
+    except OSError as e:
+        logger.debug("object link failed %s: %s", obj, e)
+        return False
+
+
+def write_file(path: Path, data: bytes) -> None:
+    """Atomically write ``data`` to ``path``, shared through the store when large.
+
+    Raises OSError on failure (the temp file is removed).
+    """
+    objects = (
+        objects_dir_for(path)
+        if DEDUPE_MIN_BYTES and len(data) >= DEDUPE_MIN_BYTES
+        else None
+    )
+    tmp = _tmp_name(path)
+    try:
+        if objects is None or not _link_object(objects, data, tmp):
+            tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _iter_objects(objects: Path):
+    if not objects.is_dir():
+        return
+    for bucket in objects.iterdir():
+        if bucket.is_dir():
+            yield from bucket.iterdir()
+
+
+def gc_objects(state_dir: Path, *, dry_run: bool = False) -> dict[str, int]:
+    """Remove objects no run file links to any more.
+
+    Returns ``{"objects_removed": n, "objects_freed_bytes": n}``.
+    """
+    removed = freed = 0
+    now = time.time()
+    for entry in _iter_objects(state_dir / OBJECTS_DIR):
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        if entry.name.endswith(".tmp"):
+            if now - st.st_mtime < _STALE_TMP_SECS:
+                continue
+        elif st.st_nlink > 1:
+            continue
+        if not dry_run:
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+        removed += 1
+        freed += st.st_size
+    return {"objects_removed": removed, "objects_freed_bytes": freed}
+
+
+def disk_usage(state_dir: Path) -> dict[str, Any]:
+    """Disk usage of a ``.workflow-state`` directory, counting shared files once.
+
+    ``apparent_bytes`` is what the run files would take as plain copies,
+    ``stored_bytes`` what they take with the object store; ``objects`` /
+    ``object_bytes`` / ``object_refs`` describe the store itself.
+    """
+    files = apparent = stored = 0
+    seen: set[tuple[int, int]] = set()
+    objects = state_dir / OBJECTS_DIR
+    if state_dir.is_dir():
+        for path in state_dir.rglob("*"):
+            try:
+                if objects in path.parents or not path.is_file():
+                    continue
+                st = path.stat()
+            except OSError:
+                continue
+            files += 1
+            apparent += st.st_size
+            if st.st_nlink > 1:
+                inode = (st.st_dev, st.st_ino)
+                if inode in seen:
+                    continue
+                seen.add(inode)
+            stored += st.st_size
+    count = size = refs = 0
+    for entry in _iter_objects(objects):
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        count += 1
+        size += st.st_size
+        refs += st.st_nlink - 1
+        if (st.st_dev, st.st_ino) not in seen:
+            stored += st.st_size  # unreferenced, still on disk until GC
+    return {
+        "files": files,
+        "apparent_bytes": apparent,
+        "stored_bytes": stored,
+        "objects": count,
+        "object_bytes": size,
+        "object_refs": refs,
+    }
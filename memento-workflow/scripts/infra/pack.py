@@ -0,0 +1,214 @@
+"""Append-only artifact pack: one data file per run instead of a file per artifact.
+
+Loose artifacts cost up to five files (and a directory) per shell step,
+each written through a temp file + ``os.replace``; runs with thousands of
+steps leave tens of thousands of inodes to write, scan and delete.  With
+``MEMENTO_ARTIFACT_PACK=on`` step logs and results are appended to
+``<artifacts_dir>/.pack`` instead, and ``.pack.idx`` gets one JSON line
+per artifact::
+
+    {"path": "loop-x/i-3/test/output.txt", "offset": 1234, "length": 567, "gz": true}
+
+Paths use the loose layout (``exec_key_to_artifact_path()`` + file name);
+``gz`` marks gzip-compressed data (``output.txt.gz`` when loose).  A
+rewritten artifact is appended again and the last index line wins.  Data
+is written before its index line, so a crash leaves at most unindexed
+bytes and a torn last line, which readers skip (the next append ends it
+first, so its own entry is not lost with it).
+
+Files handed to the relay agent (prompts, context files) are never packed.
+
+Usage:
+    python -m scripts.infra.pack unpack RUN_OR_ARTIFACTS_DIR [...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from .objects import write_file
+
+logger = logging.getLogger("workflow-engine")
+
+PACK_FILE = ".pack"
+INDEX_FILE = ".pack.idx"
+
+# Writers of one pack share a lock; packs share a fixed set of locks by
+# hash, so nothing is kept per run
+_PACK_LOCK_STRIPES = 64
+_pack_locks = [threading.Lock() for _ in range(_PACK_LOCK_STRIPES)]
+# Parsed indexes of the packs read most recently, LRU-bounded:
+# artifacts_dir -> ((index size, mtime_ns), {path: (offset, length, gz)})
+_PACK_INDEX_CACHE_SIZE = 32
+_pack_index_cache: OrderedDict[
+    Path, tuple[tuple[int, int], dict[str, tuple[int, int, bool]]]
+] = OrderedDict()
+_pack_index_guard = threading.Lock()
+
+
+def _pack_lock(artifacts_dir: Path) -> threading.Lock:
+    return _pack_locks[hash(artifacts_dir) % _PACK_LOCK_STRIPES]
+
+
+def append_to_pack(artifacts_dir: Path, entries: list[tuple[str, bytes, bool]]) -> bool:
+    """Append ``(path, data, gz)`` entries to the run's pack. Returns success."""
+    lines = []
+    try:
+        artifacts_dir.mkdir(parents=True, exist_ok=True)
+        with _pack_lock(artifacts_dir):
+            with open(artifacts_dir / PACK_FILE, "ab") as pack:
+                offset = pack.seek(0, os.SEEK_END)
+                for path, data, gz in entries:
+                    pack.write(data)
+                    entry = {"path": path, "offset": offset, "length": len(data)}
+                    if gz:
+                        entry["gz"] = True
+                    lines.append(json.dumps(entry))
+                    offset += len(data)
+            with open(artifacts_dir / INDEX_FILE, "a+b") as index:
+                # End a torn last line (crash mid-append) so this entry
+                # doesn't merge into it and get skipped with it
+                end = index.seek(0, os.SEEK_END)
+                if end:
+                    index.seek(end - 1)
+                    if index.read(1) != b"\n":
+                        lines.insert(0, "")
+                index.write(("\n".join(lines) + "\n").encode("utf-8"))
+        return True
+    except OSError as e:
+        logger.warning("artifact pack write failed %s: %s", artifacts_dir, e)
+        return False
+
+
+def load_pack_index(artifacts_dir: Path) -> dict[str, tuple[int, int, bool]]:
+    """``{path: (offset, length, gz)}`` of a pack (empty when there is none)."""
+    index_path = artifacts_dir / INDEX_FILE
+    try:
+        st = index_path.stat()
+    except OSError:
+        return {}
+    stamp = (st.st_size, st.st_mtime_ns)
+    with _pack_index_guard:
+        cached = _pack_index_cache.get(artifacts_dir)
+        if cached and cached[0] == stamp:
+            _pack_index_cache.move_to_end(artifacts_dir)
+            return cached[1]
+    index: dict[str, tuple[int, int, bool]] = {}
+    try:
+        text = index_path.read_text(encoding="utf-8")
+    except OSError:
+        return {}
+    for line in text.splitlines():
+        try:
+            entry = json.loads(line)
+            index[entry["path"]] = (
+                int(entry["offset"]), int(entry["length"]), bool(entry.get("gz")),
+            )
+        except (ValueError, KeyError, TypeError):
+            continue  # torn last line after a crash
+    with _pack_index_guard:
+        _pack_index_cache[artifacts_dir] = (stamp, index)
+        _pack_index_cache.move_to_end(artifacts_dir)
+        while len(_pack_index_cache) > _PACK_INDEX_CACHE_SIZE:
+            _pack_index_cache.popitem(last=False)
+    return index
+
+
+def forget_pack(artifacts_dir: Path) -> None:
+    """Drop a pack's cached index (its run was unpacked or removed)."""
+    with _pack_index_guard:
+        _pack_index_cache.pop(artifacts_dir, None)
+
+
+def read_packed(artifacts_dir: Path, path: str) -> tuple[bytes, bool] | None:
+    """``(stored bytes, gz)`` of one packed artifact, or None if not packed."""
+    loc = load_pack_index(artifacts_dir).get(path)
+    if loc is None:
+        return None
+    offset, length, gz = loc
+    try:
+        with open(artifacts_dir / PACK_FILE, "rb") as pack:
+            pack.seek(offset)
+            data = pack.read(length)
+    except OSError:
+        return None
+    return (data, gz) if len(data) == length else None
+
+
+def find_pack(path: Path) -> tuple[Path, str] | None:
+    """``(artifacts_dir, packed path)`` for a loose artifact path, if packed."""
+    for parent in path.parents:
+        if (parent / INDEX_FILE).is_file():
+            return parent, path.relative_to(parent).as_posix()
+    return None
+
+
+def unpack(artifacts_dir: Path) -> int:
+    """Write every packed artifact back as a loose file and remove the pack.
+
+    A loose artifact already present was written after packing was turned
+    off and is kept.  The pack is removed only if every artifact in it is
+    now loose; otherwise it is kept (and logged) so nothing is lost.
+    Returns the number of files written.
+    """
+    written = 0
+    lost: list[str] = []
+    base = artifacts_dir.resolve()
+    with _pack_lock(artifacts_dir):
+        for path in load_pack_index(artifacts_dir):
+            target = artifacts_dir / path
+            packed = target.with_name(target.name + ".gz")
+            if not target.resolve().is_relative_to(base):
+                lost.append(path)
+                continue
+            if target.exists() or packed.exists():
+                continue
+            found = read_packed(artifacts_dir, path)
+            if found is None:
+                lost.append(path)
+                continue
+            data, gz = found
+            try:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                write_file(packed if gz else target, data)
+            except OSError as e:
+                logger.warning("unpack write failed %s: %s", target, e)
+                lost.append(path)
+                continue
+            written += 1
+        if lost:
+            logger.warning(
+                "artifact pack kept %s: %d artifact(s) not restored (%s)",
+                artifacts_dir, len(lost), ", ".join(lost[:5]),
+            )
+        else:
+            (artifacts_dir / INDEX_FILE).unlink(missing_ok=True)
+            (artifacts_dir / PACK_FILE).unlink(missing_ok=True)
+        forget_pack(artifacts_dir)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Unpack per-run artifact packs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_unpack = sub.add_parser("unpack", help="Restore loose artifact files and remove the pack")
+    p_unpack.add_argument("dirs", nargs="+", type=Path, help="Run or artifacts directories")
+    args = parser.parse_args()
+
+    for d in args.dirs:
+        artifacts_dir = d if (d / INDEX_FILE).is_file() else d / "artifacts"
+        if not (artifacts_dir / INDEX_FILE).is_file():
+            print(f"{d}: no artifact pack", file=sys.stderr)
+            continue
+        print(f"{artifacts_dir}: {unpack(artifacts_dir)} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Token-bucket rate limiting for relay-driven LLM prompts of parallel lanes.
+
+A fan-out of LLM lanes hands the relay one prompt per lane at once, which
+can exceed a model's rate limits and turn into throttling failures.  Before
+the engine hands a lane's ``prompt`` action to the relay it takes a permit
+from ``LLM_LIMITER``; without one the lane gets a ``pending`` action instead
+and is held until capacity frees up (a submit releases the permit).
+
+A permit goes back when its lane submits, when the lane or its run tree
+reaches a terminal status or leaves the run store, or, for a lane the
+relay abandoned, when its lease (``MEMENTO_LLM_PERMIT_LEASE`` seconds)
+runs out.
+
+Limits are per model (process-wide) and per run tree, each with two parts:
+
+- ``outstanding``: prompts handed out and not yet submitted;
+- ``tpm``: estimated prompt tokens per minute, a token bucket that holds one
+  minute of tokens and refills continuously.  A prompt's estimate is its
+  rendered size / ``CHARS_PER_TOKEN``; a prompt larger than the bucket
+  waits for a full bucket.
+
+Model limits come from ``MEMENTO_LLM_LIMITS``, a JSON object mapping model
+names (``"*"`` for any other model, ``"default"`` for lanes without a model)
+to ``{"outstanding": n, "tpm": n}``.  Run limits are passed to ``start()``.
+Missing or zero values mean unlimited; with nothing configured every permit
+is granted at once.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any
+
+logger = logging.getLogger("workflow-engine")
+
+LIMIT_KEYS = ("outstanding", "tpm")
+CHARS_PER_TOKEN = 4
+# Retry hint for a lane held only by an outstanding cap (a submit that
+# releases a permit wakes wait() sooner)
+HOLD_RETRY_SECONDS = 1.0
+# An idle run pool is dropped once its bucket has surely refilled
+_IDLE_SECONDS = 60.0
+# A permit not released within this many seconds is taken back
+PERMIT_LEASE_SECONDS = float(os.environ.get("MEMENTO_LLM_PERMIT_LEASE", "1800"))
+
+
+def validate_limits(limits: Any) -> dict[str, int]:
+    """Check a ``{"outstanding": n, "tpm": n}`` mapping; raises ValueError."""
+    if not isinstance(limits, dict):
+        raise ValueError(f"LLM limits must be an object, got {type(limits).__name__}")
+    unknown = set(limits) - set(LIMIT_KEYS)
+    if unknown:
+        raise ValueError(
+            f"Unknown LLM limit(s) {', '.join(sorted(unknown))}: expected {LIMIT_KEYS}"
+        )
+    for key, value in limits.items():
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f"LLM limit {key!r} must be a non-negative integer")
+    return {k: v for k, v in limits.items() if v}
+
+
+def _limits_from_env() -> dict[str, dict[str, int]]:
+    raw = os.environ.get("MEMENTO_LLM_LIMITS", "")
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+        return {str(model): validate_limits(v) for model, v in data.items()}
+    except (ValueError, AttributeError) as e:
+        logger.warning("ignoring MEMENTO_LLM_LIMITS: %s", e)
+        return {}
+
+
+def estimate_tokens(chars: int) -> int:
+    return chars // CHARS_PER_TOKEN + 1
+
+
+class TokenBucket:
+    """Holds up to one minute of tokens, refilled continuously."""
+
+    __slots__ = ("capacity", "rate", "level", "stamp")
+
+    def __init__(self, per_minute: int, now: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.stamp = now
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_for(self, tokens: int, now: float) -> float:
+        """Seconds until ``tokens`` are available (0 if they are now)."""
+        self._refill(now)
+        need = min(float(tokens), self.capacity)
+        return 0.0 if self.level >= need else (need - self.level) / self.rate
+
+    def take(self, tokens: int) -> None:
+        self.level -= min(float(tokens), self.capacity)
+
+
+class _Pool:
+    """Outstanding count and token bucket for one model or one run tree."""
+
+    __slots__ = ("max_outstanding", "bucket", "outstanding", "last_used")
+
+    def __init__(self, limits: dict[str, int], now: float) -> None:
+        self.max_outstanding = limits.get("outstanding", 0)
+        tpm = limits.get("tpm", 0)
+        self.bucket = TokenBucket(tpm, now) if tpm else None
+        self.outstanding = 0
+        self.last_used = now
+
+    def wait_for(self, tokens: int, now: float) -> tuple[float, str]:
+        if self.max_outstanding and self.outstanding >= self.max_outstanding:
+            return HOLD_RETRY_SECONDS, f"{self.outstanding}/{self.max_outstanding} prompts outstanding"
+        if self.bucket is not None:
+            wait = self.bucket.wait_for(tokens, now)
+            if wait:
+                return wait, f"~{tokens} tokens over {int(self.bucket.capacity)} tpm"
+        return 0.0, ""
+
+    def take(self, tokens: int, now: float) -> None:
+        self.outstanding += 1
+        self.last_used = now
+        if self.bucket is not None:
+            self.bucket.take(tokens)
+
+    def stats(self, now: float) -> dict[str, Any]:
+        usage = [self.outstanding / self.max_outstanding] if self.max_outstanding else []
+        result: dict[str, Any] = {
+            "outstanding": self.outstanding,
+            "max_outstanding": self.max_outstanding or None,
+        }
+        if self.bucket is not None:
+            self.bucket._refill(now)
+            result["tpm"] = int(self.bucket.capacity)
+            result["tokens_available"] = int(self.bucket.level)
+            usage.append(1 - self.bucket.level / self.bucket.capacity)
+        result["utilization"] = round(max(usage), 3) if usage else 0.0
+        return result
+
+
+class LLMRateLimiter:
+    """Per-model and per-run permits for relay-driven LLM lane prompts."""
+
+    def __init__(
+        self,
+        limits: dict[str, dict[str, int]] | None = None,
+        lease_seconds: float = PERMIT_LEASE_SECONDS,
+    ) -> None:
+        self._lock = threading.Lock()
+        self._model_limits = _limits_from_env() if limits is None else limits
+        self._lease_seconds = lease_seconds
+        self._models: dict[str, _Pool] = {}
+        self._runs: dict[str, _Pool] = {}
+        # (run, model) -> (lease expiry, owner) of each permit held, oldest
+        # first, so a finished run can return them all and stale ones expire
+        self._held: dict[tuple[str, str], list[tuple[float, str]]] = {}
+
+    def configure(self, limits: dict[str, dict[str, int]]) -> None:
+        """Replace the model limits (resets model pools)."""
+        with self._lock:
+            self._model_limits = {m: validate_limits(v) for m, v in limits.items()}
+            self._models.clear()
+
+    def _model_pool(self, model: str, now: float) -> _Pool | None:
+        pool = self._models.get(model)
+        if pool is None:
+            limits = self._model_limits.get(model) or self._model_limits.get("*")
+            if not limits:
+                return None
+            pool = self._models[model] = _Pool(limits, now)
+        return pool
+
+    def _run_pool(self, run: str, limits: dict[str, int] | None, now: float) -> _Pool | None:
+        pool = self._runs.get(run)
+        if pool is None and limits:
+            pool = self._runs[run] = _Pool(limits, now)
+        return pool
+
+    def try_acquire(
+        self,
+        run: str,
+        model: str,
+        tokens: int,
+        run_limits: dict[str, int] | None = None,
+        owner: str = "",
+    ) -> tuple[float, str]:
+        """Take a permit for one prompt, or say why not.
+
+        Returns ``(0.0, "")`` when granted (pair it with ``release``, with
+        the same ``owner``), else ``(seconds to retry after, reason)``.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            pools = [
+                (f"model {model}", self._model_pool(model, now)),
+                ("run", self._run_pool(run, run_limits, now)),
+            ]
+            wait, reasons = 0.0, []
+            for label, pool in pools:
+                if pool is None:
+                    continue
+                pool_wait, why = pool.wait_for(tokens, now)
+                if pool_wait:
+                    wait = max(wait, pool_wait)
+                    reasons.append(f"{label}: {why}")
+            if reasons:
+                return wait, "; ".join(reasons)
+            for _, pool in pools:
+                if pool is not None:
+                    pool.take(tokens, now)
+            self._held.setdefault((run, model), []).append((now + self._lease_seconds, owner))
+            return 0.0, ""
+
+    def release(self, run: str, model: str, count: int = 1, owner: str | None = None) -> None:
+        """Return ``count`` permits, oldest first, or the one ``owner`` holds.
+
+        Permits already returned (e.g. expired leases) are not returned twice.
+        """
+        with self._lock:
+            self._release(run, model, count, owner)
+
+    def release_run(self, run: str) -> None:
+        """Return every permit a run tree still holds (cancel, finish, eviction)."""
+        with self._lock:
+            for r, model in [key for key in self._held if key[0] == run]:
+                self._release(r, model, len(self._held[(r, model)]), None)
+
+    def _release(self, run: str, model: str, count: int, owner: str | None) -> None:
+        leases = self._held.get((run, model))
+        if not leases:
+            return
+        if owner is None:
+            count = min(count, len(leases))
+            del leases[:count]
+        else:
+            kept = [lease for lease in leases if lease[1] != owner]
+            count = len(leases) - len(kept)
+            leases[:] = kept
+        if not leases:
+            del self._held[(run, model)]
+        for pool in (self._models.get(model), self._runs.get(run)):
+            if pool is not None:
+                pool.outstanding -= count
+
+    def _prune(self, now: float) -> None:
+        for (run, model), leases in list(self._held.items()):
+            expired = 0
+            while expired < len(leases) and leases[expired][0] <= now:
+                expired += 1
+            if expired:
+                logger.warning(
+                    "LLM permit lease expired: %d for run %s, model %s", expired, run, model,
+                )
+                self._release(run, model, expired, None)
+        for run in [
+            r for r, p in self._runs.items()
+            if not p.outstanding and now - p.last_used >= _IDLE_SECONDS
+        ]:
+            del self._runs[run]
+
+    def stats(self, run: str | None = None) -> dict[str, Any]:
+        """Outstanding prompts, available tokens and utilization per pool."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            result: dict[str, Any] = {
+                "models": {m: p.stats(now) for m, p in self._models.items()},
+            }
+            pool = self._runs.get(run) if run is not None else None
+            if pool is not None:
+                result["run"] = pool.stats(now)
+            return result
+
+
+LLM_LIMITER = LLMRateLimiter()
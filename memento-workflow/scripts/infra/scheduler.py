@@ -0,0 +1,173 @@
+"""Process-wide fair scheduler for shell commands.
+
+Every shell command the engine runs (auto-advance, parallel lanes) first
+takes a slot from ``SCHEDULER``; only the second copy of a hedged retry,
+whose first copy already holds one, bypasses it.  The slot count is global to
+the server process (``MEMENTO_SHELL_SLOTS``, default: CPU count), so N
+concurrent runs with wide fan-outs no longer start N × 16 commands at once.
+
+Waiters are queued per tenant (a root run and all of its child runs and
+lanes) and per priority class.  When a slot frees up it goes to:
+
+1. the highest priority class with anyone waiting (``interactive`` before
+   ``batch``);
+2. within it, the tenant holding the fewest slots (fair share), so a wide
+   run cannot starve a narrow one;
+3. ties broken by arrival order (FIFO within a tenant).
+
+Waits honor a cancel event (fail-fast lanes).  ``stats()``
+reports slots and queue depth for ``get_status()``; the time each command
+spent queued is recorded on its step as ``timing["queue"]``.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from .metrics import SHELL_QUEUE_WAIT_SECONDS, SHELL_QUEUED
+
+PRIORITIES = ("interactive", "batch")
+
+
+def _slots_from_env() -> int:
+    try:
+        slots = int(os.environ.get("MEMENTO_SHELL_SLOTS", ""))
+    except ValueError:
+        slots = 0
+    return max(slots, 1) if slots else os.cpu_count() or 4
+
+
+DEFAULT_SLOTS = _slots_from_env()
+
+# How often a queued waiter re-checks its cancel event
+_CANCEL_POLL_SECONDS = 0.05
+
+
+class _Tenant:
+    """One run tree's slots in use and its waiters' tickets per priority."""
+
+    __slots__ = ("running", "queued")
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.queued: dict[str, deque[int]] = {p: deque() for p in PRIORITIES}
+
+    def idle(self) -> bool:
+        return not self.running and not any(self.queued.values())
+
+
+class ShellScheduler:
+    """Global slot pool with per-tenant fair-share queues and priorities."""
+
+    def __init__(self, slots: int = DEFAULT_SLOTS) -> None:
+        self._cond = threading.Condition()
+        self._slots = max(1, slots)
+        self._running = 0
+        self._tenants: dict[str, _Tenant] = {}
+        self._seq = 0  # arrival order of waiters
+
+    @property
+    def slots(self) -> int:
+        return self._slots
+
+    def set_slots(self, slots: int) -> None:
+        """Resize the pool; running commands keep their slots."""
+        with self._cond:
+            self._slots = max(1, slots)
+            self._cond.notify_all()
+
+    def acquire(
+        self,
+        tenant: str,
+        priority: str = "interactive",
+        cancel: threading.Event | None = None,
+    ) -> float | None:
+        """Block until the tenant may start a command.
+
+        Returns the seconds spent queued, or None if ``cancel`` was set
+        first (no slot is held then).  Each successful acquire must be paired
+        with ``release(tenant)``.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}: expected one of {PRIORITIES}")
+        t0 = time.monotonic()
+        with self._cond:
+            t = self._tenants.setdefault(tenant, _Tenant())
+            self._seq += 1
+            ticket = self._seq
+            t.queued[priority].append(ticket)
+            SHELL_QUEUED.inc()
+            granted = False
+            try:
+                while self._running >= self._slots or self._head() != ticket:
+                    if cancel is not None and cancel.is_set():
+                        break
+                    self._cond.wait(_CANCEL_POLL_SECONDS if cancel is not None else None)
+                else:
+                    granted = True
+                    self._running += 1
+                    t.running += 1
+            finally:
+                t.queued[priority].remove(ticket)
+                SHELL_QUEUED.dec()
+                if not granted:
+                    self._drop_if_idle(tenant)
+                # Our departure may make someone else the head
+                self._cond.notify_all()
+        if not granted:
+            return None
+        waited = time.monotonic() - t0
+        SHELL_QUEUE_WAIT_SECONDS.observe(waited, priority)
+        return waited
+
+    def release(self, tenant: str) -> None:
+        with self._cond:
+            self._running -= 1
+            self._tenants[tenant].running -= 1
+            self._drop_if_idle(tenant)
+            self._cond.notify_all()
+
+    def _drop_if_idle(self, tenant: str) -> None:
+        if self._tenants[tenant].idle():
+            del self._tenants[tenant]
+
+    def _head(self) -> int | None:
+        """Ticket of the waiter that gets the next free slot."""
+        for priority in PRIORITIES:
+            best: tuple[int, int] | None = None
+            for t in self._tenants.values():
+                q = t.queued[priority]
+                if q and (best is None or (t.running, q[0]) < best):
+                    best = (t.running, q[0])
+            if best is not None:
+                return best[1]
+        return None
+
+    def stats(self, tenant: str | None = None) -> dict[str, Any]:
+        """Pool-wide slots and queue depth, plus the tenant's current share.
+
+        Time spent waiting is accounted per step (``timing["queue"]``).
+        """
+        with self._cond:
+            result: dict[str, Any] = {
+                "slots": self._slots,
+                "running": self._running,
+                "queued": {
+                    p: sum(len(t.queued[p]) for t in self._tenants.values())
+                    for p in PRIORITIES
+                },
+            }
+            t = self._tenants.get(tenant) if tenant is not None else None
+            if t is not None:
+                result["run"] = {
+                    "running": t.running,
+                    "queued": sum(len(q) for q in t.queued.values()),
+                }
+            return result
+
+
+SCHEDULER = ShellScheduler()
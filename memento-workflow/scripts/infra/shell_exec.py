@@ -5,16 +5,80 @@ from __future__ import annotations
 import json
 import logging
 import os
+import queue
 import shlex
+import signal
 import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Any, NamedTuple
+from typing import Any, Callable, NamedTuple, TypeVar
 
+from .metrics import SHELL_CPU_SECONDS, SHELL_HEDGES, SHELL_SECONDS
 from .sandbox import _get_tool_cache_env, _sandbox_prefix
 
 logger = logging.getLogger("workflow-engine")
 
 
+# How often a running command checks its cancel event, and how long a
+# cancelled/timed-out process group gets between SIGTERM and SIGKILL.
+_CANCEL_POLL_SECONDS = 0.05
+_KILL_GRACE_SECONDS = 2.0
+
+CANCELLED_ERROR = "Cancelled"
+
+
+class _Cancelled(Exception):
+    """Raised by _communicate() when the cancel event fires."""
+
+
+def _reap(proc: subprocess.Popen[str], sink: dict[str, Any]) -> bool:
+    """Reap ``proc`` with os.wait4() if it has exited, keeping sink["rusage"].
+
+    The rusage covers the child and every descendant it waited for (for
+    ``bash -c`` that is the whole pipeline), and unlike a
+    ``getrusage(RUSAGE_CHILDREN)`` delta it is not mixed up with commands
+    running concurrently on other threads.  Sets ``proc.returncode``, so
+    Popen never waits for the child itself.  If the child was reaped
+    elsewhere its status is lost: returncode becomes -1 and the reason goes
+    to sink["error"].  Returns whether it was reaped.
+    """
+    if proc.returncode is not None:
+        return True
+    if not hasattr(os, "wait4"):
+        return proc.poll() is not None
+    try:
+        pid, sts, rusage = os.wait4(proc.pid, os.WNOHANG)
+    except ChildProcessError:
+        # Reaped elsewhere (e.g. SIGCHLD ignored): never report it as success
+        sink["error"] = "exit status lost (child reaped elsewhere)"
+        proc.returncode = -1
+        return True
+    if pid != proc.pid:
+        return False
+    sink["rusage"] = rusage
+    proc.returncode = os.waitstatus_to_exitcode(sts)
+    return True
+
+
+def _rusage_dict(rusage: Any) -> dict[str, float]:
+    """Flatten a struct_rusage into StepResult.resources keys."""
+    max_rss = rusage.ru_maxrss
+    if sys.platform == "darwin":
+        max_rss //= 1024  # bytes on macOS, KiB elsewhere
+    return {
+        "cpu_user": round(rusage.ru_utime, 6),
+        "cpu_sys": round(rusage.ru_stime, 6),
+        "max_rss_kb": float(max_rss),
+        "io_read": float(rusage.ru_inblock),
+        "io_write": float(rusage.ru_oublock),
+        "ctx_voluntary": float(rusage.ru_nvcsw),
+        "ctx_involuntary": float(rusage.ru_nivcsw),
+    }
+
+
 class ShellResult(NamedTuple):
     """Result from _execute_shell()."""
 
@@ -31,7 +95,10 @@ def _execute_shell(
     script_path: str | None = None,
     args: str = "",
     stdin_data: str | None = None,
-    timeout: int = 120,
+    timeout: float = 120,
+    timing: dict[str, float] | None = None,
+    cancel: threading.Event | None = None,
+    resources: dict[str, float] | None = None,
 ) -> ShellResult:
     """Execute a shell command internally via subprocess.
 
@@ -43,8 +110,19 @@ def _execute_shell(
     Commands run inside an OS-level sandbox (macOS Seatbelt / Linux bubblewrap)
     that restricts writes to cwd and /tmp. Disable with MEMENTO_SANDBOX=off.
 
+    If timing is a dict, it is filled with ``sandbox`` (env + sandbox argv
+    setup before spawn) and ``shell`` (subprocess wall time) in seconds.
+    If resources is a dict, it is filled with the command's rusage (CPU
+    seconds, peak RSS, block I/O, context switches; see _rusage_dict).
+
+    The command runs in its own process group. On timeout, or when ``cancel``
+    is set while it runs, the whole group is terminated (SIGTERM, then
+    SIGKILL); a cancelled command returns status "failure" with error
+    ``CANCELLED_ERROR``.
+
     Returns (output, status, structured_output, error).
     """
+    t_setup = time.monotonic()
     # Force TMPDIR=/tmp so tools (uv, npm, etc.) write temp files to /tmp
     # instead of macOS /var/folders which is outside the sandbox whitelist.
     # Redirect tool caches (npm, yarn, cargo, etc.) to /tmp so they don't
@@ -82,20 +160,34 @@ def _execute_shell(
     logger.debug(
         "shell exec: %s (cwd=%s, sandbox=%s)", command[:200], cwd, bool(sandbox)
     )
+    t_spawn = time.monotonic()
+    if timing is not None:
+        timing["sandbox"] = round(t_spawn - t_setup, 6)
+    outcome = "error"
+    reaped: dict[str, Any] = {}
     try:
-        proc = subprocess.run(
+        proc = subprocess.Popen(
             cmd_argv,
             shell=False,
-            capture_output=True,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
-            timeout=timeout,
             cwd=cwd,
             env=merged_env,
-            input=stdin_data if stdin_data is not None else "",
+            start_new_session=True,
         )
-        output = proc.stdout.strip()
-        error = proc.stderr.strip() if proc.returncode != 0 else None
+        try:
+            stdout, stderr = _communicate(proc, stdin_data or "", timeout, cancel, reaped)
+        except (subprocess.TimeoutExpired, _Cancelled):
+            _kill_group(proc, reaped)
+            raise
+        output = stdout.strip()
+        error = None
+        if proc.returncode != 0:
+            error = "\n".join(e for e in (stderr.strip(), reaped.get("error")) if e)
         status = "success" if proc.returncode == 0 else "failure"
+        outcome = status
         structured: dict[str, Any] | None = None
         if output:
             try:
@@ -111,8 +203,167 @@ def _execute_shell(
             logger.warning("shell stderr: %s", error[:300])
         return ShellResult(output, status, structured, error)
     except subprocess.TimeoutExpired:
-        logger.error("shell timeout (%ds): %s", timeout, command[:200])
-        return ShellResult("", "failure", None, f"Command timed out after {timeout}s")
+        logger.error("shell timeout (%gs): %s", timeout, command[:200])
+        outcome = "timeout"
+        return ShellResult("", "failure", None, f"Command timed out after {timeout:g}s")
+    except _Cancelled:
+        logger.info("shell cancelled: %s", command[:200])
+        outcome = "cancelled"
+        return ShellResult("", "failure", None, CANCELLED_ERROR)
     except (OSError, subprocess.SubprocessError) as e:
         logger.error("shell exception: %s", e)
         return ShellResult("", "failure", None, str(e))
+    finally:
+        elapsed = time.monotonic() - t_spawn
+        SHELL_SECONDS.observe(elapsed, outcome)
+        if timing is not None:
+            timing["shell"] = round(elapsed, 6)
+        if "rusage" in reaped:
+            usage = _rusage_dict(reaped["rusage"])
+            SHELL_CPU_SECONDS.inc(usage["cpu_user"], "user")
+            SHELL_CPU_SECONDS.inc(usage["cpu_sys"], "sys")
+            if resources is not None:
+                resources.update(usage)
+
+
+def _communicate(
+    proc: subprocess.Popen[str],
+    stdin_data: str,
+    timeout: float,
+    cancel: threading.Event | None,
+    reaped: dict[str, Any],
+) -> tuple[str, str]:
+    """Feed stdin, drain stdout and stderr, then reap ``proc`` (see _reap).
+
+    Raises TimeoutExpired after ``timeout`` seconds and _Cancelled when
+    ``cancel`` is set, leaving the process running.
+    """
+    deadline = time.monotonic() + timeout
+    chunks: dict[str, str] = {}
+
+    def feed() -> None:
+        assert proc.stdin is not None
+        try:
+            if stdin_data:
+                proc.stdin.write(stdin_data)
+            proc.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass  # the command exited without reading its input
+
+    def drain(name: str, pipe: Any) -> None:
+        chunks[name] = pipe.read()
+        pipe.close()
+
+    threads = [
+        threading.Thread(target=feed, daemon=True),
+        threading.Thread(target=drain, args=("stdout", proc.stdout), daemon=True),
+        threading.Thread(target=drain, args=("stderr", proc.stderr), daemon=True),
+    ]
+    for t in threads:
+        t.start()
+
+    def check() -> float:
+        if cancel is not None and cancel.is_set():
+            raise _Cancelled
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise subprocess.TimeoutExpired(proc.args, timeout)
+        return remaining
+
+    for t in threads:
+        while t.is_alive():
+            t.join(min(check(), _CANCEL_POLL_SECONDS))
+    # The pipes are closed; the exit usually follows at once
+    delay = 0.0005
+    while not _reap(proc, reaped):
+        time.sleep(min(delay, check(), _CANCEL_POLL_SECONDS))
+        delay *= 2
+    return chunks.get("stdout", ""), chunks.get("stderr", "")
+
+
+def _kill_group(proc: subprocess.Popen[str], reaped: dict[str, Any]) -> None:
+    """Terminate the command's whole process group and reap it."""
+    for sig, grace in ((signal.SIGTERM, _KILL_GRACE_SECONDS), (signal.SIGKILL, None)):
+        try:
+            os.killpg(proc.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+        deadline = None if grace is None else time.monotonic() + grace
+        while not _reap(proc, reaped):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(_CANCEL_POLL_SECONDS)
+        else:
+            return
+
+
+_T = TypeVar("_T")
+
+
+def _execute_hedged(
+    run: Callable[[threading.Event], _T],
+    hedge_after: float,
+    cancel: threading.Event | None = None,
+    hedge: Callable[[threading.Event], _T] | None = None,
+    failed: Callable[[_T], bool] | None = None,
+) -> tuple[_T, bool]:
+    """Run ``run(cancel_event)``, hedging with a second copy if it is slow.
+
+    If the first call has not returned after ``hedge_after`` seconds, a
+    second one starts (``hedge``, default ``run``).  The first successful
+    copy wins and the other's cancel event is set (``_execute_shell`` then
+    kills its process group).  A copy that raises, or whose result
+    ``failed`` rejects, only wins once every launched copy has reported
+    and none succeeded; a returned failure is preferred over an exception,
+    which is re-raised only if every copy raised.  ``cancel`` stops both.
+    Returns (winner's result, whether the hedge won).
+    """
+    events = [threading.Event(), threading.Event()]
+    outcomes: list[Future[_T]] = [Future(), Future()]
+    done: queue.Queue[int] = queue.Queue()
+    threads: list[threading.Thread] = []
+
+    copies = (run, hedge or run)
+
+    def call(i: int) -> None:
+        try:
+            outcomes[i].set_result(copies[i](events[i]))
+        except BaseException as exc:  # handed to the caller below
+            outcomes[i].set_exception(exc)
+        finally:
+            done.put(i)
+
+    def launch(i: int) -> None:
+        t = threading.Thread(target=call, args=(i,), name=f"hedge-{i}", daemon=True)
+        threads.append(t)
+        t.start()
+
+    def succeeded(i: int) -> bool:
+        out = outcomes[i]
+        return out.exception() is None and not (failed is not None and failed(out.result()))
+
+    launch(0)
+    deadline = time.monotonic() + hedge_after
+    reported: list[int] = []
+    while True:
+        if cancel is not None and cancel.is_set():
+            for ev in events:
+                ev.set()
+        try:
+            reported.append(done.get(timeout=_CANCEL_POLL_SECONDS))
+        except queue.Empty:
+            if len(threads) == 1 and time.monotonic() >= deadline:
+                launch(1)
+            continue
+        if succeeded(reported[-1]) or len(reported) == len(threads):
+            break
+    for ev in events:
+        ev.set()
+    for t in threads:
+        t.join()
+    # A success, else the first failed result, else the first exception
+    returned = [i for i in reported if outcomes[i].exception() is None]
+    winner = ([i for i in returned if succeeded(i)] or returned or reported)[0]
+    if len(threads) == 2:
+        SHELL_HEDGES.inc(1, "hedge" if winner else "first")
+    return outcomes[winner].result(), winner == 1
@@ -12,12 +12,14 @@ Usage:
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
 import re
 import sys
 import threading
+import time
 from pathlib import Path
 from typing import Annotated, Any
 
@@ -31,6 +33,7 @@ from .infra.artifacts import (
 )
 from .infra.checkpoint import (
     checkpoint_dir_from_run_id,
+    checkpoint_fork,
     checkpoint_load,
     checkpoint_load_children,
     checkpoint_save,
@@ -38,6 +41,7 @@ from .infra.checkpoint import (
 from .engine.core import Frame, RunState
 from .engine.hooks import DryRunTreeHook
 from .infra.loader import discover_workflows
+from .infra.metrics import ACTIVE_RUNS, METRICS, RUN_CACHE_BYTES, RUN_CACHE_RESIDENT
 from .engine.protocol import (
     ActionBase,
     CancelledAction,
@@ -52,7 +56,10 @@ from .engine.protocol import (
     SubagentAction,
     action_to_dict,
 )
+from .infra.rate_limit import validate_limits
+from .infra.scheduler import PRIORITIES
 from .infra.shell_exec import _execute_shell
+from .engine.run_cache import RunCache
 from .engine.state import advance, apply_submit, pending_action
 from .engine.types import StructuredOutput, WorkflowContext, WorkflowDef
 from .engine.workflow_runner import WorkflowRunner
@@ -72,18 +79,21 @@ def _set_shell_log(value: bool) -> None:
 
 logger = logging.getLogger("workflow-engine")
 
-# In-memory storage for active runs (parent + child)
-_runs: dict[str, RunState] = {}
+# In-memory storage for active runs (parent + child). Bounded LRU: idle runs
+# are spilled to their checkpoint and rehydrated on next access.
+_runs: RunCache = RunCache()
 _runs_lock = threading.Lock()
-_EVICTION_THRESHOLD = 100  # trigger eviction when _runs exceeds this
-_TERMINAL_RUN_STATUSES = frozenset({"completed", "error", "halted", "cancelled"})
+_TERMINAL_RUN_STATUSES = frozenset({"completed", "error", "halted", "cancelled", "deadline_exceeded"})
+ACTIVE_RUNS.set_function(lambda: len(_runs))
+RUN_CACHE_RESIDENT.set_function(lambda: _runs.stats()["resident"])
+RUN_CACHE_BYTES.set_function(lambda: _runs.stats()["bytes"])
 
 # Feature flag: parallel auto-advance for shell-only parallel lanes
 _PARALLEL_AUTO_ADVANCE = os.environ.get("MEMENTO_PARALLEL_AUTO_ADVANCE", "on") != "off"
 _PARALLEL_MAX_WORKERS = 16
 
 # Terminal action types for parallel fast-path checks (excludes "cancelled")
-_TERMINAL_ACTION_TYPES = frozenset({"completed", "error", "halted"})
+_TERMINAL_ACTION_TYPES = frozenset({"completed", "error", "halted", "deadline_exceeded"})
 
 # MCP server instance
 mcp = FastMCP("memento-workflow")
@@ -100,53 +110,20 @@ ENGINE_ROOT = Path(__file__).resolve().parents[1]
 
 
 def _store_run(state: RunState) -> None:
-    """Store a run state. Evicts terminal runs when threshold exceeded."""
+    """Store a run state. RunCache enforces its count/byte bounds."""
     with _runs_lock:
         _runs[state.run_id] = state
-        if len(_runs) > _EVICTION_THRESHOLD:
-            _evict_terminal_runs()
 
 
 def _evict_terminal_runs() -> None:
-    """Remove terminal runs from _runs. Must be called with _runs_lock held.
+    """Drop terminal run subtrees from _runs (explicit full scan).
 
-    Evicts terminal subtrees as a unit: if a parent and all its descendants
-    are terminal, the whole component is removed. This prevents unevictable
-    trees where parent is protected by having children and children are
-    protected by being referenced.
+    Routine eviction is incremental: RunCache spills or drops LRU runs
+    whenever its count/byte bounds are exceeded.
     """
-
-    def _all_terminal(rid: str) -> bool:
-        """Return True if rid and all its descendants are terminal."""
-        s = _runs.get(rid)
-        if s is None or s.status not in _TERMINAL_RUN_STATUSES:
-            return False
-        return all(_all_terminal(cid) for cid in s.child_run_ids)
-
-    def _collect_subtree(rid: str, out: list[str]) -> None:
-        """Collect rid and all descendants into out."""
-        out.append(rid)
-        s = _runs.get(rid)
-        if s:
-            for cid in s.child_run_ids:
-                _collect_subtree(cid, out)
-
-    # Find root-level terminal subtrees (runs not referenced by any parent)
-    referenced: set[str] = set()
-    for s in _runs.values():
-        referenced.update(s.child_run_ids)
-
-    to_remove: list[str] = []
-    for rid in _runs:
-        if rid not in referenced and _all_terminal(rid):
-            _collect_subtree(rid, to_remove)
-
-    for rid in to_remove:
-        _runs.pop(rid, None)
-    if to_remove:
-        logger.debug(
-            "evicted %d terminal runs, %d remaining", len(to_remove), len(_runs)
-        )
+    removed = _runs.drop_terminal_trees()
+    if removed:
+        logger.debug("evicted %d terminal runs, %d remaining", removed, len(_runs))
 
 
 def _get_run(run_id: str) -> RunState | None:
@@ -277,9 +254,24 @@ def start(
         str, "Run ID to resume from checkpoint. Falls back to fresh start on failure."
     ] = "",
     dry_run: Annotated[bool, "Show steps without executing"] = False,
+    symbolic: Annotated[
+        bool,
+        "With dry_run: loops/fan-outs as one node with a count, plus step and token estimates",
+    ] = False,
     shell_log: Annotated[
         bool, "Debug only — include _shell_log in response (bloats context)"
     ] = False,
+    priority: Annotated[
+        str, 'Shell scheduler class: "interactive" (default) or "batch"'
+    ] = "interactive",
+    llm_limits: Annotated[
+        dict[str, int] | None,
+        'Per-run caps on parallel LLM lanes: {"outstanding": n, "tpm": n}',
+    ] = None,
+    budget: Annotated[
+        float | None,
+        "Wall-clock seconds for the run (on resume: a fresh budget from now)",
+    ] = None,
 ) -> str:
     """Start a workflow or resume from checkpoint. Returns the first action with exec_key."""
     _set_shell_log(shell_log)
@@ -305,6 +297,27 @@ def start(
                 )
             )
         )
+    if priority not in PRIORITIES:
+        return json.dumps(
+            action_to_dict(
+                ErrorAction(
+                    run_id="",
+                    message=f"Unknown priority {priority!r}: expected one of {PRIORITIES}",
+                )
+            )
+        )
+
+    if llm_limits is not None:
+        try:
+            validate_limits(llm_limits)
+        except ValueError as e:
+            return json.dumps(action_to_dict(ErrorAction(run_id="", message=str(e))))
+    if budget is not None and budget <= 0:
+        return json.dumps(
+            action_to_dict(
+                ErrorAction(run_id="", message=f"budget must be positive seconds, got {budget!r}")
+            )
+        )
 
     registry = _discover(str(cwd_path), workflow_dirs)
 
@@ -345,6 +358,8 @@ def start(
             resume_warning = f"resume={resume} is {result.status}"
         else:
             # Successful resume — delegate to WorkflowRunner
+            if budget is not None:
+                result.deadline, result.deadline_source = time.time() + budget, ""
             runner = WorkflowRunner.from_state(result, registry, run_store=_runs)
             action = runner.resume()
             return json.dumps(action_to_dict(action), default=str)
@@ -373,7 +388,7 @@ def start(
             run_store={},
             checkpoint=False,
         )
-        action = runner.dry_run()
+        action = runner.dry_run(symbolic=symbolic)
     else:
         runner = WorkflowRunner(
             wf,
@@ -381,6 +396,9 @@ def start(
             cwd=str(cwd_path),
             registry=registry,
             run_store=_runs,
+            priority=priority,
+            llm_limits=llm_limits,
+            budget=budget,
         )
         action = runner.start()
 
@@ -482,6 +500,73 @@ def resume(
     return json.dumps(action_to_dict(action), default=str)
 
 
+@mcp.tool()
+def fork(
+    run_id: Annotated[str, "Root run ID to fork from its checkpoint"],
+    exec_key: Annotated[
+        str, "First step to re-execute; results recorded before it are reused"
+    ],
+    variables: Annotated[
+        dict[str, Any] | None, "Variables to override in the new run"
+    ] = None,
+    workflow: Annotated[
+        str, "Workflow to run the fork with (defaults to the run's own, current version)"
+    ] = "",
+    cwd: Annotated[str, "Working directory (defaults to current)"] = "",
+    workflow_dirs: Annotated[
+        list[str] | None, "Additional directories to search for workflows"
+    ] = None,
+    shell_log: Annotated[
+        bool, "Debug only — include _shell_log in response (bloats context)"
+    ] = False,
+) -> str:
+    """Start a new run from a checkpointed run, re-executing from exec_key on.
+
+    The source run is left untouched; the new run records it as parent_run.
+    """
+    _set_shell_log(shell_log)
+    logger.info("fork(run_id=%s, exec_key=%s, workflow=%s)", run_id, exec_key, workflow)
+    cwd_path = Path(cwd or ".").resolve()
+
+    if not cwd_path.is_dir():
+        return json.dumps(
+            action_to_dict(
+                ErrorAction(run_id=run_id, message=f"cwd is not an existing directory: {cwd}")
+            )
+        )
+    if not _RUN_ID_RE.match(run_id):
+        return json.dumps(
+            action_to_dict(ErrorAction(run_id=run_id, message=f"Invalid run_id format: {run_id}"))
+        )
+
+    workflow = workflow or _load_resume_workflow_name(run_id, cwd_path) or ""
+    registry = _discover(str(cwd_path), workflow_dirs or [])
+    if workflow not in registry:
+        return json.dumps(
+            action_to_dict(
+                ErrorAction(
+                    run_id=run_id,
+                    message=(
+                        f"Workflow '{workflow}' for fork of run {run_id} "
+                        f"not found. Available: {sorted(registry.keys())}"
+                    ),
+                )
+            )
+        )
+
+    result = checkpoint_fork(
+        run_id, exec_key, cwd_path, registry, registry[workflow], variables=variables,
+    )
+    if isinstance(result, str):
+        return json.dumps(
+            action_to_dict(ErrorAction(run_id=run_id, message=f"fork failed: {result}"))
+        )
+
+    runner = WorkflowRunner.from_state(result, registry, run_store=_runs)
+    action = runner.start()
+    return json.dumps(action_to_dict(action), default=str)
+
+
 @mcp.tool()
 def submit(
     run_id: Annotated[str, "Run ID (parent or child)"],
@@ -514,6 +599,41 @@ def submit(
     return json.dumps(action_to_dict(action), default=str)
 
 
+@mcp.tool()
+def submit_many(
+    submissions: Annotated[
+        list[dict[str, Any]],
+        "Submissions in order; each takes submit()'s fields (run_id, exec_key, "
+        "output, structured_output, status, error, duration, cost_usd, model)",
+    ],
+    advance_parents: Annotated[
+        bool, "Auto-submit parallel parents whose lanes all finished in this batch"
+    ] = True,
+    shell_log: Annotated[
+        bool, "Debug only — include _shell_log in response (bloats context)"
+    ] = False,
+) -> str:
+    """Submit many results in one call (e.g. every lane of a parallel action).
+
+    Applied in order with one checkpoint flush per affected run. Returns
+    ``{"results": [...], "parents": [...]}`` — the next action per submission,
+    plus the next action of each parallel parent completed by the batch.
+    """
+    _set_shell_log(shell_log)
+    logger.info("submit_many(%d submissions)", len(submissions))
+    runner = WorkflowRunner.from_run_store(_runs)
+    results, parents = runner.submit_many(
+        submissions, advance_parents=advance_parents,
+    )
+    return json.dumps(
+        {
+            "results": [action_to_dict(a) for a in results],
+            "parents": [action_to_dict(a) for a in parents],
+        },
+        default=str,
+    )
+
+
 @mcp.tool()
 def next(
     run_id: Annotated[str, "Run ID to query"],
@@ -521,13 +641,54 @@ def next(
         bool, "Debug only — include _shell_log in response (bloats context)"
     ] = False,
 ) -> str:
-    """Re-fetch current pending action without mutating state. Recovery tool."""
+    """Re-fetch current pending action. Recovery tool.
+
+    Never advances the run; a lane prompt held by the LLM rate limiter is
+    handed out here once capacity frees up.
+    """
     _set_shell_log(shell_log)
     runner = WorkflowRunner.from_run_store(_runs)
     action = runner.next(run_id)
     return json.dumps(action_to_dict(action), default=str)
 
 
+# Upper bound for one wait() call; relays re-issue wait for longer waits.
+_WAIT_MAX_TIMEOUT = 300.0
+
+
+@mcp.tool()
+async def wait(
+    run_id: Annotated[str, "Run ID to wait on (usually the parent of a parallel action)"],
+    until: Annotated[
+        str,
+        '"all": every child terminal → parent action; '
+        '"any": first child that moves on → that child\'s action',
+    ] = "all",
+    exec_key: Annotated[
+        str, "If set, wait until the run's pending exec_key is no longer this one"
+    ] = "",
+    timeout: Annotated[float, "Seconds to block before returning (max 300)"] = 30.0,
+    shell_log: Annotated[
+        bool, "Debug only — include _shell_log in response (bloats context)"
+    ] = False,
+) -> str:
+    """Block until child runs (or a pending exec_key) move on; return the action.
+
+    Long-poll replacement for repeated next/status calls. Runs off the event
+    loop so concurrent submit calls (which wake it) are still served.
+    """
+    _set_shell_log(shell_log)
+    runner = WorkflowRunner.from_run_store(_runs)
+    action = await asyncio.to_thread(
+        runner.wait,
+        run_id,
+        until=until,
+        exec_key=exec_key,
+        timeout=min(max(timeout, 0.0), _WAIT_MAX_TIMEOUT),
+    )
+    return json.dumps(action_to_dict(action), default=str)
+
+
 @mcp.tool()
 def cancel(run_id: str) -> str:
     """Cancel a running workflow. Cleans up state.
@@ -604,6 +765,19 @@ def status(run_id: str) -> str:
     return json.dumps(runner.get_status(), default=str)
 
 
+@mcp.tool()
+def metrics(as_json: bool = False) -> str:
+    """Engine-wide metrics: active runs, queued lanes, checkpoint and shell
+    latency, evictions, relay-wait histograms.
+
+    Args:
+        as_json: Return a JSON snapshot instead of Prometheus text format.
+    """
+    if as_json:
+        return json.dumps(METRICS.snapshot())
+    return METRICS.render()
+
+
 @mcp.tool()
 def open_dashboard(cwd: str = "") -> str:
     """Open the workflow dashboard in a browser. Auto-selects a free port."""
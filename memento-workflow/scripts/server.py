@@ -10,14 +10,20 @@ Protocol:
   Error:    {"id": "...", "error": {"message": "...", "type": "..."}}\\n
 
 Methods mirror MCP tools from scripts/runner.py:
-  start, resume, submit, next, cancel, status, list_workflows, cleanup_runs, open_dashboard
+  start, resume, fork, submit, submit_many, next, wait, cancel, status, list_workflows,
+  cleanup_runs, open_dashboard, metrics
 
 Most methods (except list_workflows, cleanup_runs) return JSON strings — we
 re-parse them into objects before wrapping so consumers get structured results.
+Async tools (wait) are run to completion. Requests are served one at a time,
+so nothing can wake a wait here: it returns at once if its condition already
+holds, otherwise at its timeout.
 """
 
 from __future__ import annotations
 
+import asyncio
+import inspect
 import json
 import logging
 import os
@@ -30,12 +36,16 @@ from typing import Any, Callable
 from scripts.runner import (
     cancel,
     cleanup_runs,
+    fork,
     list_workflows,
+    metrics,
     open_dashboard,
     resume,
     start,
     status,
     submit,
+    submit_many,
+    wait,
 )
 from scripts.runner import next as _runner_next  # avoid shadowing builtin
 
@@ -44,13 +54,17 @@ logger = logging.getLogger("memento-workflow-server")
 METHODS: dict[str, Callable[..., Any]] = {
     "start": start,
     "resume": resume,
+    "fork": fork,
     "submit": submit,
+    "submit_many": submit_many,
     "next": _runner_next,
+    "wait": wait,
     "cancel": cancel,
     "status": status,
     "list_workflows": list_workflows,
     "cleanup_runs": cleanup_runs,
     "open_dashboard": open_dashboard,
+    "metrics": metrics,
 }
 
 
@@ -97,6 +111,8 @@ def _handle(line: str) -> str:
 
     try:
         result = fn(**params)
+        if inspect.iscoroutine(result):
+            result = asyncio.run(result)
     except TypeError as e:
         return json.dumps(
             {"id": req_id, "error": {"message": f"bad params: {e}", "type": "invalid_params"}}
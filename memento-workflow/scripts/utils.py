@@ -6,11 +6,15 @@ schema helpers, and workflow hashing.
 
 from __future__ import annotations
 
+import functools
 import hashlib
 import json
+import os
 import re
+import threading
+from collections.abc import Iterable
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, NamedTuple
 
 from .engine.types import (
     StepResult,
@@ -18,6 +22,7 @@ from .engine.types import (
     WorkflowContext,
     WorkflowDef,
 )
+from .infra.objects import write_file
 
 import logging
 
@@ -31,18 +36,88 @@ _VAR_RE = re.compile(r"\{\{([\w.\-]+)\}\}")
 # ---------------------------------------------------------------------------
 
 
-def substitute(template: str, ctx: WorkflowContext) -> str:
+class CompiledTemplate(NamedTuple):
+    """A template pre-split into static text and ``{{var}}`` placeholders.
+
+    ``statics`` has one more element than ``names``: the rendered text is
+    ``statics[0] + val(names[0]) + statics[1] + ... + statics[-1]``.
+    Compiled templates are immutable and shared between parallel lanes and
+    loop iterations — only the placeholder values are re-rendered.
+    """
+
+    raw: str
+    statics: tuple[str, ...]
+    names: tuple[str, ...]
+    digest: str  # sha256[:12] of raw (cache_prompt key)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_template(template: str) -> CompiledTemplate:
+    """Split a template into static segments and placeholder names (cached)."""
+    parts = _VAR_RE.split(template)
+    return CompiledTemplate(
+        raw=template,
+        statics=tuple(parts[0::2]),
+        names=tuple(parts[1::2]),
+        digest=hashlib.sha256(template.encode()).hexdigest()[:12],
+    )
+
+
+# Prompt file cache: path -> ((st_mtime_ns, st_size), CompiledTemplate).
+# Validated by stat() on every lookup so edited prompts are picked up.
+_PROMPT_FILE_CACHE: dict[str, tuple[tuple[int, int], CompiledTemplate]] = {}
+_PROMPT_FILE_CACHE_LOCK = threading.Lock()
+_PROMPT_FILE_CACHE_MAX = 256
+
+
+def load_prompt_template(path: Path) -> CompiledTemplate:
+    """Read and compile a prompt file, reusing the cached copy if unchanged.
+
+    Raises OSError (like ``Path.read_text``) if the file cannot be read.
+    """
+    key = str(path)
+    st = os.stat(key)
+    sig = (st.st_mtime_ns, st.st_size)
+    with _PROMPT_FILE_CACHE_LOCK:
+        hit = _PROMPT_FILE_CACHE.get(key)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
+    tpl = compile_template(path.read_text(encoding="utf-8"))
+    with _PROMPT_FILE_CACHE_LOCK:
+        if len(_PROMPT_FILE_CACHE) >= _PROMPT_FILE_CACHE_MAX:
+            _PROMPT_FILE_CACHE.clear()
+        _PROMPT_FILE_CACHE[key] = (sig, tpl)
+    return tpl
+
+
+def _render(tpl: CompiledTemplate, replace: Callable[[str], str]) -> str:
+    """Join static segments with replacements, rendering each name once."""
+    if not tpl.names:
+        return tpl.raw
+    rendered: dict[str, str] = {}
+    out: list[str] = [tpl.statics[0]]
+    for name, static in zip(tpl.names, tpl.statics[1:]):
+        val = rendered.get(name)
+        if val is None:
+            val = rendered[name] = replace(name)
+        out.append(val)
+        out.append(static)
+    return "".join(out)
+
+
+def substitute(template: str | CompiledTemplate, ctx: WorkflowContext) -> str:
     """Replace {{results.X}} and {{variables.X}} in a string."""
+    tpl = template if isinstance(template, CompiledTemplate) else compile_template(template)
 
-    def _replace(m: re.Match) -> str:
-        val = ctx.get_var(m.group(1))
+    def _replace(name: str) -> str:
+        val = ctx.get_var(name)
         if val is None:
-            return m.group(0)  # leave unresolved
+            return "{{" + name + "}}"  # leave unresolved
         if isinstance(val, (dict, list)):
             return json.dumps(val, indent=2)
         return str(val)
 
-    return _VAR_RE.sub(_replace, template)
+    return _render(tpl, _replace)
 
 
 # Threshold in characters for externalizing large values to files.
@@ -50,7 +125,7 @@ _EXTERN_THRESHOLD = 512
 
 
 def substitute_with_files(
-    template: str,
+    template: str | CompiledTemplate,
     ctx: WorkflowContext,
     artifacts_dir: Path,
     *,
@@ -62,6 +137,7 @@ def substitute_with_files(
     the threshold are inlined as before.  Pass ``extern_threshold=0``
     to force all resolved values into context files (used by cache_prompt).
     """
+    tpl = template if isinstance(template, CompiledTemplate) else compile_template(template)
     threshold = extern_threshold if extern_threshold is not None else _EXTERN_THRESHOLD
     context_files: list[str] = []
 
@@ -70,26 +146,26 @@ def substitute_with_files(
         if not file_path.resolve().is_relative_to(artifacts_dir.resolve()):
             raise ValueError(f"context file escapes artifacts_dir: {file_path}")
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.write_text(content, encoding="utf-8")
+        write_file(file_path, content.encode("utf-8"))
         context_files.append(str(file_path))
         return (
             f"(data externalized to context_{varname}.{ext} — read from context_files)"
         )
 
-    def _replace(m: re.Match) -> str:
-        val = ctx.get_var(m.group(1))
+    def _replace(name: str) -> str:
+        val = ctx.get_var(name)
         if val is None:
-            return m.group(0)
+            return "{{" + name + "}}"
         if isinstance(val, (dict, list)):
             serialized = json.dumps(val, indent=2)
             if len(serialized) > threshold:
-                return _externalize(m.group(1).replace(".", "_"), serialized, "json")
+                return _externalize(name.replace(".", "_"), serialized, "json")
             return serialized
         if isinstance(val, str) and len(val) > threshold:
-            return _externalize(m.group(1).replace(".", "_"), val, "txt")
+            return _externalize(name.replace(".", "_"), val, "txt")
         return str(val)
 
-    result = _VAR_RE.sub(_replace, template)
+    result = _render(tpl, _replace)
     return result, context_files
 
 
@@ -97,8 +173,7 @@ def load_prompt(path: str, ctx: WorkflowContext) -> str:
     """Read a prompt file and substitute template variables."""
     full = Path(ctx.prompt_dir) / path
     logger.debug("load_prompt: %s (prompt_dir=%s)", full, ctx.prompt_dir)
-    text = full.read_text(encoding="utf-8")
-    return substitute(text, ctx)
+    return substitute(load_prompt_template(full), ctx)
 
 
 # ---------------------------------------------------------------------------
@@ -270,10 +345,13 @@ def merge_child_results(
     parent_results_scoped: dict,
     parent_results: dict,
     child_results_scoped: dict,
+    parent_retired: dict | None = None,
+    child_retired: dict | None = None,
 ) -> None:
     """Merge child-produced results into parent (collision-safe).
 
-    Skips keys already present in parent (inherited results).
+    Skips keys already present in parent (inherited results).  The child's
+    retired loop iterations (WorkflowContext.retired) are merged the same way.
     Used by both runner.py (run_id lookup) and state.py (direct RunState).
     """
     for key, r in child_results_scoped.items():
@@ -282,45 +360,233 @@ def merge_child_results(
         parent_results_scoped[key] = r
         if r.results_key:
             parent_results[r.results_key] = r
+    if parent_retired is not None and child_retired:
+        for key, record in child_retired.items():
+            parent_retired.setdefault(key, record)
 
 
-def compute_totals(results_scoped: dict) -> dict[str, Any]:
-    """Compute duration/cost/step_count totals from results_scoped.
+# ---------------------------------------------------------------------------
+# Parallel lane reducers
+# ---------------------------------------------------------------------------
 
-    Returns a dict suitable for CompletedAction.totals or write_meta kwargs.
-    Shared by actions._build_completed_action and runner._write_terminal_meta.
+REDUCER_NAMES = ("concat", "merge", "count", "top_k")
+
+
+def _as_items(value: Any) -> list[Any]:
+    return list(value) if isinstance(value, list) else [value]
+
+
+def make_reducer(spec: str | Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    """Build a fold function ``(acc, value) -> acc`` from a reduce spec.
+
+    Callables are used as-is.  Built-in names (the accumulator starts as None):
+    ``concat`` (list; list values are spliced in), ``merge`` (shallow dict
+    update; non-dict values are ignored), ``count`` (number of items; a list
+    counts its length), ``top_k:<k>[:<field>]`` (the k largest items, by
+    ``item[field]`` when given; ties keep arrival order).
+
+    Raises ValueError for an unknown or malformed spec.
     """
-    total_cost = 0.0
-    total_duration = 0.0
-    steps_by_type: dict[str, int] = {}
-    has_cost = False
-    for r in results_scoped.values():
+    if callable(spec):
+        return spec
+    name, _, args = spec.partition(":")
+    if name == "concat" and not args:
+        own: list[Any] | None = None
+
+        def concat(acc: Any, v: Any) -> list[Any]:
+            # Copy the seed once, then extend that copy in place: O(n) overall
+            nonlocal own
+            if acc is None or acc is not own:
+                acc = own = list(acc or [])
+            acc.extend(_as_items(v))
+            return acc
+
+        return concat
+    if name == "merge" and not args:
+        return lambda acc, v: {**(acc or {}), **v} if isinstance(v, dict) else (acc or {})
+    if name == "count" and not args:
+        return lambda acc, v: (acc or 0) + (0 if v is None else len(_as_items(v)))
+    if name == "top_k":
+        k_str, _, field = args.partition(":")
+        if not k_str.isdigit() or int(k_str) < 1:
+            raise ValueError(f"reduce {spec!r}: expected 'top_k:<k>[:<field>]' with k >= 1")
+        k = int(k_str)
+
+        def sort_key(item: Any) -> Any:
+            return item.get(field) if field and isinstance(item, dict) else item
+
+        def fold(acc: Any, v: Any) -> list[Any]:
+            return sorted((acc or []) + _as_items(v), key=sort_key, reverse=True)[:k]
+
+        return fold
+    raise ValueError(
+        f"Unknown reduce {spec!r}: expected one of {', '.join(REDUCER_NAMES)} or a callable"
+    )
+
+
+def reduce_values(
+    values: Iterable[Any],
+    spec: str | Callable[[Any, Any], Any],
+    initial: Any = None,
+) -> Any:
+    """Fold values one at a time (nothing is materialized as a list)."""
+    fold = make_reducer(spec)
+    acc = initial
+    for value in values:
+        acc = fold(acc, value)
+    return acc
+
+
+RESOURCE_KEYS = (
+    "cpu_user", "cpu_sys", "max_rss_kb", "io_read", "io_write",
+    "ctx_voluntary", "ctx_involuntary",
+)
+
+TIMING_KEYS = ("engine_cpu", "shell", "sandbox", "relay_wait", "backoff", "queue")
+
+_TALLY_KEYS = ("step_count", "duration", "cost_usd", "steps_by_type", "statuses", "resources", "timing")
+
+
+def tally_results(
+    results: Iterable[StepResult], tally: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    """Fold StepResults into plain counters (JSON-safe, mergeable).
+
+    ``step_count`` / ``duration`` / ``cost_usd`` / ``steps_by_type`` skip
+    skipped and dry-run steps; ``statuses`` counts every step.  ``resources``
+    holds raw rusage sums (``max_rss_kb`` is a peak) plus the shell wall time
+    under ``shell``; ``timing`` holds per step name sums and a ``count``.
+    Updates ``tally`` in place when given.
+    """
+    t = tally if tally is not None else {}
+    t.setdefault("step_count", 0)
+    t.setdefault("duration", 0.0)
+    for r in results:
+        statuses = t.setdefault("statuses", {})
+        statuses[r.status] = statuses.get(r.status, 0) + 1
+        if r.resources:
+            res = t.setdefault("resources", {})
+            for key, value in r.resources.items():
+                if key == "max_rss_kb":
+                    res[key] = max(res.get(key, 0.0), value)
+                elif key in RESOURCE_KEYS:
+                    res[key] = res.get(key, 0.0) + value
+            res["shell"] = res.get("shell", 0.0) + (r.timing or {}).get("shell", 0.0)
+        if r.timing:
+            block = t.setdefault("timing", {}).setdefault(r.name, {"count": 0})
+            block["count"] += 1
+            for key, value in r.timing.items():
+                if key in TIMING_KEYS:
+                    block[key] = block.get(key, 0.0) + value
         if r.status in ("skipped", "dry_run"):
             continue
-        total_duration += r.duration
+        t["step_count"] += 1
+        t["duration"] += r.duration
         if r.cost_usd is not None:
-            total_cost += r.cost_usd
-            has_cost = True
+            t["cost_usd"] = t.get("cost_usd", 0.0) + r.cost_usd
         if r.step_type:
-            steps_by_type[r.step_type] = steps_by_type.get(r.step_type, 0) + 1
+            by_type = t.setdefault("steps_by_type", {})
+            by_type[r.step_type] = by_type.get(r.step_type, 0) + 1
+    return t
+
+
+def merge_tallies(into: dict[str, Any], other: dict[str, Any]) -> dict[str, Any]:
+    """Add the counters of ``other`` (a tally_results() dict) to ``into``."""
+
+    def _merge(dst: dict[str, Any], src: dict[str, Any]) -> None:
+        for key, value in src.items():
+            if isinstance(value, dict):
+                _merge(dst.setdefault(key, {}), value)
+            elif key == "max_rss_kb":
+                dst[key] = max(dst.get(key, 0.0), value)
+            else:
+                dst[key] = dst.get(key, 0) + value
 
+    _merge(into, {k: other[k] for k in _TALLY_KEYS if k in other})
+    return into
+
+
+def _tally_with_retired(results_scoped: dict, retired: dict | None) -> dict[str, Any]:
+    tally = tally_results(results_scoped.values())
+    for record in (retired or {}).values():
+        merge_tallies(tally, record)
+    return tally
+
+
+def compute_totals(results_scoped: dict, retired: dict | None = None) -> dict[str, Any]:
+    """Compute duration/cost/step_count totals from results_scoped.
+
+    Returns a dict suitable for CompletedAction.totals or write_meta kwargs.
+    Shared by actions._build_completed_action and runner._write_terminal_meta.
+    Shell rusage is summed under ``resources`` (see sum_resources).  Loop
+    iterations folded into ``retired`` (WorkflowContext.retired) count too.
+    """
+    tally = _tally_with_retired(results_scoped, retired)
     totals: dict[str, Any] = {
-        "duration": round(total_duration, 3),
-        "step_count": len(
-            [
-                r
-                for r in results_scoped.values()
-                if r.status not in ("skipped", "dry_run")
-            ]
-        ),
+        "duration": round(tally["duration"], 3),
+        "step_count": tally["step_count"],
     }
-    if has_cost:
-        totals["cost_usd"] = round(total_cost, 6)
-    if steps_by_type:
-        totals["steps_by_type"] = steps_by_type
+    if "cost_usd" in tally:
+        totals["cost_usd"] = round(tally["cost_usd"], 6)
+    if tally.get("steps_by_type"):
+        totals["steps_by_type"] = tally["steps_by_type"]
+    resources = _finish_resources(tally.get("resources"))
+    if resources:
+        totals["resources"] = resources
+    if retired:
+        totals["retired_iterations"] = sum(r.get("iterations", 0) for r in retired.values())
     return totals
 
 
+def _finish_resources(raw: dict[str, float] | None) -> dict[str, float]:
+    if not raw:
+        return {}
+    total = {k: raw.get(k, 0.0) for k in RESOURCE_KEYS}
+    result = {k: round(v, 6) for k, v in total.items()}
+    wall = raw.get("shell", 0.0)
+    if wall > 0:
+        result["cpu_cores"] = round((total["cpu_user"] + total["cpu_sys"]) / wall, 3)
+    return result
+
+
+def sum_resources(results: Iterable[Any]) -> dict[str, float]:
+    """Aggregate StepResult.resources over shell steps.
+
+    Counters are summed and ``max_rss_kb`` is the peak of any one step.
+    ``cpu_cores`` is CPU seconds per second of shell wall time, i.e. how
+    many cores a shell step keeps busy on average: ``os.cpu_count() /
+    cpu_cores`` is a starting point for a block's max_concurrency.
+    Returns {} when no step recorded resources.
+    """
+    return _finish_resources(tally_results(results).get("resources"))
+
+
+def compute_timing(
+    results_scoped: dict,
+    run_timing: dict[str, float] | None = None,
+    retired: dict | None = None,
+) -> dict[str, Any]:
+    """Split run time into engine_cpu / shell / sandbox / relay_wait / backoff / queue.
+
+    Step timings are summed per block (step name) and per run, including
+    loop iterations folded into ``retired``.  Engine CPU spent outside step
+    submits (start, auto-advance, lane setup) is only known at run level, so
+    ``run_timing["engine_cpu"]`` overrides the per-step sum when present.
+
+    Returns ``{"run": {...}, "blocks": {name: {..., "count": n}}}``.
+    """
+    run: dict[str, float] = dict.fromkeys(TIMING_KEYS, 0.0)
+    blocks: dict[str, dict[str, float]] = {}
+    for name, sums in _tally_with_retired(results_scoped, retired).get("timing", {}).items():
+        block = {k: sums.get(k, 0.0) for k in TIMING_KEYS}
+        for key, value in block.items():
+            run[key] += value
+        blocks[name] = {**{k: round(v, 4) for k, v in block.items()}, "count": sums["count"]}
+    if run_timing and "engine_cpu" in run_timing:
+        run["engine_cpu"] = run_timing["engine_cpu"]
+    return {"run": {k: round(v, 4) for k, v in run.items()}, "blocks": blocks}
+
+
 def workflow_hash(workflow: WorkflowDef) -> str:
     """Hash the workflow's source file content (strict resume drift check)."""
     source = getattr(workflow, "source_path", "") or ""
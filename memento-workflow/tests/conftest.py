@@ -60,10 +60,16 @@ for _fname in ["protocol.py", "core.py"]:
 # Load utils (scripts-level)
 _exec_file(SCRIPTS_DIR / "utils.py", _state_ns)
 # Load infra modules
-for _fname in ["artifacts.py", "checkpoint.py"]:
+for _fname in [
+    "metrics.py", "objects.py", "pack.py", "artifacts.py", "blobs.py", "checkpoint.py",
+    "lane_history.py", "rate_limit.py",
+]:
     _exec_file(INFRA_DIR / _fname, _state_ns)
 # Load remaining engine modules (depend on utils + infra)
-for _fname in ["actions.py", "child_runs.py", "subworkflow.py", "parallel.py", "state.py", "hooks.py"]:
+for _fname in [
+    "actions.py", "child_runs.py", "subworkflow.py", "concurrency.py", "parallel.py", "state.py",
+    "hooks.py", "symbolic.py", "tracing.py", "recording.py", "run_cache.py",
+]:
     _exec_file(ENGINE_DIR / _fname, _state_ns)
 
 # Enable _shell_log in test action responses (off by default in production)
@@ -124,6 +130,8 @@ def create_runner_ns() -> dict:
     }
     # Load extracted infra modules before runner.py (exec strips relative imports)
     _exec_file(INFRA_DIR / "sandbox.py", ns)
+    _exec_file(INFRA_DIR / "rate_limit.py", ns)
+    _exec_file(INFRA_DIR / "scheduler.py", ns)
     _exec_file(INFRA_DIR / "shell_exec.py", ns)
     _exec_file(INFRA_DIR / "dashboard_helpers.py", ns)
     _exec_file(ENGINE_DIR / "workflow_runner.py", ns)
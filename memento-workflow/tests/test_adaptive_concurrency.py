@@ -0,0 +1,165 @@
+"""Tests for adaptive ParallelEachBlock concurrency (engine/concurrency.py).
+
+Covers the AIMD step and its congestion signals, batches growing and
+shrinking in a shell fan-out, decisions logged to events.jsonl, and the
+controller state being restarted when the block is entered anew.
+"""
+
+import json
+
+import pytest
+
+from conftest import _state_ns, _types_ns, create_runner_ns
+
+# Types
+LoopBlock = _types_ns["LoopBlock"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+ShellStep = _types_ns["ShellStep"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+BatchSignals = _state_ns["BatchSignals"]
+aimd_step = _state_ns["aimd_step"]
+concurrency_bounds = _state_ns["concurrency_bounds"]
+
+_ns = create_runner_ns()
+WorkflowRunner = _ns["WorkflowRunner"]
+checkpoint_load = _ns["checkpoint_load"]
+
+
+def _signals(lanes=2, failed=0, latency=1.0, load=None, mem=None):
+    return BatchSignals(lanes=lanes, failed=failed, latency=latency, load=load, mem_available=mem)
+
+
+class TestAimdStep:
+    def test_additive_increase_capped(self):
+        assert aimd_step(2, 1, 4, _signals(), 1.0) == (3, "increase", [])
+        assert aimd_step(4, 1, 4, _signals(), 1.0) == (4, "hold", [])
+
+    def test_failures_halve(self):
+        limit, decision, reasons = aimd_step(6, 1, 8, _signals(lanes=6, failed=2), None)
+        assert (limit, decision) == (3, "decrease")
+        assert reasons == ["failure rate 2/6"]
+
+    def test_decrease_floored_at_min(self):
+        assert aimd_step(2, 2, 8, _signals(load=3.0), None)[:2] == (2, "hold")
+
+    def test_latency_load_and_memory(self):
+        _, _, reasons = aimd_step(4, 1, 8, _signals(latency=5.0, load=1.5, mem=0.05), 1.0)
+        assert reasons == ["load 1.50/cpu", "memory available 5%", "latency 5.0x baseline"]
+
+    def test_no_latency_signal_before_baseline(self):
+        assert aimd_step(1, 1, 4, _signals(latency=100.0), None)[1] == "increase"
+
+    def test_bounds(self):
+        block = ParallelEachBlock(
+            name="p", parallel_for="variables.items", concurrency="adaptive",
+            min_concurrency=2, max_concurrency=6,
+        )
+        assert concurrency_bounds(block) == (2, 6)
+        block = ParallelEachBlock(name="p", parallel_for="variables.items", min_concurrency=64)
+        assert concurrency_bounds(block) == (64, 64)
+
+
+@pytest.fixture
+def calm(monkeypatch):
+    """No load/memory pressure and no latency signal: only failures count."""
+    monkeypatch.setitem(_ns, "system_load", lambda: 0.0)
+    monkeypatch.setitem(_ns, "memory_available", lambda: 1.0)
+    monkeypatch.setitem(_state_ns, "LATENCY_FACTOR", 1e9)
+
+
+def _fanout(tmp_path, command, items, **block):
+    wf = WorkflowDef(
+        name="fan", description="",
+        blocks=[
+            ParallelEachBlock(
+                name="lanes", parallel_for="variables.items", concurrency="adaptive",
+                template=[ShellStep(name="work", command=command)],
+                **block,
+            ),
+        ],
+    )
+    runner = WorkflowRunner(
+        wf, variables={"items": items}, cwd=str(tmp_path), registry={wf.name: wf},
+    )
+    assert runner.start().action == "completed"
+    return runner
+
+
+def _events(runner):
+    path = runner.root_state.checkpoint_dir / "events.jsonl"
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def _batch_sizes(runner):
+    return runner.root_state._adaptive_batches["_par_lanes_chunk"]["sizes"]
+
+
+class TestAdaptiveFanout:
+    def test_batches_grow_to_max(self, tmp_path, calm):
+        runner = _fanout(
+            tmp_path, "echo {{variables.item}}", list(range(9)),
+            min_concurrency=1, max_concurrency=3,
+        )
+        outputs = [
+            r.output
+            for cid in runner.root_state.child_run_ids
+            for r in runner._get_run(cid).ctx.results_scoped.values()
+            if r.name == "work"
+        ]
+        assert sorted(int(o) for o in outputs) == list(range(9))
+        # 1, 2, 3, then capped at 3
+        assert _batch_sizes(runner) == [1, 2, 3]
+        # Engine state: checkpointed, but not a workflow variable
+        assert "_par_lanes_chunk_adaptive" not in runner.root_state.ctx.variables
+        registry = runner._registry
+        loaded = checkpoint_load(runner.root_state.run_id, tmp_path, registry, registry["fan"])
+        assert loaded._adaptive_batches["_par_lanes_chunk"]["sizes"] == [1, 2, 3]
+        events = _events(runner)
+        assert [(e["limit_before"], e["limit"], e["decision"]) for e in events] == [
+            (1, 2, "increase"), (2, 3, "increase"), (3, 3, "hold"),
+        ]
+        assert events[0]["event"] == "concurrency"
+        assert events[0]["block"] == "lanes"
+        assert events[0]["signals"]["lanes"] == 1
+
+    def test_failures_shrink_batches(self, tmp_path, calm):
+        runner = _fanout(
+            tmp_path, "test {{variables.item}} -lt 3", list(range(10)),
+            min_concurrency=2, max_concurrency=8,
+        )
+        decisions = [(e["limit"], e["decision"]) for e in _events(runner)]
+        # [0,1] ok -> 3; [2,3,4] two failures -> 2 (floor); [5,6] fail -> hold
+        assert decisions[:3] == [(3, "increase"), (2, "decrease"), (2, "hold")]
+        assert _events(runner)[1]["reasons"] == ["failure rate 2/3"]
+
+    def test_few_items_run_in_one_batch(self, tmp_path, calm):
+        runner = _fanout(tmp_path, "true", ["a", "b"], min_concurrency=2)
+        assert not (runner.root_state.checkpoint_dir / "events.jsonl").exists()
+        assert not runner.root_state._adaptive_batches
+
+    def test_restarts_in_outer_loop(self, tmp_path, calm):
+        wf = WorkflowDef(
+            name="outer", description="",
+            blocks=[
+                LoopBlock(
+                    name="rounds", loop_over="variables.rounds", loop_var="round",
+                    blocks=[
+                        ParallelEachBlock(
+                            name="lanes", parallel_for="variables.items",
+                            concurrency="adaptive", max_concurrency=4,
+                            template=[ShellStep(name="work", command="true")],
+                        ),
+                    ],
+                ),
+            ],
+        )
+        runner = WorkflowRunner(
+            wf, variables={"rounds": [1, 2], "items": list(range(4))},
+            cwd=str(tmp_path), registry={wf.name: wf},
+        )
+        assert runner.start().action == "completed"
+        events = _events(runner)
+        # Each round starts over at min_concurrency=1
+        assert [e["limit_before"] for e in events] == [1, 2, 1, 2]
+        assert events[0]["block"] != events[2]["block"]
@@ -1,5 +1,6 @@
 """Unit tests for the artifacts module."""
 
+import gzip
 import json
 
 import pytest
@@ -11,6 +12,10 @@ write_shell_artifacts = _state_ns["write_shell_artifacts"]
 write_llm_prompt_artifact = _state_ns["write_llm_prompt_artifact"]
 write_llm_output_artifact = _state_ns["write_llm_output_artifact"]
 write_meta = _state_ns["write_meta"]
+read_artifact = _state_ns["read_artifact"]
+write_retired_results = _state_ns["write_retired_results"]
+
+_LOG = "".join(f"test_case_{i} PASSED in 0.{i % 10}s\n" for i in range(2000))
 
 
 # ---------------------------------------------------------------------------
@@ -163,6 +168,64 @@ class TestWriteLLMOutputArtifact:
         assert data == {"a": 1}
 
 
+# ---------------------------------------------------------------------------
+# Compression
+# ---------------------------------------------------------------------------
+
+
+class TestCompression:
+    def test_large_logs_compressed(self, tmp_path):
+        art_dir = tmp_path / "artifacts"
+        write_shell_artifacts(art_dir, "test", "pytest -v", _LOG, _LOG, {"log": _LOG})
+        step = art_dir / "test"
+        assert sorted(p.name for p in step.iterdir()) == [
+            "command.txt", "error.txt.gz", "output.txt.gz", "result.json.gz",
+        ]
+        assert (step / "output.txt.gz").stat().st_size < len(_LOG) // 5
+        assert gzip.decompress((step / "output.txt.gz").read_bytes()).decode() == _LOG
+        assert read_artifact(step / "output.txt") == _LOG
+        assert read_artifact(step / "output.txt.gz") == _LOG
+        assert json.loads(read_artifact(step / "result.json")) == {"log": _LOG}
+        assert read_artifact(step / "command.txt") == "pytest -v"
+        assert read_artifact(step / "missing.txt") is None
+
+    def test_llm_output_and_retired_compressed(self, tmp_path):
+        art_dir = tmp_path / "artifacts"
+        write_llm_output_artifact(art_dir, "review", _LOG)
+        write_retired_results(art_dir, "loop:x[i=0]", [{"output": _LOG}])
+        assert (art_dir / "review" / "output.txt.gz").is_file()
+        assert (art_dir / "loop-x" / "i-0" / "retired.json.gz").is_file()
+
+    def test_prompt_stays_plain(self, tmp_path):
+        art_dir = tmp_path / "artifacts"
+        write_llm_prompt_artifact(art_dir, "review", _LOG)
+        assert (art_dir / "review" / "prompt.md").read_text() == _LOG
+
+    def test_rewrite_replaces_other_form(self, tmp_path):
+        art_dir = tmp_path / "artifacts"
+        write_llm_output_artifact(art_dir, "review", _LOG)
+        write_llm_output_artifact(art_dir, "review", "short")
+        step = art_dir / "review"
+        assert [p.name for p in step.iterdir()] == ["output.txt"]
+        write_llm_output_artifact(art_dir, "review", _LOG)
+        assert [p.name for p in step.iterdir()] == ["output.txt.gz"]
+
+    def test_level_zero_disables(self, tmp_path, monkeypatch):
+        monkeypatch.setitem(_state_ns, "COMPRESS_LEVEL", 0)
+        art_dir = tmp_path / "artifacts"
+        write_llm_output_artifact(art_dir, "review", _LOG)
+        assert (art_dir / "review" / "output.txt").read_text() == _LOG
+
+    def test_identical_content_is_byte_identical(self, tmp_path):
+        art_dir = tmp_path / "artifacts"
+        write_llm_output_artifact(art_dir, "a", _LOG)
+        write_llm_output_artifact(art_dir, "b", _LOG)
+        assert (
+            (art_dir / "a" / "output.txt.gz").read_bytes()
+            == (art_dir / "b" / "output.txt.gz").read_bytes()
+        )
+
+
 # ---------------------------------------------------------------------------
 # write_meta
 # ---------------------------------------------------------------------------
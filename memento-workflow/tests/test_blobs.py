@@ -0,0 +1,177 @@
+"""Tests for out-of-line blob storage (infra/blobs.py).
+
+Covers content-addressed blobs and handles, the threshold, escaping of
+handle-shaped user values, copies from the blob cache, large variables
+and structured outputs stored by handle in checkpoints and materialized on
+load / rehydrate, and parallel lanes sharing large values (one blob per
+run tree, handles in every lane checkpoint).
+"""
+
+import json
+
+from conftest import _state_ns, _types_ns, create_runner_ns
+
+BlobStore = _state_ns["BlobStore"]
+Frame = _state_ns["Frame"]
+LLMStep = _types_ns["LLMStep"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+RunState = _state_ns["RunState"]
+StepResult = _types_ns["StepResult"]
+WorkflowContext = _types_ns["WorkflowContext"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+checkpoint_load = _state_ns["checkpoint_load"]
+checkpoint_load_children = _state_ns["checkpoint_load_children"]
+checkpoint_rehydrate = _state_ns["checkpoint_rehydrate"]
+checkpoint_save = _state_ns["checkpoint_save"]
+checkpoint_spill = _state_ns["checkpoint_spill"]
+is_blob_handle = _state_ns["is_blob_handle"]
+record_leaf_result = _state_ns["record_leaf_result"]
+shared_values = _state_ns["shared_values"]
+
+_ns = create_runner_ns()
+WorkflowRunner = _ns["WorkflowRunner"]
+
+_FILES = [f"src/module_{i}.py" for i in range(2000)]
+
+
+def _blob_files(root):
+    return sorted(p for p in (root / "blobs").rglob("*.json"))
+
+
+class TestBlobStore:
+    def test_handles_are_content_addressed(self, tmp_path):
+        store = BlobStore(tmp_path / "blobs", threshold=100)
+        assert store.externalize({"small": 1}) == {"small": 1}
+        assert store.externalize("x" * 50) == "x" * 50
+        handle = store.externalize(_FILES)
+        assert is_blob_handle(handle)
+        assert handle["bytes"] == len(json.dumps(_FILES, separators=(",", ":")))
+        assert store.externalize(list(_FILES)) == handle
+        assert len(_blob_files(tmp_path)) == 1
+        assert store.get(handle) == _FILES
+        assert store.materialize(handle) == _FILES
+
+    def test_each_get_is_a_copy(self, tmp_path):
+        store = BlobStore(tmp_path / "blobs", threshold=100)
+        handle = store.externalize(_FILES)
+        first = store.get(handle)
+        first.append("mutated")
+        assert store.get(handle) == _FILES
+
+    def test_handle_shaped_values_escaped(self, tmp_path):
+        store = BlobStore(tmp_path / "blobs", threshold=0)
+        fake = {"$blob": "not-a-digest", "bytes": 3}
+        wrapped = {"$blob-literal": "x"}
+        for value in (fake, wrapped):
+            stored = store.externalize(value)
+            assert stored != value
+            assert store.materialize(stored) == value
+
+    def test_threshold_zero_disables(self, tmp_path):
+        store = BlobStore(tmp_path / "blobs", threshold=0)
+        assert store.externalize(_FILES) is _FILES
+        assert shared_values({"files": _FILES}, threshold=0) == {}
+
+    def test_shared_values_only_large(self):
+        small = ["a"]
+        memo = shared_values({"files": _FILES, "small": small, "n": 3}, threshold=100)
+        assert memo == {id(_FILES): _FILES}
+
+
+def _state(tmp_path, variables):
+    wf = WorkflowDef(name="blobby", description="", blocks=[])
+    return RunState(
+        run_id="run",
+        ctx=WorkflowContext(variables=variables, cwd=str(tmp_path)),
+        stack=[Frame(block=wf)],
+        registry={wf.name: wf},
+        wf_hash="",
+        workflow_name=wf.name,
+        checkpoint_dir=tmp_path / ".workflow-state" / "run",
+    ), wf
+
+
+class TestCheckpoint:
+    def test_large_values_stored_by_handle(self, tmp_path):
+        state, wf = _state(tmp_path, {"files": _FILES, "mode": "fast"})
+        record_leaf_result(
+            state.ctx, "scan",
+            StepResult(name="scan", status="success", structured_output={"files": _FILES}),
+        )
+        assert checkpoint_save(state)
+        data = json.loads((state.checkpoint_dir / "state.json").read_text())
+        assert is_blob_handle(data["ctx"]["variables"]["files"])
+        assert data["ctx"]["variables"]["mode"] == "fast"
+        assert is_blob_handle(data["ctx"]["results_scoped"]["scan"]["structured_output"])
+        assert state._checkpoint_bytes < 2000
+        assert len(_blob_files(state.checkpoint_dir)) == 2
+
+        loaded = checkpoint_load("run", tmp_path, {wf.name: wf}, wf)
+        assert loaded.ctx.variables["files"] == _FILES
+        assert loaded.ctx.results["scan"].structured_output == {"files": _FILES}
+
+    def test_handle_shaped_user_values_survive_load(self, tmp_path):
+        fake = {"$blob": "0" * 64, "bytes": 12}
+        state, wf = _state(tmp_path, {"ref": fake})
+        record_leaf_result(
+            state.ctx, "scan",
+            StepResult(name="scan", status="success", structured_output=fake),
+        )
+        assert checkpoint_save(state)
+        loaded = checkpoint_load("run", tmp_path, {wf.name: wf}, wf)
+        assert loaded.ctx.variables["ref"] == fake
+        assert loaded.ctx.results["scan"].structured_output == fake
+
+    def test_spill_and_rehydrate(self, tmp_path):
+        state, _ = _state(tmp_path, {"files": _FILES})
+        assert checkpoint_spill(state)
+        assert state.ctx.variables == {}
+        assert checkpoint_rehydrate(state)
+        assert state.ctx.variables["files"] == _FILES
+
+    def test_missing_blob_fails_load(self, tmp_path, monkeypatch):
+        state, wf = _state(tmp_path, {"files": _FILES})
+        checkpoint_save(state)
+        for path in _blob_files(state.checkpoint_dir):
+            path.unlink()
+        monkeypatch.setitem(_state_ns, "_cache", type(_state_ns["_cache"])())
+        result = checkpoint_load("run", tmp_path, {wf.name: wf}, wf)
+        assert isinstance(result, str)
+        assert "Failed to read checkpoint" in result
+
+
+class TestLanes:
+    def test_lanes_share_large_variables(self, tmp_path):
+        wf = WorkflowDef(
+            name="fan", description="",
+            blocks=[
+                ParallelEachBlock(
+                    name="lanes", parallel_for="variables.items",
+                    template=[LLMStep(name="ask", prompt_text="Review {{variables.item}}")],
+                ),
+            ],
+        )
+        runner = WorkflowRunner(
+            wf, variables={"items": ["a", "b", "c"], "files": _FILES},
+            cwd=str(tmp_path), registry={wf.name: wf},
+        )
+        parallel = runner.start()
+        root = runner.root_state
+        lanes = [runner._get_run(lane.child_run_id) for lane in parallel.lanes]
+        assert all(lane.ctx.variables["files"] is root.ctx.variables["files"] for lane in lanes)
+        assert lanes[0].ctx.variables["items"] is not root.ctx.variables["items"]
+
+        for lane in parallel.lanes:
+            prompt = runner.next(lane.child_run_id)
+            runner.submit(lane.child_run_id, prompt.exec_key, output="ok")
+        # One blob for the whole run tree, a handle in every lane checkpoint
+        assert len(_blob_files(root.checkpoint_dir)) == 1
+        for lane in lanes:
+            data = json.loads((lane.checkpoint_dir / "state.json").read_text())
+            assert is_blob_handle(data["ctx"]["variables"]["files"])
+
+        loaded = checkpoint_load(root.run_id, tmp_path, {wf.name: wf}, wf)
+        children = [c for cs in checkpoint_load_children(loaded, {wf.name: wf}).values() for c in cs]
+        assert len(children) == 3
+        assert all(c.ctx.variables["files"] == _FILES for c in children)
@@ -9,7 +9,7 @@ from pathlib import Path
 
 import pytest
 
-# cleanup.py is a standalone module with no relative imports — safe to import directly
+# cleanup.py only imports objects.py — safe to import through the package
 import sys
 
 SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
@@ -5,6 +5,7 @@ list_runs, get_run_detail, get_artifact_content, diff_runs,
 the Starlette app factory, and the CLI output.
 """
 
+import gzip
 import json
 import subprocess
 import sys
@@ -237,6 +238,26 @@ class TestGetRunDetail:
         orders = [s["order"] for s in detail["steps"]]
         assert orders == sorted(orders)
 
+    def test_passes_through_timing(self, state_dir):
+        run_dir = state_dir / "aaa111aaa111"
+        meta = json.loads((run_dir / "meta.json").read_text())
+        meta["timing"] = {"run": {"engine_cpu": 0.02, "relay_wait": 4.0}, "blocks": {}}
+        (run_dir / "meta.json").write_text(json.dumps(meta))
+        state = json.loads((run_dir / "state.json").read_text())
+        step = state["ctx"]["results_scoped"]["step-one"]
+        step["issued_at"] = "2026-03-01T10:00:00+00:00"
+        step["submitted_at"] = "2026-03-01T10:00:04+00:00"
+        step["timing"] = {"relay_wait": 4.0, "engine_cpu": 0.001}
+        (run_dir / "state.json").write_text(json.dumps(state))
+
+        detail = get_run_detail(state_dir, "aaa111aaa111")
+        assert detail is not None
+        assert detail["meta"]["timing"]["run"]["relay_wait"] == 4.0
+        s1, s2 = detail["steps"]
+        assert s1["timing"] == {"relay_wait": 4.0, "engine_cpu": 0.001}
+        assert s1["submitted_at"] == "2026-03-01T10:00:04+00:00"
+        assert s2["timing"] is None
+
 
 class TestGetArtifactContent:
     def test_reads_file(self, state_dir):
@@ -256,6 +277,21 @@ class TestGetArtifactContent:
     def test_path_traversal_blocked(self, state_dir):
         assert get_artifact_content(state_dir, "aaa111aaa111", "../../meta.json") is None
 
+    def test_reads_compressed(self, state_dir):
+        step = state_dir / "aaa111aaa111" / "artifacts" / "step-one"
+        (step / "output.txt").unlink()
+        (step / "output.txt.gz").write_bytes(gzip.compress(b"hello world"))
+        content = get_artifact_content(state_dir, "aaa111aaa111", "step-one/output.txt")
+        assert content == "hello world"
+        detail = get_run_detail(state_dir, "aaa111aaa111")
+        assert detail["steps"][0]["artifact_files"] == ["output.txt", "result.json"]
+        [node] = [
+            n for d in detail["artifact_tree"] if d["name"] == "step-one"
+            for n in d["children"] if n["name"] == "output.txt"
+        ]
+        assert node["path"] == "step-one/output.txt"
+        assert node["compressed"] is True
+
 
 class TestDiffRuns:
     def test_detects_modified_step(self, state_dir):
@@ -276,6 +312,16 @@ class TestDiffRuns:
     def test_not_found(self, state_dir):
         assert diff_runs(state_dir, "aaa111aaa111", "nonexistent") is None
 
+    def test_compressed_matches_plain(self, state_dir):
+        step1 = state_dir / "aaa111aaa111" / "artifacts" / "step-one"
+        step2 = state_dir / "bbb222bbb222" / "artifacts" / "step-one"
+        for name in ("output.txt", "result.json"):
+            (step2 / name).unlink(missing_ok=True)
+            (step2 / f"{name}.gz").write_bytes(gzip.compress((step1 / name).read_bytes()))
+        result = diff_runs(state_dir, "aaa111aaa111", "bbb222bbb222")
+        step_one = next(d for d in result["diffs"] if d["results_key"] == "step-one")
+        assert step_one["change"] == "unchanged"
+
 
 # ── CLI tests ──
 
@@ -325,6 +371,17 @@ class TestCLI:
         assert r.returncode == 0
         assert r.stdout == "hello world"
 
+    def test_artifact_command_compressed(self, state_dir):
+        step = state_dir / "aaa111aaa111" / "artifacts" / "step-one"
+        (step / "output.txt").unlink()
+        (step / "output.txt.gz").write_bytes(gzip.compress(b"hello world"))
+        r = _run_cli(
+            "artifact", "aaa111aaa111", "step-one/output.txt",
+            cwd=str(state_dir.parent),
+        )
+        assert r.returncode == 0
+        assert r.stdout == "hello world"
+
     def test_steps_json(self, state_dir):
         r = _run_cli("steps", "aaa111aaa111", cwd=str(state_dir.parent))
         assert r.returncode == 0
@@ -383,6 +440,22 @@ class TestCreateApp:
         assert "/api/diff/{id1}/{id2}" in route_paths
         assert "/api/shutdown" in route_paths
         assert "/api/ws" in route_paths
+        assert "/metrics" in route_paths
+
+    def test_metrics_serves_engine_snapshot(self, tmp_path):
+        from starlette.testclient import TestClient
+
+        client = TestClient(create_app(str(tmp_path)))
+        resp = client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.text == ""
+
+        state_dir = tmp_path / ".workflow-state"
+        state_dir.mkdir()
+        (state_dir / ".metrics.prom").write_text("memento_active_runs 3\n")
+        resp = client.get("/metrics")
+        assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert resp.text == "memento_active_runs 3\n"
 
 
 class TestSPAStaticFiles:
@@ -0,0 +1,164 @@
+"""Tests for run and block time budgets (deadline_exceeded).
+
+Covers a run budget cutting a shell step short, loop / retry / parallel
+budgets stopping new iterations, attempts and lanes, partial results and
+meta status of a run that ran out of time, and the deadline in status.
+"""
+
+import json
+import time
+
+import pytest
+
+from conftest import _types_ns, create_runner_ns
+
+GroupBlock = _types_ns["GroupBlock"]
+LLMStep = _types_ns["LLMStep"]
+LoopBlock = _types_ns["LoopBlock"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+RetryBlock = _types_ns["RetryBlock"]
+ShellStep = _types_ns["ShellStep"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+_ns = create_runner_ns()
+WorkflowRunner = _ns["WorkflowRunner"]
+
+
+def _runner(tmp_path, blocks, variables=None, **kwargs):
+    wf = WorkflowDef(name="timed", description="", blocks=blocks)
+    return WorkflowRunner(
+        wf, variables=variables or {}, cwd=str(tmp_path), registry={wf.name: wf}, **kwargs,
+    )
+
+
+def _timed_start(runner):
+    t0 = time.monotonic()
+    action = runner.start()
+    return action, time.monotonic() - t0
+
+
+class TestRunBudget:
+    def test_shell_step_cut_short(self, tmp_path):
+        runner = _runner(
+            tmp_path,
+            [
+                ShellStep(name="first", command="echo ok"),
+                ShellStep(name="slow", command="sleep 5"),
+                ShellStep(name="never", command="echo never"),
+            ],
+            budget=0.5,
+        )
+        action, elapsed = _timed_start(runner)
+        assert action.action == "deadline_exceeded"
+        assert action.deadline_at == "run"
+        assert elapsed < 3
+        assert runner.status == "deadline_exceeded"
+        # Partial results: the first step, and the step that was cut short
+        assert action.summary["first"]["status"] == "success"
+        assert action.summary["slow"]["status"] == "failure"
+        assert "never" not in action.summary
+        meta = json.loads((runner.root_state.checkpoint_dir / "meta.json").read_text())
+        assert meta["status"] == "deadline_exceeded"
+
+    def test_no_budget_no_deadline(self, tmp_path):
+        runner = _runner(tmp_path, [ShellStep(name="a", command="true")])
+        assert runner.start().action == "completed"
+        assert "deadline" not in runner.get_status()
+
+    def test_bad_budget(self, tmp_path):
+        with pytest.raises(ValueError, match="budget"):
+            _runner(tmp_path, [], budget=0)
+
+
+class TestBlockBudgets:
+    def test_loop_stops_issuing_iterations(self, tmp_path):
+        runner = _runner(
+            tmp_path,
+            [
+                LoopBlock(
+                    name="each", loop_over="variables.xs", loop_var="x", budget=0.5,
+                    blocks=[ShellStep(name="work", command="sleep 0.2")],
+                ),
+                ShellStep(name="after", command="echo after"),
+            ],
+            variables={"xs": list(range(20))},
+        )
+        action, elapsed = _timed_start(runner)
+        assert action.action == "deadline_exceeded"
+        assert action.deadline_at == "each"
+        done = [k for k in runner.root_state.ctx.results_scoped if k.endswith("/work")]
+        assert 1 <= len(done) < 20
+        assert elapsed < 2
+        assert "after" not in runner.root_state.ctx.results_scoped
+
+    def test_retry_stops_issuing_attempts(self, tmp_path):
+        runner = _runner(
+            tmp_path,
+            [
+                RetryBlock(
+                    name="poll", until=lambda ctx: False, max_attempts=1000, budget=0.4,
+                    blocks=[ShellStep(name="check", command="sleep 0.1")],
+                ),
+            ],
+        )
+        action, elapsed = _timed_start(runner)
+        assert action.action == "deadline_exceeded"
+        assert action.deadline_at == "poll"
+        assert elapsed < 2
+
+    def test_parallel_budget_stops_lanes_and_parent(self, tmp_path):
+        runner = _runner(
+            tmp_path,
+            [
+                ParallelEachBlock(
+                    name="lanes", parallel_for="variables.items", budget=0.5,
+                    template=[ShellStep(name="work", command="sleep {{variables.item}}")],
+                ),
+                ShellStep(name="after", command="echo after"),
+            ],
+            variables={"items": [0, 5]},
+        )
+        action, elapsed = _timed_start(runner)
+        assert action.action == "deadline_exceeded"
+        assert action.deadline_at == "lanes←lanes"
+        assert elapsed < 3
+        results = runner.root_state.ctx.results_scoped
+        assert results["lanes"].status == "failure"
+        assert "after" not in results
+        lanes = [runner._get_run(cid) for cid in runner.root_state.child_run_ids]
+        assert sorted(lane.status for lane in lanes) == ["completed", "deadline_exceeded"]
+
+    def test_budget_not_reached(self, tmp_path):
+        runner = _runner(
+            tmp_path,
+            [GroupBlock(name="g", budget=60, blocks=[ShellStep(name="a", command="true")])],
+        )
+        assert runner.start().action == "completed"
+
+
+class TestRelay:
+    def test_late_submit_ends_run(self, tmp_path):
+        runner = _runner(
+            tmp_path,
+            [
+                GroupBlock(
+                    name="g", budget=0.2,
+                    blocks=[
+                        LLMStep(name="ask", prompt_text="hi"),
+                        LLMStep(name="next", prompt_text="again"),
+                    ],
+                ),
+            ],
+        )
+        prompt = runner.start()
+        assert prompt.action == "prompt"
+        status = runner.get_status()["deadline"]
+        assert status["source"] == "g"
+        assert 0 < status["remaining"] <= 0.2
+        time.sleep(0.3)
+        action = runner.submit(prompt.run_id, prompt.exec_key, output="answer")
+        assert action.action == "deadline_exceeded"
+        assert action.deadline_at == "g"
+        # The late answer is kept
+        assert action.summary["ask"]["status"] == "success"
+        assert runner.next().action == "deadline_exceeded"
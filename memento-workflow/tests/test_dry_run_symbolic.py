@@ -0,0 +1,280 @@
+"""Tests for the symbolic dry-run (engine/symbolic.py, dry_run(symbolic=True)).
+
+Covers loops and fan-outs as single nodes with multiplicities, weighted
+step counts and prompt token estimates, condition summaries, upper bounds
+for conditionals and retries, unresolved item lists, subworkflows, and
+the ``start(dry_run=True, symbolic=True)`` response.
+"""
+
+import json
+import time
+
+import pytest
+
+from conftest import _compiler_ns, _types_ns, create_runner_ns
+
+Branch = _types_ns["Branch"]
+ConditionalBlock = _types_ns["ConditionalBlock"]
+GroupBlock = _types_ns["GroupBlock"]
+LLMStep = _types_ns["LLMStep"]
+LoopBlock = _types_ns["LoopBlock"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+PromptStep = _types_ns["PromptStep"]
+RetryBlock = _types_ns["RetryBlock"]
+ShellStep = _types_ns["ShellStep"]
+SubWorkflow = _types_ns["SubWorkflow"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+compile_expression = _compiler_ns["compile_expression"]
+
+_runner_ns = create_runner_ns()
+WorkflowRunner = _runner_ns["WorkflowRunner"]
+estimate_tokens = _runner_ns["estimate_tokens"]
+_start = _runner_ns["start"]
+_runs = _runner_ns["_runs"]
+
+
+def _dry_run(wf, variables=None, registry=None, symbolic=True, cwd="."):
+    registry = registry or {wf.name: wf}
+    runner = WorkflowRunner(
+        wf, variables=variables or {}, cwd=cwd, registry=registry, checkpoint=False,
+    )
+    return runner.dry_run(symbolic=symbolic)
+
+
+def _nodes(tree):
+    for node in tree:
+        yield node
+        yield from _nodes(node.children)
+
+
+def _fanout_wf():
+    return WorkflowDef(
+        name="fanout",
+        description="",
+        blocks=[
+            ShellStep(name="setup", command="echo setup"),
+            LoopBlock(
+                name="each", loop_over="variables.items", loop_var="item",
+                blocks=[
+                    ShellStep(name="build", command="make {{variables.item}}"),
+                    LLMStep(name="check", prompt_text="Check {{variables.item}} carefully"),
+                ],
+            ),
+            ParallelEachBlock(
+                name="fan", parallel_for="variables.files",
+                template=[
+                    LLMStep(name="review", prompt_text="Review {{variables.item}}"),
+                    LoopBlock(
+                        name="passes", loop_over="variables.passes", loop_var="p",
+                        blocks=[ShellStep(name="lint", command="lint {{variables.p}}")],
+                    ),
+                ],
+            ),
+        ],
+    )
+
+
+class TestMultiplicity:
+    def test_loop_is_one_node(self):
+        action = _dry_run(_fanout_wf(), {"items": list(range(1000)), "files": [], "passes": []})
+        loop = action.tree[1]
+        assert (loop.type, loop.multiplicity, loop.detail) == ("loop", 1000, "over variables.items")
+        assert [c.exec_key for c in loop.children] == [
+            "loop:each[i=*]/build", "loop:each[i=*]/check",
+        ]
+        # Rendered once, with the first item bound
+        assert loop.children[0].detail == "make 0"
+        assert len(list(_nodes(action.tree))) == 8
+
+    def test_weighted_counts_and_tokens(self):
+        action = _dry_run(
+            _fanout_wf(),
+            {"items": list(range(1000)), "files": ["a.py", "b.py", "c.py"], "passes": [1, 2]},
+        )
+        summary = action.summary
+        assert summary.symbolic is True
+        assert summary.steps_by_type == {"shell": 1 + 1000 + 3 * 2, "llm": 1000 + 3}
+        assert summary.step_count == 2010
+        assert summary.prompt_tokens == (
+            1000 * estimate_tokens(len("Check 0 carefully")) + 3 * estimate_tokens(len("Review a.py"))
+        )
+        assert summary.unresolved == []
+        fan = action.tree[2]
+        assert (fan.type, fan.multiplicity) == ("parallel_each", 3)
+        assert fan.children[1].children[0].exec_key == "par:fan[i=*]/loop:passes[i=*]/lint"
+
+    def test_matches_full_dry_run_counts(self):
+        variables = {"items": ["x", "y"], "files": ["a", "b", "c"], "passes": [1, 2]}
+        full = _dry_run(_fanout_wf(), variables, symbolic=False)
+        symbolic = _dry_run(_fanout_wf(), variables)
+        assert symbolic.summary.steps_by_type == full.summary.steps_by_type
+        assert symbolic.summary.step_count == full.summary.step_count
+        assert full.summary.symbolic is None
+
+    def test_time_independent_of_data_size(self):
+        items = list(range(100_000))
+        t0 = time.perf_counter()
+        action = _dry_run(_fanout_wf(), {"items": items, "files": items, "passes": items})
+        assert time.perf_counter() - t0 < 2.0
+        assert action.summary.steps_by_type["shell"] == 1 + 100_000 + 100_000 ** 2
+
+    def test_unresolved_items_counted_once(self):
+        wf = WorkflowDef(
+            name="later", description="",
+            blocks=[
+                ShellStep(name="detect", command="ls"),
+                LoopBlock(
+                    name="each", loop_over="results.detect.structured_output.files",
+                    loop_var="f", blocks=[LLMStep(name="fix", prompt_text="Fix {{variables.f}}")],
+                ),
+            ],
+        )
+        action = _dry_run(wf)
+        assert action.tree[1].multiplicity == 1
+        assert action.summary.unresolved == ["each"]
+        assert action.summary.steps_by_type == {"shell": 1, "llm": 1}
+
+
+class TestConditions:
+    def test_condition_summaries(self):
+        def has_tests(ctx):
+            return True
+
+        wf = WorkflowDef(
+            name="conds", description="",
+            blocks=[
+                ShellStep(name="a", command="x", condition=compile_expression('variables.mode == "full"')),
+                ShellStep(name="b", command="y", condition=has_tests),
+                ShellStep(name="c", command="z", condition=lambda ctx: True),
+                ShellStep(name="d", command="w"),
+            ],
+        )
+        action = _dry_run(wf)
+        assert [n.condition for n in action.tree] == [
+            'variables.mode == "full"', "has_tests()", "(python)", None,
+        ]
+        # Upper bound: every conditional step counted
+        assert action.summary.steps_by_type == {"shell": 4}
+
+    def test_conditional_counts_largest_branch(self):
+        wf = WorkflowDef(
+            name="branches", description="",
+            blocks=[
+                ConditionalBlock(
+                    name="pick",
+                    branches=[
+                        Branch(
+                            condition=compile_expression('variables.mode == "fast"'),
+                            blocks=[ShellStep(name="quick", command="q")],
+                        ),
+                        Branch(
+                            condition=lambda ctx: True,
+                            blocks=[
+                                ShellStep(name="slow1", command="s"),
+                                ShellStep(name="slow2", command="s"),
+                            ],
+                        ),
+                    ],
+                    default=[LLMStep(name="ask", prompt_text="Which mode?")],
+                ),
+            ],
+        )
+        [cond] = _dry_run(wf).tree
+        assert cond.type == "conditional"
+        assert [(b.name, b.condition) for b in cond.children] == [
+            ("branch 0", 'variables.mode == "fast"'), ("branch 1", "(python)"), ("default", None),
+        ]
+        summary = _dry_run(wf).summary
+        assert summary.steps_by_type == {"shell": 2, "llm": 1}
+
+    def test_retry_counts_all_attempts(self):
+        wf = WorkflowDef(
+            name="retry", description="",
+            blocks=[
+                RetryBlock(
+                    name="fix", max_attempts=4,
+                    until=compile_expression('results.test.status == "success"'),
+                    blocks=[ShellStep(name="test", command="pytest")],
+                ),
+            ],
+        )
+        [retry] = _dry_run(wf).tree
+        assert (retry.multiplicity, retry.detail) == (4, 'until results.test.status == "success"')
+        assert retry.children[0].exec_key == "retry:fix[attempt=*]/test"
+        assert _dry_run(wf).summary.steps_by_type == {"shell": 4}
+
+
+class TestSubworkflows:
+    def test_expanded_with_inject(self):
+        child = WorkflowDef(
+            name="child", description="",
+            blocks=[PromptStep(name="ok", prompt_type="confirm", message="Ship {{variables.target}}?")],
+        )
+        parent = WorkflowDef(
+            name="parent", description="",
+            blocks=[
+                LoopBlock(
+                    name="each", loop_over="variables.targets", loop_var="t",
+                    blocks=[SubWorkflow(name="deploy", workflow="child", inject={"target": "{{variables.t}}"})],
+                ),
+            ],
+        )
+        action = _dry_run(
+            parent, {"targets": ["eu", "us"]}, registry={"parent": parent, "child": child},
+        )
+        [sub] = action.tree[0].children
+        assert (sub.type, sub.detail) == ("subworkflow", "child")
+        [prompt] = sub.children
+        assert prompt.exec_key == "loop:each[i=*]/sub:deploy/ok"
+        assert prompt.detail == "Ship eu?"
+        assert action.summary.steps_by_type == {"prompt": 2}
+
+    def test_recursion_and_missing_workflow(self):
+        wf = WorkflowDef(
+            name="self", description="",
+            blocks=[
+                GroupBlock(name="g", blocks=[SubWorkflow(name="again", workflow="self")]),
+                SubWorkflow(name="gone", workflow="missing"),
+            ],
+        )
+        action = _dry_run(wf)
+        assert action.tree[0].children[0].children == []
+        assert action.tree[1].children == []
+
+
+class TestStartTool:
+    @pytest.fixture(autouse=True)
+    def _clean_runs(self):
+        _runs.clear()
+        yield
+        _runs.clear()
+
+    def test_symbolic_start(self, tmp_path):
+        wf_dir = tmp_path / "big"
+        wf_dir.mkdir()
+        (wf_dir / "workflow.py").write_text("""
+WORKFLOW = WorkflowDef(
+    name="big",
+    description="",
+    blocks=[
+        LoopBlock(name="each", loop_over="variables.items", loop_var="item",
+                  blocks=[ShellStep(name="build", command="make {{variables.item}}")]),
+    ],
+)
+""")
+        call = {
+            "workflow": "big", "cwd": str(tmp_path), "workflow_dirs": [str(tmp_path)],
+            "variables": {"items": list(range(5000))}, "dry_run": True,
+        }
+        result = json.loads(_start(symbolic=True, **call))
+        assert result["action"] == "dry_run_complete"
+        [loop] = result["tree"]
+        assert loop["multiplicity"] == 5000
+        assert result["summary"]["steps_by_type"] == {"shell": 5000}
+        assert not (tmp_path / ".workflow-state").exists()
+
+        full = json.loads(_start(**call))
+        assert full["summary"]["steps_by_type"] == {"shell": 5000}
+        assert "multiplicity" not in full["tree"][0]
+        assert "symbolic" not in full["summary"]
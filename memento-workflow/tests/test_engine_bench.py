@@ -0,0 +1,96 @@
+"""Tests for the engine benchmark harness (benchmarks/engine_bench.py).
+
+Runs every scenario at the smallest scale in-process to keep the harness
+from rotting, and covers percentile math and regression gating.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.insert(0, str(PROJECT_DIR))
+
+from benchmarks.engine_bench import (  # noqa: E402
+    SCENARIOS,
+    _percentile,
+    compare,
+    main,
+    run_scenario,
+)
+
+
+def _doc(**results):
+    return {"version": 1, "results": results}
+
+
+def _metrics(size=10, ops=100.0, p50=1.0, p99=2.0, rss=1000):
+    return {
+        "size": size, "ops_per_sec": ops, "p50_ms": p50,
+        "p99_ms": p99, "peak_rss_kb": rss,
+    }
+
+
+class TestScenarios:
+    @pytest.mark.parametrize("name", sorted(SCENARIOS))
+    def test_small_scale_runs(self, name):
+        result = run_scenario(name, scale="small", warmup=0)
+        assert result["iterations"] > 0
+        assert result["ops_per_sec"] > 0
+        assert result["p50_ms"] <= result["p99_ms"]
+        assert result["peak_rss_kb"] > 0
+
+
+class TestPercentile:
+    def test_nearest_rank(self):
+        values = [float(i) for i in range(1, 101)]
+        assert _percentile(values, 50) == 50.0
+        assert _percentile(values, 99) == 99.0
+
+    def test_empty_and_single(self):
+        assert _percentile([], 50) == 0.0
+        assert _percentile([3.0], 99) == 3.0
+
+
+class TestCompare:
+    def test_within_threshold(self):
+        base = _doc(a=_metrics())
+        cur = _doc(a=_metrics(ops=90.0, p50=1.1, p99=2.2, rss=1100))
+        assert compare(cur, base, threshold=0.25) == []
+
+    def test_throughput_drop_and_latency_rise(self):
+        base = _doc(a=_metrics())
+        cur = _doc(a=_metrics(ops=50.0, p99=4.0))
+        regressions = compare(cur, base, threshold=0.25)
+        assert any("a.ops_per_sec" in r for r in regressions)
+        assert any("a.p99_ms" in r for r in regressions)
+        assert not any("a.p50_ms" in r for r in regressions)
+
+    def test_rss_uses_own_threshold(self):
+        base = _doc(a=_metrics(rss=1000))
+        cur = _doc(a=_metrics(rss=1400))
+        assert compare(cur, base, rss_threshold=0.5) == []
+        assert compare(cur, base, rss_threshold=0.25) != []
+
+    def test_size_mismatch_and_missing_skipped(self):
+        base = _doc(a=_metrics(size=10))
+        cur = _doc(a=_metrics(size=20, ops=1.0), b=_metrics(ops=1.0))
+        assert compare(cur, base) == []
+
+
+class TestMain:
+    def test_save_then_gate(self, tmp_path, capsys):
+        baseline = tmp_path / "baseline.json"
+        args = ["--scale", "small", "--only", "get_var", "--no-isolate"]
+        assert main([*args, "--save", str(baseline)]) == 0
+        doc = json.loads(baseline.read_text())
+        assert set(doc["results"]) == {"get_var"}
+
+        # Make the baseline impossibly fast so the gate trips
+        doc["results"]["get_var"]["ops_per_sec"] *= 1000
+        baseline.write_text(json.dumps(doc))
+        assert main([*args, "--baseline", str(baseline)]) == 1
+        assert "Regressions" in capsys.readouterr().out
@@ -0,0 +1,144 @@
+"""Tests for forking a run from a recorded step (checkpoint_fork / fork tool).
+
+Covers reusing results and artifacts recorded before the fork point,
+re-executing from it with overridden variables and a changed workflow,
+lineage in meta.json and the dashboard, and rejected fork points.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from conftest import _state_ns, create_runner_ns
+
+WORKFLOW_ROOT = Path(__file__).resolve().parent.parent
+if str(WORKFLOW_ROOT) not in sys.path:
+    sys.path.insert(0, str(WORKFLOW_ROOT))
+
+from dashboard.data import get_run_detail  # noqa: E402
+
+_runner_ns = create_runner_ns()
+_fork = _runner_ns["fork"]
+_start = _runner_ns["start"]
+_submit = _runner_ns["submit"]
+_runs = _runner_ns["_runs"]
+
+checkpoint_fork = _state_ns["checkpoint_fork"]
+
+_WORKFLOW = """
+WORKFLOW = WorkflowDef(
+    name="forky",
+    description="Fork test",
+    blocks=[
+        ShellStep(name="setup", command="echo setup >> runs.log"),
+        LoopBlock(
+            name="each", loop_over="variables.items", loop_var="item",
+            blocks=[ShellStep(name="build", command="echo build-{{variables.item}} >> runs.log")],
+        ),
+        LLMStep(name="review", prompt_text="%s {{variables.mode}}"),
+    ],
+)
+"""
+
+
+@pytest.fixture(autouse=True)
+def _clean_runs():
+    _runs.clear()
+    yield
+    _runs.clear()
+
+
+@pytest.fixture
+def project(tmp_path):
+    wf_dir = tmp_path / "forky"
+    wf_dir.mkdir()
+    (wf_dir / "workflow.py").write_text(_WORKFLOW % "Review in mode")
+    return tmp_path
+
+
+def _call(tool, project, **kwargs):
+    return json.loads(tool(cwd=str(project), workflow_dirs=[str(project)], **kwargs))
+
+
+def _complete_run(project):
+    action = _call(_start, project, workflow="forky", variables={"items": ["a", "b"], "mode": "fast"})
+    assert action["exec_key"] == "review"
+    done = json.loads(_submit(run_id=action["run_id"], exec_key="review", output="LGTM"))
+    assert done["action"] == "completed"
+    return action["run_id"]
+
+
+def _log(project):
+    return (project / "runs.log").read_text().split()
+
+
+def _run_dir(project, run_id):
+    return project / ".workflow-state" / run_id
+
+
+class TestFork:
+    def test_reuses_earlier_steps(self, project):
+        source = _complete_run(project)
+        assert _log(project) == ["setup", "build-a", "build-b"]
+
+        action = _call(_fork, project, run_id=source, exec_key="review", variables={"mode": "strict"})
+        assert action["action"] == "prompt"
+        assert action["exec_key"] == "review"
+        assert action["run_id"] != source
+        assert "mode strict" in Path(action["prompt_file"]).read_text()
+        assert _log(project) == ["setup", "build-a", "build-b"]
+
+        done = json.loads(_submit(run_id=action["run_id"], exec_key="review", output="Nits"))
+        assert done["action"] == "completed"
+        meta = json.loads((_run_dir(project, action["run_id"]) / "meta.json").read_text())
+        assert meta["status"] == "completed"
+        assert meta["parent_run"] == {"run_id": source, "exec_key": "review"}
+
+        # Artifacts of reused steps are links to the source run's files
+        src = _run_dir(project, source) / "artifacts" / "setup" / "command.txt"
+        dst = _run_dir(project, action["run_id"]) / "artifacts" / "setup" / "command.txt"
+        assert dst.read_text() == src.read_text()
+        assert dst.stat().st_ino == src.stat().st_ino
+
+    def test_reexecutes_from_fork_point(self, project):
+        source = _complete_run(project)
+        action = _call(_fork, project, run_id=source, exec_key="loop:each[i=1]/build")
+        assert action["exec_key"] == "review"
+        assert _log(project) == ["setup", "build-a", "build-b", "build-b"]
+        state = json.loads((_run_dir(project, action["run_id"]) / "state.json").read_text())
+        assert state["ctx"]["variables"]["run_id"] == action["run_id"]
+        assert state["parent_run"]["exec_key"] == "loop:each[i=1]/build"
+        # The source run is untouched
+        assert json.loads((_run_dir(project, source) / "meta.json").read_text())["status"] == "completed"
+
+    def test_changed_workflow(self, project):
+        source = _complete_run(project)
+        (project / "forky" / "workflow.py").write_text(_WORKFLOW % "Review again in mode")
+        action = _call(_fork, project, run_id=source, exec_key="review")
+        assert "Review again in mode fast" in Path(action["prompt_file"]).read_text()
+        assert _log(project) == ["setup", "build-a", "build-b"]
+
+    def test_rejected_fork_points(self, project):
+        source = _complete_run(project)
+        result = _call(_fork, project, run_id=source, exec_key="nope")
+        assert result["action"] == "error"
+        assert "no recorded result" in result["message"]
+        result = _call(_fork, project, run_id="aaaaaaaaaaaa", exec_key="review")
+        assert result["action"] == "error"
+        child = checkpoint_fork(f"{source}>bbbbbbbbbbbb", "review", project, {}, None)
+        assert "root run" in child
+
+    def test_dashboard_lineage(self, project):
+        source = _complete_run(project)
+        fork_id = _call(_fork, project, run_id=source, exec_key="review")["run_id"]
+        state_dir = project / ".workflow-state"
+
+        detail = get_run_detail(state_dir, source)
+        assert [(f["run_id"], f["exec_key"]) for f in detail["forks"]] == [(fork_id, "review")]
+        fork_detail = get_run_detail(state_dir, fork_id)
+        assert fork_detail["meta"]["parent_run"] == {"run_id": source, "exec_key": "review"}
+        assert [s["exec_key"] for s in fork_detail["steps"]] == [
+            "setup", "loop:each[i=0]/build", "loop:each[i=1]/build",
+        ]
@@ -0,0 +1,182 @@
+"""Tests for longest-first lane ordering (ParallelEachBlock.order).
+
+Covers cost ranking from a dotpath, a callable and lane history, lanes
+dispatched longest-first while keeping their item indexes and output
+order, batches grouped longest-first (and the ranking kept for resume)
+with outputs and reduces still in item order,
+and the lane history store (infra/lane_history.py).
+"""
+
+import json
+
+from conftest import _state_ns, _types_ns, create_runner_ns
+
+# Types
+Frame = _state_ns["Frame"]
+LoopBlock = _types_ns["LoopBlock"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+RunState = _state_ns["RunState"]
+ShellStep = _types_ns["ShellStep"]
+WorkflowContext = _types_ns["WorkflowContext"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+advance = _state_ns["advance"]
+_dispatch_order = _state_ns["_dispatch_order"]
+history_path = _state_ns["history_path"]
+item_key = _state_ns["item_key"]
+load_lane_costs = _state_ns["load_lane_costs"]
+record_lane_durations = _state_ns["record_lane_durations"]
+
+_ns = create_runner_ns()
+WorkflowRunner = _ns["WorkflowRunner"]
+
+
+def _block(command="echo {{variables.item.name}}", **kwargs):
+    return ParallelEachBlock(
+        name="lanes", parallel_for="variables.items", order="longest_first",
+        template=[ShellStep(name="work", command=command)],
+        **kwargs,
+    )
+
+
+def _state(block, items, cwd=".", checkpoint_dir=None):
+    wf = WorkflowDef(name="fan", description="", blocks=[block])
+    return RunState(
+        run_id="run",
+        ctx=WorkflowContext(variables={"items": items}, cwd=str(cwd)),
+        stack=[Frame(block=wf)],
+        registry={wf.name: wf},
+        wf_hash="test-hash",
+        workflow_name=wf.name,
+        checkpoint_dir=checkpoint_dir,
+    )
+
+
+_ITEMS = [{"name": "a", "size": 1}, {"name": "b", "size": 9}, {"name": "c"}, {"name": "d", "size": 4}]
+
+
+class TestDispatchOrder:
+    def test_dotpath_cost_unknown_at_mean(self):
+        # known: 1, 9, 4 (mean 4.67) -> c ranks between b and d
+        state = _state(_block(cost="size"), _ITEMS)
+        assert _dispatch_order(state, _block(cost="size"), _ITEMS) == [1, 2, 3, 0]
+
+    def test_callable_cost(self):
+        block = _block(cost=lambda item: len(item["name"] * item.get("size", 0)))
+        assert _dispatch_order(_state(block, _ITEMS), block, _ITEMS) == [1, 3, 0, 2]
+
+    def test_no_costs_keeps_item_order(self):
+        block = _block(cost="missing")
+        assert _dispatch_order(_state(block, _ITEMS), block, _ITEMS) == [0, 1, 2, 3]
+
+    def test_history_cost(self, tmp_path):
+        record_lane_durations(tmp_path, "fan", "lanes", {item_key("x"): 0.1, item_key("y"): 2.0})
+        block = _block()
+        state = _state(block, ["x", "y", "z"], cwd=tmp_path, checkpoint_dir=tmp_path / "run")
+        assert _dispatch_order(state, block, ["x", "y", "z"]) == [1, 2, 0]
+
+
+class TestOrderedLanes:
+    def test_lanes_dispatched_longest_first(self):
+        state = _state(_block(cost="size"), _ITEMS)
+        action, children = advance(state)
+        assert [lane.exec_key for lane in action.lanes] == [
+            "lanes[i=1]", "lanes[i=2]", "lanes[i=3]", "lanes[i=0]",
+        ]
+        assert [c.lane_index for c in children] == [1, 2, 3, 0]
+        assert children[0].ctx.variables["item"]["name"] == "b"
+        assert children[0].ctx.variables["item_index"] == 1
+        # child_run_ids keep item order
+        assert state.child_run_ids[0] == children[3].run_id
+
+    def test_batches_grouped_longest_first(self):
+        state = _state(_block(cost="size", max_concurrency=2), _ITEMS)
+        action, children = advance(state)
+        assert [c.ctx.variables["item"]["name"] for c in children] == ["b", "c"]
+        assert state._ranked_batches["_par_lanes_chunk"]["order"] == [1, 2, 3, 0]
+
+    def test_outputs_keep_item_order(self, tmp_path):
+        wf = WorkflowDef(name="fan", description="", blocks=[_block(cost="size")])
+        runner = WorkflowRunner(
+            wf, variables={"items": _ITEMS}, cwd=str(tmp_path), registry={wf.name: wf},
+        )
+        assert runner.start().action == "completed"
+        merged = runner.root_state.ctx.results_scoped["lanes"].structured_output
+        assert merged == ["a", "b", "c", "d"]
+
+    def test_batched_outputs_and_reduce_keep_item_order(self, tmp_path):
+        block = _block(
+            "echo {{variables.item.name}}{{variables.item_index}}",
+            cost="size", max_concurrency=2, reduce="concat", result_var="names",
+        )
+        wf = WorkflowDef(name="fan", description="", blocks=[block])
+        runner = WorkflowRunner(
+            wf, variables={"items": _ITEMS}, cwd=str(tmp_path), registry={wf.name: wf},
+        )
+        assert runner.start().action == "completed"
+        # Batches ran [b, c] then [d, a]; lanes keep their item indexes
+        results = runner.root_state.ctx.results_scoped
+        assert results["par-batch:lanes[i=0]/lanes"].structured_output == ["b1", "c2"]
+        assert runner.root_state.ctx.variables["names"] == ["a0", "b1", "c2", "d3"]
+        # Only the permutation is kept; outputs are rebuilt from the lanes
+        assert runner.root_state._ranked_batches["_par_lanes_chunk"]["order"] == [1, 2, 3, 0]
+        assert set(runner.root_state._ranked_batches["_par_lanes_chunk"]) == {"exec_key", "order"}
+
+    def test_batched_outputs_use_current_entry_lanes(self, tmp_path):
+        block = _block(
+            "echo {{variables.round}}{{variables.item.name}}",
+            cost="size", max_concurrency=2, reduce="concat", result_var="names",
+        )
+        wf = WorkflowDef(
+            name="fan", description="",
+            blocks=[LoopBlock(name="rounds", loop_over="variables.rounds", loop_var="round",
+                              blocks=[block])],
+        )
+        runner = WorkflowRunner(
+            wf, variables={"items": _ITEMS, "rounds": ["x", "y"]}, cwd=str(tmp_path),
+            registry={wf.name: wf},
+        )
+        assert runner.start().action == "completed"
+        # The second round's lanes shadow the first round's for each item
+        assert runner.root_state.ctx.variables["names"] == ["ya", "yb", "yc", "yd"]
+
+    def test_history_recorded_per_item(self, tmp_path):
+        wf = WorkflowDef(
+            name="fan", description="",
+            blocks=[
+                ParallelEachBlock(
+                    name="lanes", parallel_for="variables.items", order="longest_first",
+                    template=[ShellStep(name="work", command="sleep {{variables.item}}")],
+                ),
+            ],
+        )
+        runner = WorkflowRunner(
+            wf, variables={"items": [0, 0.2]}, cwd=str(tmp_path), registry={wf.name: wf},
+        )
+        assert runner.start().action == "completed"
+        costs = load_lane_costs(tmp_path, "fan", "lanes")
+        assert costs[item_key(0.2)] > costs[item_key(0)]
+        assert costs[item_key(0.2)] >= 0.15
+
+
+class TestLaneHistory:
+    def test_smoothed_and_capped(self, tmp_path, monkeypatch):
+        record_lane_durations(tmp_path, "wf", "b", {"k": 4.0})
+        record_lane_durations(tmp_path, "wf", "b", {"k": 2.0})
+        assert load_lane_costs(tmp_path, "wf", "b") == {"k": 3.0}
+
+        monkeypatch.setitem(_state_ns, "MAX_ITEMS_PER_BLOCK", 2)
+        record_lane_durations(tmp_path, "wf", "b", {"x": 1.0, "y": 1.0})
+        assert set(load_lane_costs(tmp_path, "wf", "b")) == {"x", "y"}
+
+    def test_missing_or_corrupt_file(self, tmp_path):
+        assert load_lane_costs(tmp_path, "wf", "b") == {}
+        history_path(tmp_path).parent.mkdir(parents=True)
+        history_path(tmp_path).write_text("{not json")
+        assert load_lane_costs(tmp_path, "wf", "b") == {}
+
+    def test_long_items_hashed(self):
+        key = item_key({"text": "x" * 500})
+        assert len(key) == 32
+        assert key == item_key({"text": "x" * 500})
+        assert item_key({"b": 1, "a": 2}) == json.dumps({"a": 2, "b": 1})
@@ -0,0 +1,195 @@
+"""Tests for LLM lane rate limiting (infra/rate_limit.py).
+
+Covers the token bucket, per-model and per-run permits, lanes held with a
+``pending`` action until a submit frees capacity, ``wait()`` picking up a
+freed permit, cancellation, removal from the run store and lease expiry
+returning permits, and the status report.
+"""
+
+import threading
+import time
+
+import pytest
+
+from conftest import _state_ns, _types_ns, create_runner_ns
+
+LLMStep = _types_ns["LLMStep"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+_ns = create_runner_ns()
+WorkflowRunner = _ns["WorkflowRunner"]
+LLMRateLimiter = _ns["LLMRateLimiter"]
+TokenBucket = _ns["TokenBucket"]
+validate_limits = _ns["validate_limits"]
+
+
+class TestTokenBucket:
+    def test_refills_per_minute(self):
+        bucket = TokenBucket(600, now=0.0)
+        assert bucket.wait_for(600, 0.0) == 0.0
+        bucket.take(600)
+        # 10 tokens/s
+        assert bucket.wait_for(100, 0.0) == pytest.approx(10.0)
+        assert bucket.wait_for(100, 10.0) == 0.0
+
+    def test_oversized_request_waits_for_full_bucket(self):
+        bucket = TokenBucket(60, now=0.0)
+        assert bucket.wait_for(10_000, 0.0) == 0.0
+        bucket.take(10_000)
+        assert bucket.level == 0.0
+
+
+class TestLimiter:
+    def test_model_outstanding_cap(self):
+        limiter = LLMRateLimiter({"*": {"outstanding": 1}})
+        assert limiter.try_acquire("r1", "sonnet", 10) == (0.0, "")
+        wait, reason = limiter.try_acquire("r2", "sonnet", 10)
+        assert wait > 0
+        assert reason == "model sonnet: 1/1 prompts outstanding"
+        # Other models have their own pool
+        assert limiter.try_acquire("r2", "opus", 10) == (0.0, "")
+        limiter.release("r1", "sonnet")
+        assert limiter.try_acquire("r2", "sonnet", 10) == (0.0, "")
+
+    def test_run_tpm(self):
+        limiter = LLMRateLimiter({})
+        assert limiter.try_acquire("r", "m", 90, {"tpm": 100})[0] == 0.0
+        wait, reason = limiter.try_acquire("r", "m", 50, {"tpm": 100})
+        assert wait > 0
+        assert reason.startswith("run: ~50 tokens over 100 tpm")
+        # Other runs are not limited
+        assert limiter.try_acquire("other", "m", 50)[0] == 0.0
+
+    def test_release_run_and_stats(self):
+        limiter = LLMRateLimiter({"m": {"outstanding": 4, "tpm": 1000}})
+        for _ in range(2):
+            limiter.try_acquire("r", "m", 100, {"outstanding": 2})
+        stats = limiter.stats("r")
+        assert stats["models"]["m"]["outstanding"] == 2
+        assert stats["models"]["m"]["tokens_available"] == 800
+        assert stats["run"]["utilization"] == 1.0
+        limiter.release_run("r")
+        assert limiter.stats("r")["run"]["outstanding"] == 0
+        # Releasing more than is held is a no-op
+        limiter.release("r", "m")
+        assert limiter.stats()["models"]["m"]["outstanding"] == 0
+
+    def test_lease_expires(self):
+        limiter = LLMRateLimiter({"m": {"outstanding": 1}}, lease_seconds=0.05)
+        assert limiter.try_acquire("r", "m", 10, owner="a") == (0.0, "")
+        assert limiter.try_acquire("r", "m", 10, owner="b")[0] > 0
+        time.sleep(0.1)
+        assert limiter.try_acquire("r", "m", 10, owner="b") == (0.0, "")
+        # A late release of the expired permit leaves the new one alone
+        limiter.release("r", "m", owner="a")
+        assert limiter.stats()["models"]["m"]["outstanding"] == 1
+        limiter.release("r", "m", owner="b")
+        assert limiter.stats()["models"]["m"]["outstanding"] == 0
+
+    def test_validate(self):
+        assert validate_limits({"outstanding": 2, "tpm": 0}) == {"outstanding": 2}
+        with pytest.raises(ValueError, match="Unknown LLM limit"):
+            validate_limits({"rpm": 1})
+        with pytest.raises(ValueError, match="non-negative"):
+            validate_limits({"tpm": -1})
+
+
+def _runner(tmp_path, **kwargs):
+    wf = WorkflowDef(
+        name="fan", description="",
+        blocks=[
+            ParallelEachBlock(
+                name="lanes", parallel_for="variables.items",
+                template=[LLMStep(name="ask", prompt_text="Review {{variables.item}}", model="m")],
+            ),
+        ],
+    )
+    return WorkflowRunner(
+        wf, variables={"items": ["a", "b", "c"]}, cwd=str(tmp_path),
+        registry={wf.name: wf}, **kwargs,
+    )
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = LLMRateLimiter({})
+    monkeypatch.setitem(_ns, "LLM_LIMITER", limiter)
+    return limiter
+
+
+class TestHeldLanes:
+    def test_lanes_held_until_submit(self, tmp_path, limiter):
+        runner = _runner(tmp_path, llm_limits={"outstanding": 2})
+        parallel = runner.start()
+        assert parallel.action == "parallel"
+        lanes = [lane.child_run_id for lane in parallel.lanes]
+
+        first, second, third = (runner.next(lane) for lane in lanes)
+        assert (first.action, second.action) == ("prompt", "prompt")
+        assert third.action == "pending"
+        assert third.exec_key == second.exec_key.replace("i=1", "i=2")
+        assert "run: 2/2 prompts outstanding" in third.reason
+        # Re-fetching a granted prompt does not take another permit
+        assert runner.next(lanes[0]).action == "prompt"
+
+        status = runner.get_status()
+        assert status["llm_limits"]["run"]["outstanding"] == 2
+        assert status["llm_limits"]["run"]["utilization"] == 1.0
+        assert status["llm_limits"]["held_lanes"] == 1
+        assert "llm_held" in status["children"][lanes[2]]
+
+        assert runner.submit(lanes[0], first.exec_key, output="ok").action == "completed"
+        assert runner.next(lanes[2]).action == "prompt"
+        assert runner.get_status()["llm_limits"]["held_lanes"] == 0
+
+    def test_model_limit_from_limiter(self, tmp_path, limiter):
+        limiter.configure({"m": {"outstanding": 1}})
+        runner = _runner(tmp_path)
+        lanes = [lane.child_run_id for lane in runner.start().lanes]
+        assert runner.next(lanes[0]).action == "prompt"
+        held = runner.next(lanes[1])
+        assert held.action == "pending"
+        assert held.reason == "model m: 1/1 prompts outstanding"
+
+    def test_wait_picks_up_freed_permit(self, tmp_path, limiter):
+        runner = _runner(tmp_path, llm_limits={"outstanding": 1})
+        lanes = [lane.child_run_id for lane in runner.start().lanes]
+        first = runner.next(lanes[0])
+        assert runner.next(lanes[1]).action == "pending"
+
+        threading.Timer(
+            0.1, lambda: runner.submit(lanes[0], first.exec_key, output="ok"),
+        ).start()
+        t0 = time.monotonic()
+        action = runner.wait(lanes[1], timeout=5)
+        assert action.action == "prompt"
+        assert time.monotonic() - t0 < 2
+
+    def test_cancel_returns_permits(self, tmp_path, limiter):
+        limiter.configure({"m": {"outstanding": 1}})
+        runner = _runner(tmp_path)
+        lanes = [lane.child_run_id for lane in runner.start().lanes]
+        assert runner.next(lanes[0]).action == "prompt"
+        runner.cancel()
+        assert limiter.stats()["models"]["m"]["outstanding"] == 0
+
+    def test_removed_run_returns_permits(self, tmp_path, limiter, monkeypatch):
+        monkeypatch.setitem(_state_ns, "LLM_LIMITER", limiter)
+        limiter.configure({"m": {"outstanding": 2}})
+        store = _ns["RunCache"]()
+        runner = _runner(tmp_path, run_store=store)
+        lanes = [lane.child_run_id for lane in runner.start().lanes]
+        assert [runner.next(lane).action for lane in lanes[:2]] == ["prompt", "prompt"]
+        # The relay abandons the run; the store drops it without a submit
+        del store[runner.root_state.run_id]
+        assert limiter.stats()["models"]["m"]["outstanding"] == 0
+
+    def test_unlimited_by_default(self, tmp_path, limiter):
+        runner = _runner(tmp_path)
+        lanes = [lane.child_run_id for lane in runner.start().lanes]
+        assert [runner.next(lane).action for lane in lanes] == ["prompt"] * 3
+
+    def test_bad_run_limits_rejected(self, tmp_path):
+        with pytest.raises(ValueError, match="Unknown LLM limit"):
+            _runner(tmp_path, llm_limits={"rps": 1})
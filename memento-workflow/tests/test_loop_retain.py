@@ -0,0 +1,154 @@
+"""Tests for windowed loop results (LoopBlock.retain).
+
+Covers dropping finished iterations outside a ``last:N`` / ``aggregate``
+window, their counters in ``ctx.retired`` and in totals and timing, the
+``retired.json`` artifacts, nested loops folding into the outer record,
+and resuming a run after retired iterations.
+"""
+
+import json
+
+from conftest import _state_ns, _types_ns
+
+Frame = _state_ns["Frame"]
+LoopBlock = _types_ns["LoopBlock"]
+RunState = _state_ns["RunState"]
+ShellStep = _types_ns["ShellStep"]
+WorkflowContext = _types_ns["WorkflowContext"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+advance = _state_ns["advance"]
+apply_submit = _state_ns["apply_submit"]
+checkpoint_load = _state_ns["checkpoint_load"]
+checkpoint_save = _state_ns["checkpoint_save"]
+compute_timing = _state_ns["compute_timing"]
+compute_totals = _state_ns["compute_totals"]
+
+
+def _state(blocks, items, tmp_path):
+    wf = WorkflowDef(name="long", description="", blocks=blocks)
+    return RunState(
+        run_id="run",
+        ctx=WorkflowContext(variables={"items": items}, cwd=str(tmp_path)),
+        stack=[Frame(block=wf)],
+        registry={wf.name: wf},
+        wf_hash="",
+        workflow_name=wf.name,
+        checkpoint_dir=tmp_path / ".workflow-state" / "run",
+    ), wf
+
+
+def _loop(retain, blocks=None):
+    return LoopBlock(
+        name="each", loop_over="variables.items", loop_var="item", retain=retain,
+        blocks=blocks or [ShellStep(name="work", command="echo {{variables.item}}", result_var="last")],
+    )
+
+
+def _drive(state, action, stop_after=None, sizes=None):
+    """Submit shell actions (output = the item) until the run stops."""
+    done = 0
+    while action.action == "shell" and done != stop_after:
+        item = state.ctx.variables["item"]
+        action, _ = apply_submit(
+            state, action.exec_key, output=json.dumps(item), duration=1.0,
+            timing={"shell": 1.0},
+        )
+        done += 1
+        if sizes is not None:
+            sizes.append(len(state.ctx.results_scoped))
+    return action
+
+
+class TestRetain:
+    def test_last_n_keeps_window(self, tmp_path):
+        state, _ = _state([_loop("last:2")], list(range(6)), tmp_path)
+        action = _drive(state, advance(state)[0])
+        assert action.action == "completed"
+        assert sorted(state.ctx.results_scoped) == [
+            "loop:each[i=4]/work", "loop:each[i=5]/work",
+        ]
+        record = state.ctx.retired["loop:each"]
+        assert record["iterations"] == 4
+        assert record["step_count"] == 4
+        assert record["statuses"] == {"success": 4}
+        # Totals and timing count every iteration
+        assert action.totals["step_count"] == 6
+        assert action.totals["duration"] == 6.0
+        assert action.totals["retired_iterations"] == 4
+        timing = compute_timing(state.ctx.results_scoped, None, state.ctx.retired)
+        assert timing["blocks"]["work"]["count"] == 6
+        assert timing["run"]["shell"] == 6.0
+        # The convenience view still has the last result
+        assert state.ctx.results["work"].output == "5"
+
+    def test_aggregate_constant_memory(self, tmp_path):
+        sizes = []
+        state, _ = _state([_loop("aggregate")], list(range(50)), tmp_path)
+        action = _drive(state, advance(state)[0], sizes=sizes)
+        assert action.action == "completed"
+        # Each iteration is dropped as soon as it finishes
+        assert set(sizes) == {0}
+        assert state.ctx.results_scoped == {}
+        assert state.ctx.retired["loop:each"]["iterations"] == 50
+        assert compute_totals(state.ctx.results_scoped, state.ctx.retired)["step_count"] == 50
+
+    def test_dropped_results_in_artifacts(self, tmp_path):
+        state, _ = _state([_loop("last:1")], ["a", "b", "c"], tmp_path)
+        _drive(state, advance(state)[0])
+        retired = state.artifacts_dir / "loop-each" / "i-1" / "retired.json"
+        [dump] = json.loads(retired.read_text())
+        assert dump["exec_key"] == "loop:each[i=1]/work"
+        assert dump["output"] == '"b"'
+        assert not (state.artifacts_dir / "loop-each" / "i-2" / "retired.json").exists()
+
+    def test_all_keeps_everything(self, tmp_path):
+        state, _ = _state([_loop("all")], list(range(4)), tmp_path)
+        _drive(state, advance(state)[0])
+        assert len(state.ctx.results_scoped) == 4
+        assert state.ctx.retired == {}
+
+    def test_nested_loops_fold_into_outer(self, tmp_path):
+        inner = LoopBlock(
+            name="inner", loop_over="variables.item", loop_var="sub", retain="last:1",
+            blocks=[ShellStep(name="work", command="echo {{variables.sub}}")],
+        )
+        state, _ = _state([_loop("aggregate", [inner])], [[1, 2], [3, 4, 5]], tmp_path)
+        action = _drive(state, advance(state)[0])
+        assert action.action == "completed"
+        assert list(state.ctx.retired) == ["loop:each"]
+        assert state.ctx.retired["loop:each"]["step_count"] == 5
+        assert action.totals["step_count"] == 5
+
+
+class TestResume:
+    def test_resume_starts_after_retired(self, tmp_path):
+        state, wf = _state(
+            [_loop("aggregate"), ShellStep(name="after", command="echo {{variables.last}}")],
+            list(range(5)), tmp_path,
+        )
+        action = _drive(state, advance(state)[0], stop_after=3)
+        assert action.exec_key == "loop:each[i=3]/work"
+        assert checkpoint_save(state)
+
+        loaded = checkpoint_load("run", tmp_path, {wf.name: wf}, wf)
+        action, _ = advance(loaded)
+        assert action.exec_key == "loop:each[i=3]/work"
+        assert loaded.ctx.variables["item"] == 3
+        # result_var and the results view survive the dropped iterations
+        assert loaded.ctx.variables["last"] == 2
+        assert loaded.ctx.results["work"].output == "2"
+
+        action = _drive(loaded, action, stop_after=2)
+        assert action.action == "shell"
+        assert action.exec_key == "after"
+        assert action.command == "echo 4"
+
+    def test_checkpoint_size_constant(self, tmp_path):
+        state, _ = _state([_loop("last:2")], list(range(200)), tmp_path)
+        action = _drive(state, advance(state)[0], stop_after=20)
+        checkpoint_save(state)
+        early = state._checkpoint_bytes
+        _drive(state, action, stop_after=150)
+        checkpoint_save(state)
+        assert state._checkpoint_bytes <= early + 64
@@ -0,0 +1,206 @@
+"""Tests for the in-process metrics registry (infra/metrics.py).
+
+Covers counter/gauge/histogram bookkeeping, Prometheus text rendering,
+bounded label cardinality, throttled snapshot export, and the engine hot
+spots (checkpoint, shell, parallel fan-out, relay wait, eviction) plus the
+``metrics`` MCP tool.
+"""
+
+import json
+
+import pytest
+
+from conftest import _state_ns, _types_ns, create_runner_ns
+
+# Types
+ShellStep = _types_ns["ShellStep"]
+LLMStep = _types_ns["LLMStep"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+WorkflowDef = _types_ns["WorkflowDef"]
+WorkflowContext = _types_ns["WorkflowContext"]
+
+# Metrics
+MetricsRegistry = _state_ns["MetricsRegistry"]
+METRICS = _state_ns["METRICS"]
+MAX_SERIES = _state_ns["MAX_SERIES"]
+METRICS_FILE = _state_ns["METRICS_FILE"]
+state_dir_of = _state_ns["state_dir_of"]
+CHECKPOINT_SECONDS = _state_ns["CHECKPOINT_SECONDS"]
+SHELL_SECONDS = _state_ns["SHELL_SECONDS"]
+PARALLEL_LANES = _state_ns["PARALLEL_LANES"]
+LANES_QUEUED = _state_ns["LANES_QUEUED"]
+RELAY_WAIT_SECONDS = _state_ns["RELAY_WAIT_SECONDS"]
+RUNS_EVICTED = _state_ns["RUNS_EVICTED"]
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    METRICS.reset()
+    yield
+    METRICS.reset()
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+
+class TestRegistry:
+    def test_counter_and_gauge_render(self):
+        reg = MetricsRegistry()
+        c = reg.counter("x_events", "Events", labels=("kind",))
+        c.inc(1, "a")
+        c.inc(2, "a")
+        g = reg.gauge("x_depth", "Depth")
+        g.set(5)
+        g.dec()
+        text = reg.render()
+        assert "# TYPE x_events counter" in text
+        assert 'x_events_total{kind="a"} 3' in text
+        assert "x_depth 4" in text
+
+    def test_gauge_callback(self):
+        reg = MetricsRegistry()
+        items = [1, 2, 3]
+        reg.gauge("x_items", "Items").set_function(lambda: len(items))
+        assert "x_items 3" in reg.render()
+        items.pop()
+        assert "x_items 2" in reg.render()
+
+    def test_histogram_cumulative_buckets(self):
+        reg = MetricsRegistry()
+        h = reg.histogram("x_seconds", "Latency", buckets=(0.1, 1.0))
+        for v in (0.05, 0.5, 0.5, 5.0):
+            h.observe(v)
+        text = reg.render()
+        assert 'x_seconds_bucket{le="0.1"} 1' in text
+        assert 'x_seconds_bucket{le="1"} 3' in text
+        assert 'x_seconds_bucket{le="+Inf"} 4' in text
+        assert "x_seconds_count 4" in text
+        assert "x_seconds_sum 6.05" in text
+
+    def test_cardinality_bounded(self):
+        reg = MetricsRegistry()
+        c = reg.counter("x_hits", "Hits", labels=("key",))
+        for i in range(MAX_SERIES + 10):
+            c.inc(1, f"k{i}")
+        samples = reg.snapshot()["x_hits"]["samples"]
+        assert len(samples) == MAX_SERIES + 1
+        assert c.value("overflow-anything") == 10
+
+    def test_label_arity_checked(self):
+        reg = MetricsRegistry()
+        c = reg.counter("x_hits", "Hits", labels=("key",))
+        with pytest.raises(ValueError):
+            c.inc(1)
+
+    def test_get_or_create_and_kind_conflict(self):
+        reg = MetricsRegistry()
+        assert reg.counter("x", "X") is reg.counter("x", "X")
+        with pytest.raises(ValueError):
+            reg.gauge("x", "X")
+
+    def test_label_values_escaped(self):
+        reg = MetricsRegistry()
+        reg.counter("x", "X", labels=("k",)).inc(1, 'a"b\n')
+        assert 'x_total{k="a\\"b\\n"} 1' in reg.render()
+
+
+class TestExport:
+    def test_state_dir_of(self, tmp_path):
+        sd = tmp_path / ".workflow-state"
+        assert state_dir_of(sd / "abc" / "children" / "def") == sd
+        assert state_dir_of(tmp_path / "elsewhere") is None
+        assert state_dir_of(None) is None
+
+    def test_maybe_export_throttled(self, tmp_path):
+        reg = MetricsRegistry()
+        g = reg.gauge("x", "X")
+        g.set(1)
+        assert reg.maybe_export(tmp_path, interval=60)
+        g.set(2)
+        assert not reg.maybe_export(tmp_path, interval=60)
+        assert "x 1" in (tmp_path / METRICS_FILE).read_text()
+        assert reg.maybe_export(tmp_path, interval=0)
+        assert "x 2" in (tmp_path / METRICS_FILE).read_text()
+
+    def test_export_never_raises(self, tmp_path):
+        assert not MetricsRegistry().export(tmp_path / "missing")
+
+
+# ---------------------------------------------------------------------------
+# Engine hot spots
+# ---------------------------------------------------------------------------
+
+
+def _drive(runner, action):
+    while action.action not in ("completed", "error", "halted"):
+        if action.action == "parallel":
+            for lane in action.lanes:
+                lane_action = runner.next(lane.child_run_id)
+                while lane_action.action != "completed":
+                    lane_action = runner.submit(
+                        lane_action.run_id, lane_action.exec_key, output="ok",
+                    )
+            action = runner.submit(action.run_id, action.exec_key, output="lanes")
+        else:
+            action = runner.submit(action.run_id, action.exec_key, output="ok")
+    return action
+
+
+class TestEngineMetrics:
+    def test_run_updates_hot_spots(self, tmp_path):
+        ns = create_runner_ns()
+        wf = WorkflowDef(
+            name="metered",
+            description="",
+            blocks=[
+                ShellStep(name="setup", command="echo hi"),
+                LLMStep(name="ask", prompt_text="Hello"),
+                ParallelEachBlock(
+                    name="fan",
+                    parallel_for="variables.items",
+                    template=[LLMStep(name="review", prompt_text="Review")],
+                ),
+            ],
+        )
+        runner = ns["WorkflowRunner"](
+            wf, variables={"items": ["a", "b", "c"]}, cwd=str(tmp_path),
+            registry={wf.name: wf},
+        )
+        assert _drive(runner, runner.start()).action == "completed"
+
+        assert SHELL_SECONDS.count("success") == 1
+        assert CHECKPOINT_SECONDS.count() > 0
+        assert PARALLEL_LANES.value() == 3
+        assert LANES_QUEUED.value() == 0
+        assert RELAY_WAIT_SECONDS.count("prompt") >= 4
+        assert RELAY_WAIT_SECONDS.count("parallel") == 1
+
+        exported = (tmp_path / ".workflow-state" / METRICS_FILE).read_text()
+        assert "# TYPE memento_checkpoint_write_seconds histogram" in exported
+
+    def test_shell_outcome_labels(self, tmp_path):
+        _execute_shell = create_runner_ns()["_execute_shell"]
+        _execute_shell("exit 3", cwd=str(tmp_path))
+        _execute_shell("sleep 5", cwd=str(tmp_path), timeout=1)
+        assert SHELL_SECONDS.count("failure") == 1
+        assert SHELL_SECONDS.count("timeout") == 1
+
+
+class TestMcpMetrics:
+    def test_metrics_tool_and_eviction(self):
+        ns = create_runner_ns()
+        RunState, Frame = ns["RunState"], ns["Frame"]
+        wf = WorkflowDef(name="t", description="")
+        ns["_runs"]["aaa"] = RunState(
+            run_id="aaa", ctx=WorkflowContext(cwd="."), stack=[Frame(block=wf)],
+            registry={}, status="completed",
+        )
+        assert "memento_active_runs 1" in ns["metrics"]()
+
+        ns["_evict_terminal_runs"]()
+        assert RUNS_EVICTED.value() == 1
+        snap = json.loads(ns["metrics"](as_json=True))
+        assert snap["memento_active_runs"]["samples"][0]["value"] == 0
+        assert snap["memento_runs_evicted"]["type"] == "counter"
@@ -0,0 +1,145 @@
+"""Tests for the project-wide object store (infra/objects.py).
+
+Covers hardlinking identical large files across runs, the size floor,
+rewrites not leaking into other references, garbage collection of
+unreferenced objects in ``cleanup``, disk usage reporting, and context
+files of parallel lanes sharing one object.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+if str(SCRIPTS_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR.parent))
+
+from scripts.infra import objects  # noqa: E402
+from scripts.infra.cleanup import cleanup  # noqa: E402
+from scripts.infra.objects import disk_usage, gc_objects, write_file  # noqa: E402
+
+from conftest import _types_ns, create_runner_ns  # noqa: E402
+
+LLMStep = _types_ns["LLMStep"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+_BIG = b"x" * 10_000
+
+
+@pytest.fixture
+def state_dir(tmp_path):
+    return tmp_path / ".workflow-state"
+
+
+def _run_file(state_dir, run_id, name="output.txt"):
+    path = state_dir / run_id / "artifacts" / "step" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    (state_dir / run_id / "meta.json").write_text(json.dumps({"status": "completed"}))
+    return path
+
+
+def _objects(state_dir):
+    return [p for p in (state_dir / ".objects").rglob("*") if p.is_file()]
+
+
+class TestWriteFile:
+    def test_identical_files_share_one_object(self, state_dir):
+        a, b = _run_file(state_dir, "aaa"), _run_file(state_dir, "bbb")
+        write_file(a, _BIG)
+        write_file(b, _BIG)
+        [obj] = _objects(state_dir)
+        assert a.read_bytes() == b.read_bytes() == _BIG
+        assert a.stat().st_ino == b.stat().st_ino == obj.stat().st_ino
+        assert obj.stat().st_nlink == 3
+        assert obj.name == objects.hashlib.sha256(_BIG).hexdigest()
+
+    def test_small_files_and_outside_state_dir_are_plain(self, state_dir, tmp_path):
+        small = _run_file(state_dir, "aaa")
+        write_file(small, b"tiny")
+        outside = tmp_path / "elsewhere.txt"
+        write_file(outside, _BIG)
+        assert small.stat().st_nlink == 1
+        assert outside.stat().st_nlink == 1
+        assert _objects(state_dir) == []
+
+    def test_floor_zero_disables(self, state_dir, monkeypatch):
+        monkeypatch.setattr(objects, "DEDUPE_MIN_BYTES", 0)
+        path = _run_file(state_dir, "aaa")
+        write_file(path, _BIG)
+        assert path.stat().st_nlink == 1
+
+    def test_rewrite_does_not_touch_other_references(self, state_dir):
+        a, b = _run_file(state_dir, "aaa"), _run_file(state_dir, "bbb")
+        write_file(a, _BIG)
+        write_file(b, _BIG)
+        write_file(a, b"y" * 10_000)
+        assert b.read_bytes() == _BIG
+        assert len(_objects(state_dir)) == 2
+
+
+class TestGc:
+    def test_unreferenced_objects_removed(self, state_dir):
+        a, b = _run_file(state_dir, "aaa"), _run_file(state_dir, "bbb")
+        write_file(a, _BIG)
+        write_file(b, _BIG)
+        a.unlink()
+        assert gc_objects(state_dir) == {"objects_removed": 0, "objects_freed_bytes": 0}
+        b.unlink()
+        assert gc_objects(state_dir, dry_run=True)["objects_removed"] == 1
+        assert len(_objects(state_dir)) == 1
+        assert gc_objects(state_dir) == {"objects_removed": 1, "objects_freed_bytes": 10_000}
+        assert _objects(state_dir) == []
+
+    def test_disk_usage_counts_shared_once(self, state_dir):
+        for run_id in ("aaa", "bbb", "ccc"):
+            write_file(_run_file(state_dir, run_id), _BIG)
+        usage = disk_usage(state_dir)
+        assert usage["objects"] == 1
+        assert usage["object_refs"] == 3
+        assert usage["apparent_bytes"] - usage["stored_bytes"] == 2 * 10_000
+
+    def test_cleanup_collects_objects_of_removed_runs(self, state_dir, tmp_path):
+        write_file(_run_file(state_dir, "aaa"), _BIG)
+        write_file(_run_file(state_dir, "bbb"), _BIG)
+        write_file(_run_file(state_dir, "bbb", "other.txt"), b"z" * 10_000)
+
+        preview = cleanup(str(tmp_path), remove_all=True, dry_run=True)
+        assert preview["objects_removed"] == 2
+        assert "usage_after" not in preview
+
+        result = cleanup(str(tmp_path), remove_all=True)
+        assert result["objects_removed"] == 2
+        assert result["objects_freed_bytes"] == 20_000
+        assert result["usage_before"]["objects"] == 2
+        assert result["usage_after"]["stored_bytes"] == 0
+        assert _objects(state_dir) == []
+
+
+class TestLanes:
+    def test_lane_context_files_share_one_object(self, tmp_path):
+        ns = create_runner_ns()
+        wf = WorkflowDef(
+            name="fan", description="",
+            blocks=[
+                ParallelEachBlock(
+                    name="lanes", parallel_for="variables.items",
+                    template=[LLMStep(
+                        name="ask", prompt_text="Review {{variables.item}} against {{variables.spec}}",
+                    )],
+                ),
+            ],
+        )
+        runner = ns["WorkflowRunner"](
+            wf, variables={"items": ["a", "b", "c", "d"], "spec": "rule " * 4000},
+            cwd=str(tmp_path), registry={wf.name: wf},
+        )
+        parallel = runner.start()
+        prompts = [runner.next(lane.child_run_id) for lane in parallel.lanes]
+        files = [Path(p.context_files[0]) for p in prompts]
+        assert len({f.stat().st_ino for f in files}) == 1
+        assert files[0].stat().st_nlink == 5  # 4 lanes + the object itself
+        usage = disk_usage(tmp_path / ".workflow-state")
+        assert usage["apparent_bytes"] - usage["stored_bytes"] >= 3 * 20_000
@@ -0,0 +1,161 @@
+"""Tests for per-run artifact packs (infra/pack.py).
+
+Covers packed writes (no per-step files), transparent reads through
+``read_artifact`` and the dashboard, rewrites, torn index lines, and
+unpacking back to the loose layout (function and CLI), keeping the pack
+when an entry can't be restored.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from conftest import _state_ns
+
+WORKFLOW_ROOT = Path(__file__).resolve().parent.parent
+if str(WORKFLOW_ROOT) not in sys.path:
+    sys.path.insert(0, str(WORKFLOW_ROOT))
+
+from dashboard.data import diff_runs, get_artifact_content, get_run_detail  # noqa: E402
+
+INDEX_FILE = _state_ns["INDEX_FILE"]
+PACK_FILE = _state_ns["PACK_FILE"]
+read_artifact = _state_ns["read_artifact"]
+unpack = _state_ns["unpack"]
+write_llm_output_artifact = _state_ns["write_llm_output_artifact"]
+write_llm_prompt_artifact = _state_ns["write_llm_prompt_artifact"]
+write_shell_artifacts = _state_ns["write_shell_artifacts"]
+
+_LOG = "".join(f"test_case_{i} PASSED\n" for i in range(3000))
+
+
+@pytest.fixture
+def packed(monkeypatch):
+    monkeypatch.setitem(_state_ns, "PACK_ARTIFACTS", True)
+
+
+def _write_steps(art_dir):
+    write_shell_artifacts(art_dir, "detect", "echo hi", "hi", None, {"ok": True}, {"cpu_user": 0.1})
+    write_shell_artifacts(art_dir, "loop:each[i=0]/test", "pytest", _LOG, "warn", None)
+    write_llm_output_artifact(art_dir, "review", "LGTM", structured={"score": 5})
+
+
+def _files(root):
+    return {
+        p.relative_to(root).as_posix(): p.read_bytes()
+        for p in root.rglob("*") if p.is_file()
+    }
+
+
+class TestPackedWrites:
+    def test_one_pack_no_step_files(self, tmp_path, packed):
+        art_dir = tmp_path / "artifacts"
+        _write_steps(art_dir)
+        assert sorted(p.name for p in art_dir.iterdir()) == [PACK_FILE, INDEX_FILE]
+        assert read_artifact(art_dir / "detect" / "output.txt") == "hi"
+        assert json.loads(read_artifact(art_dir / "detect" / "result.json")) == {"ok": True}
+        assert read_artifact(art_dir / "loop-each" / "i-0" / "test" / "output.txt") == _LOG
+        assert read_artifact(art_dir / "review" / "structured.json") is not None
+        assert read_artifact(art_dir / "review" / "missing.txt") is None
+
+    def test_agent_files_stay_loose(self, tmp_path, packed):
+        art_dir = tmp_path / "artifacts"
+        write_llm_prompt_artifact(art_dir, "review", "Do the thing")
+        assert (art_dir / "review" / "prompt.md").read_text() == "Do the thing"
+
+    def test_rewrite_last_entry_wins(self, tmp_path, packed):
+        art_dir = tmp_path / "artifacts"
+        write_llm_output_artifact(art_dir, "review", _LOG)
+        write_llm_output_artifact(art_dir, "review", "short")
+        assert read_artifact(art_dir / "review" / "output.txt") == "short"
+
+    def test_replaces_loose_copy(self, tmp_path, monkeypatch):
+        art_dir = tmp_path / "artifacts"
+        write_llm_output_artifact(art_dir, "review", "loose")
+        monkeypatch.setitem(_state_ns, "PACK_ARTIFACTS", True)
+        write_llm_output_artifact(art_dir, "review", "packed")
+        assert not (art_dir / "review" / "output.txt").exists()
+        assert read_artifact(art_dir / "review" / "output.txt") == "packed"
+
+    def test_torn_index_line_skipped(self, tmp_path, packed):
+        art_dir = tmp_path / "artifacts"
+        write_llm_output_artifact(art_dir, "review", "LGTM")
+        with open(art_dir / INDEX_FILE, "a") as f:
+            f.write('{"path": "other/output.txt", "off')
+        assert read_artifact(art_dir / "review" / "output.txt") == "LGTM"
+        assert read_artifact(art_dir / "other" / "output.txt") is None
+
+    def test_append_after_torn_index_line(self, tmp_path, packed):
+        art_dir = tmp_path / "artifacts"
+        write_llm_output_artifact(art_dir, "review", "LGTM")
+        with open(art_dir / INDEX_FILE, "a") as f:
+            f.write('{"path": "other/output.txt", "off')
+        write_llm_output_artifact(art_dir, "fix", "done")
+        assert read_artifact(art_dir / "fix" / "output.txt") == "done"
+        assert read_artifact(art_dir / "review" / "output.txt") == "LGTM"
+
+
+class TestUnpack:
+    def test_unpack_matches_loose_layout(self, tmp_path, monkeypatch):
+        loose = tmp_path / "loose" / "artifacts"
+        _write_steps(loose)
+        monkeypatch.setitem(_state_ns, "PACK_ARTIFACTS", True)
+        packed_dir = tmp_path / "packed" / "artifacts"
+        _write_steps(packed_dir)
+
+        assert unpack(packed_dir) == len(_files(loose))
+        assert _files(packed_dir) == _files(loose)
+
+    def test_pack_kept_when_entry_unreadable(self, tmp_path, packed):
+        art_dir = tmp_path / "artifacts"
+        _write_steps(art_dir)
+        with open(art_dir / INDEX_FILE, "a", encoding="utf-8") as index:
+            index.write(json.dumps({"path": "lost/output.txt", "offset": 10**9, "length": 5}) + "\n")
+        assert unpack(art_dir) == 9
+        assert (art_dir / "detect" / "command.txt").read_text() == "echo hi"
+        assert (art_dir / PACK_FILE).exists() and (art_dir / INDEX_FILE).exists()
+
+    def test_cli(self, tmp_path, packed):
+        run_dir = tmp_path / "run"
+        _write_steps(run_dir / "artifacts")
+        r = subprocess.run(
+            [sys.executable, "-m", "scripts.infra.pack", "unpack", str(run_dir)],
+            capture_output=True, text=True, cwd=str(WORKFLOW_ROOT),
+        )
+        assert r.returncode == 0, r.stderr
+        assert "9 files" in r.stdout
+        assert (run_dir / "artifacts" / "detect" / "command.txt").read_text() == "echo hi"
+        assert not (run_dir / "artifacts" / PACK_FILE).exists()
+
+
+class TestDashboard:
+    def _run(self, state_dir, run_id, output):
+        run_dir = state_dir / run_id
+        write_shell_artifacts(run_dir / "artifacts", "test", "pytest", output, None, None)
+        (run_dir / "meta.json").write_text(json.dumps({"run_id": run_id, "status": "completed"}))
+        (run_dir / "state.json").write_text(json.dumps({
+            "run_id": run_id,
+            "ctx": {"results_scoped": {"test": {"results_key": "test", "name": "test", "order": 1}}},
+        }))
+
+    def test_reads_packed_artifacts(self, tmp_path, packed):
+        state_dir = tmp_path / ".workflow-state"
+        self._run(state_dir, "aaa111aaa111", _LOG)
+        self._run(state_dir, "bbb222bbb222", "1 failed")
+
+        assert get_artifact_content(state_dir, "aaa111aaa111", "test/output.txt") == _LOG
+        detail = get_run_detail(state_dir, "aaa111aaa111")
+        assert detail["steps"][0]["artifact_files"] == ["command.txt", "output.txt"]
+        [step] = detail["artifact_tree"]
+        assert step["name"] == "test"
+        assert [n["name"] for n in step["children"]] == ["command.txt", "output.txt"]
+        assert all(n["packed"] for n in step["children"])
+        assert step["children"][1]["compressed"] is True
+
+        result = diff_runs(state_dir, "aaa111aaa111", "bbb222bbb222")
+        [entry] = result["diffs"]
+        assert entry["change"] == "modified"
+        assert [d["file"] for d in entry["artifact_diffs"]] == ["output.txt"]
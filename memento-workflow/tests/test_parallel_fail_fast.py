@@ -0,0 +1,164 @@
+"""Tests for fail-fast parallel lanes (ParallelEachBlock on_failure="cancel").
+
+Covers killing in-flight shell lanes, cancelling relay lanes and rejecting
+their later submits, the parent's failure status with partial results,
+checkpointed lane statuses, batched max_concurrency, and shell cancellation.
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from conftest import _types_ns, create_runner_ns
+
+# Types
+LLMStep = _types_ns["LLMStep"]
+ShellStep = _types_ns["ShellStep"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+_ns = create_runner_ns()
+WorkflowRunner = _ns["WorkflowRunner"]
+_execute_shell = _ns["_execute_shell"]
+CANCELLED_ERROR = _ns["CANCELLED_ERROR"]
+SCHEDULER = _ns["SCHEDULER"]
+
+# Lane "bad" fails at once; the others would sleep for half a minute
+_SHELL = 'if [ "{{variables.item}}" = bad ]; then exit 1; fi; sleep 30'
+
+
+def _runner(tmp_path, template, items, on_failure="cancel", trailing=True, **block):
+    blocks = [
+        ParallelEachBlock(
+            name="fan",
+            parallel_for="variables.items",
+            template=template,
+            on_failure=on_failure,
+            **block,
+        ),
+    ]
+    if trailing:
+        blocks.append(LLMStep(name="final", prompt_text="Summarize"))
+    wf = WorkflowDef(name="failfast", description="", blocks=blocks)
+    return WorkflowRunner(
+        wf, variables={"items": list(items)}, cwd=str(tmp_path), registry={wf.name: wf},
+    )
+
+
+def _relay(tmp_path, items=("a", "b", "c")):
+    runner = _runner(
+        tmp_path, [LLMStep(name="review", prompt_text="Review {{variables.item}}")], items,
+    )
+    action = runner.start()
+    assert action.action == "parallel"
+    return runner, action, [runner.next(lane.child_run_id) for lane in action.lanes]
+
+
+class TestShellLanes:
+    @pytest.fixture(autouse=True)
+    def side_by_side(self):
+        # Lanes must run at once for a failure to cut the others short; with
+        # one slot per CPU a single-CPU host would run them one at a time
+        slots = SCHEDULER.slots
+        SCHEDULER.set_slots(max(slots, 4))
+        yield
+        SCHEDULER.set_slots(slots)
+
+    def test_failure_kills_running_lanes(self, tmp_path):
+        runner = _runner(
+            tmp_path, [ShellStep(name="work", command=_SHELL)], ["bad", "slow", "slower"],
+        )
+        t0 = time.monotonic()
+        action = runner.start()
+        assert time.monotonic() - t0 < 10
+        assert action.action == "prompt"
+        assert action.exec_key == "final"
+
+        lanes = [runner._get_run(cid) for cid in runner.root_state.child_run_ids]
+        assert [lane.status for lane in lanes] == ["completed", "cancelled", "cancelled"]
+        fan = runner.root_state.ctx.results_scoped["fan"]
+        assert fan.status == "failure"
+        assert "cancelled" in fan.error
+
+        for lane in lanes:
+            state = json.loads((lane.checkpoint_dir / "state.json").read_text())
+            assert state["status"] == lane.status
+            assert state["on_failure"] == "cancel"
+
+    def test_continue_policy_unchanged(self, tmp_path):
+        runner = _runner(
+            tmp_path, [ShellStep(name="work", command="test {{variables.item}} != bad")],
+            ["bad", "ok"], on_failure="continue",
+        )
+        runner.start()
+        lanes = [runner._get_run(cid) for cid in runner.root_state.child_run_ids]
+        assert [lane.status for lane in lanes] == ["completed", "completed"]
+        assert runner.root_state.ctx.results_scoped["fan"].status == "failure"
+
+    def test_batched_stops_later_batches(self, tmp_path):
+        runner = _runner(
+            tmp_path, [ShellStep(name="work", command="test {{variables.item}} != bad")],
+            ["ok", "bad", "c", "d", "e"], trailing=False, max_concurrency=2,
+        )
+        action = runner.start()
+        assert action.action == "completed"
+        # Only the first batch of two lanes ever ran
+        assert len(runner.root_state.child_run_ids) == 2
+
+
+class TestRelayLanes:
+    def test_failed_lane_cancels_siblings(self, tmp_path):
+        runner, action, lanes = _relay(tmp_path)
+        runner.submit(lanes[0].run_id, lanes[0].exec_key, output="a-ok")
+        result = runner.submit(lanes[1].run_id, lanes[1].exec_key, status="failure", error="x")
+        assert result.action == "completed"
+
+        lane_c = runner._get_run(lanes[2].run_id)
+        assert lane_c.status == "cancelled"
+        assert runner.next(lanes[2].run_id).action == "cancelled"
+        state = json.loads((lane_c.checkpoint_dir / "state.json").read_text())
+        assert state["status"] == "cancelled"
+
+    def test_late_submit_rejected(self, tmp_path):
+        runner, _, lanes = _relay(tmp_path)
+        runner.submit(lanes[0].run_id, lanes[0].exec_key, status="failure", error="x")
+        late = runner.submit(lanes[1].run_id, lanes[1].exec_key, output="too late")
+        assert late.action == "cancelled"
+        assert lanes[1].exec_key not in runner._get_run(lanes[1].run_id).ctx.results_scoped
+
+    def test_parent_fails_with_partial_results(self, tmp_path):
+        runner, action, lanes = _relay(tmp_path)
+        runner.submit(lanes[0].run_id, lanes[0].exec_key, output="a-ok")
+        runner.submit(lanes[1].run_id, lanes[1].exec_key, status="failure", error="x")
+        nxt = runner.submit(action.run_id, action.exec_key, output="lanes")
+        assert nxt.action == "prompt"
+        assert nxt.exec_key == "final"
+        fan = runner.root_state.ctx.results_scoped["fan"]
+        assert fan.status == "failure"
+        assert "1 parallel lane(s) cancelled" in fan.error
+        assert "a-ok" in fan.structured_output
+
+    def test_wait_all_returns_after_cancel(self, tmp_path):
+        runner, action, lanes = _relay(tmp_path)
+        runner.submit(lanes[0].run_id, lanes[0].exec_key, status="failure", error="x")
+        assert runner.wait(action.run_id, timeout=0).exec_key == action.exec_key
+        assert not runner.wait(action.run_id, timeout=0).warnings
+
+
+class TestShellCancel:
+    def test_cancel_event_kills_command(self, tmp_path):
+        cancel = threading.Event()
+        threading.Timer(0.1, cancel.set).start()
+        t0 = time.monotonic()
+        output, status, _, error = _execute_shell("sleep 30", str(tmp_path), cancel=cancel)
+        assert time.monotonic() - t0 < 5
+        assert status == "failure"
+        assert error == CANCELLED_ERROR
+
+    def test_unset_event_is_harmless(self, tmp_path):
+        output, status, _, error = _execute_shell(
+            "echo hi", str(tmp_path), cancel=threading.Event(),
+        )
+        assert (output, status, error) == ("hi", "success", None)
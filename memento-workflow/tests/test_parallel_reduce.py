@@ -0,0 +1,134 @@
+"""Tests for reducing parallel lane outputs (ParallelEachBlock reduce=).
+
+Covers the built-in reducers, the shell fast path and relay path, result_var,
+accumulation across max_concurrency batches, and bad/raising reducers.
+"""
+
+import pytest
+
+from conftest import _state_ns, _types_ns, create_runner_ns
+
+# Types
+LLMStep = _types_ns["LLMStep"]
+ShellStep = _types_ns["ShellStep"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+make_reducer = _state_ns["make_reducer"]
+reduce_values = _state_ns["reduce_values"]
+
+_ns = create_runner_ns()
+WorkflowRunner = _ns["WorkflowRunner"]
+
+_SCORE = """echo '{"item": "{{variables.item}}", "score": {{variables.item_index}}}'"""
+
+
+def _runner(tmp_path, template, items, **block):
+    wf = WorkflowDef(
+        name="reducer",
+        description="",
+        blocks=[
+            ParallelEachBlock(
+                name="fan", parallel_for="variables.items", template=template, **block,
+            ),
+        ],
+    )
+    return WorkflowRunner(
+        wf, variables={"items": list(items)}, cwd=str(tmp_path), registry={wf.name: wf},
+    )
+
+
+class TestReducers:
+    def test_concat_splices_lists(self):
+        assert reduce_values([[1, 2], 3, [4]], "concat") == [1, 2, 3, 4]
+
+    def test_concat_copies_seed_once(self):
+        seed = [0]
+        assert reduce_values([[1], 2], "concat", seed) == [0, 1, 2]
+        assert seed == [0]
+        fold = make_reducer("concat")
+        acc = fold(None, 1)
+        assert fold(acc, [2, 3]) is acc and acc == [1, 2, 3]
+
+    def test_merge_dicts(self):
+        assert reduce_values([{"a": 1}, "text", {"b": 2, "a": 3}], "merge") == {"a": 3, "b": 2}
+
+    def test_count(self):
+        assert reduce_values([[1, 2], "x", None], "count") == 3
+        assert reduce_values([], "count") is None
+
+    def test_top_k_by_field(self):
+        items = [{"s": 1}, [{"s": 5}, {"s": 3}], {"s": 4}]
+        assert reduce_values(items, "top_k:2:s") == [{"s": 5}, {"s": 4}]
+        assert reduce_values([3, 9, 1], "top_k:1") == [9]
+
+    def test_callable_and_initial(self):
+        assert reduce_values([1, 2, 3], lambda acc, v: acc + v, 10) == 16
+
+    @pytest.mark.parametrize("spec", ["sum", "top_k", "top_k:0", "concat:2"])
+    def test_bad_spec(self, spec):
+        with pytest.raises(ValueError):
+            make_reducer(spec)
+
+
+class TestParallelReduce:
+    def test_shell_lanes_reduced(self, tmp_path):
+        runner = _runner(
+            tmp_path, [ShellStep(name="score", command=_SCORE)], ["a", "b", "c"],
+            reduce="top_k:2:score", result_var="best",
+        )
+        assert runner.start().action == "completed"
+        best = [{"item": "c", "score": 2}, {"item": "b", "score": 1}]
+        assert runner.root_state.ctx.results_scoped["fan"].structured_output == best
+        assert runner.root_state.ctx.variables["best"] == best
+
+    def test_relay_lanes_reduced(self, tmp_path):
+        runner = _runner(
+            tmp_path, [LLMStep(name="review", prompt_text="Review {{variables.item}}")],
+            ["a", "b"], reduce="merge", result_var="findings",
+        )
+        action = runner.start()
+        for lane in action.lanes:
+            step = runner.next(lane.child_run_id)
+            runner.submit(step.run_id, step.exec_key, structured_output={step.run_id: 1})
+        assert runner.submit(action.run_id, action.exec_key).action == "completed"
+        assert set(runner.root_state.ctx.variables["findings"]) == {
+            lane.child_run_id for lane in action.lanes
+        }
+
+    def test_result_var_without_reduce_keeps_list(self, tmp_path):
+        runner = _runner(
+            tmp_path, [ShellStep(name="echo", command="echo {{variables.item}}")], ["a", "b"],
+            result_var="outs",
+        )
+        runner.start()
+        assert runner.root_state.ctx.variables["outs"] == ["a", "b"]
+
+    def test_batches_accumulate(self, tmp_path):
+        runner = _runner(
+            tmp_path, [ShellStep(name="echo", command="echo {{variables.item}}")],
+            ["a", "b", "c", "d", "e"], max_concurrency=2, reduce="concat", result_var="all",
+        )
+        assert runner.start().action == "completed"
+        assert runner.root_state.ctx.variables["all"] == ["a", "b", "c", "d", "e"]
+
+    def test_bad_spec_errors_before_lanes(self, tmp_path):
+        runner = _runner(
+            tmp_path, [ShellStep(name="echo", command="echo hi")], ["a"], reduce="sum",
+        )
+        action = runner.start()
+        assert action.action == "error"
+        assert "Unknown reduce" in action.message
+        assert runner.root_state.child_run_ids == []
+
+    def test_raising_reducer_fails_block(self, tmp_path):
+        def boom(acc, value):
+            raise KeyError(value)
+
+        runner = _runner(
+            tmp_path, [ShellStep(name="echo", command="echo hi")], ["a"], reduce=boom,
+        )
+        assert runner.start().action == "completed"
+        fan = runner.root_state.ctx.results_scoped["fan"]
+        assert fan.status == "failure"
+        assert "reduce failed: KeyError" in fan.error
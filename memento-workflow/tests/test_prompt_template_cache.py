@@ -0,0 +1,107 @@
+"""Tests for compiled prompt templates and the prompt file cache.
+
+Covers compile_template() splitting, load_prompt_template() mtime/size
+validation, and _build_prompt_action() sharing one compiled template
+across parallel lanes.
+"""
+
+import os
+
+from conftest import _state_ns, _types_ns
+
+# Types
+LLMStep = _types_ns["LLMStep"]
+WorkflowDef = _types_ns["WorkflowDef"]
+WorkflowContext = _types_ns["WorkflowContext"]
+
+# State / utils
+Frame = _state_ns["Frame"]
+RunState = _state_ns["RunState"]
+compile_template = _state_ns["compile_template"]
+load_prompt_template = _state_ns["load_prompt_template"]
+substitute = _state_ns["substitute"]
+substitute_with_files = _state_ns["substitute_with_files"]
+_build_prompt_action = _state_ns["_build_prompt_action"]
+
+
+def _make_state(tmp_path, prompt_dir, variables=None, run_id="run"):
+    wf = WorkflowDef(name="test", description="test", prompt_dir=str(prompt_dir))
+    ctx = WorkflowContext(
+        variables=variables or {}, cwd=".", prompt_dir=str(prompt_dir),
+    )
+    checkpoint_dir = tmp_path / run_id
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    return RunState(
+        run_id=run_id,
+        ctx=ctx,
+        stack=[Frame(block=wf)],
+        registry={"test": wf},
+        checkpoint_dir=checkpoint_dir,
+    )
+
+
+class TestCompileTemplate:
+    def test_split_statics_and_names(self):
+        tpl = compile_template("A {{variables.x}} B {{cwd}} C")
+        assert tpl.statics == ("A ", " B ", " C")
+        assert tpl.names == ("variables.x", "cwd")
+
+    def test_no_placeholders(self):
+        tpl = compile_template("plain text")
+        assert tpl.statics == ("plain text",)
+        assert tpl.names == ()
+
+    def test_cached_identity(self):
+        assert compile_template("X {{cwd}}") is compile_template("X {{cwd}}")
+
+    def test_substitute_accepts_compiled(self):
+        ctx = WorkflowContext(variables={"x": "1"})
+        tpl = compile_template("{{variables.x}}-{{variables.x}}-{{variables.y}}")
+        assert substitute(tpl, ctx) == "1-1-{{variables.y}}"
+
+    def test_repeated_large_var_externalized_once(self, tmp_path):
+        ctx = WorkflowContext(variables={"big": "x" * 1000})
+        text, files = substitute_with_files(
+            "{{variables.big}} / {{variables.big}}", ctx, tmp_path,
+        )
+        assert len(files) == 1
+        assert text.count("context_variables_big.txt") == 2
+
+
+class TestLoadPromptTemplate:
+    def test_reuses_cached_when_unchanged(self, tmp_path):
+        f = tmp_path / "p.md"
+        f.write_text("Hello {{variables.name}}")
+        assert load_prompt_template(f) is load_prompt_template(f)
+
+    def test_reloads_on_change(self, tmp_path):
+        f = tmp_path / "p.md"
+        f.write_text("v1 {{variables.name}}")
+        first = load_prompt_template(f)
+        f.write_text("version2 {{variables.name}}")
+        st = f.stat()
+        os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        second = load_prompt_template(f)
+        assert second is not first
+        assert second.raw.startswith("version2")
+
+
+class TestPromptActionSharesTemplate:
+    def test_lanes_share_static_template(self, tmp_path):
+        prompt_dir = tmp_path / "prompts"
+        prompt_dir.mkdir()
+        (prompt_dir / "review.md").write_text("Review {{variables.item}} please.")
+        step = LLMStep(name="review", prompt="review.md")
+
+        prompts = []
+        for i in range(3):
+            state = _make_state(
+                tmp_path, prompt_dir, {"item": f"file{i}.py"}, run_id=f"lane{i}",
+            )
+            _build_prompt_action(state, step, exec_key="review")
+            prompt_md = state.artifacts_dir / "review" / "prompt.md"
+            prompts.append(prompt_md.read_text())
+
+        assert prompts == [f"Review file{i}.py please." for i in range(3)]
+        tpl = load_prompt_template(prompt_dir / "review.md")
+        assert tpl.statics == ("Review ", " please.")
@@ -350,6 +350,21 @@ class TestPostToolUse:
         marker = json.loads(marker_path.read_text())
         assert marker["waiting_for_children"] is True
 
+    def test_wait_prompt_clears_waiting_flag(self, tmp_path):
+        """wait() returning the parent's next step → active relay again."""
+        marker_path = _write_marker(tmp_path, "sess-1", waiting_for_children=True)
+        _run_hook(
+            {
+                "hook_event_name": "PostToolUse",
+                "session_id": "sess-1",
+                "cwd": str(tmp_path),
+                "tool_name": "mcp__plugin_memento-workflow_memento-workflow__wait",
+                "tool_response": _make_tool_response("prompt"),
+            }
+        )
+        marker = json.loads(marker_path.read_text())
+        assert "waiting_for_children" not in marker
+
     def test_subagent_call_skipped(self, tmp_path):
         """PostToolUse with agent_id present → no marker operations."""
         _run_hook(
@@ -0,0 +1,189 @@
+"""Tests for session recording (engine/recording.py) and replay (engine/replay.py).
+
+Covers the trace written for a session with shells, a loop, parallel lanes
+and batched submits, replaying it without running shells, divergence on a
+changed workflow or a missing shell result, the load generator, and the CLI.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+WORKFLOW_ROOT = Path(__file__).resolve().parent.parent
+if str(WORKFLOW_ROOT) not in sys.path:
+    sys.path.insert(0, str(WORKFLOW_ROOT))
+
+from scripts.engine import recording  # noqa: E402
+from scripts.engine.replay import load_test, load_trace, replay_trace  # noqa: E402
+from scripts.engine.types import (  # noqa: E402
+    LLMStep,
+    LoopBlock,
+    ParallelEachBlock,
+    ShellStep,
+    WorkflowDef,
+)
+from scripts.engine.workflow_runner import WorkflowRunner  # noqa: E402
+
+
+def _wf(final_name="final"):
+    return WorkflowDef(
+        name="session",
+        description="",
+        blocks=[
+            ShellStep(name="setup", command="echo setup >> runs.log"),
+            LoopBlock(
+                name="each", loop_over="variables.items", loop_var="item",
+                blocks=[ShellStep(name="build", command="echo build-{{variables.item}} >> runs.log")],
+            ),
+            ParallelEachBlock(
+                name="fan", parallel_for="variables.items",
+                template=[LLMStep(name="review", prompt_text="Review {{variables.item}}")],
+            ),
+            LLMStep(name=final_name, prompt_text="Summarize"),
+        ],
+    )
+
+
+@pytest.fixture
+def trace(tmp_path):
+    """Record one complete session; returns the trace path."""
+    path = tmp_path / "trace.jsonl"
+    wf = _wf()
+    recording.start_recording(path)
+    try:
+        runner = WorkflowRunner(
+            wf, variables={"items": ["a", "b"]}, cwd=str(tmp_path / "project"),
+            registry={wf.name: wf},
+        )
+        action = runner.start()
+        assert action.action == "parallel"
+        lanes = [runner.next(lane.child_run_id) for lane in action.lanes]
+        runner.submit_many([
+            {"run_id": a.run_id, "exec_key": a.exec_key, "output": f"ok {i}"}
+            for i, a in enumerate(lanes)
+        ])
+        final = runner.next()
+        assert final.exec_key == "final"
+        assert runner.submit(final.run_id, "final", output="done").action == "completed"
+    finally:
+        recording.stop_recording()
+    return path
+
+
+def _log(tmp_path):
+    return (tmp_path / "project" / "runs.log").read_text().split()
+
+
+class TestRecording:
+    def test_trace_events(self, trace):
+        header = json.loads(trace.read_text().splitlines()[0])
+        assert header["event"] == "header"
+        events = load_trace(trace)
+        [run] = [e for e in events if e["event"] == "run"]
+        assert run["workflow"] == "session"
+        assert run["variables"] == {"items": ["a", "b"]}
+        calls = [e for e in events if e["event"] == "call"]
+        # submit_many's inner submits are not recorded separately
+        assert [c["method"] for c in calls] == [
+            "start", "next", "next", "submit_many", "next", "submit",
+        ]
+        assert calls[0]["args"] == {"run_id": run["run_id"]}
+        assert calls[0]["result"]["action"] == "parallel"
+        shells = [e for e in events if e["event"] == "shell"]
+        assert [s["exec_key"] for s in shells] == [
+            "setup", "loop:each[i=0]/build", "loop:each[i=1]/build",
+        ]
+        assert all(s["run_id"] == run["run_id"] and s["status"] == "success" for s in shells)
+
+    def test_off_by_default(self, tmp_path):
+        wf = _wf()
+        WorkflowRunner(wf, cwd=str(tmp_path), registry={wf.name: wf}, variables={"items": []}).start()
+        assert recording.active_recorder() is None
+        assert not list(tmp_path.glob("*.jsonl"))
+
+
+class TestReplay:
+    def test_replays_without_running_shells(self, trace, tmp_path):
+        assert _log(tmp_path) == ["setup", "build-a", "build-b"]
+        wf = _wf()
+        report = replay_trace(load_trace(trace), {wf.name: wf}, tmp_path / "replay")
+        assert report["divergences"] == []
+        assert report["calls"] == 6
+        assert report["shells"] == 3
+        assert len(report["latencies"]) == 6
+        assert _log(tmp_path) == ["setup", "build-a", "build-b"]
+        assert not (tmp_path / "replay" / "runs.log").exists()
+        # The replayed run completed under the recorded run_id
+        run_id = load_trace(trace)[0]["run_id"]
+        meta = json.loads((tmp_path / "replay" / ".workflow-state" / run_id / "meta.json").read_text())
+        assert meta["status"] == "completed"
+
+    def test_changed_workflow_diverges(self, trace, tmp_path):
+        wf = _wf(final_name="wrapup")
+        report = replay_trace(load_trace(trace), {wf.name: wf}, tmp_path / "replay")
+        paths = {(d["method"], d["path"]) for d in report["divergences"]}
+        assert ("next", "result.exec_key") in paths
+        [d] = [d for d in report["divergences"] if d["path"] == "result.exec_key"]
+        assert (d["recorded"], d["replayed"]) == ("final", "wrapup")
+
+    def test_missing_shell_result_diverges(self, trace, tmp_path):
+        events = [
+            e for e in load_trace(trace)
+            if not (e["event"] == "shell" and e["exec_key"] == "setup")
+        ]
+        wf = _wf()
+        report = replay_trace(events, {wf.name: wf}, tmp_path / "replay")
+        assert {"index": -1, "method": "shell", "path": "setup",
+                "recorded": "recorded result", "replayed": None} in report["divergences"]
+
+    def test_load_test(self, trace):
+        wf = _wf()
+        report = load_test(load_trace(trace), {wf.name: wf}, repeat=4, concurrency=2)
+        assert report["replays"] == 4
+        assert report["calls"] == 24
+        assert report["shells"] == 12
+        assert report["divergences"] == 0
+        assert report["calls_per_sec"] > 0
+
+
+class TestCli:
+    def test_replay_cli(self, tmp_path):
+        wf_dir = tmp_path / "workflows" / "cli-session"
+        wf_dir.mkdir(parents=True)
+        (wf_dir / "workflow.py").write_text(
+            'WORKFLOW = WorkflowDef(name="cli-session", description="", blocks=['
+            'ShellStep(name="hello", command="echo hi"), LLMStep(name="ask", prompt_text="Hi")])\n'
+        )
+        project = tmp_path / "project"
+        project.mkdir()
+        path = tmp_path / "trace.jsonl"
+        script = (
+            "import sys\n"
+            "from pathlib import Path\n"
+            "from scripts.engine.workflow_runner import WorkflowRunner\n"
+            "from scripts.infra.loader import discover_workflows\n"
+            "reg = discover_workflows(Path(sys.argv[1]))\n"
+            "r = WorkflowRunner(reg['cli-session'], cwd=sys.argv[2], registry=reg)\n"
+            "a = r.start()\n"
+            "r.submit(a.run_id, a.exec_key, output='hello')\n"
+        )
+        env = {**os.environ, "MEMENTO_RECORD": str(path)}
+        r = subprocess.run(
+            [sys.executable, "-c", script, str(tmp_path / "workflows"), str(project)],
+            capture_output=True, text=True, cwd=str(WORKFLOW_ROOT), env=env,
+        )
+        assert r.returncode == 0, r.stderr
+        assert len(load_trace(path)) == 4  # run, shell, start, submit
+
+        r = subprocess.run(
+            [sys.executable, "-m", "scripts.engine.replay", str(path),
+             "--workflow-dir", str(tmp_path / "workflows"), "--repeat", "3", "--json"],
+            capture_output=True, text=True, cwd=str(WORKFLOW_ROOT),
+        )
+        assert r.returncode == 0, r.stderr
+        report = json.loads(r.stdout)
+        assert (report["calls"], report["shells"], report["divergences"]) == (6, 3, 0)
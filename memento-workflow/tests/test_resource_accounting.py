@@ -0,0 +1,105 @@
+"""Tests for per-step shell resource accounting (rusage).
+
+Covers _execute_shell() filling rusage via os.wait4, StepResult.resources
+and the resources.json artifact, sum_resources()/compute_totals() and the
+resources surfaced in get_status() and meta.json.
+"""
+
+import json
+import os
+
+import pytest
+
+from conftest import _state_ns, _types_ns, create_runner_ns
+
+# Types
+ShellStep = _types_ns["ShellStep"]
+StepResult = _types_ns["StepResult"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+sum_resources = _state_ns["sum_resources"]
+compute_totals = _state_ns["compute_totals"]
+RESOURCE_KEYS = _state_ns["RESOURCE_KEYS"]
+
+_ns = create_runner_ns()
+WorkflowRunner = _ns["WorkflowRunner"]
+_execute_shell = _ns["_execute_shell"]
+
+# Burns a little CPU and allocates ~40 MB in a child of bash
+_BUSY = "python3 -c 'b = bytearray(40 * 1024 * 1024); sum(range(2_000_000))'"
+
+
+def _result(name, resources, shell=1.0):
+    return StepResult(name=name, exec_key=name, resources=resources, timing={"shell": shell})
+
+
+class TestExecuteShell:
+    def test_fills_rusage_of_descendants(self, tmp_path):
+        resources = {}
+        result = _execute_shell(_BUSY, str(tmp_path), resources=resources)
+        assert result.status == "success"
+        assert set(resources) == set(RESOURCE_KEYS)
+        assert resources["cpu_user"] + resources["cpu_sys"] > 0
+        assert resources["max_rss_kb"] > 30 * 1024
+
+    def test_timeout_still_reports(self, tmp_path):
+        resources = {}
+        result = _execute_shell("sleep 30", str(tmp_path), timeout=0.2, resources=resources)
+        assert "timed out" in result.error
+        assert "cpu_user" in resources
+
+    def test_lost_exit_status_is_failure(self, tmp_path, monkeypatch):
+        def wait4(pid, options):
+            raise ChildProcessError
+
+        monkeypatch.setattr(os, "wait4", wait4)
+        result = _execute_shell("true", str(tmp_path))
+        assert result.status == "failure"
+        assert "exit status lost" in result.error
+
+    def test_optional(self, tmp_path):
+        assert _execute_shell("echo hi", str(tmp_path)).output == "hi"
+
+
+class TestSumResources:
+    def test_sums_counters_and_peaks_rss(self):
+        results = [
+            _result("a", {"cpu_user": 1.0, "cpu_sys": 0.5, "max_rss_kb": 100.0, "io_read": 2.0}),
+            _result("b", {"cpu_user": 2.0, "cpu_sys": 0.5, "max_rss_kb": 300.0, "io_read": 3.0}, 3.0),
+            StepResult(name="llm"),
+        ]
+        total = sum_resources(results)
+        assert total["cpu_user"] == 3.0
+        assert total["max_rss_kb"] == 300.0
+        assert total["io_read"] == 5.0
+        assert total["cpu_cores"] == 1.0  # 4 CPU seconds over 4 s of shell
+
+    def test_empty_without_shell(self):
+        assert sum_resources([StepResult(name="llm")]) == {}
+        assert "resources" not in compute_totals({"llm": StepResult(name="llm")})
+
+
+class TestRunner:
+    @pytest.fixture
+    def runner(self, tmp_path):
+        wf = WorkflowDef(
+            name="busy", description="",
+            blocks=[ShellStep(name="busy", command=_BUSY), ShellStep(name="echo", command="echo hi")],
+        )
+        runner = WorkflowRunner(wf, cwd=str(tmp_path), registry={wf.name: wf})
+        assert runner.start().action == "completed"
+        return runner
+
+    def test_step_result_and_artifact(self, runner):
+        state = runner.root_state
+        busy = state.ctx.results_scoped["busy"]
+        assert busy.resources["max_rss_kb"] > 30 * 1024
+        artifact = json.loads((state.artifacts_dir / "busy" / "resources.json").read_text())
+        assert artifact == busy.resources
+
+    def test_status_and_meta(self, runner):
+        status = runner.get_status()["resources"]
+        assert status["max_rss_kb"] > 30 * 1024
+        assert status["cpu_cores"] > 0
+        meta = json.loads((runner.root_state.checkpoint_dir / "meta.json").read_text())
+        assert meta["resources"] == compute_totals(runner.root_state.ctx.results_scoped)["resources"]
@@ -0,0 +1,196 @@
+"""Tests for RetryBlock backoff, jitter, attempt timeouts and hedging.
+
+Covers the delay schedule, backoff slept before the next shell attempt and
+recorded in StepResult.timing, attempt_timeout capping shell commands, and
+hedged shell bodies (second copy wins, loser killed, percentile delays).
+"""
+
+import random
+import threading
+import time
+
+import pytest
+
+from conftest import _state_ns, _types_ns, create_runner_ns
+
+# Types
+RetryBlock = _types_ns["RetryBlock"]
+ShellStep = _types_ns["ShellStep"]
+StepResult = _types_ns["StepResult"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+Frame = _state_ns["Frame"]
+retry_delay = _state_ns["retry_delay"]
+compute_timing = _state_ns["compute_timing"]
+
+_ns = create_runner_ns()
+WorkflowRunner = _ns["WorkflowRunner"]
+_execute_hedged = _ns["_execute_hedged"]
+
+
+def _succeeded(ctx):
+    r = ctx.results.get("cmd")
+    return r is not None and r.status == "success"
+
+
+def _run(tmp_path, command, **retry):
+    wf = WorkflowDef(
+        name="retrying",
+        description="",
+        blocks=[
+            RetryBlock(
+                name="flaky",
+                until=_succeeded,
+                blocks=[ShellStep(name="cmd", command=command)],
+                **retry,
+            ),
+        ],
+    )
+    runner = WorkflowRunner(wf, cwd=str(tmp_path), registry={wf.name: wf})
+    t0 = time.monotonic()
+    action = runner.start()
+    assert action.action == "completed"
+    attempts = [r for r in runner.root_state.ctx.results_scoped.values() if r.name == "cmd"]
+    return runner, attempts, time.monotonic() - t0
+
+
+# Fails on the first run in a directory, succeeds afterwards
+_FLAKY = "test -e seen || { touch seen; exit 1; }"
+
+
+class TestRetryDelay:
+    def test_exponential_and_capped(self):
+        block = RetryBlock(name="r", until=_succeeded, backoff=1, backoff_factor=2, max_backoff=3)
+        assert [retry_delay(block, n) for n in range(5)] == [0.0, 1, 2, 3, 3]
+
+    def test_no_backoff_by_default(self):
+        assert retry_delay(RetryBlock(name="r", until=_succeeded), 3) == 0.0
+
+    def test_jitter_scales_down(self):
+        random.seed(7)
+        block = RetryBlock(name="r", until=_succeeded, backoff=1, jitter=0.5)
+        delays = [retry_delay(block, 1) for _ in range(50)]
+        assert all(0.5 <= d <= 1.0 for d in delays)
+        assert len(set(delays)) > 1
+
+
+class TestBackoff:
+    def test_backoff_before_next_attempt(self, tmp_path):
+        _, attempts, elapsed = _run(tmp_path, _FLAKY, backoff=0.3)
+        assert [a.status for a in attempts] == ["failure", "success"]
+        assert elapsed >= 0.3
+        assert "backoff" not in attempts[0].timing
+        assert attempts[1].timing["backoff"] > 0.2
+        # Backoff is not charged to the step's own duration
+        assert attempts[1].duration < 0.3
+
+    def test_backoff_in_run_timing(self, tmp_path):
+        runner, _, _ = _run(tmp_path, _FLAKY, backoff=0.1)
+        timing = compute_timing(runner.root_state.ctx.results_scoped)
+        assert timing["run"]["backoff"] > 0.05
+
+
+class TestAttemptTimeout:
+    def test_caps_shell_timeout(self, tmp_path):
+        _, attempts, elapsed = _run(tmp_path, "sleep 30", max_attempts=2, attempt_timeout=0.3)
+        assert elapsed < 10
+        assert [a.status for a in attempts] == ["failure", "failure"]
+        assert "timed out" in attempts[0].error
+
+
+class TestHedge:
+    def test_hedge_wins_and_loser_is_killed(self, tmp_path):
+        # First copy takes the lock and hangs; the hedge finds it and returns
+        command = "if mkdir lock 2>/dev/null; then sleep 30; echo slow; else echo fast; fi"
+        _, attempts, elapsed = _run(tmp_path, command, hedge_after=0.2)
+        assert elapsed < 10
+        assert len(attempts) == 1
+        assert attempts[0].output == "fast"
+        assert attempts[0].timing["hedged"] == 1.0
+        assert attempts[0].timing["hedge_won"] == 1.0
+
+    def test_fast_attempt_not_hedged(self, tmp_path):
+        _, attempts, _ = _run(tmp_path, "echo ok", hedge_after=5)
+        assert attempts[0].output == "ok"
+        assert "hedge_won" not in attempts[0].timing
+
+    def test_percentile_delay(self, tmp_path):
+        block = RetryBlock(
+            name="r", until=_succeeded, hedge_after="p80",
+            blocks=[ShellStep(name="cmd", command="true")],
+        )
+        runner, _, _ = _run(tmp_path, "true")
+        scoped = runner.root_state.ctx.results_scoped
+        scoped.clear()
+        frame = Frame(block=block)
+        assert WorkflowRunner._hedge_after(runner.root_state, frame) is None  # too few samples
+        for i in range(10):
+            scoped[f"cmd#{i}"] = StepResult(name="cmd", status="success", duration=i + 1)
+        assert WorkflowRunner._hedge_after(runner.root_state, frame) == 9
+
+
+class TestExecuteHedged:
+    def test_first_result_wins(self):
+        calls = []
+
+        def run(ev):
+            calls.append(ev)
+            return "done"
+
+        assert _execute_hedged(run, 5) == ("done", False)
+        assert len(calls) == 1
+
+    def test_both_raising_reraises(self):
+        def run(ev):
+            raise RuntimeError("boom")
+
+        def hedge(ev):
+            time.sleep(0.05)
+            raise ValueError("hedge boom")
+
+        def slow(ev):
+            time.sleep(0.2)
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            _execute_hedged(run, 5)
+        t0 = time.monotonic()
+        with pytest.raises(ValueError):  # the hedge raised first
+            _execute_hedged(slow, 0.05, hedge=hedge)
+        assert time.monotonic() - t0 < 5
+
+    def test_failed_first_waits_for_hedge(self):
+        # The first copy fails (after the hedge started); the hedge succeeds
+        def run(ev):
+            time.sleep(0.2)
+            return "failure"
+
+        def hedge(ev):
+            time.sleep(0.3)
+            return "success"
+
+        result = _execute_hedged(run, 0.05, hedge=hedge, failed=lambda r: r == "failure")
+        assert result == ("success", True)
+
+    def test_failure_returned_when_no_copy_succeeds(self):
+        def run(ev):
+            time.sleep(0.2)
+            return "failure"
+
+        def hedge(ev):
+            raise RuntimeError("boom")
+
+        result = _execute_hedged(run, 0.05, hedge=hedge, failed=lambda r: r == "failure")
+        assert result == ("failure", False)
+
+    def test_outer_cancel_stops_both(self):
+        def run(ev):
+            ev.wait(10)
+            return "cancelled"
+
+        cancel = threading.Event()
+        threading.Timer(0.2, cancel.set).start()
+        t0 = time.monotonic()
+        result, _ = _execute_hedged(run, 0.05, cancel)
+        assert result == "cancelled"
+        assert time.monotonic() - t0 < 5
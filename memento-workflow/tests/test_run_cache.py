@@ -0,0 +1,277 @@
+"""Tests for the bounded LRU run store (engine/run_cache.py).
+
+Covers count/byte bounds, spill-to-checkpoint and in-place rehydration,
+terminal subtree eviction, session pinning, and end-to-end WorkflowRunner
+runs through a tiny cache (every idle run spilled between calls).
+"""
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from conftest import _state_ns, _types_ns, create_runner_ns
+
+# Types
+ShellStep = _types_ns["ShellStep"]
+LLMStep = _types_ns["LLMStep"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+StepResult = _types_ns["StepResult"]
+WorkflowDef = _types_ns["WorkflowDef"]
+WorkflowContext = _types_ns["WorkflowContext"]
+
+# Engine
+Frame = _state_ns["Frame"]
+RunState = _state_ns["RunState"]
+RunCache = _state_ns["RunCache"]
+checkpoint_save = _state_ns["checkpoint_save"]
+checkpoint_spill = _state_ns["checkpoint_spill"]
+
+WorkflowRunner = create_runner_ns()["WorkflowRunner"]
+
+
+def _state(tmp_path, run_id, status="running", payload="x", child_run_ids=None):
+    wf = WorkflowDef(name="wf", description="")
+    ctx = WorkflowContext(cwd=str(tmp_path), variables={"big": payload})
+    ctx.results_scoped["s"] = StepResult(
+        name="s", exec_key="s", results_key="s", output=payload,
+    )
+    ctx.results["s"] = ctx.results_scoped["s"]
+    chk = tmp_path / ".workflow-state" / run_id.replace(">", "/children/")
+    state = RunState(
+        run_id=run_id, ctx=ctx, stack=[Frame(block=wf)], registry={},
+        status=status, checkpoint_dir=chk, child_run_ids=child_run_ids,
+    )
+    checkpoint_save(state)
+    return state
+
+
+def _prompt(action):
+    return Path(action.prompt_file).read_text() if action.prompt_file else action.prompt
+
+
+# ---------------------------------------------------------------------------
+# Spill / rehydrate primitives
+# ---------------------------------------------------------------------------
+
+
+class TestSpill:
+    def test_spill_drops_payload_and_keeps_ephemeral(self, tmp_path):
+        state = _state(tmp_path, "aaa")
+        state.ctx.results_scoped["tmp"] = StepResult(name="tmp", exec_key="tmp", output="e")
+        state._ephemeral_keys.add("tmp")
+        assert checkpoint_spill(state)
+        assert state._spilled
+        assert state.ctx.variables == {}
+        assert set(state.ctx.results_scoped) == {"tmp"}
+
+        cache = RunCache()
+        cache._spilled["aaa"] = state
+        assert cache["aaa"] is state
+        assert state.ctx.variables == {"big": "x"}
+        assert set(state.ctx.results_scoped) == {"s", "tmp"}
+        assert state.ctx.results["s"].output == "x"
+
+    def test_spill_requires_checkpoint_dir(self, tmp_path):
+        state = _state(tmp_path, "aaa")
+        state.checkpoint_dir = None
+        assert not checkpoint_spill(state)
+        assert not state._spilled
+
+
+# ---------------------------------------------------------------------------
+# Bounds and eviction
+# ---------------------------------------------------------------------------
+
+
+class TestBounds:
+    def test_count_bound_spills_lru(self, tmp_path):
+        cache = RunCache(max_runs=2)
+        a, b, c = (_state(tmp_path, rid) for rid in ("aaa", "bbb", "ccc"))
+        cache["aaa"], cache["bbb"] = a, b
+        cache.get("aaa")  # touch → bbb is now LRU
+        cache["ccc"] = c
+        assert b._spilled and not a._spilled and not c._spilled
+        stats = cache.stats()
+        assert (stats["resident"], stats["spilled"], stats["spills"]) == (2, 1, 1)
+        assert len(cache) == 3 and "bbb" in cache
+
+        assert cache.get("bbb") is b
+        assert not b._spilled
+        assert cache.stats()["rehydrations"] == 1
+
+    def test_byte_bound(self, tmp_path):
+        big = _state(tmp_path, "aaa", payload="x" * 10_000)
+        small = _state(tmp_path, "bbb")
+        cache = RunCache(max_runs=100, max_bytes=5_000)
+        cache["aaa"] = big
+        cache["bbb"] = small
+        assert big._spilled
+        assert cache.stats()["bytes"] == small._checkpoint_bytes
+
+    def test_terminal_tree_dropped_not_spilled(self, tmp_path):
+        cache = RunCache(max_runs=1)
+        root = _state(tmp_path, "aaa", status="completed", child_run_ids=["aaa>bbb"])
+        child = _state(tmp_path, "aaa>bbb", status="completed")
+        cache["aaa>bbb"] = child
+        cache["aaa"] = root
+        cache["ccc"] = _state(tmp_path, "ccc")
+        assert "aaa" not in cache and "aaa>bbb" not in cache
+        assert cache.stats()["evictions"] == 2
+
+    def test_tree_with_pinned_child_not_dropped(self, tmp_path):
+        cache = RunCache(max_runs=1)
+        root = _state(tmp_path, "aaa", status="completed", child_run_ids=["aaa>bbb"])
+        child = _state(tmp_path, "aaa>bbb", status="completed")
+        cache["aaa"] = root
+        with cache.session():
+            cache["aaa>bbb"] = child
+            cache["ccc"] = _state(tmp_path, "ccc")
+            assert "aaa>bbb" in cache and "aaa" in cache
+            assert not child._spilled
+        assert cache.stats()["evictions"] == 0
+
+    def test_spill_writes_outside_lock(self, tmp_path, monkeypatch):
+        cache = RunCache(max_runs=1)
+        free = []
+
+        def probe():
+            if cache._lock.acquire(timeout=2):
+                cache._lock.release()
+                free.append(True)
+
+        def spill(state):
+            # Another thread can take the lock while the checkpoint is written
+            t = threading.Thread(target=probe)
+            t.start()
+            t.join()
+            return checkpoint_spill(state)
+
+        monkeypatch.setitem(_state_ns, "checkpoint_spill", spill)
+        a = _state(tmp_path, "aaa")
+        cache["aaa"] = a
+        cache["bbb"] = _state(tmp_path, "bbb")
+        assert free == [True]
+        assert a._spilled and cache.stats()["spills"] == 1
+        assert cache["aaa"] is a and not a._spilled
+
+    def test_unspillable_runs_stay_resident(self, tmp_path):
+        cache = RunCache(max_runs=1)
+        for rid in ("aaa", "bbb"):
+            state = _state(tmp_path, rid)
+            state.checkpoint_dir = None
+            cache[rid] = state
+        assert cache.stats()["resident"] == 2
+
+    def test_pinned_runs_not_spilled(self, tmp_path):
+        cache = RunCache(max_runs=1)
+        a, b = _state(tmp_path, "aaa"), _state(tmp_path, "bbb")
+        with cache.session():
+            cache["aaa"] = a
+            cache["bbb"] = b
+            assert not a._spilled
+        # Bound enforced once the session releases its pins
+        assert a._spilled
+
+    def test_pop_and_peek_do_not_rehydrate(self, tmp_path):
+        cache = RunCache(max_runs=1)
+        a = _state(tmp_path, "aaa")
+        cache["aaa"] = a
+        cache["bbb"] = _state(tmp_path, "bbb")
+        assert cache.peek("aaa") is a and a._spilled
+        assert cache.pop("aaa") is a and a._spilled
+        assert cache.pop("aaa", None) is None
+        with pytest.raises(KeyError):
+            cache.pop("aaa")
+
+    def test_missing_checkpoint_forgets_run(self, tmp_path):
+        cache = RunCache(max_runs=1)
+        a = _state(tmp_path, "aaa")
+        cache["aaa"] = a
+        cache["bbb"] = _state(tmp_path, "bbb")
+        (a.checkpoint_dir / "state.json").unlink()
+        assert cache.get("aaa") is None
+        assert "aaa" not in cache
+
+    def test_drop_terminal_trees_keeps_referenced(self, tmp_path):
+        cache = RunCache()
+        cache["aaa"] = _state(tmp_path, "aaa", child_run_ids=["aaa>bbb"])
+        cache["aaa>bbb"] = _state(tmp_path, "aaa>bbb", status="completed")
+        cache["ccc"] = _state(tmp_path, "ccc", status="error")
+        assert cache.drop_terminal_trees() == 1
+        assert set(cache) == {"aaa", "aaa>bbb"}
+
+
+# ---------------------------------------------------------------------------
+# WorkflowRunner through a tiny cache
+# ---------------------------------------------------------------------------
+
+
+class TestRunnerWithCache:
+    def _wf(self):
+        return WorkflowDef(
+            name="cached",
+            description="",
+            blocks=[
+                ShellStep(name="setup", command="echo '{\"n\": 7}'", result_var="cfg"),
+                LLMStep(name="ask", prompt_text="n={{variables.cfg.n}}"),
+                ParallelEachBlock(
+                    name="fan",
+                    parallel_for="variables.items",
+                    template=[LLMStep(name="review", prompt_text="Review {{variables.item}}")],
+                ),
+                LLMStep(name="final", prompt_text="after {{results.ask.output}}"),
+            ],
+        )
+
+    def test_interleaved_runs_survive_spills(self, tmp_path):
+        wf = self._wf()
+        store = RunCache(max_runs=1)
+        runners, actions = [], []
+        for _ in range(3):
+            runner = WorkflowRunner(
+                wf, variables={"items": ["a", "b", "c"]}, cwd=str(tmp_path),
+                registry={wf.name: wf}, run_store=store,
+            )
+            runners.append(runner)
+            actions.append(runner.start())
+        assert store.stats()["spilled"] >= 2
+        assert all(_prompt(a) == "n=7" for a in actions)
+
+        ephemeral = WorkflowRunner.from_run_store(store)
+        for i, action in enumerate(actions):
+            action = ephemeral.submit(action.run_id, action.exec_key, output=f"ans{i}")
+            assert action.action == "parallel"
+            for lane in action.lanes:
+                lane_action = ephemeral.next(lane.child_run_id)
+                while lane_action.action != "completed":
+                    lane_action = ephemeral.submit(
+                        lane_action.run_id, lane_action.exec_key, output="ok",
+                    )
+            action = ephemeral.submit(action.run_id, action.exec_key, output="lanes")
+            assert action.action == "prompt"
+            assert _prompt(action) == f"after ans{i}"
+            final = ephemeral.submit(action.run_id, action.exec_key, output="done")
+            assert final.action == "completed"
+        assert store.stats()["rehydrations"] > 0
+
+    def test_status_reports_occupancy(self, tmp_path):
+        wf = self._wf()
+        store = RunCache(max_runs=5)
+        runner = WorkflowRunner(
+            wf, variables={"items": []}, cwd=str(tmp_path),
+            registry={wf.name: wf}, run_store=store,
+        )
+        runner.start()
+        status = runner.get_status()
+        assert status["run_cache"]["resident"] == 1
+        assert status["run_cache"]["max_runs"] == 5
+        assert status["run_cache"]["bytes"] > 0
+
+    def test_plain_dict_store_has_no_occupancy(self, tmp_path):
+        wf = self._wf()
+        runner = WorkflowRunner(
+            wf, variables={"items": []}, cwd=str(tmp_path), registry={wf.name: wf},
+        )
+        runner.start()
+        assert "run_cache" not in runner.get_status()
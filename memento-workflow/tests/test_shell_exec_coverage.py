@@ -97,7 +97,7 @@ class TestShellExecStructured:
 class TestShellExecOSError:
     def test_os_error_returns_failure(self, tmp_path):
         """OSError during subprocess execution returns failure."""
-        with patch("subprocess.run", side_effect=OSError("No such file")):
+        with patch("subprocess.Popen", side_effect=OSError("No such file")):
             result = _execute_shell("nonexistent", str(tmp_path))
             assert result.status == "failure"
             assert "No such file" in result.error
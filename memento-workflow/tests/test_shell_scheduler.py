@@ -0,0 +1,172 @@
+"""Tests for the process-wide shell scheduler (infra/scheduler.py).
+
+Covers the global slot bound, fair share between run trees, priority
+classes, cancellation while queued, and the runner routing every shell
+command through SCHEDULER (queue timing, status, start(priority=)).
+"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from conftest import _types_ns, create_runner_ns
+
+# Types
+ShellStep = _types_ns["ShellStep"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+_ns = create_runner_ns()
+WorkflowRunner = _ns["WorkflowRunner"]
+ShellScheduler = _ns["ShellScheduler"]
+SCHEDULER = _ns["SCHEDULER"]
+
+
+def _queue(sched, tenant, priority, granted):
+    """Start a thread that acquires, records the grant, then releases.
+
+    Returns once the waiter is queued, so arrival order is deterministic.
+    """
+    before = sum(sched.stats()["queued"].values())
+
+    def run():
+        sched.acquire(tenant, priority)
+        granted.append(tenant)
+        sched.release(tenant)
+
+    t = threading.Thread(target=run)
+    t.start()
+    deadline = time.monotonic() + 2
+    while sum(sched.stats()["queued"].values()) == before and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return t
+
+
+class TestShellScheduler:
+    def test_bounds_concurrency(self):
+        sched = ShellScheduler(slots=2)
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def work():
+            sched.acquire("r")
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            sched.release("r")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert peak[0] == 2
+        assert sched.stats() == {"slots": 2, "running": 0, "queued": {"interactive": 0, "batch": 0}}
+
+    def test_fair_share_between_tenants(self):
+        sched = ShellScheduler(slots=2)
+        sched.acquire("wide")
+        sched.acquire("wide")
+        granted: list[str] = []
+        threads = [_queue(sched, "wide", "interactive", granted) for _ in range(2)]
+        threads.append(_queue(sched, "narrow", "interactive", granted))
+        sched.release("wide")
+        threads[2].join(2)
+        sched.release("wide")
+        for t in threads:
+            t.join()
+        # "narrow" arrived last but held no slot, so it got the first free one
+        assert granted == ["narrow", "wide", "wide"]
+
+    def test_interactive_before_batch(self):
+        sched = ShellScheduler(slots=1)
+        sched.acquire("holder")
+        granted: list[str] = []
+        threads = [
+            _queue(sched, "b", "batch", granted),
+            _queue(sched, "i", "interactive", granted),
+        ]
+        assert sched.stats()["queued"] == {"interactive": 1, "batch": 1}
+        sched.release("holder")
+        for t in threads:
+            t.join()
+        assert granted == ["i", "b"]
+
+    def test_cancel_while_queued(self):
+        sched = ShellScheduler(slots=1)
+        sched.acquire("holder")
+        cancel = threading.Event()
+        threading.Timer(0.05, cancel.set).start()
+        assert sched.acquire("other", cancel=cancel) is None
+        assert sched.stats("other") == {"slots": 1, "running": 1, "queued": {"interactive": 0, "batch": 0}}
+        sched.release("holder")
+        assert sched.acquire("other") is not None
+
+    def test_slots_from_env(self, monkeypatch):
+        slots_from_env = _ns["_slots_from_env"]
+        for value, expected in (("3", 3), ("-2", 1), ("", None), ("0", None), ("many", None)):
+            monkeypatch.setenv("MEMENTO_SHELL_SLOTS", value)
+            assert slots_from_env() == (expected or os.cpu_count() or 4)
+
+    def test_unknown_priority(self):
+        with pytest.raises(ValueError):
+            ShellScheduler().acquire("r", "urgent")
+
+
+class TestRunnerScheduling:
+    @pytest.fixture
+    def one_slot(self):
+        slots = SCHEDULER.slots
+        SCHEDULER.set_slots(1)
+        yield
+        SCHEDULER.set_slots(slots)
+
+    def _fanout(self, tmp_path, **kwargs):
+        wf = WorkflowDef(
+            name="fan", description="",
+            blocks=[
+                ParallelEachBlock(
+                    name="lanes", parallel_for="variables.items",
+                    template=[ShellStep(name="work", command="sleep 0.1")],
+                ),
+            ],
+        )
+        return WorkflowRunner(
+            wf, variables={"items": ["a", "b", "c"]}, cwd=str(tmp_path),
+            registry={wf.name: wf}, **kwargs,
+        )
+
+    def test_lanes_serialized_and_queue_recorded(self, tmp_path, one_slot):
+        runner = self._fanout(tmp_path)
+        t0 = time.monotonic()
+        assert runner.start().action == "completed"
+        assert time.monotonic() - t0 >= 0.3
+        queued = []
+        for cid in runner.root_state.child_run_ids:
+            work = [r for r in runner._get_run(cid).ctx.results_scoped.values() if r.name == "work"]
+            queued.append(work[0].timing["queue"])
+        assert max(queued) >= 0.15
+
+        status = runner.get_status()
+        assert status["scheduler"]["slots"] == 1
+        assert status["timing"]["run"]["queue"] == 0.0  # lanes keep their own timing
+
+    def test_priority_checkpointed(self, tmp_path):
+        runner = self._fanout(tmp_path, priority="batch")
+        runner.start()
+        state = json.loads((runner.root_state.checkpoint_dir / "state.json").read_text())
+        assert state["priority"] == "batch"
+        assert runner._shell_priority(runner._get_run(runner.root_state.child_run_ids[0])) == "batch"
+
+    def test_bad_priority(self, tmp_path):
+        with pytest.raises(ValueError):
+            self._fanout(tmp_path, priority="urgent")
+        reply = json.loads(_ns["start"]("fan", cwd=str(tmp_path), priority="urgent"))
+        assert reply["action"] == "error"
+        assert "priority" in reply["message"]
@@ -0,0 +1,197 @@
+"""Tests for batched submits (WorkflowRunner.submit_many / submit_many tool).
+
+Covers per-lane results, parent auto-submit once every lane is terminal,
+deferred checkpoint flushing (one write per affected run), invalid entries,
+and the JSON shape of the MCP tool.
+"""
+
+import json
+
+import pytest
+
+from conftest import _state_ns, _types_ns, create_runner_ns
+
+# Types
+ShellStep = _types_ns["ShellStep"]
+LLMStep = _types_ns["LLMStep"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+_ns = create_runner_ns()
+WorkflowRunner = _ns["WorkflowRunner"]
+CHECKPOINT_SECONDS = _state_ns["CHECKPOINT_SECONDS"]
+METRICS = _state_ns["METRICS"]
+
+
+def _wf(trailing=True):
+    blocks = [
+        ParallelEachBlock(
+            name="fan",
+            parallel_for="variables.items",
+            template=[LLMStep(name="review", prompt_text="Review {{variables.item}}")],
+        ),
+    ]
+    if trailing:
+        blocks.append(LLMStep(name="final", prompt_text="Summarize"))
+    return WorkflowDef(name="batch", description="", blocks=blocks)
+
+
+def _fanout(tmp_path, items=("a", "b", "c"), run_store=None, trailing=True):
+    wf = _wf(trailing)
+    runner = WorkflowRunner(
+        wf, variables={"items": list(items)}, cwd=str(tmp_path),
+        registry={wf.name: wf}, run_store=run_store,
+    )
+    action = runner.start()
+    assert action.action == "parallel"
+    lanes = [runner.next(lane.child_run_id) for lane in action.lanes]
+    return runner, action, lanes
+
+
+def _subs(lanes, **extra):
+    return [
+        {"run_id": a.run_id, "exec_key": a.exec_key, "output": f"r{i}", **extra}
+        for i, a in enumerate(lanes)
+    ]
+
+
+class TestSubmitMany:
+    def test_lanes_and_parent_in_one_call(self, tmp_path):
+        runner, action, lanes = _fanout(tmp_path)
+        results, parents = runner.submit_many(_subs(lanes))
+        assert [r.action for r in results] == ["completed"] * 3
+        assert len(parents) == 1
+        assert parents[0].action == "prompt"
+        assert parents[0].exec_key == "final"
+
+        root = runner.root_state
+        merged = root.ctx.results_scoped["fan"]
+        assert merged.structured_output == ["r0", "r1", "r2"]
+
+    def test_matches_sequential_submits(self, tmp_path):
+        seq, action, lanes = _fanout(tmp_path / "seq")
+        for a in lanes:
+            seq.submit(a.run_id, a.exec_key, output="ok")
+        seq_next = seq.submit(action.run_id, action.exec_key, output="lanes")
+
+        batch, _, lanes = _fanout(tmp_path / "batch")
+        _, parents = batch.submit_many(_subs(lanes, output="ok"))
+        assert parents[0].exec_key == seq_next.exec_key
+        assert (
+            batch.root_state.ctx.results_scoped["fan"].structured_output
+            == seq.root_state.ctx.results_scoped["fan"].structured_output
+        )
+
+    def test_partial_batch_leaves_parent_pending(self, tmp_path):
+        runner, action, lanes = _fanout(tmp_path)
+        results, parents = runner.submit_many(_subs(lanes[:2]))
+        assert [r.action for r in results] == ["completed"] * 2
+        assert parents == []
+        assert runner.root_state.pending_exec_key == action.exec_key
+
+        _, parents = runner.submit_many(_subs(lanes[2:]))
+        assert [p.action for p in parents] == ["prompt"]
+
+    def test_parent_submitted_in_batch_not_resubmitted(self, tmp_path):
+        runner, action, lanes = _fanout(tmp_path)
+        subs = _subs(lanes) + [
+            {"run_id": action.run_id, "exec_key": action.exec_key, "output": "lanes"},
+        ]
+        results, parents = runner.submit_many(subs)
+        assert results[-1].action == "prompt"
+        assert parents == []
+
+    def test_advance_parents_off(self, tmp_path):
+        runner, action, lanes = _fanout(tmp_path)
+        _, parents = runner.submit_many(_subs(lanes), advance_parents=False)
+        assert parents == []
+        assert runner.root_state.pending_exec_key == action.exec_key
+
+    def test_failed_step_still_completes_lane(self, tmp_path):
+        runner, _, lanes = _fanout(tmp_path, trailing=False)
+        subs = _subs(lanes)
+        subs[1].update(status="failure", error="boom")
+        results, parents = runner.submit_many(subs)
+        assert results[1].action == "completed"
+        lane = runner._get_run(lanes[1].run_id)
+        assert lane.ctx.results_scoped[lanes[1].exec_key].status == "failure"
+        assert [p.action for p in parents] == ["completed"]
+
+    def test_errored_lane_submits_parent_as_failure(self, tmp_path):
+        runner, _, lanes = _fanout(tmp_path, trailing=False)
+        runner._get_run(lanes[0].run_id).status = "error"
+        _, parents = runner.submit_many(_subs(lanes)[1:])
+        assert len(parents) == 1
+        assert runner.root_state.ctx.results_scoped["fan"].status == "failure"
+
+    def test_invalid_entries_reported_in_place(self, tmp_path):
+        runner, _, lanes = _fanout(tmp_path)
+        subs = [
+            {"run_id": lanes[0].run_id},
+            {**_subs(lanes)[1], "bogus": 1},
+            _subs(lanes)[2],
+        ]
+        results, parents = runner.submit_many(subs)
+        assert results[0].action == "error"
+        assert "required" in results[0].message
+        assert results[1].action == "error"
+        assert "bogus" in results[1].message
+        assert results[2].action == "completed"
+        assert parents == []
+
+    def test_one_checkpoint_flush_per_run(self, tmp_path):
+        METRICS.reset()
+        runner, _, lanes = _fanout(tmp_path, items=[str(i) for i in range(6)])
+        before = CHECKPOINT_SECONDS.count()
+        _, parents = runner.submit_many(_subs(lanes))
+        assert parents[0].action == "prompt"
+        # six lanes + the parent, each flushed once
+        assert CHECKPOINT_SECONDS.count() - before == 7
+        for lane in lanes:
+            state = json.loads(
+                (runner._get_run(lane.run_id).checkpoint_dir / "state.json").read_text()
+            )
+            assert state["status"] == "completed"
+
+    def test_deferred_flush_covers_shell_steps(self, tmp_path):
+        wf = WorkflowDef(
+            name="batch-shell",
+            description="",
+            blocks=[
+                ParallelEachBlock(
+                    name="fan",
+                    parallel_for="variables.items",
+                    template=[
+                        LLMStep(name="review", prompt_text="Review {{variables.item}}"),
+                        ShellStep(name="a", command="echo a"),
+                        ShellStep(name="b", command="echo b"),
+                    ],
+                ),
+            ],
+        )
+        METRICS.reset()
+        runner = WorkflowRunner(
+            wf, variables={"items": ["x", "y"]}, cwd=str(tmp_path), registry={wf.name: wf},
+        )
+        action = runner.start()
+        lanes = [runner.next(lane.child_run_id) for lane in action.lanes]
+        before = CHECKPOINT_SECONDS.count()
+        _, parents = runner.submit_many(_subs(lanes))
+        assert parents[0].action == "completed"
+        assert CHECKPOINT_SECONDS.count() - before == 3
+        assert runner._deferred is None
+
+
+class TestSubmitManyTool:
+    @pytest.fixture(autouse=True)
+    def _clean_runs(self):
+        _ns["_runs"].clear()
+        yield
+        _ns["_runs"].clear()
+
+    def test_tool_returns_results_and_parents(self, tmp_path):
+        _, action, lanes = _fanout(tmp_path, run_store=_ns["_runs"])
+        reply = json.loads(_ns["submit_many"](_subs(lanes)))
+        assert [r["action"] for r in reply["results"]] == ["completed"] * 3
+        assert [p["action"] for p in reply["parents"]] == ["prompt"]
+        assert reply["parents"][0]["run_id"] == action.run_id
@@ -0,0 +1,122 @@
+"""Tests for per-step time accounting.
+
+Covers compute_timing() aggregation, and the runner splitting time into
+engine CPU, shell execution, sandbox setup and relay wait — surfaced in
+StepResult, get_status() and meta.json.
+"""
+
+import json
+import time
+
+from conftest import _state_ns, _types_ns, create_runner_ns
+
+# Types
+ShellStep = _types_ns["ShellStep"]
+LLMStep = _types_ns["LLMStep"]
+StepResult = _types_ns["StepResult"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+# Engine
+compute_timing = _state_ns["compute_timing"]
+TIMING_KEYS = _state_ns["TIMING_KEYS"]
+
+WorkflowRunner = create_runner_ns()["WorkflowRunner"]
+
+
+def _result(name, timing):
+    return StepResult(name=name, exec_key=name, results_key=name, timing=timing)
+
+
+def _workflow():
+    return WorkflowDef(
+        name="timed",
+        description="",
+        blocks=[
+            ShellStep(name="setup", command="echo hi"),
+            LLMStep(name="ask", prompt_text="Hello"),
+        ],
+    )
+
+
+# ---------------------------------------------------------------------------
+# compute_timing
+# ---------------------------------------------------------------------------
+
+
+class TestComputeTiming:
+    def test_empty(self):
+        timing = compute_timing({})
+        assert timing["run"] == dict.fromkeys(TIMING_KEYS, 0.0)
+        assert timing["blocks"] == {}
+
+    def test_sums_per_block_and_run(self):
+        results = {
+            "a[i=0]": _result("a", {"shell": 1.0, "sandbox": 0.1}),
+            "a[i=1]": _result("a", {"shell": 2.0, "sandbox": 0.2}),
+            "b": _result("b", {"relay_wait": 5.0, "engine_cpu": 0.01}),
+            "c": _result("c", None),
+        }
+        timing = compute_timing(results)
+        assert timing["run"] == {
+            "engine_cpu": 0.01, "shell": 3.0, "sandbox": 0.3, "relay_wait": 5.0,
+            "backoff": 0.0, "queue": 0.0,
+        }
+        assert timing["blocks"]["a"]["count"] == 2
+        assert timing["blocks"]["a"]["shell"] == 3.0
+        assert "c" not in timing["blocks"]
+
+    def test_run_engine_cpu_overrides_step_sum(self):
+        results = {"b": _result("b", {"engine_cpu": 0.01})}
+        timing = compute_timing(results, {"engine_cpu": 0.5})
+        assert timing["run"]["engine_cpu"] == 0.5
+        assert timing["blocks"]["b"]["engine_cpu"] == 0.01
+
+
+# ---------------------------------------------------------------------------
+# WorkflowRunner integration
+# ---------------------------------------------------------------------------
+
+
+class TestRunnerTiming:
+    def _run(self, tmp_path, wait=0.0):
+        wf = _workflow()
+        runner = WorkflowRunner(wf, variables={}, cwd=str(tmp_path), registry={wf.name: wf})
+        action = runner.start()
+        assert action.action == "prompt"
+        time.sleep(wait)
+        final = runner.submit(action.run_id, action.exec_key, output="ok")
+        assert final.action == "completed"
+        return runner
+
+    def test_shell_step_split(self, tmp_path):
+        runner = self._run(tmp_path)
+        setup = runner.root_state.ctx.results_scoped["setup"]
+        assert set(setup.timing) >= {"shell", "sandbox"}
+        assert setup.timing["shell"] > 0
+        assert "relay_wait" not in setup.timing
+
+    def test_relay_step_wait_and_timestamps(self, tmp_path):
+        runner = self._run(tmp_path, wait=0.05)
+        ask = runner.root_state.ctx.results_scoped["ask"]
+        assert ask.timing["relay_wait"] >= 0.05
+        assert "engine_cpu" in ask.timing
+        assert ask.issued_at and ask.submitted_at
+        assert ask.issued_at <= ask.submitted_at
+
+    def test_status_and_meta(self, tmp_path):
+        runner = self._run(tmp_path, wait=0.01)
+        status = runner.get_status()
+        run = status["timing"]["run"]
+        assert set(run) == set(TIMING_KEYS)
+        assert run["engine_cpu"] > 0
+        assert run["relay_wait"] >= 0.01
+        assert set(status["timing"]["blocks"]) == {"setup", "ask"}
+
+        meta = json.loads((runner.root_state.checkpoint_dir / "meta.json").read_text())
+        assert meta["timing"]["run"]["relay_wait"] == run["relay_wait"]
+
+    def test_timing_survives_checkpoint(self, tmp_path):
+        runner = self._run(tmp_path)
+        state = json.loads((runner.root_state.checkpoint_dir / "state.json").read_text())
+        assert state["timing"]["engine_cpu"] > 0
+        assert state["ctx"]["results_scoped"]["ask"]["timing"]["relay_wait"] >= 0
@@ -0,0 +1,177 @@
+"""Tests for the opt-in step tracer (engine/tracing.py).
+
+Covers Tracer span bookkeeping as an AdvanceHook, and end-to-end trace.json
+output from WorkflowRunner: block, shell, checkpoint, substitution and
+relay-wait spans with one track per parallel lane.
+"""
+
+import json
+
+from conftest import _state_ns, _types_ns, create_runner_ns
+
+# Types
+ShellStep = _types_ns["ShellStep"]
+GroupBlock = _types_ns["GroupBlock"]
+LoopBlock = _types_ns["LoopBlock"]
+LLMStep = _types_ns["LLMStep"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+WorkflowDef = _types_ns["WorkflowDef"]
+WorkflowContext = _types_ns["WorkflowContext"]
+
+# Engine
+Frame = _state_ns["Frame"]
+RunState = _state_ns["RunState"]
+Tracer = _state_ns["Tracer"]
+trace_span = _state_ns["trace_span"]
+TRACE_FILE = _state_ns["TRACE_FILE"]
+
+WorkflowRunner = create_runner_ns()["WorkflowRunner"]
+
+
+def _state(run_id="r1"):
+    wf = WorkflowDef(name="wf", description="")
+    return RunState(
+        run_id=run_id,
+        ctx=WorkflowContext(),
+        stack=[Frame(block=wf)],
+        registry={},
+        workflow_name="wf",
+    )
+
+
+def _spans(doc, cat=None):
+    return [
+        e for e in doc["traceEvents"]
+        if e["ph"] == "X" and (cat is None or e["cat"] == cat)
+    ]
+
+
+def _drive(runner, action):
+    while action.action not in ("completed", "error", "halted"):
+        if action.action == "parallel":
+            for lane in action.lanes:
+                lane_action = runner.next(lane.child_run_id)
+                while lane_action.action != "completed":
+                    lane_action = runner.submit(
+                        lane_action.run_id, lane_action.exec_key, output="ok",
+                    )
+            action = runner.submit(action.run_id, action.exec_key, output="lanes")
+        else:
+            action = runner.submit(action.run_id, action.exec_key, output="ok")
+    return action
+
+
+# ---------------------------------------------------------------------------
+# Tracer as AdvanceHook
+# ---------------------------------------------------------------------------
+
+
+class TestTracerSpans:
+    def test_trace_span_noop_without_tracer(self):
+        state = _state()
+        with trace_span(state, "x", "shell"):
+            pass
+        assert state._tracer is None
+
+    def test_leaf_closed_by_next_enter(self):
+        tracer = Tracer("wf")
+        state = _state()
+        a, b = LLMStep(name="a", prompt_text="a"), LLMStep(name="b", prompt_text="b")
+        tracer.on_block_enter(state, a, "a")
+        tracer.on_block_enter(state, b, "b")
+        names = [e["name"] for e in _spans(tracer.to_dict())]
+        assert names == ["a"]
+        tracer.close_run(state.run_id)
+        assert [e["name"] for e in _spans(tracer.to_dict())] == ["a", "b"]
+
+    def test_container_closed_on_exit(self):
+        tracer = Tracer("wf")
+        state = _state()
+        group = GroupBlock(name="g", blocks=[])
+        empty_loop = LoopBlock(name="l", loop_over="variables.none", loop_var="x")
+        tracer.on_block_enter(state, group, "g")
+        tracer.on_block_enter(state, empty_loop, "l")  # never pushes a frame
+        tracer.on_block_exit(state, group)
+        spans = _spans(tracer.to_dict())
+        assert [(e["name"], e["cat"]) for e in spans] == [("g", "group")]
+
+    def test_exit_without_enter_ignored(self):
+        tracer = Tracer("wf")
+        state = _state()
+        tracer.on_block_exit(state, GroupBlock(name="lane", blocks=[]))
+        assert _spans(tracer.to_dict()) == []
+
+    def test_one_track_per_run(self):
+        tracer = Tracer("wf")
+        root, lane = _state("r1"), _state("r1>abc")
+        lane.parallel_block_name = "fan"
+        lane.lane_index = 2
+        assert tracer.track(root) == 1
+        assert tracer.track(lane) == 2
+        assert tracer.track(root) == 1
+        names = {
+            e["args"]["name"] for e in tracer.to_dict()["traceEvents"]
+            if e["name"] == "thread_name"
+        }
+        assert names == {"wf (root)", "fan[2]"}
+
+
+# ---------------------------------------------------------------------------
+# WorkflowRunner integration
+# ---------------------------------------------------------------------------
+
+
+class TestRunnerTrace:
+    def _workflow(self):
+        return WorkflowDef(
+            name="traced",
+            description="",
+            blocks=[
+                ShellStep(name="setup", command="echo hi"),
+                LLMStep(name="ask", prompt_text="Hello {{variables.who}}"),
+                ParallelEachBlock(
+                    name="fan",
+                    parallel_for="variables.items",
+                    template=[LLMStep(name="review", prompt_text="Review {{variables.item}}")],
+                ),
+            ],
+        )
+
+    def test_trace_written_next_to_meta(self, tmp_path):
+        wf = self._workflow()
+        runner = WorkflowRunner(
+            wf, variables={"who": "you", "items": ["a", "b"]}, cwd=str(tmp_path),
+            registry={wf.name: wf}, trace=True,
+        )
+        final = _drive(runner, runner.start())
+        assert final.action == "completed"
+
+        chk = runner.root_state.checkpoint_dir
+        assert (chk / "meta.json").is_file()
+        doc = json.loads((chk / TRACE_FILE).read_text())
+
+        cats = {e["cat"] for e in _spans(doc)}
+        assert {"shell", "checkpoint", "substitute", "relay", "llm_step", "parallel_each"} <= cats
+        assert any(e["name"] == "shell setup" for e in _spans(doc, "shell"))
+        assert {e["name"] for e in _spans(doc, "relay")} >= {
+            "relay-wait ask", "relay-wait fan",
+        }
+
+        tracks = {
+            e["args"]["name"]: e["tid"] for e in doc["traceEvents"]
+            if e["name"] == "thread_name"
+        }
+        assert {"traced (root)", "fan[0]", "fan[1]"} <= set(tracks)
+        lane_tids = {tracks["fan[0]"], tracks["fan[1]"]}
+        lane_reviews = [e for e in _spans(doc, "llm_step") if e["tid"] in lane_tids]
+        assert len(lane_reviews) == 2
+
+    def test_tracing_off_by_default(self, tmp_path):
+        wf = self._workflow()
+        runner = WorkflowRunner(
+            wf, variables={"who": "you", "items": ["a"]}, cwd=str(tmp_path),
+            registry={wf.name: wf},
+        )
+        _drive(runner, runner.start())
+        assert runner.root_state._tracer is None
+        assert not (runner.root_state.checkpoint_dir / TRACE_FILE).exists()
@@ -0,0 +1,160 @@
+"""Tests for the long-poll wait (WorkflowRunner.wait / wait tool).
+
+Covers immediate returns when the condition already holds, wake-ups from
+submits made on other threads (no polling), the any/all/exec_key modes,
+timeouts, and the async MCP tool staying off the event loop.
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from conftest import _types_ns, create_runner_ns
+
+# Types
+LLMStep = _types_ns["LLMStep"]
+ParallelEachBlock = _types_ns["ParallelEachBlock"]
+WorkflowDef = _types_ns["WorkflowDef"]
+
+_ns = create_runner_ns()
+WorkflowRunner = _ns["WorkflowRunner"]
+
+
+def _fanout(tmp_path, items=("a", "b"), run_store=None):
+    wf = WorkflowDef(
+        name="waiter",
+        description="",
+        blocks=[
+            ParallelEachBlock(
+                name="fan",
+                parallel_for="variables.items",
+                template=[LLMStep(name="review", prompt_text="Review {{variables.item}}")],
+            ),
+            LLMStep(name="final", prompt_text="Summarize"),
+        ],
+    )
+    runner = WorkflowRunner(
+        wf, variables={"items": list(items)}, cwd=str(tmp_path),
+        registry={wf.name: wf}, run_store=run_store,
+    )
+    action = runner.start()
+    assert action.action == "parallel"
+    lanes = [runner.next(lane.child_run_id) for lane in action.lanes]
+    return runner, action, lanes
+
+
+def _later(fn, delay=0.05):
+    t = threading.Timer(delay, fn)
+    t.start()
+    return t
+
+
+class TestWait:
+    def test_all_wakes_when_last_lane_completes(self, tmp_path):
+        runner, action, lanes = _fanout(tmp_path)
+        runner.submit(lanes[0].run_id, lanes[0].exec_key, output="a")
+        timer = _later(lambda: runner.submit(lanes[1].run_id, lanes[1].exec_key, output="b"))
+        t0 = time.monotonic()
+        result = runner.wait(action.run_id, timeout=5)
+        timer.join()
+        assert time.monotonic() - t0 < 2
+        assert result.action == "parallel"
+        assert result.exec_key == action.exec_key
+        assert not result.warnings
+
+    def test_all_returns_immediately_when_done(self, tmp_path):
+        runner, action, lanes = _fanout(tmp_path)
+        for lane in lanes:
+            runner.submit(lane.run_id, lane.exec_key, output="ok")
+        assert runner.wait(action.run_id, timeout=0).exec_key == action.exec_key
+
+    def test_any_returns_changed_child(self, tmp_path):
+        runner, action, lanes = _fanout(tmp_path)
+        timer = _later(lambda: runner.submit(lanes[1].run_id, lanes[1].exec_key, output="b"))
+        result = runner.wait(action.run_id, until="any", timeout=5)
+        timer.join()
+        assert result.action == "completed"
+        assert result.run_id == lanes[1].run_id
+
+    def test_exec_key_change(self, tmp_path):
+        runner, action, lanes = _fanout(tmp_path)
+        for lane in lanes:
+            runner.submit(lane.run_id, lane.exec_key, output="ok")
+        timer = _later(lambda: runner.submit(action.run_id, action.exec_key, output="lanes"))
+        result = runner.wait(action.run_id, exec_key=action.exec_key, timeout=5)
+        timer.join()
+        assert result.action == "prompt"
+        assert result.exec_key == "final"
+
+    def test_timeout_returns_pending_with_warning(self, tmp_path):
+        runner, action, _ = _fanout(tmp_path)
+        t0 = time.monotonic()
+        result = runner.wait(action.run_id, timeout=0.1)
+        assert time.monotonic() - t0 >= 0.1
+        assert result.exec_key == action.exec_key
+        assert any("timed out" in w for w in result.warnings)
+
+    def test_nothing_to_wait_on(self, tmp_path):
+        runner, action, lanes = _fanout(tmp_path)
+        for lane in lanes:
+            runner.submit(lane.run_id, lane.exec_key, output="ok")
+        runner.submit(action.run_id, action.exec_key, output="lanes")
+        assert runner.wait(action.run_id, timeout=5).exec_key == "final"
+
+    def test_checks_run_without_the_wake_lock(self, tmp_path, monkeypatch):
+        runner, action, lanes = _fanout(tmp_path)
+        cond = _ns["_RUNS_CHANGED"]
+        free = []
+        check = WorkflowRunner._wait_ready
+
+        def probe():
+            free.append(cond.acquire(timeout=2))
+            if free[-1]:
+                cond.release()
+
+        def spy(self, *args):
+            t = threading.Thread(target=probe)
+            t.start()
+            t.join()
+            return check(self, *args)
+
+        monkeypatch.setattr(WorkflowRunner, "_wait_ready", spy)
+        timer = _later(lambda: [
+            runner.submit(lane.run_id, lane.exec_key, output="ok") for lane in lanes
+        ])
+        result = runner.wait(action.run_id, timeout=5)
+        timer.join()
+        assert result.exec_key == action.exec_key
+        assert free and all(free)
+
+    def test_unknown_run_and_bad_mode(self, tmp_path):
+        runner, action, _ = _fanout(tmp_path)
+        assert runner.wait("nope", timeout=0).action == "error"
+        assert runner.wait(action.run_id, until="some", timeout=0).action == "error"
+
+
+class TestWaitTool:
+    @pytest.fixture(autouse=True)
+    def _clean_runs(self):
+        _ns["_runs"].clear()
+        yield
+        _ns["_runs"].clear()
+
+    def test_tool_does_not_block_concurrent_submits(self, tmp_path):
+        _, action, lanes = _fanout(tmp_path, run_store=_ns["_runs"])
+
+        async def scenario():
+            waiter = asyncio.create_task(_ns["wait"](action.run_id, timeout=5))
+            await asyncio.sleep(0.05)
+            for lane in lanes:
+                # Sync tools run on the event loop, as under FastMCP
+                _ns["submit"](lane.run_id, lane.exec_key, output="ok")
+            return json.loads(await asyncio.wait_for(waiter, 3))
+
+        reply = asyncio.run(scenario())
+        assert reply["action"] == "parallel"
+        assert reply["exec_key"] == action.exec_key
+        assert "warnings" not in reply or not reply["warnings"]
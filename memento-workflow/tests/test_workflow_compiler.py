@@ -396,6 +396,50 @@ class TestBlockCompilation:
         ctx.results["flaky-cmd"] = StepResult(name="flaky-cmd", status="success")
         assert block.until(ctx) is True
 
+    def test_retry_policy_fields(self):
+        block = compile_block(
+            {"retry": "r", "until": 'results.cmd.status == "success"',
+             "backoff": 0.5, "backoff_factor": 3, "max_backoff": 10, "jitter": 0.2,
+             "attempt_timeout": 30, "hedge_after": "p90",
+             "blocks": [{"shell": "cmd", "command": "echo"}]},
+            FIXTURES_DIR, self._modules(),
+        )
+        assert (block.backoff, block.backoff_factor, block.max_backoff) == (0.5, 3, 10)
+        assert block.jitter == 0.2
+        assert block.attempt_timeout == 30
+        assert block.hedge_after == "p90"
+
+    @pytest.mark.parametrize("hedge, body", [
+        ("fast", [{"shell": "cmd", "command": "echo"}]),
+        (2, [{"shell": "a", "command": "echo"}, {"shell": "b", "command": "echo"}]),
+    ])
+    def test_retry_bad_hedge(self, hedge, body):
+        with pytest.raises(ValueError, match="hedge_after"):
+            compile_block(
+                {"retry": "r", "until": 'results.a.status == "success"',
+                 "hedge_after": hedge, "blocks": body},
+                FIXTURES_DIR, self._modules(),
+            )
+
+    def test_budget(self):
+        block = compile_block(
+            {"loop": "l", "over": "variables.xs", "as": "x", "budget": 90,
+             "blocks": [{"shell": "cmd", "command": "echo"}]},
+            FIXTURES_DIR, self._modules(),
+        )
+        assert block.budget == 90.0
+        with pytest.raises(ValueError, match="Group block 'g': budget must be a positive"):
+            compile_block({"group": "g", "budget": 0, "blocks": []}, FIXTURES_DIR, self._modules())
+
+    def test_loop_retain(self):
+        loop = {"loop": "l", "over": "variables.xs", "as": "x", "blocks": []}
+        assert compile_block(loop, FIXTURES_DIR, self._modules()).retain == "all"
+        block = compile_block({**loop, "retain": "last:3"}, FIXTURES_DIR, self._modules())
+        assert block.retain == "last:3"
+        for bad in ("last:0", "first:2", "some"):
+            with pytest.raises(ValueError, match="Loop block 'l': retain must be"):
+                compile_block({**loop, "retain": bad}, FIXTURES_DIR, self._modules())
+
     def test_retry_missing_until(self):
         with pytest.raises(ValueError, match="must specify 'until' or 'until_fn'"):
             compile_block(
@@ -440,6 +484,84 @@ class TestBlockCompilation:
         assert block.parallel_for == "results.items"
         assert block.item_var == "item"
         assert block.max_concurrency == 4
+        assert block.on_failure == "continue"
+
+    def test_parallel_block_on_failure(self):
+        block = compile_block(
+            {"parallel": "checks", "for": "results.items", "on_failure": "cancel",
+             "template": [{"shell": "check", "command": "true"}]},
+            FIXTURES_DIR, self._modules(),
+        )
+        assert block.on_failure == "cancel"
+
+    def test_parallel_block_reduce(self):
+        block = compile_block(
+            {"parallel": "checks", "for": "results.items", "reduce": "top_k:3:score",
+             "result_var": "best", "template": [{"shell": "check", "command": "true"}]},
+            FIXTURES_DIR, self._modules(),
+        )
+        assert block.reduce == "top_k:3:score"
+        assert block.result_var == "best"
+
+        block = compile_block(
+            {"parallel": "checks", "for": "results.items", "reduce_fn": "conditions.is_thorough",
+             "template": [{"shell": "check", "command": "true"}]},
+            FIXTURES_DIR, self._modules(),
+        )
+        assert callable(block.reduce)
+
+        with pytest.raises(ValueError, match="both"):
+            compile_block(
+                {"parallel": "checks", "for": "results.items", "reduce": "count",
+                 "reduce_fn": "conditions.is_thorough", "template": []},
+                FIXTURES_DIR, self._modules(),
+            )
+
+    def test_parallel_block_adaptive(self):
+        block = compile_block(
+            {"parallel": "checks", "for": "results.items", "concurrency": "adaptive",
+             "min_concurrency": 2, "max_concurrency": 8,
+             "template": [{"shell": "check", "command": "true"}]},
+            FIXTURES_DIR, self._modules(),
+        )
+        assert block.concurrency == "adaptive"
+        assert (block.min_concurrency, block.max_concurrency) == (2, 8)
+
+        with pytest.raises(ValueError, match="concurrency must be"):
+            compile_block(
+                {"parallel": "checks", "for": "results.items", "concurrency": "auto",
+                 "template": []},
+                FIXTURES_DIR, self._modules(),
+            )
+        with pytest.raises(ValueError, match="min_concurrency"):
+            compile_block(
+                {"parallel": "checks", "for": "results.items", "concurrency": "adaptive",
+                 "min_concurrency": 4, "max_concurrency": 2, "template": []},
+                FIXTURES_DIR, self._modules(),
+            )
+
+    def test_parallel_block_order(self):
+        block = compile_block(
+            {"parallel": "checks", "for": "results.items", "order": "longest_first",
+             "cost": "stats.lines", "template": [{"shell": "check", "command": "true"}]},
+            FIXTURES_DIR, self._modules(),
+        )
+        assert block.order == "longest_first"
+        assert block.cost == "stats.lines"
+
+        block = compile_block(
+            {"parallel": "checks", "for": "results.items", "order": "longest_first",
+             "cost_fn": "conditions.is_thorough", "template": []},
+            FIXTURES_DIR, self._modules(),
+        )
+        assert callable(block.cost)
+
+        with pytest.raises(ValueError, match="order must be"):
+            compile_block(
+                {"parallel": "checks", "for": "results.items", "order": "random",
+                 "template": []},
+                FIXTURES_DIR, self._modules(),
+            )
 
     def test_blockbase_fields(self):
         block = compile_block(
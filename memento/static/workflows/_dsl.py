@@ -25,6 +25,7 @@ if TYPE_CHECKING:
         variables: dict[str, Any]
         results: dict[str, Any]
         results_scoped: dict[str, Any]
+        retired: dict[str, Any]
         cwd: str
         dry_run: bool
         prompt_dir: str
@@ -80,7 +81,7 @@ if TYPE_CHECKING:
         def __init__(
             self, *, name: str,
             loop_over: str, loop_var: str,
-            blocks: list[Any] = ...,
+            blocks: list[Any] = ..., budget: float | None = ..., retain: str = ...,
             condition: Callable[[WorkflowContext], bool] | None = ...,
             isolation: Literal["inline", "subagent"] = ...,
             context_hint: str = ..., halt: str = ...,
@@ -95,6 +96,10 @@ if TYPE_CHECKING:
             max_attempts: int = ...,
             blocks: list[Any] = ...,
             halt_on_exhaustion: str = ...,
+            backoff: float = ..., backoff_factor: float = ...,
+            max_backoff: float = ..., jitter: float = ...,
+            attempt_timeout: float | None = ..., budget: float | None = ...,
+            hedge_after: float | str | None = ...,
             condition: Callable[[WorkflowContext], bool] | None = ...,
             isolation: Literal["inline", "subagent"] = ...,
             context_hint: str = ..., halt: str = ...,
@@ -106,6 +111,7 @@ if TYPE_CHECKING:
         def __init__(
             self, *, name: str,
             blocks: list[Any] = ..., model: str | None = ...,
+            budget: float | None = ...,
             condition: Callable[[WorkflowContext], bool] | None = ...,
             isolation: Literal["inline", "subagent"] = ...,
             context_hint: str = ..., halt: str = ...,
@@ -118,7 +124,14 @@ if TYPE_CHECKING:
             self, *, name: str,
             parallel_for: str, template: list[Any] = ...,
             item_var: str = ..., max_concurrency: int | None = ...,
+            concurrency: Literal["fixed", "adaptive"] = ...,
+            min_concurrency: int = ...,
+            order: Literal["items", "longest_first"] = ...,
+            cost: str | Callable[[Any], float] | None = ...,
             model: str | None = ...,
+            on_failure: Literal["continue", "cancel"] = ...,
+            reduce: str | Callable[[Any, Any], Any] | None = ...,
+            result_var: str = ..., budget: float | None = ...,
             condition: Callable[[WorkflowContext], bool] | None = ...,
             isolation: Literal["inline", "subagent"] = ...,
             context_hint: str = ..., halt: str = ...,